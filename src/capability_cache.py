@@ -0,0 +1,114 @@
+"""On-disk cache of what this machine's ffmpeg and GPU can do, kept across
+launches.
+
+Every launch used to re-run the same handful of capability probes: a Vulkan/
+libplacebo test encode (up to _GPU_PROBE_TIMEOUT), the CUDA interop one,
+`ffmpeg -encoders`, nvidia-smi. Their answers only change when ffmpeg or the
+GPU driver does, so this store keeps them in one small JSON file under
+platform_utils.cache_dir() and a launch after the first spawns none of them.
+
+The whole store is valid for one *identity*, a string the caller builds from
+whatever the answers depend on -- utils uses the ffmpeg/ffprobe binaries'
+path, size and mtime plus the GPU driver files' (see
+platform_utils.gpu_driver_identity). A different identity starts an empty
+store. Each entry also expires after a TTL, so a GPU swapped in without a
+driver update is noticed within days; clear() is the explicit re-probe.
+
+Standard library only, no tkinter, no utils.py -- the path and identity are
+passed in, so tests point a store at a temporary file.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+_STORE_VERSION = 1
+
+# How long an answer is trusted. Long enough that a daily user never waits on
+# a probe, short enough that hardware changed under an unchanged driver is
+# picked up without anyone knowing to ask for a re-probe.
+_TTL = 7 * 24 * 3600.0
+
+# get()'s answer for "nothing usable stored", distinct from any stored value.
+MISSING = object()
+
+
+class CapabilityStore:
+    """Named capability answers for one identity, each with a TTL.
+
+    Writes go straight to disk: there are a handful of entries, each written
+    once per identity, so there is nothing to batch."""
+
+    def __init__(self, path: str, identity: 'str | None', ttl: float = _TTL) -> None:
+        self.path = path
+        self._identity = identity
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: 'dict[str, dict[str, Any]] | None' = None
+
+    def _load(self) -> 'dict[str, dict[str, Any]]':
+        """The entries, read from disk on first use. Runs under _lock. An
+        unreadable file, or one for another identity, starts empty."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('version') == _STORE_VERSION
+                    and data.get('identity') == self._identity):
+                self._entries = dict(data['entries'])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning("Ignoring unreadable capability cache %s: %s", self.path, e)
+        return self._entries
+
+    def get(self, name: str) -> Any:
+        """The stored answer for *name*, or MISSING when there is none, it has
+        expired, or nothing can be validated (no identity)."""
+        if self._identity is None:
+            return MISSING
+        with self._lock:
+            entry = self._load().get(name)
+        if not isinstance(entry, dict) or 'value' not in entry:
+            return MISSING
+        if not 0 <= time.time() - entry.get('at', 0.0) <= self._ttl:
+            return MISSING
+        return entry['value']
+
+    def put(self, name: str, value: Any) -> None:
+        """Store *value* (JSON-serializable) as the answer for *name*."""
+        if self._identity is None:
+            return
+        with self._lock:
+            self._load()[name] = {'value': value, 'at': time.time()}
+            self._save()
+
+    def clear(self) -> None:
+        """Forget every answer, so each capability is probed again."""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def _save(self) -> None:
+        """Temp file then replace, as probe_cache.ProbeStore.save does. Runs
+        under _lock. A store that can't be written costs the next launch its
+        head start, nothing more."""
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': _STORE_VERSION, 'identity': self._identity,
+                           'entries': self._entries}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning("Could not save capability cache: %s", e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,144 @@
+"""On-disk checkpoints for resumable (segmented) conversions.
+
+A resumable conversion encodes into keyframe-aligned segment files in a work
+directory beside the output (see ConversionManager._segment_plan), and records
+each finished segment here. Run the same request again after a cancel or a
+crash and only the segments missing from the manifest are encoded before the
+final mux -- hours of finished work on a long source are kept instead of
+thrown away.
+
+The work directory's name is derived from everything that decides the
+segments' bytes: the encode settings and the source file's identity (path,
+size, mtime). Change any of those and the name changes with it, so stale
+segments from a different encode can never be stitched into this one -- they
+are simply never looked at. A GPU->CPU retry is such a change: segments from
+two different encoders can't share one stream, so the retry starts its own
+checkpoint set.
+
+Standard library only, no tkinter, no conversion.py.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+MANIFEST_NAME = 'manifest.json'
+_MANIFEST_VERSION = 1
+
+
+def request_key(settings: 'dict[str, Any]', input_path: str) -> 'str | None':
+    """A stable fingerprint of *settings* plus the input file's identity, or
+    None if the input can't be stat()ed (then there is nothing to resume).
+
+    mtime_ns and size stand in for the file's content: re-hashing a
+    50 GB source to check for a resume would cost more than most resumes save.
+    """
+    try:
+        st = os.stat(input_path)
+    except OSError:
+        return None
+    payload = json.dumps({
+        'settings': settings,
+        'input': [os.path.normcase(os.path.abspath(input_path)),
+                  st.st_size, st.st_mtime_ns],
+        'version': _MANIFEST_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def checkpoint_dir(output_path: str, key: str) -> str:
+    """Where a resumable conversion keeps its segments: beside the output (same
+    volume, so the final mux is never a cross-drive copy), dot-prefixed so it
+    stays out of the way while it exists."""
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)),
+                        f'.hdr2sdr-{key[:16]}')
+
+
+@dataclass
+class Manifest:
+    """The checkpoint record for one work directory.
+
+    Mutable and saved after every change: the whole point is that it is
+    already on disk when the process dies. completed maps a segment index to
+    the byte size its file had when it finished, so a file truncated or
+    replaced since then is treated as missing rather than trusted.
+    """
+    work_dir: str
+    key: str
+    bounds: 'list[tuple[float, float | None]]'
+    completed: 'dict[int, int]' = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.work_dir, MANIFEST_NAME)
+
+    def is_done(self, index: int, segment_path: str) -> bool:
+        size = self.completed.get(index)
+        if size is None:
+            return False
+        try:
+            return os.path.getsize(segment_path) == size
+        except OSError:
+            return False
+
+    def mark_done(self, index: int, segment_path: str) -> None:
+        try:
+            self.completed[index] = os.path.getsize(segment_path)
+        except OSError as e:
+            # ffmpeg exited 0 but the file is gone: nothing to resume from,
+            # and the mux will report the real problem.
+            logging.warning("Segment %d has no output to checkpoint: %s", index, e)
+            return
+        self.save()
+
+    def save(self) -> None:
+        """Atomic temp-file-then-replace write (the same pattern as
+        settings.save_settings), so a crash mid-write leaves the previous
+        manifest rather than a truncated one that would discard every
+        checkpoint on the next load. Errors are logged, not raised: a failed
+        checkpoint write costs resumability, never the conversion itself."""
+        tmp = self.path + '.tmp'
+        payload = {
+            'version': _MANIFEST_VERSION,
+            'key': self.key,
+            'bounds': [list(b) for b in self.bounds],
+            'completed': {str(i): size for i, size in self.completed.items()},
+        }
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning("Could not save conversion checkpoint: %s", e)
+
+
+def load_manifest(work_dir: str, key: str) -> 'Manifest | None':
+    """The manifest in *work_dir*, or None if there is none, it can't be read,
+    or it belongs to a different key or format version."""
+    try:
+        with open(os.path.join(work_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != _MANIFEST_VERSION or data.get('key') != key:
+            return None
+        bounds = [(float(start), None if length is None else float(length))
+                  for start, length in data['bounds']]
+        completed = {int(i): int(size) for i, size in data['completed'].items()}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logging.warning("Ignoring unreadable conversion checkpoint in %s: %s",
+                            work_dir, e)
+        return None
+    return Manifest(work_dir=work_dir, key=key, bounds=bounds, completed=completed)
+
+
+def new_manifest(work_dir: str, key: str,
+                 bounds: 'list[tuple[float, float | None]]') -> Manifest:
+    """Create *work_dir* if needed and start an empty manifest there."""
+    os.makedirs(work_dir, exist_ok=True)
+    manifest = Manifest(work_dir=work_dir, key=key, bounds=list(bounds))
+    manifest.save()
+    return manifest
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import itertools
 import os
+import shutil
 import subprocess
+import tempfile
 import threading
-import re
 import logging
-from dataclasses import dataclass, replace
-from typing import Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable
 from conversion_view import ConversionView, Notice
+import checkpoints
 import ffmpeg_command
+import ffmpeg_progress
+import fused_lut
+from ffmpeg_command import OutputSpec  # re-exported: part of ConversionRequest
+import cpu_budget
 import platform_utils
-from utils import (get_video_properties, FFMPEG_EXECUTABLE,
+from utils import (get_video_properties, ffmpeg_executable, ffmpeg_filters,
                    vulkan_libplacebo_available, vulkan_cuda_interop_available,
+                   stored_capability,
+                   probe_keyframes_near, get_maxcll, get_max_luminance, detect_crop,
+                   _escape_path_for_filter,
                    _startupinfo as _utils_startupinfo)
 import platform  # noqa: F401 -- unused directly, but `import platform` (not
 # `from platform import system`) must stay so `src.conversion.platform` still
@@ -42,6 +53,86 @@ class ConversionRequest:
     bit_depth: int = 8
     licensed: bool = False
     lut_enabled: bool = True
+    # Split-and-stitch: encode keyframe-aligned segments of one long file in
+    # parallel, then concatenate them. CPU encodes only -- see
+    # ConversionManager._segment_plan.
+    split_encode: bool = False
+    # Checkpointed: encode in segments recorded in an on-disk manifest, so
+    # re-running the same request after a cancel or crash encodes only the
+    # segments still missing. See checkpoints.py.
+    resumable: bool = False
+    # Fan-out: more files from the same decode and tonemap pass, each with its
+    # own bit depth/quality/codec/size. See ffmpeg_command.build.
+    extra_outputs: tuple[OutputSpec, ...] = ()
+    # CPU tonemapping through one baked 3D LUT instead of the five-pass
+    # filter chain. See fused_lut.py for the speed/accuracy trade. BT.2390
+    # and Spline take this path on the CPU whatever it is set to.
+    fused_lut: bool = False
+    # Resize to this many lines (width follows the aspect ratio), in linear
+    # light before the tonemap, so every stage after it runs on the output's
+    # pixels. None, or a height no smaller than the source's, keeps the
+    # source size. See ffmpeg_command.output_size.
+    output_height: int | None = None
+    # Detect the source's black bars and crop them off before the tonemap,
+    # so neither it nor the encoder spends work on them. See
+    # utils.detect_crop.
+    auto_crop: bool = False
+
+    def with_overrides(self, **changes: Any) -> ConversionRequest:
+        """dataclasses.replace, as ffmpeg_command.RequestLike asks."""
+        return replace(self, **changes)
+
+
+# The request fields that decide the shared half of a fan-out -- decode plus
+# tonemap. Requests that agree on all of these (and on the input) can be one
+# ffmpeg run; everything else is per output. bit_depth isn't here: build()
+# plans the tonemap for the deepest output.
+_FAN_OUT_SHARED_FIELDS = ('gamma', 'use_gpu', 'tonemapper', 'licensed', 'lut_enabled',
+                          'auto_crop')
+
+
+def merge_fan_out(requests: list[ConversionRequest]
+                  ) -> list[tuple[ConversionRequest, list[int]]]:
+    """Group a batch's requests into fan-out runs: those with the same input
+    and tonemap settings become one request whose extra_outputs are the
+    others' outputs, so the batch decodes and tonemaps each source once
+    instead of once per deliverable.
+
+    Returns (request, indexes into *requests* it covers) in first-seen
+    order, so a queue can mark every covered item with the run's outcome.
+    Split/resumable requests are never merged: both run as segments, which
+    a fan-out can't (see ConversionManager._segment_plan), and a merge would
+    silently drop the mode the user asked for.
+    """
+    groups: dict[tuple[Any, ...], list[int]] = {}
+    runs: list[tuple[ConversionRequest, list[int]]] = []
+    order: list[tuple[Any, ...] | int] = []
+    for index, request in enumerate(requests):
+        if request.split_encode or request.resumable or request.extra_outputs:
+            order.append(index)
+            continue
+        key = (os.path.normcase(os.path.abspath(request.input_path)),
+               *(getattr(request, name) for name in _FAN_OUT_SHARED_FIELDS))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(index)
+
+    for entry in order:
+        if isinstance(entry, int):
+            runs.append((requests[entry], [entry]))
+            continue
+        members = groups[entry]
+        first = requests[members[0]]
+        extras = tuple(
+            OutputSpec(output_path=requests[i].output_path,
+                       bit_depth=requests[i].bit_depth,
+                       quality=requests[i].quality,
+                       quality_mode=requests[i].quality_mode,
+                       height=requests[i].output_height)
+            for i in members[1:])
+        runs.append((replace(first, extra_outputs=extras), members))
+    return runs
 
 
 @dataclass(frozen=True)
@@ -57,13 +148,200 @@ class ConversionRun:
     view: ConversionView
 
 
-class ConversionManager:
+# Job ids only label a job in logs and let a caller tell two handles apart at
+# a glance; itertools.count's __next__ is atomic under the GIL, so two
+# submit() calls racing from different threads still never share one.
+_job_ids = itertools.count(1)
+
+# Hard ceilings on how many sessions one hardware encoder family will open at
+# once, independent of how many cores the machine has. NVIDIA's consumer
+# (GeForce) driver refuses the Nth+1 concurrent NVENC session outright --
+# ffmpeg exits with "OpenEncodeSessionEx failed: out of memory" -- and that
+# N has moved between driver generations (3, then 5, then 8), so this uses
+# the oldest, lowest value: a job held back in the queue costs a little
+# throughput, a job admitted past the cap fails and falls through to the
+# CPU retry. AMF and QSV have no driver-enforced cap, so they are absent and
+# only the general max_concurrent_jobs limit applies to them.
+_ENCODER_SESSION_CAPS = {'nvenc': 3}
+
+
+def default_max_concurrent_jobs() -> int:
+    """How many scheduled conversions run at once unless told otherwise.
+
+    One libx264 encode already spreads across roughly eight cores before it
+    plateaus (its frame-threading and lookahead stop scaling well past that),
+    so one job per eight cores keeps a big machine busy without a 4-core
+    laptop running two encodes that just fight over the same cores. Cores
+    are the ones this process may use (cpu_budget), not the host's.
+    """
+    return max(1, cpu_budget.cpus() // 8)
+
+
+# Source seconds per segment in a resumable conversion: the most work a
+# cancel or crash can cost. Shorter means more ffmpeg start-ups and seeks for
+# no benefit most runs; two minutes is noise beside a multi-hour encode.
+_CHECKPOINT_INTERVAL = 120.0
+
+# Request fields that change nothing about the encoded bytes, so toggling one
+# between a cancelled run and its re-run still resumes. split_encode only
+# changes how many segments encode at once -- a resumed run reuses the
+# manifest's own segment bounds either way.
+_RESUME_IRRELEVANT_FIELDS = frozenset({'open_after_conversion', 'split_encode',
+                                       'resumable'})
+
+# Below this, a split encode's fixed costs (N extra ffmpeg start-ups and
+# seeks, the final mux) eat most of what the parallelism would win back.
+_MIN_SPLIT_DURATION = 120.0
+
+
+def default_segment_workers() -> int:
+    """How many segment encodes a split conversion runs at once.
+
+    A single libx264/libx265 encode stops scaling somewhere past four
+    threads once it is one of several, so one worker per four cores, each
+    capped to its share of threads (see _segment_plan), keeps every core
+    busy without the encoders thrashing each other.
+    """
+    return max(1, cpu_budget.cpus() // 4)
+
+
+@dataclass(frozen=True)
+class SegmentPlan:
+    """How a segmented conversion runs: where the cuts are, how many segments
+    encode at once, and -- for a resumable one -- the checkpoint manifest
+    (which also fixes the work directory)."""
+    bounds: list[tuple[float, float | None]]
+    workers: int
+    manifest: checkpoints.Manifest | None = None
+
+
+class _ProcessGroup:
+    """Stands in for job.process while a split encode runs.
+
+    A split job has several ffmpeg processes over its life -- the segment
+    encodes, then the mux -- but every caller that stops or inspects a
+    conversion (cancel_conversion, cancel_job, gui.on_close's poll()) only
+    knows about one. This gives them one: terminate() reaches every live
+    process, including any started after the call, and poll() reports the
+    whole job as running until the runner records its final returncode
+    (finish()), which wait() blocks for as Popen.wait does. stderr is None
+    so monitor_progress, should it ever be handed one, returns straight away
+    instead of reading a pipe that doesn't exist.
+    """
+    stderr = None
+    stdout = None
+
     def __init__(self) -> None:
-        self.process: subprocess.Popen[str] | None = None
-        self.cancelled: bool = False
+        self._procs: list[subprocess.Popen[str]] = []
+        self._lock = threading.Lock()
+        self._terminated = False
+        self._finished = threading.Event()
+        self.returncode: int | None = None
+
+    def add(self, proc: subprocess.Popen[str]) -> None:
+        with self._lock:
+            self._procs.append(proc)
+            if not self._terminated:
+                return
+        proc.terminate()
+
+    def terminate(self) -> None:
+        with self._lock:
+            self._terminated = True
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.poll() is None:
+                proc.terminate()
+
+    def poll(self) -> int | None:
+        return self.returncode
+
+    def finish(self, returncode: int) -> None:
+        """Record the whole job's returncode, releasing wait()."""
+        self.returncode = returncode
+        self._finished.set()
+
+    def wait(self) -> int:
+        self._finished.wait()
+        return self.returncode if self.returncode is not None else 1
+
+
+@dataclass(eq=False)
+class ConversionJob:
+    """One conversion's live state: its own process, cancel flag and progress.
+
+    Mutable, unlike ConversionRequest -- this is the handle that changes
+    while the conversion runs, so a caller holding it can watch or cancel
+    that one encode without touching any other job running alongside it.
+    eq=False keeps identity comparison: two jobs are never "the same job"
+    just because they happen to hold equal state.
+
+    run is None only for the placeholder the manager holds before anything
+    has started; every job submit() creates has one from the start.
+    """
+    run: ConversionRun | None = None
+    process: subprocess.Popen[str] | _ProcessGroup | None = None
+    cancelled: bool = False
+    progress: float = 0.0
+    # The latest block from ffmpeg's -progress stream -- speed, fps, frame,
+    # bytes written -- and, via its eta(), time left. None until the first
+    # block arrives.
+    stats: ffmpeg_progress.ProgressEvent | None = None
+    # 'pending' (queued, not admitted yet) -> 'running' -> 'done' / 'failed'
+    # / 'cancelled'. retry_job puts a finished job back to 'pending'.
+    state: str = 'pending'
+    job_id: int = field(default_factory=lambda: next(_job_ids))
+
+
+class ConversionManager:
+    def __init__(self, max_concurrent_jobs: int | None = None) -> None:
         self._gpu_encoder: str | None = None
         self._gpu_name_cache: str | None = None
-        self._run: ConversionRun | None = None
+        # Set once detect_gpu_encoder has answered, so "no hardware encoder"
+        # (None) isn't mistaken for "not detected yet" and probed again. The
+        # lock makes the detection single-flight: a conversion asking while
+        # start_gpu_detection's worker is still probing waits for its answer.
+        self._gpu_encoder_detected = False
+        self._gpu_encoder_lock = threading.Lock()
+        # start_gpu_detection's pending or finished answer; None until started.
+        self._gpu_detection: Future[bool] | None = None
+        self._gpu_detection_lock = threading.Lock()
+        # The interactive (start()) conversion. process, cancelled and _run
+        # below are views onto it, so the single-file path and every caller
+        # that predates the scheduler keep reading and writing them as plain
+        # attributes.
+        self._current = ConversionJob()
+        # Scheduled (submit()) jobs in submission order, pending and running
+        # alike; a job leaves this list when it finishes. Guarded by
+        # _sched_lock because a job's monitor thread releases its slot while
+        # the main thread may be submitting or cancelling another.
+        self._jobs: list[ConversionJob] = []
+        self._sched_lock = threading.Lock()
+        self.max_concurrent_jobs = max_concurrent_jobs or default_max_concurrent_jobs()
+
+    @property
+    def process(self) -> subprocess.Popen[str] | _ProcessGroup | None:
+        return self._current.process
+
+    @process.setter
+    def process(self, value: subprocess.Popen[str] | _ProcessGroup | None) -> None:
+        self._current.process = value
+
+    @property
+    def cancelled(self) -> bool:
+        return self._current.cancelled
+
+    @cancelled.setter
+    def cancelled(self, value: bool) -> None:
+        self._current.cancelled = value
+
+    @property
+    def _run(self) -> ConversionRun | None:
+        return self._current.run
+
+    @_run.setter
+    def _run(self, value: ConversionRun | None) -> None:
+        self._current.run = value
 
     def start(self, request: ConversionRequest, view: ConversionView) -> bool:
         """Public entry point. The only way to begin a conversion.
@@ -71,6 +349,135 @@ class ConversionManager:
         view.on_complete decides batch vs interactive; the caller sets it when
         constructing the view. The GPU->CPU retry re-enters here with a
         request derived via replace().
+
+        Starts immediately, regardless of how many scheduled jobs are
+        running: this is the path a user clicking Convert takes, and making
+        them wait behind a batch they may not even be watching would look
+        like a hang. submit() is the queued, concurrency-limited path.
+        """
+        return self._launch(request, view, None)
+
+    def submit(self, request: ConversionRequest,
+               view: ConversionView) -> ConversionJob:
+        """Queue *request* and return its job handle; start it once a slot frees.
+
+        Up to max_concurrent_jobs submitted jobs run at once, fewer when the
+        next job's hardware encoder is already at its session cap (see
+        _ENCODER_SESSION_CAPS) -- a job the cap holds back stays queued
+        without blocking CPU jobs submitted after it. Each job reports
+        through its own *view*, so a batch passes one per item. Must be
+        called on the main thread, like start(): admitting a job touches
+        its view.
+        """
+        job = ConversionJob(run=ConversionRun(request=request, view=view))
+        with self._sched_lock:
+            self._jobs.append(job)
+        logging.debug(f"Queued conversion job {job.job_id}: {request.input_path}")
+        self._pump()
+        return job
+
+    def jobs(self) -> list[ConversionJob]:
+        """Snapshot of the scheduled jobs that haven't finished, oldest first."""
+        with self._sched_lock:
+            return list(self._jobs)
+
+    def set_max_concurrent_jobs(self, limit: int) -> None:
+        """Change the concurrency limit; raising it admits queued jobs now.
+
+        Lowering it never stops a running job -- the extra ones finish
+        normally and the queue simply refills more slowly.
+        """
+        self.max_concurrent_jobs = max(1, limit)
+        self._pump()
+
+    def _encoder_family(self, request: ConversionRequest) -> str | None:
+        """The hardware encoder family (e.g. 'nvenc') this request would open a
+        session on, or None for a CPU encode.
+
+        Mirrors ffmpeg_command's own gating -- 12-bit never reaches the GPU
+        (see _tonemap_plan) -- so a CPU-bound 12-bit job isn't counted
+        against the NVENC cap. The encoder probe only runs for GPU requests,
+        which is when build() would have run it anyway.
+        """
+        if not request.use_gpu or request.bit_depth >= 12:
+            return None
+        encoder = self._resolve_gpu_encoder()
+        return encoder.rsplit('_', 1)[-1] if encoder else None
+
+    def _pump(self) -> None:
+        """Admit as many pending jobs as the limits allow. Main thread.
+
+        Jobs are picked under the lock and launched outside it: _launch
+        probes the file and spawns ffmpeg, and a monitor thread finishing
+        meanwhile must not block on that just to release its slot.
+        """
+        while True:
+            # Resolved up front, outside the lock: the first call may run the
+            # encoder-detection subprocess, and holding _sched_lock across
+            # that would stall a monitor thread trying to release its slot.
+            if any(j.run is not None and j.run.request.use_gpu for j in self.jobs()):
+                self._resolve_gpu_encoder()
+            with self._sched_lock:
+                running = [j for j in self._jobs if j.state == 'running']
+                if len(running) >= self.max_concurrent_jobs:
+                    return
+                sessions: dict[str, int] = {}
+                for j in running:
+                    assert j.run is not None
+                    family = self._encoder_family(j.run.request)
+                    if family is not None:
+                        sessions[family] = sessions.get(family, 0) + 1
+                job = None
+                for candidate in self._jobs:
+                    if candidate.state != 'pending':
+                        continue
+                    assert candidate.run is not None
+                    family = self._encoder_family(candidate.run.request)
+                    cap = _ENCODER_SESSION_CAPS.get(family or '')
+                    if cap is not None and sessions.get(family or '', 0) >= cap:
+                        continue
+                    job = candidate
+                    break
+                if job is None:
+                    return
+                job.state = 'running'
+            assert job.run is not None
+            try:
+                launched = self._launch(job.run.request, job.run.view, job)
+            except Exception as e:
+                # Same reasoning as _retry_with_cpu: nothing else would ever
+                # call on_complete for this job, and one bad item must not
+                # stop the queue behind it from draining.
+                logging.error(f"Conversion job {job.job_id} failed to start: {e}")
+                launched = False
+                if job.run.view.on_complete is not None:
+                    job.run.view.on_complete(False, str(e))
+            if not launched:
+                self._finish_job(job, 'failed')
+
+    def _finish_job(self, job: ConversionJob, state: str) -> None:
+        """Record *job*'s final state and free its slot. Any thread.
+
+        The refill is handed to the job's view.schedule rather than run
+        here: this is usually called from the job's monitor thread, and
+        starting the next job touches that job's view, which may be Tk.
+        """
+        with self._sched_lock:
+            job.state = state
+            if job in self._jobs:
+                self._jobs.remove(job)
+            else:
+                return
+        if job.run is not None:
+            job.run.view.schedule(self._pump)
+
+    def _launch(self, request: ConversionRequest, view: ConversionView,
+                job: ConversionJob | None) -> bool:
+        """Guards, command construction and ffmpeg launch for one conversion.
+
+        *job* is None for start(): the interactive conversion gets a fresh
+        handle here, only once the guards have passed, so a rejected start
+        leaves the previous run's handle in place exactly as before.
         """
         # Guarded (not a bare abspath()): verify_paths' "both paths given" check
         # relies on an empty string staying falsy. os.path.abspath('') resolves
@@ -82,6 +489,10 @@ class ConversionManager:
                         if request.input_path else request.input_path),
             output_path=(os.path.abspath(request.output_path)
                          if request.output_path else request.output_path),
+            extra_outputs=tuple(
+                replace(spec, output_path=os.path.abspath(spec.output_path)
+                        if spec.output_path else spec.output_path)
+                for spec in request.extra_outputs),
         )
 
         # Every guard below rejects via self._reject(message, view), which
@@ -99,8 +510,15 @@ class ConversionManager:
             self._reject(incompatibility, view)
             return False
 
-        self._run = ConversionRun(request=request, view=view)
-        self.cancelled = False
+        if not self._verify_extra_outputs(request, view):
+            return False
+
+        if job is None:
+            job = self._current = ConversionJob()
+        job.run = ConversionRun(request=request, view=view)
+        job.cancelled = False
+        job.progress = 0.0
+        job.stats = None
 
         properties = get_video_properties(request.input_path)
         if properties is None:
@@ -118,27 +536,142 @@ class ConversionManager:
         view.set_inputs_enabled(False)
         view.set_cancel_visible(True, on_cancel=self.cancel_conversion)
 
+        segment_plan = None
+        work_dir = None
+        segmented = None
+        cmd: list[str] = []
+        # Scheduled jobs split the budget max_concurrent_jobs ways, and a
+        # split encode splits its share again among its workers; the
+        # interactive conversion runs alone.
+        jobs = self.max_concurrent_jobs if job is not self._current else 1
         try:
-            cmd = self.construct_ffmpeg_command(request, properties, view)
+            segment_plan = self._segment_plan(request, properties)
+            if segment_plan is not None:
+                work_dir = (segment_plan.manifest.work_dir if segment_plan.manifest
+                            else self._make_work_dir(request))
+                segmented = self.construct_segmented_commands(
+                    request, properties, view, segment_plan.bounds, work_dir,
+                    threads=cpu_budget.threads_per_job(segment_plan.workers * jobs))
+            else:
+                cmd = self.construct_ffmpeg_command(
+                    request, properties, view,
+                    threads=cpu_budget.threads_per_job(jobs))
         except Exception:
             # The UI was already disabled and the cancel button gridded above,
-            # but self.process hasn't been assigned yet -- Cancel would be a
+            # but job.process hasn't been assigned yet -- Cancel would be a
             # no-op and gui.py's generic error handler doesn't re-enable the
             # UI. Undo both here so the app isn't left permanently disabled,
             # then let the original exception propagate unchanged so callers
-            # still see/log/report it exactly as before.
+            # still see/log/report it exactly as before. A checkpoint
+            # directory is left alone: it may hold a previous run's segments.
             view.set_inputs_enabled(True)
             view.set_cancel_visible(False)
+            if work_dir is not None and not (segment_plan and segment_plan.manifest):
+                shutil.rmtree(work_dir, ignore_errors=True)
             raise
-        self.process = self.start_ffmpeg_process(cmd)
+
+        if segment_plan is not None:
+            assert work_dir is not None and segmented is not None
+            job.process = _ProcessGroup()
+            job.state = 'running'
+            thread = threading.Thread(
+                target=self._run_segmented,
+                args=(job, request, view, properties['duration'], segmented,
+                      work_dir, segment_plan))
+            thread.daemon = True
+            thread.start()
+            return True
+
+        job.process = self.start_ffmpeg_process(cmd)
+        job.state = 'running'
 
         thread = threading.Thread(
             target=self.monitor_progress,
-            args=(request, view, properties['duration']))
+            args=(request, view, properties['duration']),
+            kwargs={'job': job})
         thread.daemon = True
         thread.start()
         return True
 
+    def _segment_plan(self, request: ConversionRequest,
+                      properties: dict[str, Any]) -> SegmentPlan | None:
+        """How to run this request in segments, or None to run it as one
+        ffmpeg process.
+
+        split_encode splits CPU encodes only. A GPU encode is already one
+        hardware session running flat out, and several at once would just
+        queue on the same silicon (and, for NVENC, on its session cap -- see
+        _ENCODER_SESSION_CAPS). 12-bit counts as CPU: _tonemap_plan forces it
+        there whatever the GPU toggle says, and libx265 at 12-bit is exactly
+        the encode slow enough to need this. resumable segments any encode,
+        GPU included, but a GPU one runs its segments one at a time. A short
+        file, a machine with too few cores for two workers (split only), or a
+        source whose keyframes can't be found near the cut points all fall
+        back to a normal encode, and so does a fan-out (extra_outputs): its
+        point is one decode feeding every output, which per-output segment
+        sets would undo. A stream copy (see ffmpeg_command.stream_copy_ok)
+        takes seconds and is never segmented.
+        """
+        if not (request.split_encode or request.resumable) or request.extra_outputs:
+            return None
+        crop = ffmpeg_command.requested_crop(request, self._probes(request))
+        if ffmpeg_command.stream_copy_ok(request, properties, crop):
+            return None
+        on_gpu = request.use_gpu and request.bit_depth < 12
+        if on_gpu and not request.resumable:
+            return None
+        duration = float(properties.get('duration') or 0)
+        if duration < _MIN_SPLIT_DURATION:
+            return None
+        workers = (default_segment_workers()
+                   if request.split_encode and not on_gpu else 1)
+        if not request.resumable and workers < 2:
+            return None
+
+        key = None
+        if request.resumable:
+            settings = {k: v for k, v in asdict(request).items()
+                        if k not in _RESUME_IRRELEVANT_FIELDS}
+            key = checkpoints.request_key(settings, request.input_path)
+        if key is not None:
+            work_dir = checkpoints.checkpoint_dir(request.output_path, key)
+            manifest = checkpoints.load_manifest(work_dir, key)
+            if manifest is not None:
+                logging.info(f"Resuming conversion: {len(manifest.completed)} of "
+                             f"{len(manifest.bounds)} segments already encoded.")
+                return SegmentPlan(manifest.bounds,
+                                   min(workers, len(manifest.bounds)), manifest)
+
+        # Two segments per worker: segments are cut at keyframes and differ in
+        # content, so they finish unevenly, and a worker that finishes early
+        # can pick up another instead of idling while the slowest one runs.
+        count = workers * 2 if request.split_encode else 1
+        if key is not None:
+            count = max(count, int(duration // _CHECKPOINT_INTERVAL))
+        targets = [duration * i / count for i in range(count)]
+        keyframes = probe_keyframes_near(request.input_path, targets)
+        # targets[0] is 0, so the first keyframe found is the video's own
+        # first frame -- the first segment's start (see segment_bounds).
+        first = keyframes[0] if len(targets) > 1 and keyframes and \
+            keyframes[0] < targets[1] else 0.0
+        bounds = ffmpeg_command.segment_bounds(keyframes, duration, start=first)
+        if len(bounds) < 2:
+            logging.info("No usable keyframe cut points; encoding as one segment.")
+            return None
+        manifest = (checkpoints.new_manifest(
+            checkpoints.checkpoint_dir(request.output_path, key), key, bounds)
+            if key is not None else None)
+        return SegmentPlan(bounds, min(workers, len(bounds)), manifest)
+
+    @staticmethod
+    def _make_work_dir(request: ConversionRequest) -> str:
+        """A scratch directory for a split encode's segments, beside the
+        output: same volume, so the segments cost no cross-drive copy, and a
+        dot-prefixed name so it stays out of the way while it exists."""
+        return tempfile.mkdtemp(
+            prefix='.hdr2sdr-',
+            dir=os.path.dirname(request.output_path) or None)
+
     @staticmethod
     def _reject(message: str, view: ConversionView) -> None:
         """Hand a guard rejection to the view and end the run as a failure
@@ -170,20 +703,81 @@ class ConversionManager:
             return False
         return True
 
+    def _verify_extra_outputs(self, request: ConversionRequest,
+                              view: ConversionView) -> bool:
+        """verify_paths and validate_bit_depth_output for each fan-out
+        output, plus one check only a fan-out needs: two outputs of one
+        ffmpeg run must not be the same file."""
+        seen = {os.path.normcase(request.output_path)}
+        for spec in request.extra_outputs:
+            if not self.verify_paths(request.input_path, spec.output_path, view):
+                return False
+            path = os.path.normcase(spec.output_path)
+            if path in seen:
+                self._reject(f"Two outputs share the path {spec.output_path}.", view)
+                return False
+            seen.add(path)
+            bit_depth = request.bit_depth if spec.bit_depth is None else spec.bit_depth
+            incompatibility = self.validate_bit_depth_output(spec.output_path, bit_depth)
+            if incompatibility:
+                self._reject(incompatibility, view)
+                return False
+        return True
+
     def _resolve_gpu_encoder(self) -> 'str | None':
-        if self._gpu_encoder is None:
-            self._gpu_encoder = self.detect_gpu_encoder()
+        if self._gpu_encoder is None and not self._gpu_encoder_detected:
+            with self._gpu_encoder_lock:
+                if self._gpu_encoder is None and not self._gpu_encoder_detected:
+                    self._gpu_encoder = self.detect_gpu_encoder()
+                    self._gpu_encoder_detected = True
         return self._gpu_encoder
 
-    def construct_ffmpeg_command(self, request: ConversionRequest,
-                                 properties: dict[str, Any],
-                                 view: ConversionView) -> list[str]:
-        probes = ffmpeg_command.Probes(
+    def _probes(self, request: ConversionRequest | None = None) -> ffmpeg_command.Probes:
+        return ffmpeg_command.Probes(
             resolve_gpu_encoder=self._resolve_gpu_encoder,
             resolve_libplacebo_available=vulkan_libplacebo_available,
             resolve_cuda_interop_available=vulkan_cuda_interop_available,
+            resolve_fused_lut=(
+                (lambda tonemapper, transfer: self._resolve_fused_lut(
+                    request.input_path, tonemapper, transfer))
+                if request is not None else None),
+            resolve_crop=(
+                (lambda: detect_crop(request.input_path))
+                if request is not None else None),
+            resolve_filters=ffmpeg_filters,
         )
-        return ffmpeg_command.build(request, properties, probes, view)
+
+    @staticmethod
+    def _resolve_fused_lut(input_path: str, tonemapper: str,
+                           transfer: str = 'pq') -> str | None:
+        """The fused LUT for this source's signal peak, escaped for the
+        filtergraph. A LUT that can't be written (read-only or full cache
+        drive) costs the speed-up, not the conversion: None falls back to
+        the normal chain -- or, for BT.2390/Spline, which have no normal
+        CPU chain, to ffmpeg_command's clear error."""
+        peak = fused_lut.signal_peak(get_maxcll(input_path),
+                                     get_max_luminance(input_path))
+        try:
+            return _escape_path_for_filter(fused_lut.lut_path(tonemapper, peak, transfer))
+        except OSError as e:
+            logging.warning(f"Fused LUT for {tonemapper} unavailable: {e}")
+            return None
+
+    def construct_ffmpeg_command(self, request: ConversionRequest,
+                                 properties: dict[str, Any],
+                                 view: ConversionView,
+                                 threads: int | None = None) -> list[str]:
+        return ffmpeg_command.build(request, properties, self._probes(request), view,
+                                    threads)
+
+    def construct_segmented_commands(
+            self, request: ConversionRequest, properties: dict[str, Any],
+            view: ConversionView, bounds: list[tuple[float, float | None]],
+            work_dir: str, threads: int | None = None
+    ) -> ffmpeg_command.SegmentedCommands:
+        return ffmpeg_command.build_segmented(
+            request, properties, self._probes(request), view, bounds, work_dir,
+            threads)
 
     # .m4v is Apple's legacy "iPod video" MPEG-4 profile: it predates HEVC/10-bit
     # entirely and only ever allowed 8-bit H.264 Baseline/Main/High. Unlike plain
@@ -207,46 +801,66 @@ class ConversionManager:
         return None
 
     def start_ffmpeg_process(self, cmd: list[str]) -> subprocess.Popen[str]:
-        """Start the FFmpeg process without showing a console window."""
+        """Start the FFmpeg process without showing a console window.
+
+        Every process gets ffmpeg's -progress stream on stdout (see
+        ffmpeg_progress) -- the flags and the stdout pipe are added together
+        here so one can never be set up without the other. stderr then
+        carries only the banner and real errors.
+        """
         startupinfo, creationflags = _utils_startupinfo()
+        cmd = cmd[:1] + ffmpeg_progress.PROGRESS_ARGS + cmd[1:]
 
         process = subprocess.Popen(
             cmd,
             stderr=subprocess.PIPE,
-            stdout=subprocess.DEVNULL,  # output goes to a file; don't fill an unread pipe
+            stdout=subprocess.PIPE,  # the -progress key=value stream
             universal_newlines=True,
             startupinfo=startupinfo,
             creationflags=creationflags,
             encoding='utf-8',
             errors='replace'
         )
-        logging.debug(f"Started FFmpeg process with command: {' '.join(cmd)}")
+        logging.debug("Started FFmpeg process with command: %s", ' '.join(cmd))
         return process
 
-    def monitor_progress(self, request: ConversionRequest, view: ConversionView,
-                         duration: float) -> None:
-        progress_pattern = re.compile(r'time=(\d+:\d+:\d+\.\d+)')
-        error_messages: list[str] = []
-        gpu_error_detected = False
+    @staticmethod
+    def _read_progress(stream: Any,
+                       on_event: Callable[[ffmpeg_progress.ProgressEvent], None]) -> None:
+        parser = ffmpeg_progress.ProgressParser()
+        for line in stream:
+            event = parser.feed(line)
+            if event is not None:
+                on_event(event)
 
-        # Capture a stable local reference at thread-entry time.  cancel_conversion
-        # on the main thread can set self.process = None concurrently; using `proc`
-        # throughout this function prevents AttributeError if that happens between
-        # the loop ending and proc.returncode being read.
-        proc = self.process
-        if proc is None or proc.stderr is None:
-            return
+    def _follow_process(self, proc: Any, job: ConversionJob,
+                        on_event: Callable[[ffmpeg_progress.ProgressEvent], None]
+                        ) -> tuple[list[str], bool]:
+        """Drain one ffmpeg's two output streams until it exits (or the job is
+        cancelled): progress blocks from stdout go to *on_event* on a helper
+        thread, stderr is kept here. Returns (stderr tail, whether stderr
+        looked like a GPU failure).
+
+        Both pipes must be read concurrently -- leaving either unread lets
+        its OS buffer fill, and ffmpeg then blocks writing to it forever.
+        stderr is held in a fixed-size ring (ffmpeg_progress.stderr_tail),
+        so a long encode's memory stays flat.
+        """
+        reader = None
+        if proc.stdout is not None:
+            reader = threading.Thread(target=self._read_progress,
+                                      args=(proc.stdout, on_event))
+            reader.daemon = True
+            reader.start()
+
+        tail = ffmpeg_progress.stderr_tail()
+        gpu_error_detected = False
         for line in proc.stderr:
-            if self.cancelled:
+            if job.cancelled:
                 break
             decoded_line = line.strip()
-            logging.debug(decoded_line)
-            error_messages.append(decoded_line)
-            match = progress_pattern.search(decoded_line)
-            if match and duration:
-                elapsed_time = self.parse_time(match.group(1))
-                progress = (elapsed_time / duration) * 100
-                view.set_progress(progress)
+            logging.debug('%s', decoded_line)
+            tail.append(decoded_line)
 
             # ffmpeg's own banner lines echo the input/output path verbatim
             # ("Input #0, ..., from '<path>':" / "Output #0, ..., to
@@ -258,19 +872,61 @@ class ConversionManager:
                     k in decoded_line.lower() for k in ('cuda', 'nvcuda.dll', 'amf', 'mfx')):
                 gpu_error_detected = True
 
+        if reader is not None:
+            # stderr closing means ffmpeg is exiting, and stdout closes with
+            # it; the bound only matters if a cancel broke out above while a
+            # terminated process is still flushing.
+            reader.join(timeout=5)
+        return list(tail), gpu_error_detected
+
+    def monitor_progress(self, request: ConversionRequest, view: ConversionView,
+                         duration: float, job: ConversionJob | None = None) -> None:
+        """Follow *job*'s ffmpeg to completion, then hand off the result.
+
+        *job* defaults to the interactive conversion; the scheduler passes
+        each submitted job's own handle so concurrent jobs never read each
+        other's process or cancel flag.
+        """
+        if job is None:
+            job = self._current
+
+        # Capture a stable local reference at thread-entry time.  cancel_conversion
+        # on the main thread can set job.process = None concurrently; using `proc`
+        # throughout this function prevents AttributeError if that happens between
+        # the loop ending and proc.returncode being read.
+        proc = job.process
+        if proc is None or proc.stderr is None:
+            return
+
+        def on_event(event: ffmpeg_progress.ProgressEvent) -> None:
+            job.stats = event
+            job.progress = event.percent(duration)
+            view.set_progress(job.progress)
+
+        error_messages, gpu_error_detected = self._follow_process(proc, job, on_event)
+
         if proc is not None:
             proc.wait()
-            returncode = proc.returncode
-            if returncode != 0 and request.use_gpu and gpu_error_detected and not self.cancelled:
+            # Set once wait() returns, for a Popen and a _ProcessGroup alike.
+            returncode = proc.returncode if proc.returncode is not None else 1
+            if returncode != 0 and request.use_gpu and gpu_error_detected and not job.cancelled:
                 logging.warning("GPU acceleration failed. Retrying with CPU encoding.")
                 # The retry touches Tk (gpu checkbox, dialog, UI state) and must run
-                # on the main thread, not this worker thread.
-                view.schedule(lambda: self._retry_with_cpu(request, view))
+                # on the main thread, not this worker thread. A scheduled job
+                # keeps its slot across the retry: it is the same job, still
+                # running, just on a different encoder.
+                view.schedule(lambda: self._retry_with_cpu(request, view, job))
             else:
-                self.handle_completion(request, view, error_messages, returncode)
+                self.handle_completion(request, view, error_messages, returncode, job)
+                if returncode == 0:
+                    state = 'done'
+                else:
+                    state = 'cancelled' if job.cancelled else 'failed'
+                self._finish_job(job, state)
 
     def _retry_with_cpu(self, request: ConversionRequest,
-                        view: ConversionView) -> None:
+                        view: ConversionView,
+                        job: ConversionJob | None = None) -> None:
         """Restart the conversion on the CPU after a GPU failure. Main thread.
 
         The retry derives its request from the original with replace() rather
@@ -280,35 +936,164 @@ class ConversionManager:
         already belong to a different, later-started conversion by the time
         this after(0) callback fires (e.g. cancel + immediately start another
         file).
+
+        A scheduled *job* is relaunched in place, on its own handle, so the
+        retry neither jumps the queue nor replaces the interactive run.
         """
         view.notify(Notice.warning(
             "GPU Acceleration Failed",
             "GPU acceleration failed. Switching to CPU encoding."))
+        scheduled = job is not None and job in self.jobs()
         try:
-            self.start(replace(request, use_gpu=False), view)
+            if scheduled:
+                assert job is not None
+                if not self._launch(replace(request, use_gpu=False), view, job):
+                    self._finish_job(job, 'failed')
+            else:
+                self.start(replace(request, use_gpu=False), view)
         except Exception as e:
-            # E.g. a GPU-only tonemapper (BT.2390/Spline) with no CPU
-            # implementation, raised from construct_ffmpeg_command -- start
-            # restores UI state before re-raising in that case. But start can
-            # also raise from start_ffmpeg_process (e.g. a missing ffmpeg
-            # binary), which sits outside that try/except and leaves the UI
-            # disabled. Either way, nothing else in this call path calls
-            # on_complete -- without this the batch item would be stuck at
-            # 'Converting' forever.
+            # E.g. BT.2390/Spline on the CPU with no fused LUT to run them
+            # (an unwritable cache folder), raised from
+            # construct_ffmpeg_command -- start restores UI state before
+            # re-raising in that case. But start can also raise from
+            # start_ffmpeg_process (e.g. a missing ffmpeg binary), which sits
+            # outside that try/except and leaves the UI disabled. Either way,
+            # nothing else in this call path calls on_complete -- without
+            # this the batch item would be stuck at 'Converting' forever.
             logging.error(f"CPU retry failed to start ({request.tonemapper}): {e}")
             if view.on_complete is not None:
                 view.on_complete(False, str(e))
+            if scheduled:
+                assert job is not None
+                self._finish_job(job, 'failed')
+
+    def _run_segmented(self, job: ConversionJob, request: ConversionRequest,
+                       view: ConversionView, duration: float,
+                       commands: ffmpeg_command.SegmentedCommands,
+                       work_dir: str, plan: SegmentPlan) -> None:
+        """Encode every missing segment (plan.workers at a time), then mux.
+        Worker thread.
+
+        The segmented counterpart of monitor_progress, and it ends the same
+        way: one handle_completion with the relevant stderr tail, then the
+        job's slot is freed -- or, after a GPU failure, a CPU retry. Progress
+        is the summed encoded time of all segments (each one's -progress
+        out_time, or its full length if a checkpoint already has it) over
+        the whole duration, held just short of 100% until the mux is done.
+        The first segment to fail stops the rest -- the output can't be
+        stitched without it -- and its stderr is what the user sees.
+
+        The work directory is deleted once the output exists. A resumable
+        run that fails or is cancelled keeps it: those finished segments are
+        what the next run resumes from.
+        """
+        group = job.process
+        assert isinstance(group, _ProcessGroup)
+        manifest = plan.manifest
+        lengths = [duration - start if length is None else length
+                   for start, length in plan.bounds]
+        encoded = [0.0] * len(commands.segment_cmds)
+        lock = threading.Lock()
+        failure: list[tuple[int, list[str], bool]] = []
+
+        def report() -> None:
+            with lock:
+                progress = min(sum(encoded) / duration * 100, 99.0)
+            job.progress = progress
+            view.set_progress(progress)
+
+        def run_one(cmd: list[str], index: int | None) -> tuple[int, list[str], bool]:
+            proc = self.start_ffmpeg_process(cmd)
+            group.add(proc)
+
+            def on_event(event: ffmpeg_progress.ProgressEvent) -> None:
+                if index is None:
+                    return
+                encoded[index] = event.out_time
+                report()
+
+            lines, gpu_error = self._follow_process(proc, job, on_event)
+            proc.wait()
+            return proc.returncode, lines, gpu_error
+
+        def encode_segment(index: int) -> None:
+            if job.cancelled or failure:
+                return
+            segment_path = commands.segment_paths[index]
+            if manifest is not None and manifest.is_done(index, segment_path):
+                return
+            returncode, lines, gpu_error = run_one(commands.segment_cmds[index], index)
+            if returncode == 0:
+                encoded[index] = lengths[index]
+                if manifest is not None:
+                    with lock:
+                        manifest.mark_done(index, segment_path)
+            elif not job.cancelled:
+                with lock:
+                    first = not failure
+                    failure.append((returncode, lines, gpu_error))
+                if first:
+                    logging.error(f"Segment {index} failed with code {returncode}.")
+                    group.terminate()
+
+        if manifest is not None:
+            for index, path in enumerate(commands.segment_paths):
+                if manifest.is_done(index, path):
+                    encoded[index] = lengths[index]
+            report()
+
+        gpu_failed = False
+        # A failure until the encode says otherwise, so an exception that
+        # escapes the handler below still leaves a resumable job's segments.
+        returncode, error_messages = 1, []
+        try:
+            with ThreadPoolExecutor(max_workers=plan.workers) as pool:
+                list(pool.map(encode_segment, range(len(commands.segment_cmds))))
+
+            if failure:
+                returncode, error_messages, gpu_failed = failure[0]
+            elif job.cancelled:
+                returncode, error_messages = 1, []
+            else:
+                with open(commands.concat_list_path, 'w', encoding='utf-8') as f:
+                    f.write(commands.concat_list)
+                returncode, error_messages, _ = run_one(commands.concat_cmd, None)
+        except Exception as e:
+            # E.g. a full disk writing the concat list, or ffmpeg missing.
+            # Without this the job would never complete and its batch item
+            # would sit at 'Converting' forever.
+            logging.error(f"Segmented encode failed: {e}", exc_info=True)
+            returncode, error_messages = 1, [str(e)]
+        finally:
+            if manifest is None or returncode == 0:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        group.finish(returncode)
+        if returncode != 0 and request.use_gpu and gpu_failed and not job.cancelled:
+            logging.warning("GPU acceleration failed. Retrying with CPU encoding.")
+            view.schedule(lambda: self._retry_with_cpu(request, view, job))
+            return
+        self.handle_completion(request, view, error_messages, returncode, job)
+        if returncode == 0:
+            state = 'done'
+        else:
+            state = 'cancelled' if job.cancelled else 'failed'
+        self._finish_job(job, state)
 
     def parse_time(self, time_str: str) -> float:
         hours, minutes, seconds = map(float, time_str.split(':'))
         return hours * 3600 + minutes * 60 + seconds
 
     def handle_completion(self, request: ConversionRequest, view: ConversionView,
-                          error_messages: list[str], returncode: int) -> None:
+                          error_messages: list[str], returncode: int,
+                          job: ConversionJob | None = None) -> None:
+        if job is None:
+            job = self._current
+
         def _handle() -> None:
             # returncode is the value monitor_progress already read from its
-            # own locally-captured proc, not re-read from self.process here:
-            # cancel_conversion (main thread) can set self.process = None
+            # own locally-captured proc, not re-read from job.process here:
+            # cancel_conversion (main thread) can set job.process = None
             # between monitor_progress finishing and this after(0)-scheduled
             # callback actually running, which would otherwise misreport a
             # conversion that had already finished successfully.
@@ -320,7 +1105,7 @@ class ConversionManager:
                 success = returncode == 0
                 reason = None
                 if not success:
-                    if not self.cancelled:
+                    if not job.cancelled:
                         tail = '\n'.join(error_messages[-50:])
                         logging.error(f"Batch item failed with code "
                                       f"{returncode}: {tail}")
@@ -340,7 +1125,7 @@ class ConversionManager:
                     f"Conversion complete! Output saved to: {request.output_path}"))
                 if request.open_after_conversion:
                     view.open_output(request.output_path)
-            elif not self.cancelled:
+            elif not job.cancelled:
                 tail = error_messages[-50:]  # ffmpeg stderr can be thousands of progress lines; show only the tail where real errors appear
                 error_message = '\n'.join(tail)
                 logging.error(f"Conversion failed with code {returncode}: {error_message}")
@@ -355,6 +1140,12 @@ class ConversionManager:
         view.schedule(_handle)
 
     def cancel_conversion(self) -> None:
+        """Cancel everything: the interactive conversion and every scheduled job.
+
+        This is what the Cancel button is wired to, and a user pressing it
+        during a batch means "stop the batch", not "stop whichever of the
+        concurrent encodes happened to start last". cancel_job stops just one.
+        """
         self.cancelled = True
         view = self._run.view if self._run else None
         if self.process and view is not None:
@@ -365,6 +1156,52 @@ class ConversionManager:
             view.set_inputs_enabled(True)
             view.set_cancel_visible(False)
             view.restore_drop_target()
+        for job in self.jobs():
+            self.cancel_job(job)
+
+    def cancel_job(self, job: ConversionJob) -> None:
+        """Cancel one scheduled job, queued or running, leaving the rest alone.
+
+        A running job's process is terminated and its monitor thread reports
+        the (cancelled) failure through on_complete as usual, then frees the
+        slot. A queued job never reached ffmpeg, so nothing else would ever
+        call its on_complete -- it is called here instead.
+        """
+        with self._sched_lock:
+            if job not in self._jobs:
+                return
+            job.cancelled = True
+            was_pending = job.state == 'pending'
+            if was_pending:
+                job.state = 'cancelled'
+                self._jobs.remove(job)
+        proc = job.process
+        if proc is not None:
+            proc.terminate()
+        if was_pending and job.run is not None:
+            logging.debug(f"Cancelled queued conversion job {job.job_id}")
+            on_complete = job.run.view.on_complete
+            if on_complete is not None:
+                on_complete(False, "Cancelled")
+
+    def retry_job(self, job: ConversionJob) -> bool:
+        """Queue a finished (failed or cancelled) job again, with the same
+        request. Returns False if the job is still queued or running.
+
+        The handle is reused rather than a new job submitted, so whoever is
+        holding it -- a batch row, say -- keeps tracking the same object.
+        """
+        with self._sched_lock:
+            if job in self._jobs or job.run is None:
+                return False
+            job.state = 'pending'
+            job.cancelled = False
+            job.process = None
+            job.progress = 0.0
+            job.stats = None
+            self._jobs.append(job)
+        self._pump()
+        return True
 
     def gpu_name(self) -> str:
         """Return this machine's primary GPU name, for the status tooltip.
@@ -376,12 +1213,27 @@ class ConversionManager:
         """
         if self._gpu_name_cache is not None:
             return self._gpu_name_cache
-        self._gpu_name_cache = (
-            platform_utils.gpu_name(self._nvidia_present(), self._gpu_encoder)
-            or 'GPU'
+        name = stored_capability(
+            'gpu_name',
+            lambda: platform_utils.gpu_name(
+                stored_capability('nvidia', self._nvidia_present), self._gpu_encoder)
+            or 'GPU',
+            keep=lambda name: name != 'GPU',
         )
+        # A stored answer is whatever the JSON file held.
+        self._gpu_name_cache = name if isinstance(name, str) and name else 'GPU'
         return self._gpu_name_cache
 
+    def reset_gpu_detection(self) -> None:
+        """Forget the detected encoder and GPU name, so the next query
+        detects them again -- the counterpart of utils.reprobe_capabilities
+        for what this manager holds itself."""
+        with self._gpu_detection_lock:
+            self._gpu_detection = None
+        self._gpu_encoder = None
+        self._gpu_encoder_detected = False
+        self._gpu_name_cache = None
+
     def _nvidia_present(self) -> bool:
         """Return True if nvidia-smi reports a usable NVIDIA GPU."""
         try:
@@ -399,10 +1251,13 @@ class ConversionManager:
 
     def _list_encoders(self) -> str:
         """Return lowercase stdout of 'ffmpeg -encoders', or '' on failure."""
+        exe = ffmpeg_executable()
+        if not exe:
+            return ''
         try:
             si, flags = _utils_startupinfo()
             process = subprocess.Popen(
-                [FFMPEG_EXECUTABLE, '-encoders'],
+                [exe, '-encoders'],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 universal_newlines=True,
@@ -418,9 +1273,12 @@ class ConversionManager:
         """Detect best available H.264 GPU encoder; sets and returns self._gpu_encoder.
 
         Priority: NVENC (requires confirmed NVIDIA GPU) > AMF > QSV > None.
+        The encoder listing and nvidia-smi's answer are kept with the other
+        capabilities (utils.stored_capability), so only the first launch on
+        an ffmpeg build and driver spawns either.
         """
-        encoders = self._list_encoders()
-        nvidia = self._nvidia_present()
+        encoders = stored_capability('encoders', self._list_encoders, keep=bool)
+        nvidia = stored_capability('nvidia', self._nvidia_present)
 
         if nvidia and 'h264_nvenc' in encoders:
             self._gpu_encoder = 'h264_nvenc'
@@ -434,19 +1292,57 @@ class ConversionManager:
         logging.debug(f"Detected GPU encoder: {self._gpu_encoder}")
         return self._gpu_encoder
 
+    def start_gpu_detection(self) -> Future[bool]:
+        """Start detecting GPU support in the background and return its
+        pending answer -- the one is_gpu_acceleration_available gives.
+
+        The encoder listing (plus nvidia-smi) and the libplacebo test encode
+        run concurrently on their own threads, so detection costs the slower
+        of the two rather than their sum, and the window doesn't wait for
+        either. On NVENC with libplacebo the CUDA interop probe a conversion
+        would run first is started too. Idempotent: until
+        reset_gpu_detection, every call returns the same future.
+        """
+        with self._gpu_detection_lock:
+            if self._gpu_detection is None:
+                pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='gpu-detect')
+                encoder = pool.submit(self._resolve_gpu_encoder)
+                libplacebo = pool.submit(vulkan_libplacebo_available)
+                pool.submit(self._prewarm_cuda_interop, encoder, libplacebo)
+                self._gpu_detection = pool.submit(self._gpu_support, encoder, libplacebo)
+                pool.shutdown(wait=False)
+            return self._gpu_detection
+
+    @staticmethod
+    def _gpu_support(encoder: Future[str | None], libplacebo: Future[bool]) -> bool:
+        """Combine start_gpu_detection's probes into its answer."""
+        try:
+            has_encoder = encoder.result() is not None
+        except Exception as e:
+            logging.error(f"Error checking GPU availability: {e}")
+            has_encoder = False
+        return has_encoder or libplacebo.result()
+
+    @staticmethod
+    def _prewarm_cuda_interop(encoder: Future[str | None], libplacebo: Future[bool]) -> None:
+        """Probe CUDA interop ahead of the first NVENC + libplacebo
+        conversion, the only kind that asks for it."""
+        try:
+            if encoder.result() == 'h264_nvenc' and libplacebo.result():
+                vulkan_cuda_interop_available()
+        except Exception as e:
+            logging.debug(f"CUDA interop prewarm skipped: {e}")
+
     def is_gpu_acceleration_available(self) -> bool:
         """True if any GPU acceleration is usable: a hardware H.264 encoder
         (nvenc/amf/qsv) and/or GPU tonemapping via libplacebo. Either one alone
         makes the GPU toggle worthwhile -- a machine with Vulkan/libplacebo but
         no hardware encoder still gets the (bigger) tonemapping speedup -- so the
-        toggle is gated on the union, not on the encoder alone."""
-        try:
-            if self._gpu_encoder is None:
-                self._gpu_encoder = self.detect_gpu_encoder()
-            has_encoder = self._gpu_encoder is not None
-        except Exception as e:
-            logging.error(f"Error checking GPU availability: {e}")
-            has_encoder = False
-        return has_encoder or vulkan_libplacebo_available()
+        toggle is gated on the union, not on the encoder alone.
+
+        Waits for start_gpu_detection's answer (starting it if nothing has),
+        so a caller never probes alongside it."""
+        return self.start_gpu_detection().result()
+
 
 conversion_manager = ConversionManager()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""How many CPUs this process may actually use, for sizing worker pools and
+ffmpeg's thread counts.
+
+os.cpu_count() is the host's core count. Under an affinity mask (taskset,
+`start /affinity`, a container's cpuset) or a cgroup CPU quota (docker
+--cpus, a Kubernetes CPU limit) the process gets a fraction of that, and
+every pool or encoder sized from the host count oversubscribes it: threads
+thrash, and a quota'd cgroup is throttled for whole scheduling periods at a
+time. ffmpeg sizes its own codec and filter threads from the affinity mask
+but knows nothing of quotas.
+
+cpus() is the smallest of the host count, the affinity mask and the cgroup
+quota -- cgroup v2 cpu.max or v1 cpu.cfs_quota_us/cpu.cfs_period_us, the
+tightest along the process's cgroup and its ancestors, rounded up to whole
+CPUs. It is read once: none of these change under a running app in practice.
+
+cgroup_dirs and read_cgroup_file are shared with frame_cache, which reads
+the memory controller the same way.
+
+Standard library only, no tkinter, no utils.py.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+
+_CGROUP_ROOT = '/sys/fs/cgroup'
+_PROC_CGROUP = '/proc/self/cgroup'
+
+# Where cgroup v1 mounts the cpu controller, which distributions co-mount
+# with cpuacct under either name or leave alone.
+_V1_CPU_MOUNTS = ('cpu,cpuacct', 'cpuacct,cpu', 'cpu')
+
+_cpus: 'int | None' = None
+
+
+def cpus() -> int:
+    """The number of CPUs this process can keep busy, never less than 1."""
+    global _cpus
+    if _cpus is None:
+        _cpus = _measure()
+    return _cpus
+
+
+def threads_per_job(jobs: int = 1) -> 'int | None':
+    """Threads for each of *jobs* ffmpeg processes sharing the budget, or
+    None when ffmpeg's own default (one per host core) already fits."""
+    share = max(1, cpus() // max(1, jobs))
+    return None if share >= (os.cpu_count() or 1) else share
+
+
+def _measure() -> int:
+    host = os.cpu_count() or 1
+    limits = [host]
+    affinity = _affinity_cpus()
+    if affinity:
+        limits.append(affinity)
+    quota = _cgroup_cpu_limit()
+    if quota:
+        limits.append(max(1, math.ceil(quota)))
+    budget = min(limits)
+    if budget < host:
+        logging.info(f"CPU budget: {budget} of {host} cores "
+                     f"(affinity {affinity}, cgroup quota {quota}).")
+    return budget
+
+
+def _affinity_cpus() -> 'int | None':
+    """CPUs in this process's affinity mask, where the platform says."""
+    process_cpu_count = getattr(os, 'process_cpu_count', None)  # 3.13+
+    if process_cpu_count is not None:
+        return process_cpu_count()
+    if hasattr(os, 'sched_getaffinity'):
+        try:
+            return len(os.sched_getaffinity(0))
+        except OSError:
+            return None
+    return None
+
+
+def _cgroup_cpu_limit(cgroup_root: str = _CGROUP_ROOT,
+                      proc_cgroup: str = _PROC_CGROUP) -> 'float | None':
+    """The tightest cgroup CPU quota over this process, in CPUs (1.5 for
+    150ms of every 100ms period), or None when there is none -- or no
+    cgroups at all, as on Windows and macOS."""
+    try:
+        with open(proc_cgroup, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    limits: 'list[float]' = []
+    for line in lines:
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        if not controllers:  # the v2 unified hierarchy
+            for directory in cgroup_dirs(cgroup_root, path):
+                limits += _v2_limit(directory)
+        elif 'cpu' in controllers.split(','):
+            for mount in _V1_CPU_MOUNTS:
+                base = os.path.join(cgroup_root, mount)
+                if os.path.isdir(base):
+                    for directory in cgroup_dirs(base, path):
+                        limits += _v1_limit(directory)
+                    break
+    return min(limits) if limits else None
+
+
+def cgroup_dirs(base: str, path: str) -> 'list[str]':
+    """The process's cgroup directory under *base* and each ancestor's up to
+    *base* itself, those that exist. Without a cgroup namespace a container
+    sees its host-side path in /proc/self/cgroup while its own cgroup is
+    mounted at *base*, so the walk always ends there."""
+    relative = path.strip('/')
+    dirs = []
+    while True:
+        directory = os.path.join(base, relative) if relative else base
+        if os.path.isdir(directory):
+            dirs.append(directory)
+        if not relative:
+            return dirs
+        relative = os.path.dirname(relative)
+
+
+def read_cgroup_file(path: str) -> 'str | None':
+    """A cgroup (or /proc) file's stripped text, or None if it can't be read."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _v2_limit(directory: str) -> 'list[float]':
+    """cpu.max is "<quota> <period>" in microseconds, or "max <period>"."""
+    text = read_cgroup_file(os.path.join(directory, 'cpu.max'))
+    try:
+        quota, period = text.split()  # type: ignore[union-attr]
+        if quota != 'max' and int(period) > 0:
+            return [int(quota) / int(period)]
+    except (AttributeError, ValueError):
+        pass
+    return []
+
+
+def _v1_limit(directory: str) -> 'list[float]':
+    """cpu.cfs_quota_us is -1 when unlimited."""
+    quota = read_cgroup_file(os.path.join(directory, 'cpu.cfs_quota_us'))
+    period = read_cgroup_file(os.path.join(directory, 'cpu.cfs_period_us'))
+    try:
+        if int(quota) > 0 and int(period) > 0:  # type: ignore[arg-type]
+            return [int(quota) / int(period)]  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        pass
+    return []
@@ -45,10 +45,14 @@ from dataclasses import dataclass
 from typing import Any, Callable, Protocol
 
 from conversion_view import ConversionView, Notice
+from fused_lut import (FUSED_FILTER, FUSED_RESIZED_FILTER, FUSED_TONEMAPPERS,
+                       LUT_ONLY_TONEMAPPERS)
 from utils import (VULKAN_DEVICE_ARGS, VULKAN_CUDA_DEVICE_ARGS,
-                   build_libplacebo_filter, is_gpu_only_tonemapper,
-                   FFMPEG_CONVERT_FILTER, get_lut_filter_path,
-                   FFMPEG_EXECUTABLE)
+                   build_libplacebo_filter, classify_source,
+                   SOURCE_HLG, SOURCE_PQ, SOURCE_SDR,
+                   FFMPEG_CONVERT_FILTER, FFMPEG_LINEARIZE_FILTER,
+                   FFMPEG_TONEMAP_FILTER, LINEAR_RESIZE_FILTER,
+                   crop_filter, get_lut_filter_path, require_ffmpeg)
 
 
 class RequestLike(Protocol):
@@ -83,6 +87,86 @@ class RequestLike(Protocol):
     def licensed(self) -> bool: ...
     @property
     def lut_enabled(self) -> bool: ...
+    @property
+    def extra_outputs(self) -> 'tuple[OutputSpec, ...]': ...
+    @property
+    def fused_lut(self) -> bool: ...
+    @property
+    def output_height(self) -> 'int | None': ...
+    @property
+    def auto_crop(self) -> bool: ...
+
+    def with_overrides(self, **changes: Any) -> 'RequestLike':
+        """A copy with *changes* applied -- dataclasses.replace, for the
+        frozen dataclass ConversionRequest is."""
+        ...
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    """One more deliverable from the same conversion: a fan-out request
+    writes its own output_path plus one file per spec, all from a single
+    decode and tonemap pass (see build()).
+
+    Each None field inherits the request's own value. codec is 'h264' or
+    'hevc' to pick the output codec instead of this module's usual choice
+    (HEVC for an HEVC source or 12-bit, H.264 otherwise) -- the mandatory
+    swaps still win, since no H.264 encoder here can write 12-bit, nor a
+    hardware one 10-bit. height scales that output down (width follows the
+    aspect ratio); None keeps the source size.
+    """
+    output_path: str
+    bit_depth: 'int | None' = None
+    quality: 'int | None' = None
+    quality_mode: 'str | None' = None
+    codec: 'str | None' = None
+    height: 'int | None' = None
+
+    def apply(self, request: RequestLike) -> RequestLike:
+        """*request* as this output sees it: its path, bit depth and
+        quality settings swapped in, and no further outputs of its own."""
+        return request.with_overrides(
+            output_path=self.output_path,
+            bit_depth=request.bit_depth if self.bit_depth is None else self.bit_depth,
+            quality=request.quality if self.quality is None else self.quality,
+            quality_mode=(request.quality_mode if self.quality_mode is None
+                          else self.quality_mode),
+            output_height=self.height, extra_outputs=())
+
+
+def requested_crop(request: RequestLike,
+                   probes: 'Probes') -> 'tuple[int, int, int, int] | None':
+    """The black-bar crop (width, height, x, y) this request encodes, or None
+    for the whole frame: auto_crop off, no crop probe supplied, or nothing
+    found worth removing. Only an auto_crop request calls the probe, so no
+    other conversion pays for its decode."""
+    if not request.auto_crop or probes.resolve_crop is None:
+        return None
+    return probes.resolve_crop()
+
+
+def _cropped(properties: 'dict[str, Any]',
+             crop: 'tuple[int, int, int, int] | None') -> 'dict[str, Any]':
+    """*properties* as the filter chain after the crop sees them: the crop's
+    size in place of the source's, so output_size scales what is left."""
+    if crop is None:
+        return properties
+    return dict(properties, width=crop[0], height=crop[1])
+
+
+def output_size(properties: 'dict[str, Any]',
+                height: 'int | None') -> 'tuple[int, int] | None':
+    """The (width, height) a request's output_height resizes the source to,
+    or None to keep the source size: no height asked for, one no smaller
+    than the source's (upscaling adds pixels to encode and no detail), or a
+    source whose size didn't probe. Width follows the aspect ratio, and both
+    are even, as 4:2:0 chroma needs."""
+    src_w, src_h = properties.get('width'), properties.get('height')
+    if not height or not src_w or not src_h or height >= src_h:
+        return None
+    out_h = max(2, height - height % 2)
+    out_w = max(2, round(src_w * out_h / src_h / 2) * 2)
+    return out_w, out_h
 
 
 @dataclass(frozen=True)
@@ -94,7 +178,8 @@ class TonemapPlan:
 
 
 def _tonemap_plan(request: RequestLike, properties: 'dict[str, Any]',
-                  resolve_libplacebo_available: 'Callable[[], bool]') -> TonemapPlan:
+                  resolve_libplacebo_available: 'Callable[[], bool]',
+                  source: str = SOURCE_PQ) -> TonemapPlan:
     """12-bit forces the CPU pipeline outright -- no hardware encoder (any
     vendor) has a 12-bit HEVC profile in its API, a fixed silicon
     limitation. Dolby Vision profile 5 has no HDR10-compatible base layer,
@@ -103,7 +188,9 @@ def _tonemap_plan(request: RequestLike, properties: 'dict[str, Any]',
     libplacebo even on an otherwise-CPU run -- only the tonemap step moves
     to the GPU, encoding still follows the vendor dispatch in
     _gpu_device_args. Profiles 7/8 carry an HDR10-compatible base layer and
-    need no special handling here.
+    need no special handling here. An SDR *source* (see
+    utils.classify_source) has nothing to tonemap, so it never asks for
+    libplacebo -- nor probes for it.
 
     resolve_libplacebo_available is a parameter, not a direct call to
     utils.vulkan_libplacebo_available, so this module never imports a
@@ -116,7 +203,8 @@ def _tonemap_plan(request: RequestLike, properties: 'dict[str, Any]',
 
     dovi_needs_rpu = bool(properties.get('is_dolby_vision')
                          and properties.get('dovi_profile') == 5)
-    use_libplacebo = (use_gpu or dovi_needs_rpu) and resolve_libplacebo_available()
+    use_libplacebo = ((use_gpu or dovi_needs_rpu) and source != SOURCE_SDR
+                      and resolve_libplacebo_available())
 
     notices: 'list[Notice]' = []
     if dovi_needs_rpu and not use_libplacebo:
@@ -224,25 +312,83 @@ def _gpu_device_args(plan: TonemapPlan,
                    use_cuda_interop=use_cuda_interop, notices=notices)
 
 
-def _filter_args(request: RequestLike, plan: TonemapPlan, gpu: GpuPlan) -> str:
+def _filter_args(request: RequestLike, plan: TonemapPlan, gpu: GpuPlan,
+                 fused_lut_path: 'str | None' = None,
+                 source: str = SOURCE_PQ,
+                 size: 'tuple[int, int] | None' = None,
+                 crop: 'tuple[int, int, int, int] | None' = None) -> str:
     """The tonemap filter chain body, without the [0:v:0]...[vout] wrapper
     -- build() owns that, since it also owns the -filter_complex
     flag itself.
 
-    Raises ValueError for a GPU-only tonemapper (e.g. bt.2390) forced onto
-    the CPU zscale path, which has no equivalent -- unchanged from the
-    pre-split function."""
+    *crop* (see requested_crop) goes first, so every stage after it -- the
+    tonemap, any resize, the encoder -- only sees the picture inside the
+    black bars. It is a CPU filter: on the libplacebo path it runs before
+    the upload, which is why _video_plan turns CUDA interop off for a
+    cropped run.
+
+    Raises ValueError as _tonemap_chain does."""
+    chain = _tonemap_chain(request, plan, gpu, fused_lut_path, source, size)
+    if crop is None:
+        return chain
+    return crop_filter(crop) if chain == 'null' else f'{crop_filter(crop)},{chain}'
+
+
+def _tonemap_chain(request: RequestLike, plan: TonemapPlan, gpu: GpuPlan,
+                   fused_lut_path: 'str | None' = None,
+                   source: str = SOURCE_PQ,
+                   size: 'tuple[int, int] | None' = None) -> str:
+    """_filter_args' chain from the (possibly cropped) source picture on.
+
+    *fused_lut_path* (already escaped for a filtergraph) swaps the CPU
+    chain for its one-lookup equivalent -- see fused_lut.py. eq=gamma
+    follows it only when it would change something.
+
+    An SDR *source* gets no color filters at all: only eq=gamma when it
+    would change something, else a null pass so the graph keeps its shape.
+    An HLG one runs the same chains as PQ -- zscale linearizes by the
+    frame's own transfer tag, and the fused LUT is baked for HLG.
+
+    *size* (see output_size) resizes in linear light, before the tonemap:
+    LINEAR_RESIZE_FILTER after the CPU chain's linearization,
+    FUSED_RESIZED_FILTER for the fused LUT, libplacebo's own w/h (which
+    downscales in linear light too), and for an SDR source a round trip
+    through linear light around the resize.
+
+    Raises ValueError for a libplacebo-only tonemapper (e.g. bt.2390) on
+    the CPU path with no fused LUT to run it: zscale's tonemap has no
+    equivalent, and the LUT is the only CPU implementation."""
     tonemapper = request.tonemapper.lower()
+    gamma_is_identity = abs(request.gamma - 1.0) < 1e-9
+    resize = LINEAR_RESIZE_FILTER.format(width=size[0], height=size[1]) if size else ''
+    if source == SOURCE_SDR:
+        chain = [f'zscale=t=linear,{resize},zscale=t=bt709:m=bt709:r=tv'] if size else []
+        if not gamma_is_identity:
+            chain.append(f'eq=gamma={request.gamma}')
+        return ','.join(chain) or 'null'
     if plan.use_libplacebo:
+        width, height = size or ('iw', 'ih')
         return build_libplacebo_filter(
-            request.gamma, tonemapper, cuda_input=gpu.use_cuda_interop,
-            lut_enabled=request.lut_enabled)
-    if is_gpu_only_tonemapper(tonemapper):
+            request.gamma, tonemapper, width=width, height=height,
+            cuda_input=gpu.use_cuda_interop, lut_enabled=request.lut_enabled)
+    if tonemapper in LUT_ONLY_TONEMAPPERS and fused_lut_path is None:
         raise ValueError(
-            f"{tonemapper} requires GPU tonemapping; this item's "
-            "settings force CPU processing — change the tonemapper "
-            "or output bit depth."
+            f"{tonemapper} requires GPU tonemapping or its CPU lookup "
+            "table, and the lookup table could not be created — check "
+            "that the cache folder is writable, or change the tonemapper."
         )
+    if fused_lut_path is not None:
+        if size:
+            chain = FUSED_RESIZED_FILTER.format(
+                width=size[0], height=size[1], lut_path=fused_lut_path)
+        else:
+            chain = FUSED_FILTER.format(lut_path=fused_lut_path)
+        if not gamma_is_identity:
+            chain += f',eq=gamma={request.gamma}'
+        return chain
+    if size:
+        return ','.join([FFMPEG_LINEARIZE_FILTER, resize, FFMPEG_TONEMAP_FILTER.format(
+            gamma=request.gamma, tonemapper=tonemapper, lut_path=get_lut_filter_path())])
     return FFMPEG_CONVERT_FILTER.format(
         gamma=request.gamma, tonemapper=tonemapper, lut_path=get_lut_filter_path())
 
@@ -257,7 +403,7 @@ _MP4_FAMILY = {'mp4', 'm4v', 'mov'}
 
 
 def _container_stream_args(
-    output_path: str, properties: 'dict[str, Any]'
+    output_path: str, properties: 'dict[str, Any]', input_index: int = 0
 ) -> 'tuple[list[str], list[str], list[str]]':
     """Decide subtitle mapping and audio/subtitle codecs for the output
     container.
@@ -268,11 +414,15 @@ def _container_stream_args(
     that no MP4 codec can represent. Non-MP4 containers (notably MKV) keep
     the original copy-everything behavior.
 
+    *input_index* is which ffmpeg input the source's audio/subtitles come
+    from: 0 for a normal conversion, 1 for the segmented path's final mux,
+    where input 0 is the concatenated video.
+
     Returns (subtitle_map_args, audio_codec_args, subtitle_codec_args).
     """
     ext = os.path.splitext(output_path)[1].lower().lstrip('.')
     if ext not in _MP4_FAMILY:
-        return (['-map', '0:s?'], ['-c:a', 'copy'], ['-c:s', 'copy'])
+        return (['-map', f'{input_index}:s?'], ['-c:a', 'copy'], ['-c:s', 'copy'])
 
     audio_codec = (properties.get('audio_codec') or '').lower()
     if audio_codec and audio_codec not in _MP4_AUDIO_OK:
@@ -285,7 +435,7 @@ def _container_stream_args(
     subtitle_map_args = []
     for stream in properties.get('subtitle_streams', []):
         if (stream.get('codec_name') or '').lower() in _TEXT_SUBTITLES:
-            subtitle_map_args += ['-map', f"0:{stream['index']}"]
+            subtitle_map_args += ['-map', f"{input_index}:{stream['index']}"]
     subtitle_codec_args = ['-c:s', 'mov_text'] if subtitle_map_args else []
 
     return (subtitle_map_args, audio_codec_args, subtitle_codec_args)
@@ -298,7 +448,8 @@ class StreamArgs:
     subtitle_codec_args: 'list[str]'
 
 
-def _stream_map_args(request: RequestLike, properties: 'dict[str, Any]') -> StreamArgs:
+def _stream_map_args(request: RequestLike, properties: 'dict[str, Any]',
+                     input_index: int = 0) -> StreamArgs:
     """Stream mapping plus the free/Pro Dolby Vision audio tier split.
 
     Pro keeps the container-aware passthrough _container_stream_args decides
@@ -306,13 +457,13 @@ def _stream_map_args(request: RequestLike, properties: 'dict[str, Any]') -> Stre
     always preserved). Free is restricted to the first audio stream,
     downmixed to 2-channel stereo AAC, regardless of container."""
     subtitle_map_args, audio_codec_args, subtitle_codec_args = \
-        _container_stream_args(request.output_path, properties)
+        _container_stream_args(request.output_path, properties, input_index)
 
     if properties.get('is_dolby_vision') and not request.licensed:
-        audio_map_args = ['-map', '0:a:0?']
+        audio_map_args = ['-map', f'{input_index}:a:0?']
         audio_codec_args = list(_FREE_DOVI_AUDIO_ARGS)
     else:
-        audio_map_args = ['-map', '0:a?']
+        audio_map_args = ['-map', f'{input_index}:a?']
 
     return StreamArgs(map_args=audio_map_args + subtitle_map_args,
                       audio_codec_args=audio_codec_args,
@@ -337,17 +488,21 @@ class CodecPlan:
 
 
 def _codec_and_pix_fmt(request: RequestLike, properties: 'dict[str, Any]',
-                       active_encoder: 'str | None') -> CodecPlan:
+                       active_encoder: 'str | None',
+                       prefer: 'str | None' = None) -> CodecPlan:
     """Pixel format, the two H.264->HEVC preservation/mandatory swaps, and
     codec selection -- including produces_hevc, computed here rather than
     left for a caller to reconstruct from active_encoder plus want_libx265,
     since active_encoder can be reassigned inside this same function by the
     swap below and a caller holding the pre-swap value would compute the
     wrong hvc1-tag decision (see the module docstring's HEVC-swap-ordering
-    note)."""
+    note).
+
+    *prefer* is an OutputSpec's codec: 'hevc' swaps as if the source were
+    HEVC, 'h264' as if it weren't. The mandatory swaps ignore it."""
     bit_depth = request.bit_depth
     codec_name = (properties.get('codec_name') or '').lower()
-    source_is_hevc = codec_name == 'hevc'
+    source_is_hevc = codec_name == 'hevc' if prefer is None else prefer == 'hevc'
 
     # Output Color Depth: 10-bit (free) / 12-bit (Pro, CPU-only) avoids the
     # banding that gradient-heavy HDR sources produce once crushed down to
@@ -450,51 +605,125 @@ class Probes:
     resolve_gpu_encoder: 'Callable[[], str | None]'
     resolve_libplacebo_available: 'Callable[[], bool]'
     resolve_cuda_interop_available: 'Callable[[], bool]'
-
-
-def build(request: RequestLike, properties: 'dict[str, Any]',
-         probes: Probes, view: ConversionView) -> 'list[str]':
-    """Construct the ffmpeg argv for one conversion.
-
-    The one impure function in this module: it owns view and decides
-    notice-emission order. Notices from _tonemap_plan and _gpu_device_args
-    are delivered immediately after each of those calls returns -- before
-    _filter_args runs, since _filter_args is the only helper that can raise
-    and a raise must never suppress a notice that a pre-split caller would
-    already have seen (the pre-split function emitted these notices inline,
-    textually before the equivalent of the _filter_args call)."""
-    tone = _tonemap_plan(request, properties, probes.resolve_libplacebo_available)
+    # (tonemapper, source transfer) -> the escaped path of this source's
+    # fused LUT (generating it on first use), or None to run the normal chain
+    # after all. Lazy like the three above: only a CPU-tonemapped request
+    # with fused_lut set, an HLG source, or a tonemapper only the LUT
+    # implements ever calls it, so nothing else probes the source's HDR
+    # metadata or touches the LUT cache.
+    resolve_fused_lut: 'Callable[[str, str], str | None] | None' = None
+    # -> the source's black-bar crop (width, height, x, y), or None. Called
+    # only for an auto_crop request (see requested_crop): detection decodes
+    # a frame at several positions of the file.
+    resolve_crop: 'Callable[[], tuple[int, int, int, int] | None] | None' = None
+    # -> the filter names this ffmpeg build has (utils.ffmpeg_filters), empty
+    # when they couldn't be listed. Checked against the chain _video_plan
+    # built, so a build without zscale or lut3d fails with a message that
+    # says so, not ffmpeg's "No such filter" in the log.
+    resolve_filters: 'Callable[[], frozenset[str]] | None' = None
+
+
+def _video_plan(request: RequestLike, properties: 'dict[str, Any]',
+                probes: Probes, view: ConversionView,
+                crop: 'tuple[int, int, int, int] | None' = None
+                ) -> 'tuple[GpuPlan, str]':
+    """The GPU plan and tonemap filter body, delivering each planning step's
+    notices as soon as that step returns -- before _filter_args runs, since
+    _filter_args is the only helper that can raise and a raise must never
+    suppress a notice that a pre-split caller would already have seen (the
+    pre-split function emitted these notices inline, textually before the
+    equivalent of the _filter_args call). Shared by build() and
+    build_segmented() so a split encode plans its video exactly once.
+
+    *crop* is requested_crop's box; *properties* are the uncropped
+    source's."""
+    source = classify_source(properties)
+    tone = _tonemap_plan(request, properties, probes.resolve_libplacebo_available, source)
     for notice in tone.notices:
         view.notify(notice)
 
+    # NVDEC's frames stay in CUDA memory on the interop path, out of reach
+    # of the CPU crop filter -- a cropped run decodes on the CPU instead
+    # (still tonemapping on the GPU) without probing for interop at all.
     gpu = _gpu_device_args(tone, probes.resolve_gpu_encoder,
-                           probes.resolve_cuda_interop_available)
+                           probes.resolve_cuda_interop_available
+                           if crop is None else (lambda: False))
     for notice in gpu.notices:
         view.notify(notice)
 
-    filter_str = _filter_args(request, tone, gpu)  # may raise ValueError
+    fused_lut_path = None
+    tonemapper = request.tonemapper.lower()
+    size = output_size(_cropped(properties, crop), request.output_height)
+    # HLG takes the LUT unasked: it is the cheap chain for that source -- but
+    # not when resizing, where FUSED_RESIZED_FILTER's round trip through PQ
+    # clips the overshoot above 10,000 nits that HLG's Y'CbCr can decode to,
+    # and the zscale chain, tonemapping the output's pixels only, is cheap
+    # anyway.
+    wants_lut = (tonemapper in LUT_ONLY_TONEMAPPERS
+                 or (tonemapper in FUSED_TONEMAPPERS
+                     and (request.fused_lut or (source == SOURCE_HLG and not size))))
+    if (wants_lut and source != SOURCE_SDR and not tone.use_libplacebo
+            and probes.resolve_fused_lut is not None):
+        fused_lut_path = probes.resolve_fused_lut(
+            tonemapper, SOURCE_PQ if size else source)
+
+    filter_str = _filter_args(request, tone, gpu, fused_lut_path, source, size,
+                              crop)  # may raise ValueError
+    if probes.resolve_filters is not None:
+        _check_filters(filter_str, probes.resolve_filters())
+    return gpu, filter_str
+
+
+# The CPU chains' filters that an ffmpeg build can lack: zscale needs zimg,
+# and minimal builds leave out tonemap or lut3d. libplacebo isn't listed:
+# the libplacebo chain is only built once its own probe has run it.
+_OPTIONAL_FILTERS = ('zscale', 'tonemap', 'lut3d')
+
+
+def _check_filters(filter_str: str, available: 'frozenset[str]') -> None:
+    """Raise ValueError naming any filter *filter_str* uses that is not in
+    *available*. An empty *available* (the list couldn't be read) checks
+    nothing, and ffmpeg has the last word as before."""
+    if not available:
+        return
+    used = {part.split('=', 1)[0].strip() for part in filter_str.split(',')}
+    missing = [name for name in _OPTIONAL_FILTERS if name in used and name not in available]
+    if missing:
+        raise ValueError(
+            f"This ffmpeg build has no {' or '.join(missing)} filter, which this "
+            "conversion needs. Reinstall the application, or use an ffmpeg "
+            "built with it."
+        )
+
 
-    cmd = [FFMPEG_EXECUTABLE, '-loglevel', 'info']
-    cmd += gpu.pre_input_args
-    cmd += ['-i', os.path.normpath(request.input_path)]
-    cmd += [
-        '-filter_complex', f'[0:v:0]{filter_str}[vout]',
-        '-map', '[vout]',
-    ]
+def _hvc1_tag_args(request: RequestLike, codec_plan: CodecPlan) -> 'list[str]':
+    """HEVC in MP4/MOV must be tagged 'hvc1': ffmpeg's default sample entry
+    is 'hev1', which QuickTime/Apple devices (and some Windows players)
+    refuse to recognize even though the stream is fine. Matroska has no
+    such codec tag, so MKV is left alone."""
+    out_ext = os.path.splitext(request.output_path)[1].lower().lstrip('.')
+    if codec_plan.produces_hevc and out_ext in ('mp4', 'mov'):
+        return ['-tag:v', 'hvc1']
+    return []
+
+
+def _output_args(request: RequestLike, properties: 'dict[str, Any]',
+                 active_encoder: 'str | None', video_label: str,
+                 prefer: 'str | None' = None,
+                 threads: 'int | None' = None) -> 'list[str]':
+    """Everything after the filter graph for one output file: its maps,
+    encoder and container args, ending with its path."""
+    cmd = ['-map', video_label]
 
     streams = _stream_map_args(request, properties)
     cmd += streams.map_args
 
-    codec_plan = _codec_and_pix_fmt(request, properties, gpu.active_encoder)
+    codec_plan = _codec_and_pix_fmt(request, properties, active_encoder, prefer)
     cmd += _encoder_rate_args(request, properties, codec_plan.codec)
+    if threads:
+        cmd += ['-threads', str(threads)]
 
-    # HEVC in MP4/MOV must be tagged 'hvc1': ffmpeg's default sample entry
-    # is 'hev1', which QuickTime/Apple devices (and some Windows players)
-    # refuse to recognize even though the stream is fine. Matroska has no
-    # such codec tag, so MKV is left alone.
-    out_ext = os.path.splitext(request.output_path)[1].lower().lstrip('.')
-    if codec_plan.produces_hevc and out_ext in ('mp4', 'mov'):
-        cmd += ['-tag:v', 'hvc1']
+    cmd += _hvc1_tag_args(request, codec_plan)
 
     cmd += [
         '-r', str(properties['frame_rate']),
@@ -507,8 +736,301 @@ def build(request: RequestLike, properties: 'dict[str, Any]',
         '-map_metadata', '0',  # Copy all metadata
         '-movflags', '+faststart',  # Optimize for streaming playback
         os.path.normpath(request.output_path),
-        '-y'
     ]
+    return cmd
+
+
+# What a command builder's RuntimeError starts with when there is no ffmpeg
+# to put at the head of its argv (see utils.require_ffmpeg).
+_FFMPEG_MISSING = "Cannot start the conversion"
+
+# Per container, the source video codecs a stream copy may carry: the ones
+# this app would encode there itself. .m4v is H.264-only (see
+# ConversionManager._HIGH_BIT_DEPTH_INCOMPATIBLE_EXTS).
+_STREAM_COPY_CODECS = {
+    'mp4': frozenset({'h264', 'hevc'}),
+    'mov': frozenset({'h264', 'hevc'}),
+    'mkv': frozenset({'h264', 'hevc'}),
+    'm4v': frozenset({'h264'}),
+}
+
+
+def stream_copy_ok(request: RequestLike, properties: 'dict[str, Any]',
+                   crop: 'tuple[int, int, int, int] | None' = None) -> bool:
+    """Whether this request can copy the source's video as-is instead of
+    encoding it: an SDR source (nothing to tonemap), no gamma change, a
+    codec the output container takes, no deeper than the requested bit
+    depth, no resize or *crop* (see requested_crop), and a single output.
+    Quality settings are not a reason to re-encode -- a copy is the
+    source's own quality, with no generation loss, in seconds instead of a
+    full encode."""
+    if request.extra_outputs or abs(request.gamma - 1.0) >= 1e-9 or crop is not None:
+        return False
+    if output_size(properties, request.output_height) is not None:
+        return False
+    if classify_source(properties) != SOURCE_SDR:
+        return False
+    ext = os.path.splitext(request.output_path)[1].lower().lstrip('.')
+    codec = (properties.get('codec_name') or '').lower()
+    return (codec in _STREAM_COPY_CODECS.get(ext, frozenset())
+            and properties.get('bit_depth', 8) <= request.bit_depth)
+
+
+def _stream_copy_command(request: RequestLike, properties: 'dict[str, Any]') -> 'list[str]':
+    """The remux build() runs when stream_copy_ok: video copied, audio and
+    subtitles handled exactly as in an encode, and no GPU planning at all --
+    nothing is decoded, so nothing needs probing."""
+    streams = _stream_map_args(request, properties)
+    source_is_hevc = (properties.get('codec_name') or '').lower() == 'hevc'
+    cmd = [require_ffmpeg(_FFMPEG_MISSING), '-loglevel', 'info',
+           '-i', os.path.normpath(request.input_path),
+           '-map', '0:v:0']
+    cmd += streams.map_args
+    cmd += ['-c:v', 'copy']
+    cmd += _hvc1_tag_args(request, CodecPlan(codec='copy', pix_fmt='',
+                                             produces_hevc=source_is_hevc))
+    cmd += streams.audio_codec_args
+    cmd += streams.subtitle_codec_args
+    cmd += [
+        '-map_metadata', '0',
+        '-movflags', '+faststart',
+        os.path.normpath(request.output_path),
+        '-y',
+    ]
+    return cmd
+
+
+# The fully-GPU tail build_libplacebo_filter ends with on the CUDA interop
+# path: frames stay in CUDA memory for NVENC. Per-output scaling and pixel
+# formats are CPU filters, so a fan-out brings them down once, before split.
+_CUDA_FRAMES_TAIL = 'hwmap=reverse=1:derive_device=cuda'
+
+
+def _fan_out_graph(filter_str: str, sizes: 'list[tuple[int, int] | None]',
+                   resized_to: 'tuple[int, int] | None' = None) -> 'tuple[str, list[str]]':
+    """The -filter_complex for a fan-out, and the label each output maps.
+
+    The tonemap chain runs once and split copies its frames (by reference --
+    no pixel copy) to one branch per output; a branch only gets a filter of
+    its own when that output is scaled. *sizes* is each output's
+    output_size, None for the source's. *resized_to* is the size
+    *filter_str* already resized to (see build()), which an output asking
+    for it needs no scale for."""
+    if filter_str.endswith(_CUDA_FRAMES_TAIL):
+        filter_str += ',hwdownload,format=nv12'
+    labels = [f'[s{i}]' for i in range(len(sizes))]
+    graph = [f'[0:v:0]{filter_str}[vt]', f"[vt]split={len(sizes)}{''.join(labels)}"]
+    video_labels = []
+    for i, size in enumerate(sizes):
+        if size is not None and size != resized_to:
+            graph.append(f'{labels[i]}scale={size[0]}:{size[1]}[vout{i}]')
+            video_labels.append(f'[vout{i}]')
+        else:
+            video_labels.append(labels[i])
+    return ';'.join(graph), video_labels
+
+
+def _global_thread_args(threads: 'int | None') -> 'list[str]':
+    """-filter_threads and the decoder's -threads, before the input. ffmpeg
+    sizes both from the host's cores unless told; the encoder's own -threads
+    goes with each output's encoder args."""
+    if not threads:
+        return []
+    return ['-filter_threads', str(threads), '-threads', str(threads)]
+
+
+def build(request: RequestLike, properties: 'dict[str, Any]',
+          probes: Probes, view: ConversionView,
+          threads: 'int | None' = None) -> 'list[str]':
+    """Construct the ffmpeg argv for one conversion.
+
+    The one impure function in this module (with build_segmented): it owns
+    view and decides notice-emission order -- see _video_plan.
+
+    *threads* caps the decoder, filter graph and every encoder at that many
+    threads each (cpu_budget.threads_per_job); None leaves ffmpeg's own
+    one-per-core default.
+
+    With extra_outputs this is still one ffmpeg process: one decode, one
+    tonemap, then split into every output, each with its own encoder args.
+    The GPU decision is shared, so one 12-bit output keeps the whole run on
+    the CPU pipeline. So is the resize before the tonemap: the shared chain
+    resizes to the largest output when every output is resized, and the
+    smaller ones scale down from there.
+
+    With auto_crop, the crop runs first and everything after it -- the
+    resize included -- works on the cropped picture.
+
+    An SDR source that stream_copy_ok accepts is remuxed instead."""
+    crop = requested_crop(request, probes)
+    if stream_copy_ok(request, properties, crop):
+        logging.info("SDR source: copying its video stream instead of converting it.")
+        return _stream_copy_command(request, properties)
+    extras = list(request.extra_outputs)
+    plan_request = request
+    heights = [request.output_height] + [s.height for s in extras]
+    resized_to = None
+    if extras:
+        deepest = max([request.bit_depth] + [s.bit_depth for s in extras
+                                             if s.bit_depth is not None])
+        sized = [h for h in heights if h]
+        if (len(sized) == len(heights)
+                and output_size(_cropped(properties, crop), max(sized)) is not None):
+            resized_to = max(sized)
+        plan_request = request.with_overrides(bit_depth=deepest, output_height=resized_to)
+    gpu, filter_str = _video_plan(plan_request, properties, probes, view, crop)
+
+    cmd = [require_ffmpeg(_FFMPEG_MISSING), '-loglevel', 'info']
+    cmd += gpu.pre_input_args
+    cmd += _global_thread_args(threads)
+    cmd += ['-i', os.path.normpath(request.input_path)]
+
+    if not extras:
+        cmd += ['-filter_complex', f'[0:v:0]{filter_str}[vout]']
+        cmd += _output_args(request, properties, gpu.active_encoder, '[vout]',
+                            threads=threads)
+    else:
+        specs: 'list[OutputSpec | None]' = [None, *extras]
+        # Every branch follows output_size's rules, as the main output does:
+        # no upscale, and even sizes for 4:2:0.
+        cropped = _cropped(properties, crop)
+        graph, labels = _fan_out_graph(
+            filter_str, [output_size(cropped, h) for h in heights],
+            output_size(cropped, resized_to))
+        cmd += ['-filter_complex', graph]
+        for spec, label in zip(specs, labels):
+            if spec is None:
+                cmd += _output_args(request, properties, gpu.active_encoder, label,
+                                    threads=threads)
+            else:
+                cmd += _output_args(spec.apply(request), properties,
+                                    gpu.active_encoder, label, spec.codec, threads)
+    cmd += ['-y']
 
     logging.debug(f"Constructed ffmpeg command: {' '.join(cmd)}")
     return cmd
+
+
+def segment_bounds(cut_points: 'list[float]', duration: float,
+                   start: float = 0.0) -> 'list[tuple[float, float | None]]':
+    """(start, length) for each segment of a split encode, from the keyframe
+    *cut_points* between them. *start* is where the first segment begins:
+    the video's first keyframe, which sits slightly after 0 whenever the
+    audio starts first (an AAC priming delay makes the container's
+    start_time negative) -- starting at 0 there makes ffmpeg pad the
+    segment's head with a duplicated frame. The last segment's length is
+    None -- it runs to the end of the file, so a container duration that is
+    slightly short (common with MKV) can't clip the final frames.
+
+    Cuts at or before *start* or at/after *duration* are ignored: either
+    would produce an empty segment, which the concat demuxer rejects."""
+    starts = [start] + sorted(c for c in set(cut_points) if start < c < duration)
+    ends: 'list[float | None]' = list(starts[1:]) + [None]
+    return [(seg_start, None if end is None else end - seg_start)
+            for seg_start, end in zip(starts, ends)]
+
+
+def _concat_list_line(path: str) -> str:
+    """One line of an ffmpeg concat-demuxer list. The format quotes with
+    single quotes and has no escape inside them, so a literal quote closes
+    the string, emits an escaped quote, and reopens it."""
+    return "file '" + path.replace("'", "'\\''") + "'\n"
+
+
+@dataclass(frozen=True)
+class SegmentedCommands:
+    """Everything a split-and-stitch conversion runs, in order: one
+    video-only encode per segment (independent, so run in parallel), then
+    one stream-copy mux that concatenates them and adds the source's
+    audio/subtitles once. concat_list is the text to write to
+    concat_list_path before the mux runs."""
+    segment_cmds: 'list[list[str]]'
+    segment_paths: 'list[str]'
+    concat_list_path: str
+    concat_list: str
+    concat_cmd: 'list[str]'
+
+
+def build_segmented(request: RequestLike, properties: 'dict[str, Any]',
+                    probes: Probes, view: ConversionView,
+                    bounds: 'list[tuple[float, float | None]]',
+                    work_dir: str,
+                    threads: 'int | None' = None) -> SegmentedCommands:
+    """The split-and-stitch counterpart of build(), for one long file.
+
+    Each segment command is build()'s video pipeline with an input-side
+    -ss/-t, so ffmpeg seeks straight to the segment's keyframe instead of
+    decoding everything before it. Audio, subtitles and metadata are left
+    out of the segments entirely and taken from the source exactly once in
+    the final mux: cutting audio at video keyframes would leave a gap or
+    overlap of up to one audio frame at every join. *threads* caps each
+    segment's decoder, filter graph and encoder as in build(), so N
+    concurrent encodes share the machine instead of each sizing itself to
+    every core.
+
+    Segments are Matroska whatever the output container: MKV takes every
+    codec/pixel format this module can produce, and the final mux rewrites
+    the container anyway."""
+    exe = require_ffmpeg(_FFMPEG_MISSING)
+    gpu, filter_str = _video_plan(request, properties, probes, view,
+                                  requested_crop(request, probes))
+    codec_plan = _codec_and_pix_fmt(request, properties, gpu.active_encoder)
+    encode_args = _encoder_rate_args(request, properties, codec_plan.codec)
+    thread_args = ['-threads', str(threads)] if threads else []
+    input_path = os.path.normpath(request.input_path)
+    # Each -t stops half a frame short of the next segment's first keyframe,
+    # so rounding in the printed timestamps can never pull that keyframe into
+    # this segment as well and show it twice at the join.
+    half_frame = 0.5 / float(properties['frame_rate'])
+
+    segment_cmds: 'list[list[str]]' = []
+    segment_paths: 'list[str]' = []
+    for index, (start, length) in enumerate(bounds):
+        path = os.path.join(work_dir, f'segment_{index:04d}.mkv')
+        cmd = [exe, '-loglevel', 'info']
+        cmd += gpu.pre_input_args
+        cmd += _global_thread_args(threads)
+        cmd += ['-ss', f'{start:.6f}']
+        if length is not None:
+            cmd += ['-t', f'{length - half_frame:.6f}']
+        cmd += ['-i', input_path,
+                '-filter_complex', f'[0:v:0]{filter_str}[vout]',
+                '-map', '[vout]']
+        cmd += encode_args
+        cmd += thread_args
+        cmd += [
+            '-r', str(properties['frame_rate']),
+            '-pix_fmt', codec_plan.pix_fmt,
+            '-strict', '-2',
+            '-an', '-sn', '-dn',
+            path,
+            '-y',
+        ]
+        segment_cmds.append(cmd)
+        segment_paths.append(path)
+
+    concat_list_path = os.path.join(work_dir, 'segments.txt')
+    streams = _stream_map_args(request, properties, input_index=1)
+    concat_cmd = [exe, '-loglevel', 'info',
+                  '-f', 'concat', '-safe', '0', '-i', concat_list_path,
+                  '-i', input_path,
+                  '-map', '0:v:0']
+    concat_cmd += streams.map_args
+    concat_cmd += ['-c:v', 'copy']
+    concat_cmd += _hvc1_tag_args(request, codec_plan)
+    concat_cmd += streams.audio_codec_args
+    concat_cmd += streams.subtitle_codec_args
+    concat_cmd += [
+        '-map_metadata', '1',
+        '-movflags', '+faststart',
+        os.path.normpath(request.output_path),
+        '-y',
+    ]
+
+    logging.debug(f"Constructed {len(segment_cmds)} segment commands; "
+                  f"mux: {' '.join(concat_cmd)}")
+    return SegmentedCommands(
+        segment_cmds=segment_cmds, segment_paths=segment_paths,
+        concat_list_path=concat_list_path,
+        concat_list=''.join(_concat_list_line(p) for p in segment_paths),
+        concat_cmd=concat_cmd)
@@ -0,0 +1,103 @@
+"""ffmpeg's machine-readable progress stream, parsed.
+
+ConversionManager used to regex every stderr line for 'time=' and keep every
+line it had ever seen, so a multi-hour encode held hundreds of thousands of
+stats lines in memory just to show the last 50 if it failed. ffmpeg has a
+purpose-built channel for this instead: `-progress pipe:1` writes one
+key=value per line to stdout, a block per update, each block closed by a
+`progress=continue` (or `progress=end`) line; `-nostats` then silences the
+human-readable stats line on stderr, leaving stderr with only the banner and
+any real errors.
+
+Standard library only, no tkinter, no conversion.py -- a pure parser, like
+ffmpeg_command, so it is testable with a list of strings.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+
+# Inserted straight after the executable by ConversionManager.start_ffmpeg_process,
+# which is also what points stdout at a pipe -- the two only work together.
+PROGRESS_ARGS = ['-progress', 'pipe:1', '-nostats']
+
+# How much stderr a finished run keeps. handle_completion shows the last 50
+# lines; the rest is headroom for a fatal error that ffmpeg follows with a
+# burst of per-stream summary lines.
+STDERR_TAIL_LINES = 200
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """One completed progress block: where the encode is and how fast.
+
+    out_time is seconds of output written so far -- the same clock the old
+    'time=' regex read, now exact (microseconds) instead of centiseconds.
+    speed is ffmpeg's own media-seconds-per-wall-second figure ('2.5x'), or
+    None while it is still 'N/A' in the first block or two.
+    """
+    frame: int
+    fps: float
+    speed: float | None
+    out_time: float
+    total_size: int
+    done: bool
+
+    def percent(self, duration: float) -> float:
+        """Share of *duration* encoded, 0-100. Clamped: out_time can overshoot
+        a container's declared duration by a frame or two."""
+        if not duration:
+            return 0.0
+        return max(0.0, min(self.out_time / duration * 100, 100.0))
+
+    def eta(self, duration: float) -> float | None:
+        """Seconds of wall time left at the current speed, or None until
+        ffmpeg reports one."""
+        if not self.speed:
+            return None
+        return max(0.0, duration - self.out_time) / self.speed
+
+
+def _float_or_none(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        # 'N/A' is what ffmpeg prints for any figure it can't compute yet.
+        return None
+
+
+class ProgressParser:
+    """Accumulates key=value lines; feed() returns a ProgressEvent each time a
+    block closes and None otherwise. One parser per ffmpeg process."""
+
+    def __init__(self) -> None:
+        self._fields: dict[str, str] = {}
+
+    def feed(self, line: str) -> ProgressEvent | None:
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        if key != 'progress':
+            self._fields[key] = value
+            return None
+        fields, self._fields = self._fields, {}
+        # out_time_us is the modern key. Older builds only have out_time_ms,
+        # which -- despite the name -- has always been microseconds too.
+        out_time_us = _float_or_none(fields.get('out_time_us'))
+        if out_time_us is None:
+            out_time_us = _float_or_none(fields.get('out_time_ms'))
+        speed = _float_or_none(fields.get('speed', '').rstrip('x') or None)
+        return ProgressEvent(
+            frame=int(_float_or_none(fields.get('frame')) or 0),
+            fps=_float_or_none(fields.get('fps')) or 0.0,
+            speed=speed or None,
+            out_time=max(0.0, (out_time_us or 0.0) / 1_000_000),
+            total_size=int(_float_or_none(fields.get('total_size')) or 0),
+            done=value == 'end',
+        )
+
+
+def stderr_tail() -> 'deque[str]':
+    """A fixed-size buffer for a run's stderr: appending past the limit drops
+    the oldest line, so memory stays flat however long the encode runs."""
+    return deque(maxlen=STDERR_TAIL_LINES)
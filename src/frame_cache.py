@@ -0,0 +1,285 @@
+"""Decoded preview frames in memory, bounded by bytes rather than by count.
+
+A preview frame is extracted at the panes' own size, anywhere from a few
+hundred kilobytes to the ~33 MB of a 4K frame as PIL holds it (four bytes a
+pixel, RGB included). An entry cap can't bound that: 48 small frames are
+nothing, 48 large ones are over a gigabyte and a half. FrameCache charges
+each entry its decoded size and evicts least recently used first once the
+total passes its budget.
+
+One cache holds every kind of frame -- originals and each converted
+variant, for every file -- so a batch of queued files shares the budget,
+and switching back to one whose frames are still held is a hit. Each kind
+goes through a section() view, which reads like a dict of its own.
+
+The default budget is a share of the memory actually available: the
+system's (MemAvailable on Linux, the physical memory free on Windows and
+macOS) or, tighter still, what is left under the process's cgroup
+memory.max, so a container's limit is respected the same way cpu_budget
+respects its CPU quota. It is read once, when the cache is made.
+
+No tkinter, no PIL -- the size of a value is whatever the *sizeof*
+callable given to the cache says -- and nothing beyond the standard library
+but cpu_budget's cgroup readers.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator
+
+from cpu_budget import cgroup_dirs, read_cgroup_file
+
+_MIB = 1024 * 1024
+
+# default_budget()'s share of available memory, and the range it is kept
+# in: enough for a few dozen pane-sized frames on a small machine, and never
+# so much that a long session on a large one holds gigabytes of previews.
+_BUDGET_SHARE = 4
+_MIN_BUDGET = 64 * _MIB
+_MAX_BUDGET = 2048 * _MIB
+# When nothing says how much memory is available.
+_FALLBACK_BUDGET = 512 * _MIB
+
+_CGROUP_ROOT = '/sys/fs/cgroup'
+_PROC_CGROUP = '/proc/self/cgroup'
+_PROC_MEMINFO = '/proc/meminfo'
+_V1_MEMORY_MOUNT = 'memory'
+# cgroup v1 reports "no limit" as a page-aligned LONG_MAX.
+_V1_UNLIMITED = 1 << 60
+
+
+class FrameCache:
+    """Least recently used values, evicted once their summed sizes pass
+    *budget* bytes. Safe to use from the preview's worker threads.
+
+    hits, misses and evictions count get() lookups and the entries evicted
+    to make room, for stats() and the log; a value larger than the whole
+    budget is not stored at all."""
+
+    def __init__(self, sizeof: 'Callable[[Any], int]', budget: 'int | None' = None) -> None:
+        self.budget = default_budget() if budget is None else budget
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[tuple[str, Hashable], tuple[Any, int]]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: 'tuple[str, Hashable]', default: Any = None) -> Any:
+        """*key*'s value, now the most recently used, or *default*."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: 'tuple[str, Hashable]', value: Any) -> None:
+        """Store *value* as the most recently used, evicting the least
+        recently used entries until the total fits the budget again."""
+        size = max(0, self._sizeof(value))
+        with self._lock:
+            self._drop(key)
+            if size > self.budget:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def pop(self, key: 'tuple[str, Hashable]', default: Any = None) -> Any:
+        with self._lock:
+            entry = self._drop(key)
+        return default if entry is None else entry[0]
+
+    def _drop(self, key: 'tuple[str, Hashable]') -> 'tuple[Any, int] | None':
+        """Remove *key*'s entry, if any. Runs under _lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+        return entry
+
+    def __contains__(self, key: object) -> bool:
+        """Membership without counting a lookup or refreshing the entry, for
+        planning what to extract."""
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> 'list[tuple[str, Hashable]]':
+        """A snapshot of the keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> 'dict[str, int]':
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size,
+                    'budget': self.budget, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def section(self, name: str) -> 'FrameCacheSection':
+        """A dict-like view of the entries stored under *name*."""
+        return FrameCacheSection(self, name)
+
+
+class FrameCacheSection:
+    """One kind of entry in a FrameCache, keyed as if it had the cache to
+    itself: the cache's key is (name, key)."""
+
+    def __init__(self, cache: FrameCache, name: str) -> None:
+        self.cache = cache
+        self.name = name
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.cache.get((self.name, key), default)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.cache.put((self.name, key), value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        return self.cache.pop((self.name, key), default)
+
+    def __contains__(self, key: object) -> bool:
+        return (self.name, key) in self.cache
+
+    def __iter__(self) -> 'Iterator[Hashable]':
+        return iter([key for name, key in self.cache.keys() if name == self.name])
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def default_budget() -> int:
+    """A quarter of the memory this process can still use, kept within
+    _MIN_BUDGET.._MAX_BUDGET."""
+    available = available_memory()
+    if available is None:
+        return _FALLBACK_BUDGET
+    budget = max(_MIN_BUDGET, min(_MAX_BUDGET, available // _BUDGET_SHARE))
+    logging.debug(f"Preview frame cache budget: {budget // _MIB} MiB "
+                  f"of {available // _MIB} MiB available.")
+    return budget
+
+
+def available_memory() -> 'int | None':
+    """Bytes of memory this process could still allocate without pushing the
+    system into swap or its cgroup into the OOM killer: the smaller of the
+    system's available memory and the cgroup's headroom, or None when
+    neither can be read."""
+    limits = [limit for limit in (_system_available(), _cgroup_headroom())
+              if limit is not None]
+    return min(limits) if limits else None
+
+
+def _system_available() -> 'int | None':
+    if sys.platform == 'win32':
+        return _windows_available()
+    meminfo = _meminfo_available()
+    if meminfo is not None:
+        return meminfo
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _meminfo_available(path: str = _PROC_MEMINFO) -> 'int | None':
+    """MemAvailable from /proc/meminfo, which counts reclaimable page cache
+    that MemFree leaves out."""
+    text = read_cgroup_file(path)
+    for line in (text or '').splitlines():
+        if line.startswith('MemAvailable:'):
+            try:
+                return int(line.split()[1]) * 1024  # reported in kB
+            except (IndexError, ValueError):
+                return None
+    return None
+
+
+def _windows_available() -> 'int | None':
+    if sys.platform != 'win32':
+        return None
+    try:
+        import ctypes
+
+        class _MemoryStatusEx(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong),
+                        ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong),
+                        ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong),
+                        ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong),
+                        ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = _MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(_MemoryStatusEx)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return int(status.ullAvailPhys)
+    except Exception:
+        return None
+
+
+def _cgroup_headroom(cgroup_root: str = _CGROUP_ROOT,
+                     proc_cgroup: str = _PROC_CGROUP) -> 'int | None':
+    """The tightest cgroup memory limit over this process less what its
+    cgroup already uses, or None when there is no limit -- or no cgroups at
+    all, as on Windows and macOS. Walks the cgroup and its ancestors as
+    cpu_budget does for CPU quotas."""
+    text = read_cgroup_file(proc_cgroup)
+    if text is None:
+        return None
+    headrooms: 'list[int]' = []
+    for line in text.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        if not controllers:  # the v2 unified hierarchy
+            files = ('memory.max', 'memory.current')
+            base = cgroup_root
+        elif 'memory' in controllers.split(','):
+            files = ('memory.limit_in_bytes', 'memory.usage_in_bytes')
+            base = os.path.join(cgroup_root, _V1_MEMORY_MOUNT)
+        else:
+            continue
+        for directory in cgroup_dirs(base, path):
+            limit = _read_int(os.path.join(directory, files[0]))
+            if limit is None or limit >= _V1_UNLIMITED:
+                continue
+            used = _read_int(os.path.join(directory, files[1])) or 0
+            headrooms.append(max(0, limit - used))
+    return min(headrooms) if headrooms else None
+
+
+def _read_int(path: str) -> 'int | None':
+    """An integer file's value; None for "max" (v2's no limit) or no file."""
+    try:
+        return int(read_cgroup_file(path))  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
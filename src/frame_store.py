@@ -0,0 +1,195 @@
+"""On-disk cache of preview frames, kept across sessions.
+
+frame_cache holds decoded frames for the life of the app. Reopen a file the
+next day and every seek frame, original and converted, is extracted again
+-- an ffmpeg decode (and tonemap) per position. This store keeps those
+frames under platform_utils.cache_dir(), zlib-compressed, one file each, so
+a file previewed once previews again without running ffmpeg until it
+changes.
+
+A frame is named by a hash of everything that decided its pixels: the
+source file's path, byte size and mtime, the caller's key (for the preview:
+timestamp, tonemapper, LUT on/off, GPU or CPU path and extraction box), the
+identity of the ffmpeg that made it (probe_cache.tool_fingerprint) and the
+store's format version. A changed file or a new ffmpeg simply stops
+matching its old frames, which then age out.
+
+The cap is on bytes, least recently used first out: a hit touches the file's
+mtime, and a write that takes the total past max_bytes deletes the oldest
+frames down to 90% of it. Writes -- compressing included -- run on one
+background thread, so storing a frame never holds up the preview that
+extracted it.
+
+Standard library and probe_cache only, no tkinter, no PIL, no utils.py -- a
+frame is opaque bytes here, and the directory and tool are passed in, so
+tests point a store at a temporary directory.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from probe_cache import tool_fingerprint
+
+_STORE_VERSION = 1
+_MAX_BYTES = 512 * 1024 * 1024
+_SUFFIX = '.frame'
+# Fast over small: a frame is written once, off the UI thread, and read
+# back on a preview that is waiting for it.
+_COMPRESS_LEVEL = 1
+
+
+class FrameStore:
+    """Frames as compressed files in *directory*, at most *max_bytes* of them.
+
+    *tool* is called once, at the first get() or put(), for the path of the
+    ffmpeg the frames come from, so making a store locates nothing. Every
+    error is logged and treated as a miss: a cache that can't be read or
+    written costs a re-extraction, nothing more."""
+
+    def __init__(self, directory: str, tool: 'Callable[[], str | None]',
+                 max_bytes: int = _MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._tool = tool
+        self._identity: 'str | None' = None
+        self._lock = threading.Lock()
+        # name -> [bytes on disk, last used], read from the directory once.
+        self._index: 'dict[str, list[float]] | None' = None
+        self._total = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frame-store')
+
+    def get(self, video_path: str, key: Any) -> 'bytes | None':
+        """The frame stored as *video_path*'s *key*, or None."""
+        name = self._name(video_path, key)
+        if name is None:
+            return None
+        with self._lock:
+            entry = self._load().get(name)
+            if entry is None:
+                return None
+            entry[1] = time.time()
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            os.utime(path)
+            return data
+        except (OSError, zlib.error) as e:
+            logging.warning("Dropping unreadable stored preview frame %s: %s", path, e)
+            self._remove(name)
+            return None
+
+    def put(self, video_path: str, key: Any, data: 'bytes | Callable[[], bytes]') -> None:
+        """Store *data* as *video_path*'s *key*, in the background. *data* may
+        be a callable producing the bytes, so encoding the frame happens on
+        the writer thread too."""
+        name = self._name(video_path, key)
+        if name is None:
+            return
+        with self._lock:
+            if name in self._load():
+                return
+        self._writer.submit(self._write, name, data)
+
+    def flush(self) -> None:
+        """Wait for the writes submitted so far."""
+        self._writer.submit(lambda: None).result()
+
+    def _name(self, video_path: str, key: Any) -> 'str | None':
+        """The file name for *video_path*'s *key*, or None when the source or
+        the tool can't be stat()ed."""
+        if self._identity is None:
+            fingerprint = tool_fingerprint(self._tool())
+            if fingerprint is None:
+                return None
+            self._identity = f'{_STORE_VERSION}|{fingerprint}'
+        try:
+            st = os.stat(video_path)
+        except OSError:
+            return None
+        source = [os.path.normcase(os.path.abspath(video_path)), st.st_size, st.st_mtime_ns]
+        blob = json.dumps([self._identity, source, key], default=repr)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest() + _SUFFIX
+
+    def _load(self) -> 'dict[str, list[float]]':
+        """The index, read from the directory on first use. Runs under _lock."""
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(_SUFFIX) and entry.is_file():
+                        st = entry.stat()
+                        self._index[entry.name] = [st.st_size, st.st_mtime]
+                        self._total += st.st_size
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning("Ignoring unreadable preview frame store %s: %s",
+                            self.directory, e)
+        return self._index
+
+    def _write(self, name: str, data: 'bytes | Callable[[], bytes]') -> None:
+        """Compress and write one frame, then evict past the cap. Runs on the
+        writer thread: temp file then replace, so a reader never sees half a
+        frame."""
+        path = os.path.join(self.directory, name)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            payload = zlib.compress(data() if callable(data) else data, _COMPRESS_LEVEL)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except Exception as e:
+            logging.warning("Could not store preview frame: %s", e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            index = self._load()
+            previous = index.get(name)
+            if previous is not None:
+                self._total -= int(previous[0])
+            index[name] = [len(payload), time.time()]
+            self._total += len(payload)
+            evicted = self._evict(index) if self._total > self.max_bytes else []
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def _evict(self, index: 'dict[str, list[float]]') -> 'list[str]':
+        """Drop the least recently used frames down to 90% of the cap, so the
+        next few writes don't each pay for a sort; returns their names for
+        the caller to delete outside the lock. Runs under _lock."""
+        keep = int(self.max_bytes * 0.9)
+        evicted = []
+        for name in sorted(index, key=lambda name: index[name][1]):
+            if self._total <= keep:
+                break
+            self._total -= int(index.pop(name)[0])
+            evicted.append(name)
+        return evicted
+
+    def _remove(self, name: str) -> None:
+        with self._lock:
+            entry = self._load().pop(name, None)
+            if entry is not None:
+                self._total -= int(entry[0])
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
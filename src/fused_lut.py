@@ -0,0 +1,335 @@
+"""The CPU tonemap chain baked into one 3D LUT ("fused" mode).
+
+utils.FFMPEG_CONVERT_FILTER runs five float passes over every full-resolution
+frame: zscale to linear light, tonemap, zscale back to Rec.709, the lut3d
+gamut correction, then eq. For a fixed tonemapper and signal peak every one
+of those steps is a fixed per-pixel function of the source's PQ-encoded RGB,
+so their composition is too -- and one tetrahedral lut3d lookup is far
+cheaper than the chain. Measured on a 10-bit HEVC HDR10 clip with a static
+ffmpeg 6.0, single-threaded: decode plus filtering went from 1.83 s to
+0.81 s, so the filters alone run roughly three times faster.
+
+Accuracy against the five-pass chain, same clip, reinhard, rgb24 output:
+mean 0.2/255, 99th percentile 1/255, 99.9th 4/255 (mobius and hable land
+within the same bounds after a lossless encode). The worst pixels (up to
+45/255) are synthetic, wildly out-of-gamut colors sitting on the gamut
+clamp's kink, where any interpolated grid rounds the corner off -- the same
+effect tools/generate_lut.py's docstring measures for its own grid size.
+
+Two details decide that accuracy, both confirmed against real output:
+  - The source is converted to *float* RGB before the lookup, and the LUT's
+    domain runs to 1.5, not 1.0. Limited-range Y'CbCr legitimately decodes
+    to R'G'B' values above 1.0 for saturated colors, and the five-pass chain
+    keeps them (tonemap desaturates them back into range); clamping at 1.0
+    first put the error at a mean of 5/255 with a maximum of 143.
+  - ffmpeg's tonemap filter picks its signal peak from the frame's MaxCLL,
+    else the mastering display's peak, else -- the frame being linear light
+    by then -- 1000 nits (see signal_peak). The LUT has to be baked for
+    that same peak, so it is keyed on it.
+
+eq=gamma is not baked in: ffmpeg's eq adjusts luma in Y'CbCr, which no RGB
+LUT reproduces exactly, so a non-1.0 gamma stays a separate (cheap) pass.
+
+BT.2390 and Spline -- libplacebo's curves, which ffmpeg's tonemap filter
+lacks -- are baked the same way (see _pq_curve), so with a LUT the CPU path
+can run every tonemapper the app offers; without one it can't run those two
+at all (LUT_ONLY_TONEMAPPERS).
+
+Standard library only, no tkinter -- generation is pure Python, about a
+second for the 65^3 grid, and happens once per (tonemapper, peak): the
+result is cached on disk under platform_utils.cache_dir().
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+
+from platform_utils import cache_dir
+
+# Tonemappers libplacebo implements and ffmpeg's tonemap filter doesn't: on
+# the CPU path they exist only as a fused LUT, whether or not the request
+# asked for fused mode.
+LUT_ONLY_TONEMAPPERS = frozenset({'bt.2390', 'spline'})
+
+# Every tonemapper this module can bake. The first three mirror ffmpeg's
+# tonemap filter exactly, so FFMPEG_CONVERT_FILTER is their reference.
+FUSED_TONEMAPPERS = frozenset({'reinhard', 'mobius', 'hable'}) | LUT_ONLY_TONEMAPPERS
+
+# The CPU chain with the fused LUT in place of zscale/tonemap/zscale/lut3d.
+# zscale with no options only converts Y'CbCr to RGB (transfer and primaries
+# stay PQ/BT.2020); format= keeps that RGB in float so values above 1.0
+# survive to the lookup -- see the module docstring.
+FUSED_FILTER = (
+    'zscale,format=gbrpf32le,lut3d=file={lut_path}:interp=tetrahedral,'
+    'setparams=color_primaries=bt709:color_trc=bt709:colorspace=bt709'
+)
+
+# FUSED_FILTER at a reduced output size. The resize belongs in linear light
+# (see utils.LINEAR_RESIZE_FILTER), which the LUT can't take as input -- a
+# 65-point grid over 0-100x reference white would spend nearly every point
+# on highlights -- so the resized frame goes back to PQ for the lookup. That
+# is the PQ LUT whatever the source's transfer: linear light with npl=100 is
+# the same scale for both, so the two tables agree. Measured on the HDR10
+# smoke sample at half size: the same error against the resized full chain as
+# FUSED_FILTER has against the full chain at full size.
+FUSED_RESIZED_FILTER = (
+    'zscale=t=linear:npl=100,format=gbrpf32le,zscale=w={width}:h={height}:f=bilinear,'
+    'zscale=t=smpte2084:npl=100,format=gbrpf32le,lut3d=file={lut_path}:interp=tetrahedral,'
+    'setparams=color_primaries=bt709:color_trc=bt709:colorspace=bt709'
+)
+
+LUT_SIZE = 65
+# The source transfers the LUT can decode: PQ (HDR10) and HLG.
+_TRANSFERS = frozenset({'pq', 'hlg'})
+_DOMAIN_MAX = 1.5
+# Bump when the math below changes, so cached LUTs from an older version are
+# never picked up again.
+_LUT_VERSION = 1
+
+# FFMPEG_CONVERT_FILTER's zscale npl, and ffmpeg tonemap's default desat.
+_NPL = 100.0
+_DESAT = 2.0
+
+# SMPTE ST 2084 (PQ) constants.
+_M1 = 2610 / 16384
+_M2 = 2523 / 4096 * 128
+_C1 = 3424 / 4096
+_C2 = 2413 / 4096 * 32
+_C3 = 2392 / 4096 * 32
+
+# ARIB STD-B67 (HLG) constants, and the BT.2100 system gamma for the
+# 1000-nit display zimg assumes.
+_HLG_A = 0.17883277
+_HLG_B = 1 - 4 * _HLG_A
+_HLG_C = 0.5 - _HLG_A * math.log(4 * _HLG_A)
+_HLG_GAMMA = 1.2
+
+# BT.2020 luma coefficients: ffmpeg's tonemap desaturates against the luma of
+# the frame's own colorspace, which is BT.2020 for every source this app
+# tonemaps.
+_LUMA = (0.2627, 0.6780, 0.0593)
+
+# Identical to tools/generate_lut.py's BT2020_TO_BT709 (a test holds the two
+# together): the fused LUT replaces that generated LUT's lookup as well.
+_BT2020_TO_BT709 = (
+    (1.6604910021, -0.5876411388, -0.0728498633),
+    (-0.1245504745, 1.1328998971, -0.0083494226),
+    (-0.0181507634, -0.1005788980, 1.1187296614),
+)
+
+
+def signal_peak(maxcll: 'float | None', max_luminance: 'float | None') -> float:
+    """The peak ffmpeg's tonemap filter uses for a source, in units of the
+    100-nit reference white: MaxCLL if the frame carries a non-zero one,
+    else the mastering display's peak, else 10. The last is 10 (1000 nits),
+    not the 100 a PQ-tagged frame would get, because zscale has already
+    re-tagged the frame as linear light when tonemap sees it."""
+    if maxcll:
+        return maxcll / 100.0
+    if max_luminance:
+        return max_luminance / 100.0
+    return 10.0
+
+
+def _pq_eotf(value: float) -> float:
+    """PQ code value -> nits. Negative codes are black, as in zimg; values
+    above 1.0 follow the curve on up (they stay below its pole for anything
+    inside _DOMAIN_MAX)."""
+    if value <= 0:
+        return 0.0
+    p = value ** (1 / _M2)
+    return (max(p - _C1, 0.0) / (_C2 - _C3 * p)) ** (1 / _M1) * 10000.0
+
+
+def _hlg_eotf(value: float) -> float:
+    """HLG code value -> display nits, as zimg linearizes it: the BT.2100
+    inverse OETF, then a 1000-nit display's system gamma of 1.2. zimg
+    applies that gamma to each channel rather than through the pixel's
+    luminance as BT.2100's OOTF does -- measured against zscale's own float
+    output, and the reason this takes one channel, not the whole pixel."""
+    if value <= 0:
+        return 0.0
+    if value <= 0.5:
+        scene = value * value / 3.0
+    else:
+        scene = (math.exp((value - _HLG_C) / _HLG_A) + _HLG_B) / 12.0
+    return 1000.0 * scene ** _HLG_GAMMA
+
+
+def _pq_oetf(nits: float) -> float:
+    """Nits -> PQ code value, the inverse of _pq_eotf."""
+    y = (max(nits, 0.0) / 10000.0) ** _M1
+    return ((_C1 + _C2 * y) / (1.0 + _C3 * y)) ** _M2
+
+
+def _bt2390(x: float, src_max: float, dst_max: float) -> float:
+    """libplacebo's bt.2390: the ITU-R BT.2390 EETF, a Hermite spline knee
+    in PQ space. Everything is a PQ code value; the knee offset is
+    libplacebo's default of 1.0 (the report's own curve uses 0.5)."""
+    max_lum = dst_max / src_max
+    ks = 2.0 * max_lum - 1.0
+    e1 = x / src_max
+    if e1 > ks:
+        t = (e1 - ks) / (1.0 - ks)
+        t2, t3 = t * t, t * t * t
+        e1 = ((2 * t3 - 3 * t2 + 1) * ks + (t3 - 2 * t2 + t) * (1.0 - ks)
+              + (-2 * t3 + 3 * t2) * max_lum)
+    return e1 * src_max
+
+
+def _spline(x: float, src_max: float, dst_max: float) -> float:
+    """libplacebo's spline, with its default constants: a linear segment
+    through a knee point below it and a cubic roll-off above, both in PQ
+    space. libplacebo picks the knee from the scene's measured average when
+    peak detection is on; with nothing measured it falls back to 40% of the
+    source range, which is what a static curve can use."""
+    src_knee = 0.4 * src_max
+    dst_knee = src_knee + 0.4 * (0.4 * dst_max - src_knee)
+    dst_knee = max(0.1 * dst_max, min(dst_knee, 0.8 * dst_max))
+    ratio = max(0.2, min(1.5 * (src_max / dst_max - 1.0), 1.2))
+    slope = (dst_knee / src_knee) ** (0.5 * ratio)
+    x -= src_knee
+    if x <= 0:
+        # P(-src_knee) = -dst_knee, P(0) = 0, P'(0) = slope.
+        pa = (-dst_knee + slope * src_knee) / (src_knee * src_knee)
+        return (pa * x + slope) * x + dst_knee
+    # Q(in_max) = out_max, Q''(in_max) = 0, Q(0) = 0, Q'(0) = slope.
+    in_max, out_max = src_max - src_knee, dst_max - dst_knee
+    t = 2.0 * in_max * in_max
+    qa = (slope * in_max - out_max) / (in_max * t)
+    qb = -3.0 * (slope * in_max - out_max) / t
+    return ((qa * x + qb) * x + slope) * x + dst_knee
+
+
+def _pq_curve(sig: float, tonemapper: str, peak: float) -> float:
+    """One of libplacebo's PQ-space curves on a linear signal (1.0 = the
+    100-nit reference white), mapping *peak* onto that white. A source no
+    brighter than the target needs no tonemapping and passes unchanged.
+    Like libplacebo, the input is clamped to the peak first: both curves
+    turn back down past it."""
+    if peak <= 1.0:
+        return sig
+    src_max, dst_max = _pq_oetf(peak * _NPL), _pq_oetf(_NPL)
+    curve = _bt2390 if tonemapper == 'bt.2390' else _spline
+    x = _pq_oetf(min(sig, peak) * _NPL)
+    return _pq_eotf(curve(x, src_max, dst_max)) / _NPL
+
+
+def _hable(x: float) -> float:
+    a, b, c, d, e, f = 0.15, 0.50, 0.10, 0.20, 0.02, 0.30
+    return (x * (x * a + b * c) + d * e) / (x * (x * a + b) + d * f) - e / f
+
+
+def _mobius(x: float, j: float, peak: float) -> float:
+    if x <= j:
+        return x
+    a = -j * j * (peak - 1.0) / (j * j - 2.0 * j + peak)
+    b = (j * j - 2.0 * j * peak + peak) / max(peak - 1.0, 1e-6)
+    return (b * b + 2.0 * b * j + j * j) / (b - a) * (x + a) / (x + b)
+
+
+def _tonemap(rgb: 'tuple[float, float, float]', tonemapper: str,
+             peak: float) -> 'tuple[float, float, float]':
+    """ffmpeg's tonemap filter on one linear pixel, with its default
+    parameters: desaturate overbright pixels toward luma, then scale all
+    three channels by the curve's ratio at the brightest one, so hue is
+    kept. BT.2390 and Spline get the same hue-keeping scale but not the
+    desaturation, which is ffmpeg's and not libplacebo's."""
+    r, g, b = rgb
+    if tonemapper in LUT_ONLY_TONEMAPPERS:
+        sig = max(r, g, b, 1e-6)
+        scale = _pq_curve(sig, tonemapper, peak) / sig
+        return r * scale, g * scale, b * scale
+    luma = _LUMA[0] * r + _LUMA[1] * g + _LUMA[2] * b
+    overbright = max(luma - _DESAT, 1e-6) / max(luma, 1e-6)
+    r, g, b = (c + (luma - c) * overbright for c in (r, g, b))
+
+    sig = max(r, g, b, 1e-6)
+    if tonemapper == 'reinhard':
+        mapped = sig / (sig + 1.0) * (peak + 1.0) / peak
+    elif tonemapper == 'hable':
+        mapped = _hable(sig) / _hable(peak)
+    elif tonemapper == 'mobius':
+        mapped = _mobius(sig, 0.3, peak)
+    else:
+        raise ValueError(f"No fused LUT for tonemapper {tonemapper!r}")
+    scale = mapped / sig
+    return r * scale, g * scale, b * scale
+
+
+def _clamp01(v: float) -> float:
+    return max(0.0, min(1.0, v))
+
+
+def _gamut(rgb: 'tuple[float, float, float]') -> 'tuple[float, float, float]':
+    """Linear BT.2020-primaries RGB -> Rec.709-encoded BT.709 RGB: the second
+    zscale (gamma-2.4 encode, clamped by the 8/10-bit intermediate) followed
+    by generate_lut._convert (decode, matrix, clamp, encode). The encode and
+    decode cancel, leaving clamp, matrix, clamp, encode."""
+    r, g, b = (_clamp01(c) for c in rgb)
+    return tuple(  # type: ignore[return-value]
+        _clamp01(row[0] * r + row[1] * g + row[2] * b) ** (1 / 2.4)
+        for row in _BT2020_TO_BT709)
+
+
+def transform(r: float, g: float, b: float, tonemapper: str,
+              peak: float, transfer: str = 'pq') -> 'tuple[float, float, float]':
+    """The whole CPU chain (without eq) for one BT.2020 pixel, PQ- or (with
+    transfer='hlg') HLG-encoded."""
+    if transfer == 'hlg':
+        linear = tuple(_hlg_eotf(c) / _NPL for c in (r, g, b))
+    else:
+        linear = tuple(_pq_eotf(c) / _NPL for c in (r, g, b))
+    return _gamut(_tonemap(linear, tonemapper, peak))  # type: ignore[arg-type]
+
+
+def cube_lines(tonemapper: str, peak: float, size: int = LUT_SIZE,
+               transfer: str = 'pq') -> 'list[str]':
+    """The fused LUT as .cube lines (no newlines), red index fastest -- the
+    same ordering tools/generate_lut.py writes."""
+    lines = [f'LUT_3D_SIZE {size}',
+             'DOMAIN_MIN 0.0 0.0 0.0',
+             f'DOMAIN_MAX {_DOMAIN_MAX} {_DOMAIN_MAX} {_DOMAIN_MAX}']
+    step = _DOMAIN_MAX / (size - 1)
+    for bi in range(size):
+        for gi in range(size):
+            for ri in range(size):
+                out = transform(ri * step, gi * step, bi * step, tonemapper, peak,
+                                transfer)
+                lines.append(f'{out[0]:.6f} {out[1]:.6f} {out[2]:.6f}')
+    return lines
+
+
+_lock = threading.Lock()
+
+
+def lut_path(tonemapper: str, peak: float, transfer: str = 'pq') -> str:
+    """The cached fused LUT for (tonemapper, peak, transfer), generated on
+    first use. *transfer* is 'pq' or 'hlg' -- the source's, as
+    utils.classify_source names it.
+
+    Serialized by one lock: two conversions of sources with the same peak
+    starting together must not both spend a second generating the same
+    file. Written to a temp file then renamed, so a crash mid-write can never
+    leave a truncated LUT that a later run would trust.
+    """
+    tonemapper = tonemapper.lower()
+    if tonemapper not in FUSED_TONEMAPPERS:
+        raise ValueError(f"No fused LUT for tonemapper {tonemapper!r}")
+    if transfer not in _TRANSFERS:
+        raise ValueError(f"No fused LUT for transfer {transfer!r}")
+    # PQ names carry no transfer so LUTs cached before HLG support stay valid.
+    prefix = '' if transfer == 'pq' else f'{transfer}_'
+    path = os.path.join(cache_dir(), 'luts',
+                        f'fused_v{_LUT_VERSION}_{prefix}{tonemapper}_{peak:.4f}.cube')
+    with _lock:
+        if not os.path.isfile(path):
+            logging.info(f"Generating fused {tonemapper} LUT for peak {peak:g}.")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w', newline='\n') as f:
+                f.write('\n'.join(cube_lines(tonemapper, peak, transfer=transfer)) + '\n')
+            os.replace(tmp, path)
+    return path
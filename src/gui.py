@@ -3,24 +3,25 @@ import os
 import sys
 import tkinter as tk
 import webbrowser
-from typing import TypeVar
+from typing import TYPE_CHECKING, TypeVar
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 from dark_theme import apply_dark_theme
 from conversion import ConversionRequest, conversion_manager
 from tk_conversion_view import TkConversionView
-from utils import (get_video_properties, get_maxcll, TONEMAP,
-                   is_gpu_only_tonemapper, vulkan_libplacebo_available,
+from utils import (get_video_properties, get_maxcll, TONEMAP, reprobe_capabilities,
                    VIDEO_FILE_FILTER, parse_drop_paths as _shared_parse_drop_paths)
 from settings import load_settings, save_settings
-from PIL import Image
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import logging
 import threading
 from concurrent.futures import Future, ThreadPoolExecutor
 
 from dialogs import _LicenseDialog, _UpdateDialog
-from preview import DEFAULT_MIN_SIZE, _PREVIEW_POOL_WORKERS, _HDRPreviewMixin
+from preview import DEFAULT_MIN_SIZE, _HDRPreviewMixin, _preview_pool_workers
+
+if TYPE_CHECKING:
+    from PIL import Image
 # Imported as a module object, not `from pro.batch import _BatchMixin`. As in
 # src/licensing.py and src/dialogs.py: a `from`-import of an unresolved
 # module leaves pyright treating the unresolved import *declaration* as
@@ -152,6 +153,11 @@ webbrowser = webbrowser  # noqa: F811
 
 _Number = TypeVar('_Number', int, float)
 
+# Workers for file-metadata probes (see HDRConverterGUI._update_info_label).
+# Two, so a superseded probe stuck on a slow file doesn't hold up the one for
+# the file now loaded.
+_PROBE_POOL_WORKERS = 2
+
 
 def _clamp(value: _Number, lo: _Number, hi: _Number) -> _Number:
     """Clamp value into [lo, hi]. lo/hi may be given in either order."""
@@ -182,14 +188,12 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
     # _write_back_current_settings/_schedule_batch_list_refresh.
     _BATCH_LIST_REFRESH_DEBOUNCE_MS = 150
 
+    # The info strip's text while a newly loaded file is being probed.
+    _INFO_PLACEHOLDER = 'Reading file info…'
+
     _QUALITY_MODE_TO_INTERNAL = {'Constant Quality': 'cq', 'Target Bitrate': 'bitrate'}
     _QUALITY_MODE_FROM_INTERNAL = {'cq': 'Constant Quality', 'bitrate': 'Target Bitrate'}
 
-    # Appended to a GPU-only tonemapper's combobox label when it's unselectable
-    # (GPU tonemapping isn't active) -- the entry stays visible/greyed instead
-    # of being removed from the list, per _apply_tonemap_choices.
-    _GPU_ONLY_SUFFIX = " (GPU Only)"
-
     def __init__(self, root: "TkinterDnD.Tk", licensed: bool = False) -> None:
         """Initialize the GUI and set up all components."""
         self.root = root
@@ -209,9 +213,16 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.progress_var = tk.DoubleVar(value=0)
         self.open_after_conversion_var = tk.BooleanVar(value=_s['open_after_conversion'])
         self.display_image_var = tk.BooleanVar(value=_s['display_preview'])
+        # Crop the source's black bars before tonemapping (see
+        # utils.detect_crop). The preview shows the same crop.
+        self.auto_crop_var = tk.BooleanVar(value=_s['auto_crop'])
         self.original_image = None
         self.converted_image_base = None
         self.gpu_accel_var = tk.BooleanVar(value=False)  # gpu_accel is no longer persisted
+        # conversion_manager's GPU detection being shown (see
+        # _start_gpu_detection), and what to run once it has answered.
+        self._gpu_detection: 'Future[bool] | None' = None
+        self._after_gpu_detection: list = []
         # Persisted export setting: applies the gamut-correction LUT on GPU
         # exports (costs a CPU round-trip, ~2x slower at 4K -- see
         # build_libplacebo_filter's docstring). No effect on CPU exports,
@@ -220,10 +231,6 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         # difference real GPU export would produce.
         self.lut_export_var = tk.BooleanVar(value=_s['lut_enabled'])
         self.tonemap_var = tk.StringVar(value=_s['tonemapper'])
-        # Tracks the last selection that was actually valid, so a click on a
-        # greyed-out GPU-only row (still clickable -- see _on_tonemap_selected)
-        # has something sane to revert to.
-        self._last_valid_tonemapper = self.tonemap_var.get()
         self.quality_var = tk.IntVar(value=_s['quality'])
         self.bitrate_var = tk.IntVar(value=_s['quality_bitrate_kbps'])
         self.quality_mode_var = tk.StringVar(
@@ -260,15 +267,19 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.last_time_position: float | None = None
         self._preview_generation = 0
         self._preview_pool = ThreadPoolExecutor(
-            max_workers=_PREVIEW_POOL_WORKERS, thread_name_prefix='frame-fetch')
+            max_workers=_preview_pool_workers(), thread_name_prefix='frame-fetch')
         self._preview_thread: Future | None = None
         self._converted_preview_base: Image.Image | None = None
         self._duration_path: str | None = None
         self._duration_value: float | None = None
+        self._duration_keyframes: list[float] | None = None
         self._source_bit_depth: int = 8
-        self._preview_cache_original: dict = {}
-        self._preview_cache_converted: dict = {}
-        self._cache_lock = threading.Lock()
+        # File metadata is probed off the main thread (see _update_info_label).
+        self._input_generation = 0
+        self._probe_pool = ThreadPoolExecutor(
+            max_workers=_PROBE_POOL_WORKERS, thread_name_prefix='file-probe')
+        self._input_probe: Future | None = None
+        self._init_preview_cache()
 
         self.create_widgets()
         self.configure_grid()
@@ -412,6 +423,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         free = [
             self.browse_button, self.convert_button, self.gamma_slider,
             self.open_after_conversion_checkbutton, self.display_image_checkbutton,
+            self.auto_crop_checkbutton,
             self.input_entry, self.output_entry, self.gamma_entry,
             self.bit_depth_10_radio, self.batch_listbox,
         ]
@@ -427,20 +439,32 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
 
     def on_close(self) -> None:
         """Handle the window close event."""
-        if conversion_manager.process and conversion_manager.process.poll() is None:
+        # Scheduled (submit()) jobs each own their process, so an idle
+        # interactive slot doesn't mean nothing is encoding. Queued jobs that
+        # never started don't count: closing simply means they never will.
+        interactive_running = (conversion_manager.process
+                               and conversion_manager.process.poll() is None)
+        if interactive_running or any(
+                job.state == 'running' for job in conversion_manager.jobs()):
             if messagebox.askokcancel(
                     "Quit", "A conversion is in progress. Do you want to cancel and exit?"):
                 conversion_manager.cancel_conversion()
                 self._save_current_settings()
-                if hasattr(self, '_preview_pool'):
-                    self._preview_pool.shutdown(wait=False, cancel_futures=True)
+                self._shutdown_worker_pools()
                 self.root.destroy()
         else:
             self._save_current_settings()
-            if hasattr(self, '_preview_pool'):
-                self._preview_pool.shutdown(wait=False, cancel_futures=True)
+            self._shutdown_worker_pools()
             self.root.destroy()
 
+    def _shutdown_worker_pools(self) -> None:
+        """Drop queued preview and probe jobs on close; running ones finish
+        on their own and publish nothing once the root is gone."""
+        for name in ('_preview_pool', '_probe_pool'):
+            pool = getattr(self, name, None)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
     def _save_current_settings(self) -> None:
         """Persist current UI settings to disk."""
         try:
@@ -455,6 +479,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
                 'quality_bitrate_kbps': self.bitrate_var.get(),
                 'filetype': self.format_var.get(),
                 'lut_enabled': self.lut_export_var.get(),
+                'auto_crop': self._auto_crop_enabled(),
             })
         except AttributeError:
             pass  # bare/partially-initialized instance (test contexts only)
@@ -512,8 +537,8 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
             "Reinhard: Basic HDR to SDR conversion\n"
             "Mobius: Natural-looking conversion\n"
             "Hable: Game-like conversion (Cyberpunk 2077)\n"
-            "BT.2390: Broadcast-standard highlight rolloff (GPU Only)\n"
-            "Spline: Scene-adaptive libplacebo default (GPU Only)"
+            "BT.2390: Broadcast-standard highlight rolloff\n"
+            "Spline: Scene-adaptive libplacebo default"
         )
         info_button_tonemap.bind('<Enter>',
                                   lambda e: self.show_tooltip(e, tooltip_text_tonemap))
@@ -561,6 +586,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
 
         self.gpu_status_label = ttk.Label(self.control_frame, text='')
         self.gpu_status_label.grid(row=4, column=2, sticky=tk.E, padx=(15, 0), pady=(5, 0))
+        self.gpu_status_label.bind('<Double-Button-1>', self._redetect_gpu_acceleration)
 
         self.quality_mode_frame = ttk.Frame(self.control_frame)
         self.quality_mode_frame.grid(row=5, column=1, sticky=tk.W, padx=(10, 10), pady=(5, 0))
@@ -719,6 +745,12 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.open_after_conversion_checkbutton.grid(
             row=1, column=0, padx=(5, 5), sticky=tk.N)
 
+        self.auto_crop_checkbutton = ttk.Checkbutton(
+            self.action_frame, text="Crop black bars",
+            variable=self.auto_crop_var, command=self.update_frame_preview)
+        self.auto_crop_checkbutton.grid(
+            row=2, column=0, padx=(5, 5), sticky=tk.N + tk.W)
+
         self.convert_button = ttk.Button(
             self.action_frame, text="Convert", command=self.convert_video)
         self.convert_button.grid(row=1, column=1, padx=(5, 5), pady=(0, 10), sticky=tk.N)
@@ -786,6 +818,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.interactable_elements = [
             self.browse_button, self.convert_button, self.gamma_slider,
             self.open_after_conversion_checkbutton, self.display_image_checkbutton,
+            self.auto_crop_checkbutton,
             self.input_entry, self.output_entry, self.gamma_entry,
             self.batch_listbox,
             self.quality_slider, self.quality_entry, self.quality_mode_combobox,
@@ -795,7 +828,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
             self.bit_depth_10_radio, self.bit_depth_12_radio, self.apply_settings_button,
         ]
 
-        self._detect_gpu_acceleration()
+        self._start_gpu_detection()
 
         self._apply_quality_mode()
         self._apply_tonemap_choices()
@@ -910,7 +943,12 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
                 self._restore_settings_dict(item['settings'])
         finally:
             self._restoring_batch_item_settings = False
-        self._write_back_current_settings()
+        if item is None or not item.get('settings'):
+            # A queued item's own settings were just restored, and are
+            # written back once the probe lands (_publish_input_probe): until
+            # then its Target Bitrate fraction would be re-derived against
+            # the unknown-source fallback ceiling, not this file's bitrate.
+            self._write_back_current_settings()
         self.button_frame.grid()
         self.image_frame.grid()
         self.action_frame.grid()
@@ -926,8 +964,10 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self._converted_preview_base = None
         self._reset_custom_seek()
         self._reset_preview_cache()
-        # Drop the probe state so nothing (info strip, bit-depth toggle) can be
-        # re-rendered later from a file that is no longer loaded.
+        # Drop the probe state -- and any probe still running, see
+        # _update_info_label -- so nothing (info strip, bit-depth toggle) can
+        # be re-rendered later from a file that is no longer loaded.
+        self._input_generation = getattr(self, '_input_generation', 0) + 1
         self._source_bit_depth = 8
         self._cached_props = None
         self._cached_maxcll = None
@@ -989,15 +1029,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
             return  # bare/partially-initialized instance (test contexts only)
         source = getattr(self, '_source_bit_depth', 8)
         if source > 10:
-            # Default to 10-bit, but a queued file remembers its own choice
-            # (stored by _on_bit_depth_toggle) so batch runs and queue clicks
-            # restore it instead of silently reverting to 10-bit.
-            choice = '10-bit'
-            if self._licensed:
-                item = self._batch_item_for_current_input()
-                if item is not None:
-                    choice = item.get('settings', {}).get('bit_depth_choice', '10-bit')
-            self.bit_depth_var.set(choice)
+            self.bit_depth_var.set(self._stored_bit_depth_choice())
             pro_text = 'CPU Only' if self._licensed else 'Pro'
             self.bit_depth_12_radio.config(
                 text=f'12-bit ({pro_text})',
@@ -1006,6 +1038,16 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         else:
             self.bit_depth_frame.grid_remove()
 
+    def _stored_bit_depth_choice(self) -> str:
+        """10-bit by default, but a queued file remembers its own choice
+        (stored by _on_bit_depth_toggle) so batch runs and queue clicks
+        restore it instead of silently reverting to 10-bit."""
+        if self._licensed:
+            item = self._batch_item_for_current_input()
+            if item is not None:
+                return item.get('settings', {}).get('bit_depth_choice', '10-bit')
+        return '10-bit'
+
     def _selected_bit_depth(self) -> int:
         """The output bit depth for the current source: 8/10-bit are fully
         automatic; above 10-bit, a licensed user's 10/12-bit toggle choice
@@ -1042,9 +1084,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         counterpart to _current_settings_dict), then re-run the existing
         range/fallback logic so the restored values are re-validated against
         whichever file is now loaded -- e.g. Target Bitrate's ceiling clamps
-        to this file's own source bitrate, and a GPU-only tonemapper falls
-        back to Mobius if this machine's GPU accel (a fixed, machine-wide
-        capability, not a per-file setting) is off.
+        to this file's own source bitrate.
 
         Self-guarded against _write_back_current_settings: the slider moves
         below are internal, intermediate state, not a user edit, and must
@@ -1292,21 +1332,11 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.quality_var.set(int(round(new_value)))
 
     def _apply_tonemap_choices(self) -> None:
-        """Always show all tonemapper entries; the GPU-only ones (BT.2390,
-        Spline) get a "(GPU Only)" suffix and are greyed out in the dropdown
-        instead of being removed when GPU tonemapping isn't actually active
-        (toggle on and the Vulkan/libplacebo probe passed). Resets the
-        selection to Mobius if it becomes unavailable while selected."""
-        gpu_active = self.gpu_accel_var.get() and vulkan_libplacebo_available()
-        display_values = [
-            t if gpu_active or not is_gpu_only_tonemapper(t)
-            else f"{t}{self._GPU_ONLY_SUFFIX}"
-            for t in TONEMAP
-        ]
-        self.tonemap_combobox.configure(values=display_values)
-        if not gpu_active and is_gpu_only_tonemapper(self.tonemap_var.get()):
-            self.tonemap_var.set('Mobius')
-        self._last_valid_tonemapper = self.tonemap_var.get()
+        """Show every tonemapper, whether or not GPU tonemapping is active.
+        BT.2390 and Spline used to be greyed out with a "(GPU Only)" suffix
+        and reset to Mobius without it; they now run on the CPU too, as a
+        fused LUT (see fused_lut.py), so no entry depends on the GPU."""
+        self.tonemap_combobox.configure(values=TONEMAP)
 
     def _apply_lut_export_availability(self) -> None:
         """Accurate GPU Color (lut_export_var) only affects the GPU/
@@ -1334,15 +1364,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         self.update_frame_preview()
 
     def _on_tonemap_selected(self, event: tk.Event = None) -> None:  # type: ignore[type-arg]
-        """<<ComboboxSelected>> handler. A greyed GPU-only row is still
-        clickable in a plain Tk listbox (the grey is cosmetic only), so this
-        is the actual guard: any selection carrying the "(GPU Only)" suffix
-        is refused and reverted to the last valid selection instead."""
-        raw = self.tonemap_var.get()
-        if raw.endswith(self._GPU_ONLY_SUFFIX):
-            self.tonemap_var.set(self._last_valid_tonemapper)
-            return
-        self._last_valid_tonemapper = raw
+        """<<ComboboxSelected>> handler."""
         if hasattr(self, 'lut_export_checkbutton'):
             self._apply_lut_export_availability()
         self._write_back_current_settings()
@@ -1470,19 +1492,74 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
         return " | ".join(parts)
 
     def _update_info_label(self, file_path: str) -> None:
-        """Probe file metadata and update the info strip below the output path."""
+        """Start probing *file_path*'s metadata for the info strip below the
+        output path, without waiting for the answer.
+
+        get_video_properties/get_maxcll run on a worker -- a first-time
+        ffprobe of a file on a slow share can take seconds -- and
+        _publish_input_probe applies their answer on the main thread. Until
+        then the strip shows a placeholder and the file reads as unprobed
+        (no bit-depth toggle, the fallback Target Bitrate ceiling). Loading
+        another file, or unloading this one, supersedes the probe by the
+        same generation check display_frames uses for preview frames."""
         if not hasattr(self, 'info_label'):
             return
-        props = get_video_properties(file_path)
-        self._source_bit_depth = props.get('bit_depth', 8) if props else 8
+        self._input_generation = getattr(self, '_input_generation', 0) + 1
+        generation = self._input_generation
+        self._source_bit_depth = 8
+        self._cached_props = None
+        self._cached_maxcll = None
         self._update_bit_depth_choice()
+        if hasattr(self, 'bit_depth_var'):
+            # The toggle is hidden until the probe says otherwise; keep the
+            # var on this file's own choice so a write-back meanwhile doesn't
+            # stamp the previous file's onto it.
+            self.bit_depth_var.set(self._stored_bit_depth_choice())
+        self.info_label.config(text=self._INFO_PLACEHOLDER)
+        self.info_label.grid()
+
+        def worker() -> None:
+            try:
+                props = get_video_properties(file_path)
+                maxcll = get_maxcll(file_path) if props else None
+            except Exception as e:
+                logging.error(f"Error probing {file_path}: {e}")
+                props, maxcll = None, None
+            if generation == self._input_generation:
+                self._schedule_on_main(
+                    lambda: self._publish_input_probe(generation, props, maxcll))
+
+        if not hasattr(self, '_probe_pool'):
+            self._probe_pool = ThreadPoolExecutor(
+                max_workers=_PROBE_POOL_WORKERS, thread_name_prefix='file-probe')
+        self._input_probe = self._probe_pool.submit(worker)
+
+    def _publish_input_probe(self, generation: int, props: dict | None,  # type: ignore[type-arg]
+                             maxcll: float | None) -> None:
+        """Apply a probe started by _update_info_label. Main thread. Dropped
+        when another file has been loaded, or this one unloaded, since."""
+        if generation != getattr(self, '_input_generation', 0):
+            return
+        self._source_bit_depth = props.get('bit_depth', 8) if props else 8
         self._cached_props = props
-        self._cached_maxcll = get_maxcll(file_path) if props else None
+        self._cached_maxcll = maxcll
         # A newly-loaded file gets its own 50%-of-source Target Bitrate seed,
         # not whatever was left over from a previous file or session.
         self._bitrate_needs_reseed = True
-        if hasattr(self, 'quality_slider'):
-            self._apply_quality_mode()
+        item = self._batch_item_for_current_input()
+        self._restoring_batch_item_settings = True
+        try:
+            self._update_bit_depth_choice()
+            if hasattr(self, 'quality_slider'):
+                self._apply_quality_mode()
+            if item is not None and item.get('settings'):
+                # Restored once already by _load_input_file, but a customized
+                # Target Bitrate is a fraction of the source bitrate, which
+                # is only known now.
+                self._restore_settings_dict(item['settings'])
+        finally:
+            self._restoring_batch_item_settings = False
+        self._write_back_current_settings()
         self._refresh_info_label_text()
 
     def _refresh_info_label_text(self) -> None:
@@ -1542,7 +1619,17 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
             messagebox.showerror("Error", f"Error handling file drop: {e}")
 
     def convert_video(self) -> None:
-        """Convert the video from HDR to SDR."""
+        """Convert the video from HDR to SDR.
+
+        Clicked while GPU detection is still running, the conversion starts
+        once it has answered -- on the GPU if that's the answer -- rather
+        than on the CPU now or after a detection of its own. Until then the
+        button says it is waiting (see _show_conversion_waiting)."""
+        if self._gpu_detection_pending():
+            if self.convert_video not in self._after_gpu_detection:
+                self._after_gpu_detection.append(self.convert_video)
+                self._show_conversion_waiting(True)
+            return
         if getattr(self, 'batch_items', None):
             self.start_batch()
             return
@@ -1593,6 +1680,7 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
                 tonemapper=tonemapper, quality=quality, quality_mode=quality_mode,
                 bit_depth=bit_depth, licensed=self._licensed,
                 lut_enabled=self._effective_lut_enabled(),
+                auto_crop=self._auto_crop_enabled(),
             )
             view = TkConversionView(self, self.progress_var,
                                     self.interactable_elements, self.cancel_button)
@@ -1627,9 +1715,76 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
 
     # ── GPU acceleration ───────────────────────────────────────────────────────
 
+    def _start_gpu_detection(self) -> None:
+        """Show the GPU status for conversion_manager's detection, started by
+        main.pyw before the window was built. The window doesn't wait for it:
+        until the answer arrives the label reads "detecting" and GPU
+        acceleration stays off, then _on_gpu_detection_done applies it. An
+        answer already in (every probe stored from an earlier launch, say)
+        is shown right away, without the interim badge."""
+        detection = conversion_manager.start_gpu_detection()
+        self._gpu_detection = detection
+        if detection.done():
+            self._detect_gpu_acceleration()
+            return
+        self.gpu_status_label.config(text="… GPU", foreground='gray')
+        self.gpu_status_label.bind(
+            '<Enter>', lambda e: self.show_tooltip(e, "Detecting GPU support..."))
+        self.gpu_status_label.bind('<Leave>', self.hide_tooltip)
+        detection.add_done_callback(
+            lambda _done: self._schedule_on_main(
+                lambda: self._on_gpu_detection_done(detection)))
+
+    def _gpu_detection_pending(self) -> bool:
+        detection = getattr(self, '_gpu_detection', None)
+        return detection is not None and not detection.done()
+
+    def _on_gpu_detection_done(self, detection: Future[bool]) -> None:
+        """Apply a detection that finished after the window was shown: the
+        status label, then everything gated on gpu_accel_var, then any
+        conversion that was started while it ran. Main thread. A detection
+        superseded by a re-detect is ignored."""
+        if detection is not self._gpu_detection:
+            return
+        self._detect_gpu_acceleration()
+        self._apply_gpu_availability()
+        waiting, self._after_gpu_detection = self._after_gpu_detection, []
+        if self.convert_video in waiting:
+            self._show_conversion_waiting(False)
+        for callback in waiting:
+            callback()
+
+    def _show_conversion_waiting(self, waiting: bool) -> None:
+        """Convert, clicked while GPU detection runs, reads "Waiting for
+        GPU…" and takes no more clicks, with the reason on hover, until the
+        answer arrives -- up to utils._GPU_PROBE_TIMEOUT on a cold driver -- and
+        the conversion starts."""
+        if waiting:
+            self.convert_button.config(state='disabled', text='Waiting for GPU…')
+            self.convert_button.bind('<Enter>', lambda e: self.show_tooltip(
+                e, "Detecting GPU support... The conversion starts when it finishes."))
+            self.convert_button.bind('<Leave>', self.hide_tooltip)
+        else:
+            self.convert_button.config(state='normal', text='Convert')
+            self.convert_button.unbind('<Enter>')
+            self.convert_button.unbind('<Leave>')
+            self.hide_tooltip()
+
+    def _apply_gpu_availability(self) -> None:
+        """Bring everything gated on gpu_accel_var up to a detection answer
+        that arrived after construction."""
+        # Clamp the quality value into the new mode's range rather than
+        # remapping it: it was never set against the range the answer implies.
+        self._last_quality_mode_applied = None
+        self._apply_quality_mode()
+        self._apply_tonemap_choices()
+        self._apply_lut_export_availability()
+        if self.input_path_var.get():
+            self.update_frame_preview()
+
     def _detect_gpu_acceleration(self) -> None:
-        """Probe GPU availability once, at construction. GPU acceleration is
-        always attempted when available -- there is no user toggle -- so this
+        """Show the detected GPU availability. GPU acceleration is always
+        attempted when available -- there is no user toggle -- so this
         replaces the old checkbox's on-click check."""
         try:
             available = conversion_manager.is_gpu_acceleration_available()
@@ -1655,6 +1810,17 @@ class HDRConverterGUI(_BatchMixin, _HDRPreviewMixin):
                 "GPU tonemapping (libplacebo/Vulkan).")
         self._bind_gpu_status_tooltip(available)
 
+    def _redetect_gpu_acceleration(self, event: object = None) -> None:
+        """Double-clicking the GPU status label detects GPU support from
+        scratch. Detection answers are kept across launches (see
+        utils.open_capability_store), which a new GPU behind an unchanged
+        driver, or a driver fixed in place, would otherwise wait out."""
+        reprobe_capabilities()
+        conversion_manager.reset_gpu_detection()
+        self._start_gpu_detection()
+        if not self._gpu_detection_pending():
+            self._apply_gpu_availability()
+
     def _bind_gpu_status_tooltip(self, available: bool) -> None:
         """Hover text for the non-interactive GPU status label.
 
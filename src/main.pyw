@@ -1,11 +1,24 @@
 import sys
 from tkinterdnd2 import TkinterDnD
+from conversion import conversion_manager
 from gui import HDRConverterGUI
 from licensing import check_license_nonblocking
 from platform_utils import setup_dpi_awareness
+from utils import open_capability_store, open_probe_stores, setup_logging
 
 if __name__ == "__main__":
+    # Importing utils configures nothing (see its FFMPEG_EXECUTABLE note);
+    # the app's logging is set up here, by the app.
+    setup_logging()
     setup_dpi_awareness()
+    # Before the window is built: its GPU detection then answers from the
+    # previous launch's probes instead of spawning them again.
+    open_capability_store()
+    # Likewise for files probed in earlier sessions.
+    open_probe_stores()
+    # Probes run on background threads while Tk starts and the window is
+    # built; the window shows "detecting" until they answer.
+    conversion_manager.start_gpu_detection()
     root = TkinterDnD.Tk()
     root.withdraw()
     gui_holder: dict = {}
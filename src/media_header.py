@@ -0,0 +1,769 @@
+"""Container-header probing for MP4/MOV/M4V and Matroska/WebM, without ffprobe.
+
+Everything _probe_video_properties needs from the common containers is in
+the file's header: the codec, dimensions and sample timing of each track, the
+colour tags (MP4's colr box, Matroska's Colour element), the codec
+configuration record that carries the bit depth, the Dolby Vision
+configuration record, and the HDR10 mastering/content-light boxes. Reading
+those through an mmap costs a few page faults; spawning ffprobe to read the
+same bytes costs a process launch, which is what dominates probing a folder
+of thousands of files.
+
+probe() returns what ffprobe's JSON would have said -- the same 'streams',
+'format' and, when the header settles it, 'frames' side data -- so utils
+derives the props dict from it with the very code it uses for ffprobe's
+output. Whenever the header leaves a field to the bitstream (no colour tags,
+an "unspecified" tag, a codec whose bit depth lives only in its SPS, a
+fragmented MP4 with no sample tables in its moov), probe() returns None and
+the caller falls back to ffprobe: guessing there could misclassify an HDR
+source as SDR, and an extra process launch is the cheaper mistake.
+
+keyframes() reads the same headers' seek index -- MP4's stss sync-sample
+table, Matroska's Cues -- as the presentation times of the video track's
+keyframes, or None when the file has no such index.
+
+Standard library only, no tkinter, no utils.py.
+"""
+from __future__ import annotations
+
+import array
+import mmap
+import struct
+import sys
+from typing import Any, Iterator
+
+# ISO/IEC 23091-4 code points, shared by MP4's colr/vpcC and Matroska's
+# Colour element, as ffprobe names them. 2 ("unspecified") is deliberately
+# missing: the bitstream may still say, and only ffprobe would read it.
+_PRIMARIES = {
+    1: 'bt709', 4: 'bt470m', 5: 'bt470bg', 6: 'smpte170m', 7: 'smpte240m',
+    8: 'film', 9: 'bt2020', 10: 'smpte428', 11: 'smpte431', 12: 'smpte432',
+    22: 'jedec-p22',
+}
+_TRANSFERS = {
+    1: 'bt709', 4: 'gamma22', 5: 'gamma28', 6: 'smpte170m', 7: 'smpte240m',
+    8: 'linear', 9: 'log100', 10: 'log316', 11: 'iec61966-2-4', 12: 'bt1361e',
+    13: 'iec61966-2-1', 14: 'bt2020-10', 15: 'bt2020-12', 16: 'smpte2084',
+    17: 'smpte428', 18: 'arib-std-b67',
+}
+_HDR_TRANSFERS = frozenset({'smpte2084', 'arib-std-b67'})
+
+# MP4 sample-entry four-character codes, by the codec ffprobe reports. The
+# Dolby Vision entries (dvh1/dvhe/dva1/dvav) carry an ordinary HEVC/AVC base
+# layer.
+_MP4_VIDEO = {
+    b'avc1': 'h264', b'avc3': 'h264', b'dva1': 'h264', b'dvav': 'h264',
+    b'hvc1': 'hevc', b'hev1': 'hevc', b'dvh1': 'hevc', b'dvhe': 'hevc',
+    b'av01': 'av1', b'vp09': 'vp9',
+}
+_MP4_AUDIO = {
+    b'ac-3': 'ac3', b'ec-3': 'eac3', b'Opus': 'opus', b'fLaC': 'flac',
+    b'alac': 'alac', b'.mp3': 'mp3',
+}
+# mp4a is resolved through its esds objectTypeIndication.
+_MP4A_OBJECT_TYPES = {
+    0x40: 'aac', 0x66: 'aac', 0x67: 'aac', 0x68: 'aac',
+    0x69: 'mp3', 0x6B: 'mp3', 0xA5: 'ac3', 0xA6: 'eac3',
+}
+_MP4_SUBTITLE = {
+    b'tx3g': 'mov_text', b'text': 'mov_text', b'wvtt': 'webvtt', b'stpp': 'ttml',
+}
+_MP4_HANDLERS = {b'vide': 'video', b'soun': 'audio', b'sbtl': 'subtitle',
+                 b'subt': 'subtitle', b'text': 'subtitle'}
+
+_MKV_VIDEO = {
+    'V_MPEGH/ISO/HEVC': 'hevc', 'V_MPEG4/ISO/AVC': 'h264', 'V_AV1': 'av1',
+    'V_VP9': 'vp9',
+}
+_MKV_AUDIO = {
+    'A_AAC': 'aac', 'A_AC3': 'ac3', 'A_EAC3': 'eac3', 'A_DTS': 'dts',
+    'A_TRUEHD': 'truehd', 'A_OPUS': 'opus', 'A_FLAC': 'flac',
+    'A_VORBIS': 'vorbis', 'A_MPEG/L3': 'mp3', 'A_MPEG/L2': 'mp2',
+}
+_MKV_SUBTITLE = {
+    'S_TEXT/UTF8': 'subrip', 'S_TEXT/ASS': 'ass', 'S_TEXT/SSA': 'ass',
+    'S_TEXT/WEBVTT': 'webvtt', 'S_HDMV/PGS': 'hdmv_pgs_subtitle',
+    'S_VOBSUB': 'dvd_subtitle', 'S_DVBSUB': 'dvb_subtitle',
+    'S_HDMV/TEXTST': 'hdmv_text_subtitle',
+}
+_MKV_TRACK_TYPES = {1: 'video', 2: 'audio', 17: 'subtitle'}
+
+# Matroska element IDs, with their length-marker bits, as read by _ebml_id.
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEK_HEAD, _SEEK, _SEEK_ID, _SEEK_POSITION = 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+_INFO, _TIMESTAMP_SCALE, _DURATION = 0x1549A966, 0x2AD7B1, 0x4489
+_TRACKS, _TRACK_ENTRY = 0x1654AE6B, 0xAE
+_TRACK_TYPE, _CODEC_ID, _CODEC_PRIVATE, _DEFAULT_DURATION = 0x83, 0x86, 0x63A2, 0x23E383
+_VIDEO, _PIXEL_WIDTH, _PIXEL_HEIGHT = 0xE0, 0xB0, 0xBA
+_COLOUR, _BITS_PER_CHANNEL = 0x55B0, 0x55B2
+_TRANSFER_CHARACTERISTICS, _PRIMARIES_ID, _MAX_CLL = 0x55BA, 0x55BB, 0x55BC
+_MASTERING_METADATA, _LUMINANCE_MAX = 0x55D0, 0x55D9
+_BLOCK_ADDITION_MAPPING, _BLOCK_ADD_ID_TYPE, _BLOCK_ADD_ID_EXTRA_DATA = 0x41E4, 0x41E7, 0x41ED
+_CLUSTER = 0x1F43B675
+_TRACK_NUMBER = 0xD7
+_CUES, _CUE_POINT, _CUE_TIME = 0x1C53BB6B, 0xBB, 0xB3
+_CUE_TRACK_POSITIONS, _CUE_TRACK = 0xB7, 0xF7
+_UNKNOWN_SIZE = -1
+
+_DOVI_RECORDS = (b'dvcC', b'dvvC', b'dvwC')
+
+
+class _Unsupported(Exception):
+    """The header doesn't settle something ffprobe would report."""
+
+
+def probe(path: str) -> 'dict[str, Any] | None':
+    """ffprobe-shaped {'streams', 'format'[, 'frames']} for *path*, or None
+    when it isn't an MP4/MOV or Matroska file, or its header leaves anything
+    to the bitstream. Never raises for a bad or unreadable file."""
+    try:
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == struct.pack('>I', _EBML):
+                return _probe_matroska(buf)
+            if buf[4:8] in (b'ftyp', b'moov', b'free', b'wide', b'skip', b'mdat'):
+                return _probe_mp4(buf)
+    except (OSError, ValueError, IndexError, struct.error, _Unsupported):
+        # ValueError covers mmap of an empty file as well as bad values.
+        pass
+    return None
+
+
+def keyframes(path: str) -> 'list[float] | None':
+    """Presentation times in seconds, ascending, of the first video track's
+    keyframes, relative to the start of the file's timeline (what ffmpeg's
+    input-side -ss counts from) -- or None when it isn't an MP4/MOV or
+    Matroska file or its header carries no seek index. Never raises for a
+    bad or unreadable file."""
+    try:
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == struct.pack('>I', _EBML):
+                return _matroska_keyframes(buf)
+            if buf[4:8] in (b'ftyp', b'moov', b'free', b'wide', b'skip', b'mdat'):
+                return _mp4_keyframes(buf)
+    except (OSError, ValueError, IndexError, struct.error, _Unsupported):
+        pass
+    return None
+
+
+def _colour(primaries: 'int | None', transfer: 'int | None') -> 'tuple[str, str]':
+    """ffprobe's names for a pair of colour code points; _Unsupported when
+    either is missing or unspecified."""
+    if primaries not in _PRIMARIES or transfer not in _TRANSFERS:
+        raise _Unsupported('colour left to the bitstream')
+    return _PRIMARIES[primaries], _TRANSFERS[transfer]
+
+
+def _hdr_frames(transfer: str, maxcll: 'int | None',
+                max_luminance: 'str | None') -> 'list[dict[str, Any]] | None':
+    """The 'frames' side data ffprobe would report, or None when an HDR
+    source's header has no MaxCLL. Many HDR10 files carry a mastering
+    display box but send MaxCLL only in SEI, which ffprobe reads from the
+    first frame. A missing MaxCLL would move the peak that the tonemap
+    uses, so ffprobe decides."""
+    side_data = []
+    if max_luminance is not None:
+        side_data.append({'side_data_type': 'Mastering display metadata',
+                          'max_luminance': max_luminance})
+    if maxcll is not None:
+        side_data.append({'side_data_type': 'Content light level metadata',
+                          'max_content': maxcll})
+    if maxcll is None and transfer in _HDR_TRANSFERS:
+        return None
+    return [{'side_data_list': side_data}]
+
+
+def _probe_result(streams: 'list[dict[str, Any]]', duration: float, size: int,
+                  frames: 'list[dict[str, Any]] | None') -> 'dict[str, Any]':
+    """Assemble the ffprobe-shaped result. format.bit_rate is what ffprobe
+    computes for it too: the file's size over its duration."""
+    if duration <= 0:
+        raise _Unsupported('no duration')
+    data: 'dict[str, Any]' = {
+        'streams': streams,
+        'format': {'duration': f'{duration:.6f}',
+                   'bit_rate': str(int(size * 8 / duration))},
+    }
+    if frames is not None:
+        data['frames'] = frames
+    return data
+
+
+# ── MP4 / MOV ──────────────────────────────────────────────────────────────────
+
+def _boxes(buf: Any, start: int, end: int) -> 'Iterator[tuple[bytes, int, int]]':
+    """(type, payload start, payload end) of each box in buf[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise _Unsupported('truncated box')
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _child(buf: Any, start: int, end: int, kind: bytes) -> 'tuple[int, int] | None':
+    for k, s, e in _boxes(buf, start, end):
+        if k == kind:
+            return s, e
+    return None
+
+
+def _path(buf: Any, start: int, end: int, *kinds: bytes) -> 'tuple[int, int] | None':
+    span: 'tuple[int, int] | None' = (start, end)
+    for kind in kinds:
+        span = _child(buf, span[0], span[1], kind)
+        if span is None:
+            return None
+    return span
+
+
+def _mp4_bit_depth(kind: bytes, buf: Any, s: int, e: int) -> 'int | None':
+    """Bit depth from a codec configuration record (avcC/hvcC/av1C/vpcC)."""
+    if kind == b'hvcC' and e - s > 17:
+        return (buf[s + 17] & 7) + 8
+    if kind == b'av1C' and e - s > 2:
+        return 12 if buf[s + 2] & 0x20 else 10 if buf[s + 2] & 0x40 else 8
+    if kind == b'vpcC' and e - s > 6:
+        return buf[s + 6] >> 4
+    if kind == b'avcC' and e - s > 5:
+        profile = buf[s + 1]
+        if profile in (66, 77, 88):
+            return 8
+        # High profiles append chroma_format and bit depths after the
+        # parameter sets.
+        pos = s + 6
+        for count_mask in (0x1F, 0xFF):
+            count = buf[pos - 1] & count_mask
+            for _ in range(count):
+                pos += 2 + struct.unpack_from('>H', buf, pos)[0]
+            pos += 1
+        if pos + 1 < e:
+            return (buf[pos] & 7) + 8
+    return None
+
+
+def _mp4_visual_entry(buf: Any, kind: bytes, s: int, e: int, stream: 'dict[str, Any]'
+                      ) -> 'tuple[str, int | None, str | None]':
+    """Fill *stream* from a visual sample entry; return its transfer name and
+    any HDR10 metadata the entry's boxes carry."""
+    stream['width'], stream['height'] = struct.unpack_from('>HH', buf, s + 24)
+    primaries = transfer = bit_depth = maxcll = None
+    max_luminance = None
+    # 78 bytes of fixed VisualSampleEntry fields precede the child boxes.
+    for k, cs, ce in _boxes(buf, s + 78, e):
+        if k == b'colr' and buf[cs:cs + 4] in (b'nclx', b'nclc'):
+            primaries, transfer = struct.unpack_from('>HH', buf, cs + 4)
+        elif k in (b'avcC', b'hvcC', b'av1C', b'vpcC'):
+            bit_depth = _mp4_bit_depth(k, buf, cs, ce)
+            if k == b'vpcC' and primaries is None:
+                primaries, transfer = buf[cs + 7], buf[cs + 8]
+        elif k in _DOVI_RECORDS:
+            stream['side_data_list'] = [{'side_data_type': 'DOVI configuration record',
+                                         'dv_profile': buf[cs + 2] >> 1}]
+        elif k == b'mdcv':
+            luminance = struct.unpack_from('>I', buf, cs + 16)[0]
+            max_luminance = f'{luminance}/10000'
+        elif k == b'clli':
+            maxcll = struct.unpack_from('>H', buf, cs)[0]
+    if bit_depth is None:
+        raise _Unsupported(f'no bit depth in {kind!r}')
+    stream['bits_per_raw_sample'] = str(bit_depth)
+    stream['color_primaries'], stream['color_transfer'] = _colour(primaries, transfer)
+    return stream['color_transfer'], maxcll, max_luminance
+
+
+def _mp4_audio_codec(buf: Any, kind: bytes, s: int, e: int) -> str:
+    if kind in _MP4_AUDIO:
+        return _MP4_AUDIO[kind]
+    if kind != b'mp4a':
+        raise _Unsupported(f'audio {kind!r}')
+    version = struct.unpack_from('>H', buf, s + 8)[0]
+    # AudioSampleEntry: 28 bytes, plus QuickTime's version 1/2 extensions.
+    children = s + {0: 28, 1: 44, 2: 64}.get(version, 28)
+    esds = _child(buf, children, e, b'esds')
+    if esds is None:
+        raise _Unsupported('mp4a without esds')
+    pos = esds[0] + 4
+    if buf[pos] != 0x03:
+        raise _Unsupported('esds without ES_Descriptor')
+    pos = _descriptor_body(buf, pos)
+    flags = buf[pos + 2]
+    pos += 3
+    if flags & 0x80:
+        pos += 2
+    if flags & 0x40:
+        pos += 1 + buf[pos]
+    if flags & 0x20:
+        pos += 2
+    if buf[pos] != 0x04:
+        raise _Unsupported('esds without DecoderConfigDescriptor')
+    object_type = buf[_descriptor_body(buf, pos)]
+    if object_type not in _MP4A_OBJECT_TYPES:
+        raise _Unsupported(f'mp4a object type {object_type:#x}')
+    return _MP4A_OBJECT_TYPES[object_type]
+
+
+def _descriptor_body(buf: Any, pos: int) -> int:
+    """Skip an MPEG-4 descriptor's tag and variable-length size."""
+    pos += 1
+    for _ in range(4):
+        pos += 1
+        if not buf[pos - 1] & 0x80:
+            break
+    return pos
+
+
+def _be_array(typecode: str, buf: Any, start: int, count: int) -> 'array.array[int]':
+    """*count* big-endian 32-bit integers from buf[start:]."""
+    table = array.array(typecode, buf[start:start + 4 * count])
+    if len(table) != count:
+        raise _Unsupported('truncated table')
+    if sys.byteorder == 'little':
+        table.byteswap()
+    return table
+
+
+def _mp4_sample_stats(buf: Any, stbl: 'tuple[int, int]') -> 'tuple[int, int, int, int]':
+    """(sample count, summed sample durations, the most common sample
+    duration, total sample bytes) from stts and stsz."""
+    stts = _child(buf, stbl[0], stbl[1], b'stts')
+    stsz = _child(buf, stbl[0], stbl[1], b'stsz')
+    if stts is None or stsz is None:
+        raise _Unsupported('no sample tables (fragmented?)')
+    entries = struct.unpack_from('>I', buf, stts[0] + 4)[0]
+    table = _be_array('I', buf, stts[0] + 8, 2 * entries)
+    counts, deltas = table[0::2], table[1::2]
+    count = sum(counts)
+    total = sum(c * d for c, d in zip(counts, deltas))
+    common = max(zip(counts, deltas))[1] if entries else 0
+    sample_size, sample_count = struct.unpack_from('>II', buf, stsz[0] + 4)
+    if sample_size:
+        data_size = sample_size * sample_count
+    else:
+        data_size = sum(_be_array('I', buf, stsz[0] + 12, sample_count))
+    return count, total, common, data_size
+
+
+def _mp4_track(buf: Any, trak: 'tuple[int, int]', index: int
+               ) -> 'tuple[dict[str, Any], float, tuple[str, int | None, str | None] | None]':
+    """One trak as an ffprobe stream, its duration in seconds, and (for
+    video) the colour/HDR info _mp4_visual_entry found."""
+    mdhd = _path(buf, trak[0], trak[1], b'mdia', b'mdhd')
+    hdlr = _path(buf, trak[0], trak[1], b'mdia', b'hdlr')
+    stbl = _path(buf, trak[0], trak[1], b'mdia', b'minf', b'stbl')
+    if mdhd is None or hdlr is None or stbl is None:
+        raise _Unsupported('incomplete trak')
+    if buf[mdhd[0]] == 1:
+        timescale, media_duration = struct.unpack_from('>IQ', buf, mdhd[0] + 20)
+    else:
+        timescale, media_duration = struct.unpack_from('>II', buf, mdhd[0] + 12)
+    if not timescale:
+        raise _Unsupported('zero timescale')
+    codec_type = _MP4_HANDLERS.get(buf[hdlr[0] + 8:hdlr[0] + 12], 'data')
+    stream: 'dict[str, Any]' = {'index': index, 'codec_type': codec_type}
+    if codec_type == 'data':
+        return stream, 0.0, None
+
+    count, total, common, data_size = _mp4_sample_stats(buf, stbl)
+    # mov.c's stream duration: mdhd's, or the sample durations' sum when
+    # that is shorter (mdhd often counts one frame too many).
+    duration = min(media_duration, total) if total else media_duration
+    stsd = _child(buf, stbl[0], stbl[1], b'stsd')
+    if stsd is None:
+        raise _Unsupported('no stsd')
+    entry = next(_boxes(buf, stsd[0] + 8, stsd[1]), None)
+    if entry is None:
+        raise _Unsupported('empty stsd')
+    kind, s, e = entry
+    hdr = None
+    if codec_type == 'video':
+        if kind not in _MP4_VIDEO or not count or not total:
+            raise _Unsupported(f'video {kind!r}')
+        stream['codec_name'] = _MP4_VIDEO[kind]
+        stream['avg_frame_rate'] = f'{count * timescale}/{total}'
+        stream['r_frame_rate'] = f'{timescale}/{common}'
+        hdr = _mp4_visual_entry(buf, kind, s, e, stream)
+    elif codec_type == 'audio':
+        stream['codec_name'] = _mp4_audio_codec(buf, kind, s, e)
+    else:
+        stream['codec_name'] = _MP4_SUBTITLE.get(kind, kind.decode('latin-1').strip())
+    seconds = duration / timescale
+    stream['duration'] = f'{seconds:.6f}'
+    if duration > 0 and codec_type in ('video', 'audio'):
+        stream['bit_rate'] = str(round(data_size * 8 * timescale / duration))
+    return stream, seconds, hdr
+
+
+def _probe_mp4(buf: Any) -> 'dict[str, Any]':
+    moov = _child(buf, 0, len(buf), b'moov')
+    if moov is None:
+        raise _Unsupported('no moov')
+    if _child(buf, moov[0], moov[1], b'mvex') is not None:
+        raise _Unsupported('fragmented MP4')
+    mvhd = _child(buf, moov[0], moov[1], b'mvhd')
+    if mvhd is None:
+        raise _Unsupported('no mvhd')
+    # The container's duration is mvhd's (edit lists included), which can be
+    # shorter than a primed audio track's.
+    if buf[mvhd[0]] == 1:
+        movie_timescale, movie_duration = struct.unpack_from('>IQ', buf, mvhd[0] + 20)
+    else:
+        movie_timescale, movie_duration = struct.unpack_from('>II', buf, mvhd[0] + 12)
+    streams, durations, video_hdr = [], [], None
+    for kind, s, e in _boxes(buf, moov[0], moov[1]):
+        if kind != b'trak':
+            continue
+        stream, seconds, hdr = _mp4_track(buf, (s, e), len(streams))
+        streams.append(stream)
+        durations.append(seconds)
+        if hdr is not None and video_hdr is None:
+            video_hdr = hdr
+    if video_hdr is None:
+        raise _Unsupported('no video track')
+    duration = (movie_duration / movie_timescale if movie_timescale and movie_duration
+                else max(durations))
+    return _probe_result(streams, duration, len(buf), _hdr_frames(*video_hdr))
+
+
+def _run_lookup(counts: 'array.array[int]', values: 'array.array[int]',
+                samples: 'list[int]', accumulate: bool) -> 'list[int]':
+    """Read a run-length sample table (stts, ctts) at *samples* (0-based,
+    ascending): each sample's value, or with *accumulate* the sum of every
+    earlier sample's -- stts's deltas summed are the decode timestamp."""
+    out = []
+    run = run_start = base = 0
+    for sample in samples:
+        while run < len(counts) and sample >= run_start + counts[run]:
+            base += counts[run] * values[run]
+            run_start += counts[run]
+            run += 1
+        if run == len(counts):
+            raise _Unsupported('sample past the end of its table')
+        out.append(base + (sample - run_start) * values[run] if accumulate else values[run])
+    return out
+
+
+def _mp4_keyframes(buf: Any) -> 'list[float]':
+    moov = _child(buf, 0, len(buf), b'moov')
+    if moov is None or _child(buf, moov[0], moov[1], b'mvex') is not None:
+        raise _Unsupported('no sample tables')
+    mvhd = _child(buf, moov[0], moov[1], b'mvhd')
+    if mvhd is None:
+        raise _Unsupported('no mvhd')
+    movie_timescale = struct.unpack_from('>I', buf, mvhd[0] + (20 if buf[mvhd[0]] == 1 else 12))[0]
+    for kind, s, e in _boxes(buf, moov[0], moov[1]):
+        hdlr = _path(buf, s, e, b'mdia', b'hdlr') if kind == b'trak' else None
+        if hdlr is not None and buf[hdlr[0] + 8:hdlr[0] + 12] == b'vide':
+            return _mp4_track_keyframes(buf, (s, e), movie_timescale)
+    raise _Unsupported('no video track')
+
+
+def _mp4_track_keyframes(buf: Any, trak: 'tuple[int, int]', movie_timescale: int
+                         ) -> 'list[float]':
+    """Sync samples' presentation times: decode time from stts, plus the
+    composition offset from ctts, less the edit list's start -- as mov.c
+    places them on the timeline."""
+    mdhd = _path(buf, trak[0], trak[1], b'mdia', b'mdhd')
+    stbl = _path(buf, trak[0], trak[1], b'mdia', b'minf', b'stbl')
+    if mdhd is None or stbl is None:
+        raise _Unsupported('incomplete trak')
+    timescale = struct.unpack_from('>I', buf, mdhd[0] + (20 if buf[mdhd[0]] == 1 else 12))[0]
+    stts = _child(buf, stbl[0], stbl[1], b'stts')
+    if not timescale or stts is None:
+        raise _Unsupported('no sample timing')
+    table = _be_array('I', buf, stts[0] + 8, 2 * struct.unpack_from('>I', buf, stts[0] + 4)[0])
+    counts, deltas = table[0::2], table[1::2]
+
+    # No stss means every sample is a sync sample (an intra-only stream).
+    stss = _child(buf, stbl[0], stbl[1], b'stss')
+    if stss is None:
+        samples = list(range(sum(counts)))
+    else:
+        count = struct.unpack_from('>I', buf, stss[0] + 4)[0]
+        samples = [n - 1 for n in _be_array('I', buf, stss[0] + 8, count)]
+    times = _run_lookup(counts, deltas, samples, accumulate=True)
+
+    # ctts offsets are signed in practice whatever the box version says,
+    # which is how mov.c reads them too.
+    ctts = _child(buf, stbl[0], stbl[1], b'ctts')
+    first_pts = 0
+    if ctts is not None:
+        table = _be_array('i', buf, ctts[0] + 8, 2 * struct.unpack_from('>I', buf, ctts[0] + 4)[0])
+        offsets = _run_lookup(table[0::2], table[1::2], samples, accumulate=False)
+        times = [t + o for t, o in zip(times, offsets)]
+        first_pts = table[1] if len(table) else 0
+
+    # The edit list: leading empty edits delay the track, and the first real
+    # one says which media time is presented first. Without one, the first
+    # sample's presentation time is the start.
+    delay, start = 0.0, first_pts
+    elst = _path(buf, trak[0], trak[1], b'edts', b'elst')
+    if elst is not None:
+        wide = buf[elst[0]] == 1
+        entry, fmt = (20, '>Qq') if wide else (12, '>Ii')
+        for i in range(struct.unpack_from('>I', buf, elst[0] + 4)[0]):
+            segment_duration, media_time = struct.unpack_from(fmt, buf, elst[0] + 8 + i * entry)
+            if media_time != -1:
+                start = media_time
+                break
+            if movie_timescale:
+                delay += segment_duration / movie_timescale
+    keyframes = {round(delay + (t - start) / timescale, 6) for t in times}
+    return sorted(k for k in keyframes if k >= 0)
+
+
+# ── Matroska / WebM ────────────────────────────────────────────────────────────
+
+def _ebml_id(buf: Any, pos: int) -> 'tuple[int, int]':
+    """(element ID with its marker bits, position after it)."""
+    first = buf[pos]
+    length = 1
+    while length <= 4 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 4:
+        raise _Unsupported('bad element ID')
+    return int.from_bytes(buf[pos:pos + length], 'big'), pos + length
+
+
+def _ebml_size(buf: Any, pos: int) -> 'tuple[int, int]':
+    """(element data size or _UNKNOWN_SIZE, position after it)."""
+    first = buf[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise _Unsupported('bad element size')
+    value = first & (0xFF >> length)
+    for i in range(1, length):
+        value = (value << 8) | buf[pos + i]
+    if value == (1 << (7 * length)) - 1:
+        return _UNKNOWN_SIZE, pos + length
+    return value, pos + length
+
+
+def _elements(buf: Any, start: int, end: int) -> 'Iterator[tuple[int, int, int]]':
+    """(ID, data start, data end) of each element in buf[start:end]. An
+    unknown-size element (a live-written Segment or Cluster) runs to *end*."""
+    pos = start
+    while pos < end:
+        element_id, pos = _ebml_id(buf, pos)
+        size, pos = _ebml_size(buf, pos)
+        data_end = end if size == _UNKNOWN_SIZE else pos + size
+        if data_end > end:
+            raise _Unsupported('truncated element')
+        yield element_id, pos, data_end
+        pos = data_end
+
+
+def _uint(buf: Any, s: int, e: int) -> int:
+    return int.from_bytes(buf[s:e], 'big')
+
+
+def _float(buf: Any, s: int, e: int) -> float:
+    if e - s == 4:
+        return struct.unpack_from('>f', buf, s)[0]
+    if e - s == 8:
+        return struct.unpack_from('>d', buf, s)[0]
+    return 0.0
+
+
+def _mkv_codec_private_bit_depth(codec: str, private: 'bytes | None') -> 'int | None':
+    kinds = {'hevc': b'hvcC', 'h264': b'avcC', 'av1': b'av1C'}
+    if private is None or codec not in kinds:
+        return None
+    return _mp4_bit_depth(kinds[codec], private, 0, len(private))
+
+
+def _mkv_video(buf: Any, entry: 'dict[int, tuple[int, int]]', stream: 'dict[str, Any]',
+               private: 'bytes | None') -> 'tuple[str, int | None, str | None]':
+    video = entry.get(_VIDEO)
+    if video is None:
+        raise _Unsupported('video track without Video element')
+    fields = {i: (s, e) for i, s, e in _elements(buf, *video)}
+    if _PIXEL_WIDTH not in fields or _PIXEL_HEIGHT not in fields:
+        raise _Unsupported('no dimensions')
+    stream['width'] = _uint(buf, *fields[_PIXEL_WIDTH])
+    stream['height'] = _uint(buf, *fields[_PIXEL_HEIGHT])
+    if _DEFAULT_DURATION not in entry:
+        raise _Unsupported('no DefaultDuration')
+    # matroskadec's own reduction of 1e9/DefaultDuration: numerator and
+    # denominator both at most 30000, so 41708333 ns comes out 24000/1001.
+    # Imported here, not at the top: fractions pulls in decimal, ~5ms of
+    # every launch for a branch most files never reach.
+    from fractions import Fraction
+    exact = Fraction(10 ** 9, _uint(buf, *entry[_DEFAULT_DURATION]) or 1)
+    rate = exact.limit_denominator(max(1, min(30000, int(30000 / exact))))
+    stream['avg_frame_rate'] = stream['r_frame_rate'] = f'{rate.numerator}/{rate.denominator}'
+
+    colour = {i: (s, e) for i, s, e in _elements(buf, *fields[_COLOUR])} \
+        if _COLOUR in fields else {}
+    primaries = _uint(buf, *colour[_PRIMARIES_ID]) if _PRIMARIES_ID in colour else None
+    transfer = (_uint(buf, *colour[_TRANSFER_CHARACTERISTICS])
+                if _TRANSFER_CHARACTERISTICS in colour else None)
+    stream['color_primaries'], stream['color_transfer'] = _colour(primaries, transfer)
+    bit_depth = _mkv_codec_private_bit_depth(stream['codec_name'], private)
+    if bit_depth is None and _BITS_PER_CHANNEL in colour:
+        bit_depth = _uint(buf, *colour[_BITS_PER_CHANNEL]) or None
+    if bit_depth is None:
+        raise _Unsupported('no bit depth')
+    stream['bits_per_raw_sample'] = str(bit_depth)
+
+    maxcll = _uint(buf, *colour[_MAX_CLL]) if _MAX_CLL in colour else None
+    max_luminance = None
+    if _MASTERING_METADATA in colour:
+        for i, s, e in _elements(buf, *colour[_MASTERING_METADATA]):
+            if i == _LUMINANCE_MAX:
+                max_luminance = f'{round(_float(buf, s, e) * 10000)}/10000'
+    return stream['color_transfer'], maxcll, max_luminance
+
+
+def _mkv_dovi(buf: Any, mapping: 'tuple[int, int]') -> 'dict[str, Any] | None':
+    fields = {i: (s, e) for i, s, e in _elements(buf, *mapping)}
+    if _BLOCK_ADD_ID_TYPE not in fields or _BLOCK_ADD_ID_EXTRA_DATA not in fields:
+        return None
+    if _uint(buf, *fields[_BLOCK_ADD_ID_TYPE]).to_bytes(4, 'big') not in _DOVI_RECORDS:
+        return None
+    s, _ = fields[_BLOCK_ADD_ID_EXTRA_DATA]
+    return {'side_data_type': 'DOVI configuration record', 'dv_profile': buf[s + 2] >> 1}
+
+
+def _mkv_track(buf: Any, track: 'tuple[int, int]', index: int
+               ) -> 'tuple[dict[str, Any], tuple[str, int | None, str | None] | None]':
+    entry: 'dict[int, tuple[int, int]]' = {}
+    side_data = []
+    for i, s, e in _elements(buf, *track):
+        if i == _BLOCK_ADDITION_MAPPING:
+            dovi = _mkv_dovi(buf, (s, e))
+            if dovi is not None:
+                side_data.append(dovi)
+        else:
+            entry.setdefault(i, (s, e))
+    if _TRACK_TYPE not in entry or _CODEC_ID not in entry:
+        raise _Unsupported('incomplete TrackEntry')
+    codec_type = _MKV_TRACK_TYPES.get(_uint(buf, *entry[_TRACK_TYPE]))
+    codec_id = bytes(buf[slice(*entry[_CODEC_ID])]).rstrip(b'\0').decode('ascii', 'replace')
+    names = {'video': _MKV_VIDEO, 'audio': _MKV_AUDIO, 'subtitle': _MKV_SUBTITLE}
+    # A_AAC may carry a profile suffix (A_AAC/MPEG4/LC); the rest match whole.
+    codec_name = names.get(codec_type or '', {}).get(
+        'A_AAC' if codec_id.startswith('A_AAC') else codec_id)
+    if codec_name is None:
+        raise _Unsupported(f'track {codec_id!r}')
+    stream: 'dict[str, Any]' = {'index': index, 'codec_type': codec_type,
+                                'codec_name': codec_name}
+    if side_data:
+        stream['side_data_list'] = side_data
+    if codec_type != 'video':
+        return stream, None
+    private = (bytes(buf[slice(*entry[_CODEC_PRIVATE])])
+               if _CODEC_PRIVATE in entry else None)
+    return stream, _mkv_video(buf, entry, stream, private)
+
+
+def _mkv_segment(buf: Any, wanted: 'tuple[int, ...]') -> 'dict[int, tuple[int, int]]':
+    """The data span of each *wanted* top-level element of the Segment. Info
+    and Tracks normally precede the first Cluster and Cues follow the last;
+    whatever isn't found before the first Cluster is looked up through the
+    SeekHead rather than by walking every Cluster."""
+    header_id, pos = _ebml_id(buf, 0)
+    size, pos = _ebml_size(buf, pos)
+    segment = next(_elements(buf, pos + size, len(buf)), None)
+    if segment is None or segment[0] != _SEGMENT:
+        raise _Unsupported('no Segment')
+    _, seg_start, seg_end = segment
+
+    found: 'dict[int, tuple[int, int]]' = {}
+    seeks: 'dict[int, int]' = {}
+    for i, s, e in _elements(buf, seg_start, seg_end):
+        if i in wanted:
+            found.setdefault(i, (s, e))
+        elif i == _SEEK_HEAD:
+            for seek_id, ss, se in _elements(buf, s, e):
+                if seek_id != _SEEK:
+                    continue
+                seek = {j: (a, b) for j, a, b in _elements(buf, ss, se)}
+                if _SEEK_ID in seek and _SEEK_POSITION in seek:
+                    seeks[_uint(buf, *seek[_SEEK_ID])] = _uint(buf, *seek[_SEEK_POSITION])
+        elif i == _CLUSTER:
+            break
+        if all(w in found for w in wanted):
+            break
+    for w in wanted:
+        if w not in found and w in seeks:
+            i, s, e = next(_elements(buf, seg_start + seeks[w], seg_end))
+            if i == w:
+                found[w] = (s, e)
+    return found
+
+
+def _mkv_timestamp_scale(buf: Any, info: 'dict[int, tuple[int, int]]') -> int:
+    return _uint(buf, *info[_TIMESTAMP_SCALE]) if _TIMESTAMP_SCALE in info else 1_000_000
+
+
+def _probe_matroska(buf: Any) -> 'dict[str, Any]':
+    found = _mkv_segment(buf, (_INFO, _TRACKS))
+    if _INFO not in found or _TRACKS not in found:
+        raise _Unsupported('no Info/Tracks')
+
+    info = {i: (s, e) for i, s, e in _elements(buf, *found[_INFO])}
+    scale = _mkv_timestamp_scale(buf, info)
+    if _DURATION not in info:
+        raise _Unsupported('no Duration')
+    duration = _float(buf, *info[_DURATION]) * scale / 1e9
+
+    streams, video_hdr = [], None
+    for i, s, e in _elements(buf, *found[_TRACKS]):
+        if i != _TRACK_ENTRY:
+            continue
+        stream, hdr = _mkv_track(buf, (s, e), len(streams))
+        streams.append(stream)
+        if hdr is not None and video_hdr is None:
+            video_hdr = hdr
+    if video_hdr is None:
+        raise _Unsupported('no video track')
+    return _probe_result(streams, duration, len(buf), _hdr_frames(*video_hdr))
+
+
+def _matroska_keyframes(buf: Any) -> 'list[float]':
+    """CuePoint times for the first video track. Muxers cue that track's
+    keyframes (mkvmerge and ffmpeg cue every one), and nothing else."""
+    found = _mkv_segment(buf, (_INFO, _TRACKS, _CUES))
+    if any(w not in found for w in (_INFO, _TRACKS, _CUES)):
+        raise _Unsupported('no Cues')
+    scale = _mkv_timestamp_scale(buf, {i: (s, e) for i, s, e in _elements(buf, *found[_INFO])})
+    video_track = None
+    for i, s, e in _elements(buf, *found[_TRACKS]):
+        if i != _TRACK_ENTRY:
+            continue
+        entry = {j: (a, b) for j, a, b in _elements(buf, s, e)}
+        if (_TRACK_TYPE in entry and _TRACK_NUMBER in entry
+                and _uint(buf, *entry[_TRACK_TYPE]) == 1):
+            video_track = _uint(buf, *entry[_TRACK_NUMBER])
+            break
+    if video_track is None:
+        raise _Unsupported('no video track')
+
+    keyframes = set()
+    for i, s, e in _elements(buf, *found[_CUES]):
+        if i != _CUE_POINT:
+            continue
+        time, tracks = None, []
+        for j, a, b in _elements(buf, s, e):
+            if j == _CUE_TIME:
+                time = _uint(buf, a, b)
+            elif j == _CUE_TRACK_POSITIONS:
+                tracks.extend(_uint(buf, c, d) for k, c, d in _elements(buf, a, b)
+                              if k == _CUE_TRACK)
+        if time is not None and video_track in tracks:
+            keyframes.add(round(time * scale / 1e9, 6))
+    if not keyframes:
+        raise _Unsupported('no cues for the video track')
+    return sorted(keyframes)
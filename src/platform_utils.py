@@ -1,8 +1,8 @@
 """OS-specific primitives: subprocess startup flags, app data directories,
-DPI awareness, and GPU-name probing. Every sys.platform branch in the app
-lives here except two one-liners that already degrade correctly on other
-platforms: utils.py's ffmpeg/ffprobe .exe suffix and updater.py's
-detached-launch creationflags.
+DPI awareness, GPU-name probing and GPU driver identity. Every sys.platform
+branch in the app lives here except two one-liners that already degrade
+correctly on other platforms: utils.py's ffmpeg/ffprobe .exe suffix and
+updater.py's detached-launch creationflags.
 """
 from __future__ import annotations
 
@@ -42,6 +42,19 @@ def log_dir() -> str:
     return os.path.join(tempfile.gettempdir(), 'HDR to SDR')
 
 
+def cache_dir() -> str:
+    """Where the app keeps data it can regenerate (e.g. generated LUTs), per
+    OS: the platform's cache location, so backup tools and roaming profiles
+    skip it."""
+    if sys.platform == 'win32':
+        base = os.getenv('LOCALAPPDATA') or tempfile.gettempdir()
+        return os.path.join(base, 'HDR to SDR', 'Cache')
+    if sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Caches/HDR-to-SDR')
+    base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'HDR-to-SDR')
+
+
 def setup_dpi_awareness() -> None:
     """Enable Per-Monitor DPI awareness so Windows doesn't bitmap-scale the window."""
     if sys.platform != 'win32':
@@ -127,3 +140,40 @@ def gpu_name(nvidia_present: bool, gpu_encoder: str | None) -> str | None:
         if name:
             return name
     return _wmi_gpu_name(gpu_encoder)
+
+
+# Files a GPU driver install or update replaces, per OS: the Vulkan loader
+# and the vendors' runtime libraries the probes in utils.py and conversion.py
+# exercise. Only their size and mtime are read, so checking costs a stat()
+# each, never a driver call.
+def _gpu_driver_files() -> list[str]:
+    if sys.platform == 'win32':
+        system32 = os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'System32')
+        return [os.path.join(system32, name) for name in
+                ('vulkan-1.dll', 'nvcuda.dll', 'nvEncodeAPI64.dll',
+                 'amfrt64.dll', 'libmfxhw64.dll', 'libvpl.dll')]
+    if sys.platform == 'darwin':
+        return []
+    return [os.path.join(lib, name)
+            for lib in ('/usr/lib/x86_64-linux-gnu', '/usr/lib64', '/usr/lib')
+            for name in ('libvulkan.so.1', 'libcuda.so.1', 'libnvidia-encode.so.1')]
+
+
+def gpu_driver_identity() -> str:
+    """A cheap identity for the installed GPU drivers: the size and mtime of
+    each driver file present, plus the loaded NVIDIA kernel module's version
+    on Linux. It changes when a driver is installed, updated or removed,
+    which is when a cached GPU capability answer stops being trustworthy."""
+    parts = []
+    for path in _gpu_driver_files():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f'{os.path.basename(path)}|{st.st_size}|{st.st_mtime_ns}')
+    try:
+        with open('/proc/driver/nvidia/version', encoding='utf-8', errors='replace') as f:
+            parts.append(f.readline().strip())
+    except OSError:
+        pass
+    return ';'.join(parts)
@@ -8,27 +8,50 @@ from concurrent.futures import Future, ThreadPoolExecutor
 from typing import TYPE_CHECKING, Callable
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 
+import cpu_budget
+from frame_cache import FrameCache, FrameCacheSection
+from frame_store import FrameStore
+from platform_utils import cache_dir
 from utils import (
     extract_frame,
     extract_frame_with_conversion,
     extract_frame_with_gpu_conversion,
     get_video_properties,
-    clear_hdr_metadata_cache,
+    invalidate_probe_caches,
+    keyframe_index,
+    nearest_keyframe,
+    detect_crop,
     extract_frames_batch,
     extract_frames_with_conversion_batch,
     extract_frames_with_gpu_conversion_batch,
-    is_gpu_only_tonemapper,
+    extract_preview_frames,
+    ffmpeg_executable,
+    classify_source,
+    SOURCE_PQ,
     vulkan_libplacebo_available,
 )
 
+# PIL is imported by the methods that render, on the first preview: it is
+# the heaviest import on the way to the window (see utils.py).
+if TYPE_CHECKING:
+    from PIL import Image, ImageTk
+
 # ── Module-level constants ─────────────────────────────────────────────────────
 
 DEFAULT_MIN_SIZE = (550, 150)
+# The largest box a preview frame is ever extracted for. Frames are extracted
+# for the panes' own size (see _preview_extract_box), rounded up to
+# _PREVIEW_BOX_STEP so a window nudged a few pixels keeps its cached frames.
 PREVIEW_SIZE = (3840, 2160)
+_PREVIEW_BOX_STEP = 320
+
+
+def _preview_pool_workers() -> int:
+    """Frame-fetch workers: one per four cores this process may use (see
+    cpu_budget), since each runs an ffmpeg decode of its own."""
+    return max(1, cpu_budget.cpus() // 4)
 
-_PREVIEW_POOL_WORKERS = max(1, (os.cpu_count() or 1) // 4)
 
 INITIAL_PANE_SIZE = (640, 360)
 _MIN_PANE_W = 240
@@ -39,6 +62,33 @@ _MIN_SIZE_MARGIN = (16, 16)
 _INITIAL_WIDTH_STRETCH = 400
 
 
+def _frame_bytes(image: Image.Image) -> int:
+    """What a cached frame costs decoded: PIL keeps one byte a pixel for
+    single-band images and four for the rest, RGB included."""
+    width, height = image.size
+    return width * height * (1 if image.mode in ('1', 'L', 'P') else 4)
+
+
+def _frame_to_bytes(image: Image.Image) -> bytes:
+    """A frame as the disk store keeps it: its mode and size, then its pixels."""
+    header = f'{image.mode} {image.width} {image.height}\n'.encode('ascii')
+    return header + image.tobytes()
+
+
+def _frame_from_bytes(data: bytes) -> Image.Image:
+    """The frame _frame_to_bytes stored."""
+    from PIL import Image
+
+    header, _, pixels = data.partition(b'\n')
+    mode, width, height = header.decode('ascii').split()
+    return Image.frombytes(mode, (int(width), int(height)), pixels)
+
+
+# The CPU tonemappers zscale's tonemap filter runs directly -- the ones a
+# decoded preview frame is cheap to render with (see _preview_tonemappers).
+_ZSCALE_TONEMAPPERS = ('reinhard', 'mobius', 'hable')
+
+
 # ── _HDRPreviewMixin ───────────────────────────────────────────────────────────
 
 class _HDRPreviewMixin:
@@ -76,6 +126,7 @@ class _HDRPreviewMixin:
         gamma_var: tk.DoubleVar
         tonemap_var: tk.StringVar
         lut_export_var: tk.BooleanVar
+        auto_crop_var: tk.BooleanVar
         tonemap_combobox: ttk.Combobox
         custom_time_var: tk.StringVar
         custom_time_position: float | None
@@ -87,8 +138,12 @@ class _HDRPreviewMixin:
         _preview_generation: int
         _preview_pool: ThreadPoolExecutor
         _preview_thread: Future | None
-        _preview_cache_original: dict[tuple[str, float], Image.Image]
-        _preview_cache_converted: dict[tuple[str, float, str, bool, bool], Image.Image]
+        _preview_frames: FrameCache
+        _preview_cache_original: dict | FrameCacheSection
+        _preview_cache_converted: dict | FrameCacheSection
+        _preview_file_stamps: dict[str, tuple[int, int] | None]
+        _preview_store: FrameStore
+        _preview_box: tuple[int, int] | None
         gpu_accel_var: tk.BooleanVar
         _cache_lock: threading.Lock
         current_frame_index: int
@@ -96,13 +151,13 @@ class _HDRPreviewMixin:
         last_time_position: float | None
         _duration_path: str | None
         _duration_value: float | None
+        _duration_keyframes: list[float] | None
+        _duration_source_kind: str | None
         _resize_job: str | None
         _window_auto_fitted: bool
         _min_window_size: tuple[int, int]
         frame_buttons: list[ttk.Button]
 
-    _PREVIEW_CACHE_MAX = 48  # bound preview-frame memory (~1.5MB each at 960x540)
-
     # ── Gamma ──────────────────────────────────────────────────────────────────
 
     def adjust_gamma(self, image: Image.Image, gamma: float) -> Image.Image:
@@ -125,6 +180,8 @@ class _HDRPreviewMixin:
         base = self._converted_preview_base
         if base is None:
             return
+        from PIL import ImageTk
+
         adjusted = self.adjust_gamma(base, self.gamma_var.get())
         converted_photo = ImageTk.PhotoImage(adjusted)
         self.converted_image_label.config(image=converted_photo)
@@ -221,12 +278,17 @@ class _HDRPreviewMixin:
 
     def _preview_source_size(self) -> tuple[int, int]:
         """The real aspect ratio to fit preview panes to, taken from the most
-        recently extracted frame. Falls back to PREVIEW_SIZE's 16:9 box
-        before any frame has ever been extracted (original_image is None)."""
+        recently extracted frame, at the size it would be extracted for the
+        whole PREVIEW_SIZE box -- the frame itself is only pane-sized, so it
+        can't be the cap on how far the panes may grow. Falls back to
+        PREVIEW_SIZE's 16:9 box before any frame has ever been extracted
+        (original_image is None)."""
         original = getattr(self, 'original_image', None)
-        if original is not None:
-            return original.size
-        return PREVIEW_SIZE
+        if original is None:
+            return PREVIEW_SIZE
+        width, height = original.size
+        scale = min(PREVIEW_SIZE[0] / width, PREVIEW_SIZE[1] / height)
+        return (round(width * scale), round(height * scale))
 
     @staticmethod
     def _fit_preview_pane(
@@ -268,6 +330,28 @@ class _HDRPreviewMixin:
                 pane_w = min(pane_w, max_pane_w)
         return self._fit_preview_pane(pane_w, 0, src_size)
 
+    def _preview_extract_box(self) -> tuple[int, int]:
+        """The box to extract preview frames for: the pane size they will be
+        shown at (picked as _render_preview_images picks it), rounded up to
+        _PREVIEW_BOX_STEP and capped at PREVIEW_SIZE.
+
+        Only ever grows: a window made smaller keeps using the frames already
+        cached for the bigger one, and a window grown past them re-extracts
+        (see _rescale_preview_to_window). The box is part of every cache key.
+        Tk reports pane sizes in the pixels images are drawn at, so the pane
+        size is already the display's resolution."""
+        if getattr(self, '_window_auto_fitted', False):
+            pane = getattr(self, '_preview_render_size', None) or self._preview_target_size()
+        else:
+            pane = self._initial_preview_size()
+        box = tuple(min(cap, -(-side // _PREVIEW_BOX_STEP) * _PREVIEW_BOX_STEP)
+                    for side, cap in zip(pane, PREVIEW_SIZE))
+        previous = getattr(self, '_preview_box', None)
+        if previous is not None:
+            box = (max(box[0], previous[0]), max(box[1], previous[1]))
+        self._preview_box = box  # type: ignore[assignment]
+        return self._preview_box  # type: ignore[return-value]
+
     # ── Rendering helpers ──────────────────────────────────────────────────────
 
     @staticmethod
@@ -280,6 +364,8 @@ class _HDRPreviewMixin:
         original = getattr(self, 'original_image', None)
         if original is None:
             return
+        from PIL import Image, ImageTk
+
         self._preview_render_size = size
         original_resized = original.resize(size, Image.Resampling.LANCZOS)
         original_photo = ImageTk.PhotoImage(original_resized)
@@ -322,6 +408,17 @@ class _HDRPreviewMixin:
             # _render_preview_images measures fresh once the new frame lands.
             return
         self._render_preview_at_size(self._preview_target_size())
+        self._extract_sharper_preview_if_outgrown()
+
+    def _extract_sharper_preview_if_outgrown(self) -> None:
+        """Re-extract the shown frames when the panes have grown past the box
+        they were extracted for. The upscaled frames stay up meanwhile -- no
+        spinner -- and the sharper ones replace them as they land."""
+        video_path = self.input_path_var.get() if hasattr(self, 'input_path_var') else ''
+        if not video_path or not self.display_image_var.get():
+            return
+        if not self._preview_in_cache(video_path):
+            self.display_frames(video_path)
 
     def resize_images(self, max_width: int, max_height: int) -> None:
         """Resize both preview panes to fit within max_width x max_height,
@@ -482,7 +579,15 @@ class _HDRPreviewMixin:
         custom = getattr(self, 'custom_time_position', None)
         if custom is not None:
             return max(0.0, min(custom, duration))
-        return (self.current_frame_index / (self.total_frames + 1)) * duration
+        return self._seek_frame_position(self.current_frame_index, duration)
+
+    def _seek_frame_position(self, index: int, duration: float) -> float:
+        """Return seek button *index*'s position: evenly spaced through the
+        file, moved to the nearest keyframe when the file has an index, so
+        extracting it decodes a single frame. A typed custom seek is shown
+        where it was asked for instead."""
+        t = (index / (self.total_frames + 1)) * duration
+        return min(nearest_keyframe(getattr(self, '_duration_keyframes', None), t), duration)
 
     def on_custom_seek(self, event: object = None) -> None:
         """Preview the timestamp typed in the custom-seek entry."""
@@ -505,20 +610,95 @@ class _HDRPreviewMixin:
 
     # ── Preview cache ──────────────────────────────────────────────────────────
 
-    def _reset_preview_cache(self) -> None:
-        """Drop all cached preview frames (e.g. when a new file is loaded)."""
-        self._preview_cache_original = {}
-        self._preview_cache_converted = {}
-        clear_hdr_metadata_cache()
+    def _init_preview_cache(self) -> None:
+        """One byte-budgeted frame cache for every file's originals and
+        converted frames (see frame_cache), seen through a section each, over
+        the on-disk store that keeps them across sessions (see frame_store)."""
+        self._preview_frames = FrameCache(_frame_bytes)
+        self._preview_cache_original = self._preview_frames.section('original')
+        self._preview_cache_converted = self._preview_frames.section('converted')
+        self._preview_store = FrameStore(
+            os.path.join(cache_dir(), 'preview-frames'), ffmpeg_executable)
+        self._preview_file_stamps = {}
+        self._cache_lock = threading.Lock()
 
-    def _cache_store(self, cache: dict, key: object, value: Image.Image) -> None:
-        """Insert into a preview cache, evicting the oldest entry past the cap."""
+    def _reset_preview_cache(self) -> None:
+        """Called when a file is loaded or unloaded: drop the loaded file's
+        probe results so loading it again reads them afresh, and its cached
+        frames only if the file changed on disk since they were extracted.
+        Every other file's frames stay, bounded by the cache's byte budget,
+        so switching back to a queued file shows its preview at once."""
+        path = self.input_path_var.get() if hasattr(self, 'input_path_var') else ''
+        if not path:
+            return
+        invalidate_probe_caches(path)
+        if not hasattr(self, '_preview_file_stamps'):
+            self._preview_file_stamps = {}
+        try:
+            st = os.stat(path)
+            stamp: tuple[int, int] | None = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            stamp = None
+        previous = self._preview_file_stamps.get(path, stamp)
+        self._preview_file_stamps[path] = stamp
+        if stamp is None or previous != stamp:
+            self._discard_preview_frames(path)
+        frames = getattr(self, '_preview_frames', None)
+        if frames is not None:
+            logging.debug(f"Preview frame cache: {frames.stats()}")
+
+    def _discard_preview_frames(self, video_path: str) -> None:
+        """Drop every cached frame of *video_path*."""
+        for cache in (getattr(self, '_preview_cache_original', {}),
+                      getattr(self, '_preview_cache_converted', {})):
+            for key in [key for key in cache if key[0] == video_path]:
+                cache.pop(key, None)
+
+    def _cache_store(self, cache: dict | FrameCacheSection, key: tuple,
+                     value: Image.Image, persist: bool = True) -> None:
+        """Insert into a preview cache; the frame cache evicts by its byte
+        budget (see frame_cache). A newly extracted frame is also written to
+        the disk store, in the background; one read back from it is not."""
         if not hasattr(self, '_cache_lock'):
             self._cache_lock = threading.Lock()
         with self._cache_lock:
             cache[key] = value
-            if len(cache) > self._PREVIEW_CACHE_MAX:
-                cache.pop(next(iter(cache)))
+        store = getattr(self, '_preview_store', None)
+        if persist and store is not None:
+            # The key's path is fingerprinted by the store; the rest -- time,
+            # tonemapper, LUT, GPU and box, or just time and box for an
+            # original -- names the frame within that file.
+            store.put(key[0], key[1:], lambda: _frame_to_bytes(value))
+
+    def _cached_frame(self, cache: dict | FrameCacheSection,
+                      key: tuple) -> Image.Image | None:
+        """*key*'s frame from memory, else from the disk store -- kept in
+        memory from then on -- else None."""
+        frame = cache.get(key)
+        if frame is None:
+            frame = self._promote_stored_frame(cache, key)
+        return frame
+
+    def _frame_available(self, cache: dict | FrameCacheSection, key: tuple) -> bool:
+        """Whether *key*'s frame needs no extraction: in memory, or on disk and
+        now promoted into memory. Doesn't count as a memory cache lookup."""
+        return key in cache or self._promote_stored_frame(cache, key) is not None
+
+    def _promote_stored_frame(self, cache: dict | FrameCacheSection,
+                              key: tuple) -> Image.Image | None:
+        store = getattr(self, '_preview_store', None)
+        if store is None:
+            return None
+        data = store.get(key[0], key[1:])
+        if data is None:
+            return None
+        try:
+            frame = _frame_from_bytes(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            logging.warning(f"Ignoring unreadable stored preview frame: {e}")
+            return None
+        self._cache_store(cache, key, frame, persist=False)
+        return frame
 
     def _effective_lut_enabled(self) -> bool:
         """The lut_enabled value actually used by preview/export: simply
@@ -563,8 +743,8 @@ class _HDRPreviewMixin:
     def _gpu_tonemap_active(self) -> bool:
         """True when a real export would run GPU (libplacebo) tonemapping --
         mirrors gui.py's _apply_tonemap_choices ``gpu_active`` formula, so
-        preview extraction picks the same path for every tonemapper (not just
-        the GPU-only ones) that real export will actually use.
+        preview extraction picks the same path for every tonemapper that real
+        export will actually use.
 
         Before this, preview always ran the CPU zscale tonemap for
         Reinhard/Mobius/Hable regardless of the GPU accel toggle -- only the
@@ -583,11 +763,44 @@ class _HDRPreviewMixin:
 
     def _use_gpu_extraction(self, tonemapper: str) -> bool:
         """Whether preview should extract this tonemapper's converted frame via
-        the GPU (libplacebo) path rather than CPU zscale. Unconditional for
-        GPU-only tonemappers (BT.2390/Spline have no CPU implementation at
-        all); otherwise follows _gpu_tonemap_active so CPU-capable
-        tonemappers match real export's choice too."""
-        return is_gpu_only_tonemapper(tonemapper) or self._gpu_tonemap_active()
+        the GPU (libplacebo) path rather than the CPU chain. Follows
+        _gpu_tonemap_active for every tonemapper, so preview matches real
+        export's choice: BT.2390 and Spline run on the CPU too now, as their
+        fused LUT (see utils._cpu_preview_filter), so they no longer pay a
+        Vulkan device init per preview frame when GPU tonemapping is off.
+        *tonemapper* is kept so call sites read the same as before."""
+        return self._gpu_tonemap_active()
+
+    def _auto_crop_enabled(self) -> bool:
+        """auto_crop_var's state; getattr-guarded like _effective_lut_enabled
+        for bare test doubles, which default to no crop."""
+        auto_crop_var = getattr(self, 'auto_crop_var', None)
+        return bool(auto_crop_var is not None and auto_crop_var.get())
+
+    @staticmethod
+    def _crop_preview_frames(video_path: str,
+                             *frames: Image.Image) -> tuple[Image.Image, ...]:
+        """*frames* cut to the source's black-bar crop (see utils.detect_crop),
+        scaled from source pixels to each frame's own preview size.
+
+        The crop is applied to the cached full frames rather than inside the
+        ffmpeg chain, so the caches stay keyed exactly as before and toggling
+        the crop re-renders from them instead of re-extracting. The picture
+        inside the box is the same either way: the tonemap works pixel by
+        pixel (libplacebo's scene peak detection aside, which black bars
+        barely move)."""
+        crop = detect_crop(video_path)
+        properties = get_video_properties(video_path) or {}
+        src_w, src_h = properties.get('width'), properties.get('height')
+        if crop is None or not src_w or not src_h:
+            return frames
+        width, height, x, y = crop
+        cropped = []
+        for frame in frames:
+            sx, sy = frame.width / src_w, frame.height / src_h
+            cropped.append(frame.crop((round(x * sx), round(y * sy),
+                                       round((x + width) * sx), round((y + height) * sy))))
+        return tuple(cropped)
 
     def _preview_in_cache(self, video_path: str) -> bool:
         """Return True if both frames for the current state are already cached."""
@@ -601,21 +814,28 @@ class _HDRPreviewMixin:
         tonemapper = self.tonemap_var.get().lower()
         lut_enabled = self._effective_lut_enabled()
         use_gpu = self._use_gpu_extraction(tonemapper)
+        box = self._preview_extract_box()
         return (
-            (video_path, time_key) in self._preview_cache_original
-            and (video_path, time_key, tonemapper, lut_enabled, use_gpu) in self._preview_cache_converted
+            (video_path, time_key, box) in self._preview_cache_original
+            and (video_path, time_key, tonemapper, lut_enabled, use_gpu, box)
+            in self._preview_cache_converted
         )
 
     # ── Frame extraction ───────────────────────────────────────────────────────
 
     def _get_duration(self, video_path: str) -> float:
-        """Return the video duration, probing ffprobe only once per file."""
+        """Return the video duration, probing ffprobe only once per file, and
+        record the file's keyframe index for _seek_frame_position."""
         if (getattr(self, '_duration_path', None) == video_path
                 and getattr(self, '_duration_value', None)):
             return self._duration_value  # type: ignore[return-value]
         properties = get_video_properties(video_path)
         if not properties or not properties.get('duration'):
             raise ValueError("Failed to retrieve video properties.")
+        # Read alongside the duration, so the seek positions derived from
+        # both always describe the same file.
+        self._duration_keyframes = keyframe_index(video_path)
+        self._duration_source_kind = classify_source(properties)
         self._duration_path = video_path
         self._duration_value = properties['duration']
         return self._duration_value  # type: ignore[return-value]
@@ -633,8 +853,10 @@ class _HDRPreviewMixin:
         time_position: float,
         tonemapper: str,
         lut_enabled: bool = True,
+        box: tuple[int, int] = PREVIEW_SIZE,
     ) -> tuple[Image.Image, Image.Image]:
-        """Return (original, converted) preview frames, caching ffmpeg results.
+        """Return (original, converted) preview frames fit to *box* (see
+        _preview_extract_box), caching ffmpeg results.
 
         lut_enabled: mirrors gui.py's permanent "Accurate GPU Color" export
         setting (lut_export_var), so the preview shows what real export will
@@ -646,16 +868,20 @@ class _HDRPreviewMixin:
             self._preview_cache_converted = {}
 
         time_key = round(time_position, 3)
-        original_key = (video_path, time_key)
-        original = self._preview_cache_original.get(original_key)
+        original_key = (video_path, time_key, box)
+        original = self._cached_frame(self._preview_cache_original, original_key)
+        use_gpu = self._use_gpu_extraction(tonemapper)
+        converted_key = (video_path, time_key, tonemapper, lut_enabled, use_gpu, box)
+        converted = self._cached_frame(self._preview_cache_converted, converted_key)
+        if original is None and converted is None:
+            # Neither cached: one decode for both (see extract_preview_frames).
+            return self._extract_preview_pairs(
+                video_path, [time_position], tonemapper, lut_enabled, use_gpu, box)[0]
+
         if original is None:
             original = extract_frame(video_path, time_position=time_position,
-                                     width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1])
+                                     width=box[0], height=box[1])
             self._cache_store(self._preview_cache_original, original_key, original)
-
-        use_gpu = self._use_gpu_extraction(tonemapper)
-        converted_key = (video_path, time_key, tonemapper, lut_enabled, use_gpu)
-        converted = self._preview_cache_converted.get(converted_key)
         if converted is None:
             extract_fn = (extract_frame_with_gpu_conversion
                           if use_gpu
@@ -663,36 +889,87 @@ class _HDRPreviewMixin:
             converted = extract_fn(
                 video_path, gamma=1.0,
                 tonemapper=tonemapper, time_position=time_position,
-                width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1],
+                width=box[0], height=box[1],
                 lut_enabled=lut_enabled,
             )
             self._cache_store(self._preview_cache_converted, converted_key, converted)
         return original, converted
 
+    def _preview_tonemappers(self, video_path: str, tonemapper: str,
+                             use_gpu: bool) -> list[str]:
+        """*tonemapper* first, then the other tonemappers worth rendering from
+        the same decode: on the CPU path, for an HDR10 source, the ones
+        zscale's tonemap runs directly. Once a position is decoded, a
+        pane-sized tonemap is cheap, so switching among them hits the cache.
+        LUT-only tonemappers, HLG sources (all fused LUTs) and the GPU path
+        would each cost more than the decode they share."""
+        hdr10 = (getattr(self, '_duration_path', None) == video_path
+                 and getattr(self, '_duration_source_kind', None) == SOURCE_PQ)
+        if use_gpu or not hdr10:
+            return [tonemapper]
+        return [tonemapper] + [tm for tm in _ZSCALE_TONEMAPPERS if tm != tonemapper]
+
+    def _extract_preview_pairs(
+        self, video_path: str, positions: list[float], tonemapper: str,
+        lut_enabled: bool, use_gpu: bool, box: tuple[int, int],
+    ) -> list[tuple[Image.Image, Image.Image]]:
+        """(original, converted) frames for *positions* from one decode of
+        each, cached along with the other tonemappers' frames decoded with
+        them (see _preview_tonemappers)."""
+        tonemappers = self._preview_tonemappers(video_path, tonemapper, use_gpu)
+        results = extract_preview_frames(
+            video_path, positions, 1.0, tonemappers, box[0], box[1],
+            lut_enabled=lut_enabled, gpu=use_gpu)
+        pairs = []
+        for t, (original, converted) in zip(positions, results):
+            time_key = round(t, 3)
+            self._cache_store(self._preview_cache_original, (video_path, time_key, box), original)
+            for tm, img in zip(tonemappers, converted):
+                self._cache_store(self._preview_cache_converted,
+                                  (video_path, time_key, tm, lut_enabled, use_gpu, box), img)
+            pairs.append((original, converted[0]))
+        return pairs
+
+    def _prewarm_batch_pairs(
+        self, video_path: str, positions: list[float], tonemapper: str, generation: int,
+        lut_enabled: bool = True, box: tuple[int, int] = PREVIEW_SIZE,
+    ) -> None:
+        """Extract original and converted frames for the given positions,
+        each decoded once (see _extract_preview_pairs). Keys follow the same
+        rules as _prewarm_batch_converted's."""
+        if generation != self._preview_generation:
+            return
+        try:
+            self._extract_preview_pairs(
+                video_path, positions, tonemapper, lut_enabled,
+                self._use_gpu_extraction(tonemapper), box)
+        except Exception:
+            logging.exception('preview batch pre-warm failed')
+
     def _prewarm_batch_originals(
-        self, video_path: str, positions: list[float], generation: int
+        self, video_path: str, positions: list[float], generation: int,
+        box: tuple[int, int] = PREVIEW_SIZE,
     ) -> None:
         """Extract all original (HDR) frames for the given positions in one ffmpeg pass."""
         if generation != self._preview_generation:
             return
         try:
-            originals = extract_frames_batch(
-                video_path, positions, PREVIEW_SIZE[0], PREVIEW_SIZE[1])
+            originals = extract_frames_batch(video_path, positions, box[0], box[1])
             for t, img in zip(positions, originals):
                 self._cache_store(
-                    self._preview_cache_original, (video_path, round(t, 3)), img)
+                    self._preview_cache_original, (video_path, round(t, 3), box), img)
         except Exception:
             logging.exception('preview batch original pre-warm failed')
 
     def _prewarm_batch_converted(
         self, video_path: str, positions: list[float], tonemapper: str, generation: int,
-        lut_enabled: bool = True,
+        lut_enabled: bool = True, box: tuple[int, int] = PREVIEW_SIZE,
     ) -> None:
         """Tonemap-convert all frames for the given positions in one ffmpeg pass
         (or, for the GPU path, N looped GPU passes -- see
         extract_frames_with_gpu_conversion_batch).
 
-        lut_enabled and the GPU/CPU choice (_use_gpu_extraction) must match
+        lut_enabled, *box* and the GPU/CPU choice (_use_gpu_extraction) must match
         _extract_preview_images's real lookup key exactly, or prewarmed
         entries become unreachable (or reachable under the wrong key) from
         the real lookup path.
@@ -704,15 +981,15 @@ class _HDRPreviewMixin:
             if use_gpu:
                 converted = extract_frames_with_gpu_conversion_batch(
                     video_path, positions, 1.0, tonemapper,
-                    PREVIEW_SIZE[0], PREVIEW_SIZE[1], lut_enabled=lut_enabled)
+                    box[0], box[1], lut_enabled=lut_enabled)
             else:
                 converted = extract_frames_with_conversion_batch(
                     video_path, positions, 1.0, tonemapper,
-                    PREVIEW_SIZE[0], PREVIEW_SIZE[1], lut_enabled=lut_enabled)
+                    box[0], box[1], lut_enabled=lut_enabled)
             for t, img in zip(positions, converted):
                 self._cache_store(
                     self._preview_cache_converted,
-                    (video_path, round(t, 3), tonemapper, lut_enabled, use_gpu), img)
+                    (video_path, round(t, 3), tonemapper, lut_enabled, use_gpu, box), img)
         except Exception:
             logging.exception('preview batch converted pre-warm failed')
 
@@ -723,6 +1000,7 @@ class _HDRPreviewMixin:
         tonemapper: str,
         generation: int,
         lut_enabled: bool = True,
+        box: tuple[int, int] = PREVIEW_SIZE,
     ) -> None:
         """Dispatch pre-warm batch tasks for the non-visible seek frames."""
         if generation != self._preview_generation:
@@ -734,29 +1012,42 @@ class _HDRPreviewMixin:
 
         use_gpu = self._use_gpu_extraction(tonemapper)
 
-        positions: list[float] = []
+        # Positions missing both frames are decoded once for both; the rest
+        # (usually after a tonemapper switch) extract only what is missing.
+        both: list[float] = []
+        originals: list[float] = []
+        converted: list[float] = []
         for index in range(1, self.total_frames + 1):
             if index == self.current_frame_index:
                 continue
-            t = (index / (self.total_frames + 1)) * duration
+            t = self._seek_frame_position(index, duration)
             t_key = round(t, 3)
-            if ((video_path, t_key) not in self._preview_cache_original or
-                    (video_path, t_key, tonemapper, lut_enabled, use_gpu) not in self._preview_cache_converted):
-                positions.append(t)
-
-        if not positions:
-            return
-
-        if hasattr(self, '_preview_pool'):
-            self._preview_pool.submit(
-                self._prewarm_batch_originals, video_path, positions, generation)
-            self._preview_pool.submit(
-                self._prewarm_batch_converted, video_path, positions, tonemapper, generation,
-                lut_enabled)
-        else:
-            self._prewarm_batch_originals(video_path, positions, generation)
-            self._prewarm_batch_converted(
-                video_path, positions, tonemapper, generation, lut_enabled)
+            need_original = not self._frame_available(
+                self._preview_cache_original, (video_path, t_key, box))
+            need_converted = not self._frame_available(
+                self._preview_cache_converted,
+                (video_path, t_key, tonemapper, lut_enabled, use_gpu, box))
+            if need_original and need_converted:
+                both.append(t)
+            elif need_original:
+                originals.append(t)
+            elif need_converted:
+                converted.append(t)
+
+        tasks: list[tuple[Callable[..., None], tuple[object, ...]]] = []
+        if both:
+            tasks.append((self._prewarm_batch_pairs,
+                          (video_path, both, tonemapper, generation, lut_enabled)))
+        if originals:
+            tasks.append((self._prewarm_batch_originals, (video_path, originals, generation)))
+        if converted:
+            tasks.append((self._prewarm_batch_converted,
+                          (video_path, converted, tonemapper, generation, lut_enabled)))
+        for task, args in tasks:
+            if hasattr(self, '_preview_pool'):
+                self._preview_pool.submit(task, *args, box=box)
+            else:
+                task(*args, box=box)
 
     # ── Main display entrypoints ───────────────────────────────────────────────
 
@@ -764,6 +1055,8 @@ class _HDRPreviewMixin:
         """Kick off frame extraction on a worker thread and render on the main thread."""
         tonemapper = self.tonemap_var.get().lower()
         lut_enabled = self._effective_lut_enabled()
+        auto_crop = self._auto_crop_enabled()
+        box = self._preview_extract_box()
 
         self._preview_generation = getattr(self, '_preview_generation', 0) + 1
         generation = self._preview_generation
@@ -773,13 +1066,16 @@ class _HDRPreviewMixin:
                 duration = self._get_duration(video_path)
                 time_position = self._preview_time_position(duration)
                 original, converted = self._extract_preview_images(
-                    video_path, time_position, tonemapper, lut_enabled
+                    video_path, time_position, tonemapper, lut_enabled, box=box
                 )
+                if auto_crop:
+                    original, converted = self._crop_preview_frames(
+                        video_path, original, converted)
                 if generation == self._preview_generation:
                     self._schedule_on_main(lambda: self._render_preview_images(
                         original, converted, time_position, generation))
                 self._prewarm_other_frames(
-                    video_path, duration, tonemapper, generation, lut_enabled)
+                    video_path, duration, tonemapper, generation, lut_enabled, box=box)
             except Exception as e:
                 # A stale (superseded) job's error must not clobber a newer
                 # preview the same way its success path already guards
@@ -791,7 +1087,7 @@ class _HDRPreviewMixin:
 
         if not hasattr(self, '_preview_pool'):
             self._preview_pool = ThreadPoolExecutor(
-                max_workers=_PREVIEW_POOL_WORKERS, thread_name_prefix='frame-fetch')
+                max_workers=_preview_pool_workers(), thread_name_prefix='frame-fetch')
         self._preview_thread = self._preview_pool.submit(worker)
 
     def _render_preview_images(
@@ -0,0 +1,297 @@
+"""On-disk cache of per-file probe results, kept across sessions.
+
+utils.py caches ffprobe's answers (video properties, HDR metadata) in
+memory, which only helps within one run: reopen a
+500-file batch the next morning and every file is probed again, twice over,
+at about half a second to a second each. This store keeps those answers in
+one JSON file under platform_utils.cache_dir(), so a file probed once is
+answered from disk until it changes.
+
+An entry is valid only for the file it was probed from: its path, byte size
+and mtime, plus the identity of the probing tool (see tool_fingerprint) --
+a different ffprobe build may parse the same stream differently. Checking
+that costs one os.stat() per lookup, so a hit never opens the video. A
+stale entry is not deleted on sight; it is overwritten by the next probe of
+that path, or aged out by the size cap.
+
+The cap is on entries, least recently used first out: at a few hundred
+bytes each, _MAX_ENTRIES keeps the file around a megabyte, small enough to
+read whole at the first lookup of a session.
+
+FileMemo is the in-memory layer in front of it: one per kind of result,
+keyed the same way, so the path a conversion abspath()s and the one the GUI
+was handed find the same entry, and an edited file misses on its own.
+
+Standard library only, no tkinter, no utils.py -- the path and tool are
+passed in, so tests point a store at a temporary file.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+_STORE_VERSION = 1
+_MAX_ENTRIES = 4000
+
+# FileMemo's default cap. Only files loaded or queued this session land in
+# it, so this is far more than a session needs while still bounding one that
+# runs for days over a watch folder.
+_MEMO_MAX_ENTRIES = 512
+
+# How long put() lets unsaved entries wait before writing the file. Probing
+# a batch puts one entry per file per kind in quick succession; saving each
+# would rewrite the whole file hundreds of times. Whatever is still unsaved
+# at exit is written by save(), which utils registers with atexit.
+_SAVE_DELAY = 5.0
+
+# get()'s answer for "nothing usable stored", distinct from any stored value
+# (None included) so a caller never has to guess which one it got.
+MISSING = object()
+
+
+def tool_fingerprint(executable: 'str | None') -> 'str | None':
+    """A cheap identity for the probing tool: its path, size and mtime. An
+    ffmpeg update replaces the binary and so invalidates every entry,
+    without running `ffprobe -version` to find out. None if it can't be
+    stat()ed -- then nothing is cached, since nothing could be validated."""
+    if not executable:
+        return None
+    try:
+        st = os.stat(executable)
+    except OSError:
+        return None
+    return f'{os.path.normcase(os.path.abspath(executable))}|{st.st_size}|{st.st_mtime_ns}'
+
+
+def _normalized(video_path: str) -> str:
+    return os.path.normcase(os.path.abspath(video_path))
+
+
+def _file_key(video_path: str) -> 'tuple[str, list[int]] | None':
+    """(normalized path, [size, mtime_ns]) for *video_path*, or None if it
+    can't be stat()ed."""
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        return None
+    return _normalized(video_path), [st.st_size, st.st_mtime_ns]
+
+
+class _Flight:
+    """One in-progress computation that other callers for the same file wait
+    on instead of starting their own."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: 'BaseException | None' = None
+        # Set by FileMemo.invalidate while the computation runs: its result
+        # still goes to the callers waiting on it, but isn't remembered.
+        self.stale = False
+
+
+class FileMemo:
+    """Per-file results of one kind, in memory, least recently used out first.
+
+    get() computes a missing result at most once at a time per file: callers
+    for the same file wait for the one computing it, while callers for other
+    files go ahead -- the lock is never held while *compute* runs, so one slow
+    file on a network share doesn't stall every other probe. An entry holds
+    the file's size and mtime when it was computed and is recomputed once
+    they change. A file that can't be stat()ed is keyed by path alone."""
+
+    def __init__(self, max_entries: int = _MEMO_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, tuple[list[int] | None, Any]]' = OrderedDict()
+        self._flights: 'dict[str, _Flight]' = {}
+
+    def get(self, video_path: str, compute: 'Callable[[str], Any]',
+            keep: 'Callable[[Any], bool]' = lambda value: True) -> Any:
+        """*video_path*'s result, from memory or else from compute(video_path).
+        A result that fails *keep* is returned to every waiting caller but not
+        remembered, so the next get() tries again. An exception from *compute*
+        is raised in every waiting caller, and not remembered either."""
+        key = _file_key(video_path)
+        name, stamp = key if key is not None else (_normalized(video_path), None)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(name)
+                return entry[1]
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute(video_path)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[name]
+                if flight.error is None and not flight.stale and keep(flight.value):
+                    self._remember(name, stamp, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def put(self, video_path: str, value: Any) -> None:
+        """Remember *value* as *video_path*'s result, for a result computed
+        along with some other one."""
+        key = _file_key(video_path)
+        name, stamp = key if key is not None else (_normalized(video_path), None)
+        with self._lock:
+            self._remember(name, stamp, value)
+
+    def _remember(self, name: str, stamp: 'list[int] | None', value: Any) -> None:
+        """Store an entry as the most recently used. Runs under _lock."""
+        self._entries[name] = (stamp, value)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, video_path: str) -> None:
+        """Forget *video_path*'s result, so the next get() recomputes it --
+        including one that is being computed right now."""
+        name = _normalized(video_path)
+        with self._lock:
+            self._entries.pop(name, None)
+            flight = self._flights.get(name)
+            if flight is not None:
+                flight.stale = True
+
+    def clear(self) -> None:
+        """Forget every file's result."""
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.stale = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ProbeStore:
+    """Probe results for many files, loaded lazily at the first lookup.
+
+    Thread-safe: preview workers and conversions probe concurrently. Each
+    entry holds one file's results by kind ('props', 'hdr'), so the
+    kinds share one stat check and one eviction slot."""
+
+    def __init__(self, path: str, tool: 'str | None',
+                 max_entries: int = _MAX_ENTRIES) -> None:
+        self.path = path
+        self._fingerprint = tool_fingerprint(tool)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # Held across a whole save, so two threads saving at once can't
+        # interleave their writes to the one temp file.
+        self._save_lock = threading.Lock()
+        self._entries: 'dict[str, dict[str, Any]] | None' = None
+        self._dirty = False
+        self._last_save = 0.0
+
+    def _load(self) -> 'dict[str, dict[str, Any]]':
+        """The entries, read from disk on first use. Runs under _lock. An
+        unreadable file, or one from another format version or ffprobe
+        build, starts an empty store rather than failing a probe."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('version') == _STORE_VERSION
+                    and data.get('tool') == self._fingerprint):
+                self._entries = dict(data['entries'])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning("Ignoring unreadable probe cache %s: %s", self.path, e)
+        return self._entries
+
+    def get(self, video_path: str, kind: str) -> Any:
+        """The stored *kind* result for *video_path*, or MISSING when there is
+        none or the file has changed since it was stored."""
+        if self._fingerprint is None:
+            return MISSING
+        key = _file_key(video_path)
+        if key is None:
+            return MISSING
+        name, stamp = key
+        with self._lock:
+            entry = self._load().get(name)
+            if entry is None or entry.get('stamp') != stamp or kind not in entry:
+                return MISSING
+            entry['used'] = time.time()
+            self._dirty = True
+            return entry[kind]
+
+    def put(self, video_path: str, kind: str, value: Any) -> None:
+        """Store *value* (JSON-serializable) as *video_path*'s *kind* result.
+        Results of other kinds survive only if the file is unchanged."""
+        if self._fingerprint is None:
+            return
+        key = _file_key(video_path)
+        if key is None:
+            return
+        name, stamp = key
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(name)
+            if entry is None or entry.get('stamp') != stamp:
+                entry = entries[name] = {'stamp': stamp}
+            entry[kind] = value
+            entry['used'] = time.time()
+            self._dirty = True
+            if len(entries) > self._max_entries:
+                self._evict(entries)
+            due = time.monotonic() - self._last_save >= _SAVE_DELAY
+        if due:
+            self.save()
+
+    def _evict(self, entries: 'dict[str, dict[str, Any]]') -> None:
+        """Drop the least recently used entries down to 90% of the cap, so
+        the next few puts don't each pay for a sort. Runs under _lock."""
+        keep = int(self._max_entries * 0.9)
+        by_use = sorted(entries, key=lambda name: entries[name].get('used', 0.0))
+        for name in by_use[:len(entries) - keep]:
+            del entries[name]
+
+    def save(self) -> None:
+        """Write unsaved entries: temp file then replace, as
+        settings.save_settings does, so a crash mid-write leaves the previous
+        file. Errors are logged, not raised -- a cache that can't be written
+        costs the next session its head start, nothing more."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty or self._entries is None:
+                    return
+                payload = json.dumps({'version': _STORE_VERSION,
+                                      'tool': self._fingerprint,
+                                      'entries': self._entries})
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logging.warning("Could not save probe cache: %s", e)
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
@@ -23,6 +23,10 @@ DEFAULTS = {
     # default for color accuracy; users who want raw GPU export speed can opt
     # out.
     'lut_enabled': True,
+    # Crop letterbox/pillarbox bars off before tonemapping, so neither the
+    # tonemap nor the encoder works on them. Off by default: it changes the
+    # output's frame size.
+    'auto_crop': False,
 }
 
 
@@ -1,16 +1,27 @@
-from PIL import Image, UnidentifiedImageError
 import subprocess
 import os
 import io
 import logging
-import logging.handlers
 import re
 import sys
 import json
 import shutil
 import threading
-
-from platform_utils import _startupinfo, log_dir
+import atexit
+import bisect
+from typing import TYPE_CHECKING
+
+import capability_cache
+import fused_lut
+import media_header
+import probe_cache
+from platform_utils import _startupinfo, cache_dir, gpu_driver_identity, log_dir
+
+# PIL is imported where frames are decoded, not here: it is the heaviest
+# import on the way to the window, and nothing before the first preview
+# needs it.
+if TYPE_CHECKING:
+    from PIL import Image
 
 # Constants and initialization
 TONEMAP = ["Reinhard", "Mobius", "Hable", "BT.2390", "Spline"]
@@ -35,18 +46,39 @@ TONEMAP = ["Reinhard", "Mobius", "Hable", "BT.2390", "Spline"]
 # accurate mode used by professional color tools) measurably reduces the
 # resulting error -- confirmed via real-ffmpeg pixel comparison against
 # zscale's own conversion on real HDR10 content.
-FFMPEG_CONVERT_FILTER = (
-    'zscale=t=linear:npl=100,tonemap={tonemapper},zscale=t=bt709:m=bt709:r=tv,'
+#
+# Split in two at the one point a reduced output size resizes (see
+# LINEAR_RESIZE_FILTER): after linearization, before everything else.
+FFMPEG_LINEARIZE_FILTER = 'zscale=t=linear:npl=100'
+FFMPEG_TONEMAP_FILTER = (
+    'tonemap={tonemapper},zscale=t=bt709:m=bt709:r=tv,'
     'lut3d=file={lut_path}:interp=tetrahedral,setparams=color_primaries=bt709:color_trc=bt709:colorspace=bt709,'
     'eq=gamma={gamma}'
 )
-
-# The preview chain is the export chain plus a downscale, so it is derived from
-# it rather than restated -- the two must never drift apart.
-FFMPEG_FILTER = (
-    FFMPEG_CONVERT_FILTER
-    + ',scale={width}:{height}:force_original_aspect_ratio=decrease'
-)
+FFMPEG_CONVERT_FILTER = FFMPEG_LINEARIZE_FILTER + ',' + FFMPEG_TONEMAP_FILTER
+
+# The resize a reduced output size adds straight after FFMPEG_LINEARIZE_FILTER,
+# so tonemap, lut3d and eq run on the output's pixel count rather than the
+# source's -- a 4K->1080p conversion measured 2.7x faster than tonemapping at
+# 4K and scaling afterwards. Resizing linear light is also the correct place
+# to average pixels: a highlight next to a shadow mixes as light does, where
+# resizing the PQ signal measured 2.7x the error of the linear resize against
+# a gamma-correct resize of the tonemapped frame.
+#
+# format= pins the float RGB the linearizing zscale produced -- without it
+# the two zscales may negotiate a Y'CbCr format between them. f=bilinear is
+# zimg's triangle filter, widened to the downscale ratio: no negative lobes,
+# so a 1000-nit highlight can't ring into dark halos the way bicubic or
+# lanczos do at HDR contrast ratios.
+LINEAR_RESIZE_FILTER = 'format=gbrpf32le,zscale=w={width}:h={height}:f=bilinear'
+
+# The preview chain is the export chain at a reduced output size, so it is
+# derived from it rather than restated -- the two must never drift apart.
+# Like a resized export it downscales in linear light before the tonemap, so
+# a pane-sized preview runs tonemap, lut3d and eq on the pane's pixels rather
+# than the source's. {width}/{height} are concrete (see preview_frame_size).
+FFMPEG_FILTER = ','.join([FFMPEG_LINEARIZE_FILTER, LINEAR_RESIZE_FILTER,
+                          FFMPEG_TONEMAP_FILTER])
 
 # Zscale-only gamut correction (no LUT). Used by the CPU preview path when
 # the user has the permanent "Accurate GPU Color" setting (lut_export_var)
@@ -55,22 +87,41 @@ FFMPEG_FILTER = (
 # (see construct_ffmpeg_command in conversion.py), and the GPU/libplacebo
 # export path builds its own filter string rather than referencing this one.
 FFMPEG_FILTER_LEGACY_NO_LUT = (
-    'zscale=t=linear:npl=100,tonemap={tonemapper},zscale=t=bt709:m=bt709:r=tv:p=bt709,'
-    'eq=gamma={gamma},scale={width}:{height}:force_original_aspect_ratio=decrease'
+    'zscale=t=linear:npl=100,' + LINEAR_RESIZE_FILTER + ','
+    'tonemap={tonemapper},zscale=t=bt709:m=bt709:r=tv:p=bt709,eq=gamma={gamma}'
 )
 
-# Tonemappers with no zscale/CPU implementation -- confirmed via
-# `ffmpeg -h filter=tonemap` against the real bundled build (only
-# none/linear/gamma/clip/reinhard/hable/mobius exist there). These two exist
-# only via libplacebo, so they require the GPU tonemap path both for preview
-# and for final conversion. Lowercase, matching libplacebo's own spelling.
-GPU_ONLY_TONEMAPPERS = {'bt.2390', 'spline'}
+# What a source needs before an SDR encode, as classify_source names it. The
+# names double as fused_lut's transfer names for the two HDR kinds.
+SOURCE_PQ = 'pq'
+SOURCE_HLG = 'hlg'
+SOURCE_SDR = 'sdr'
 
+# ffprobe color_transfer values of SDR transfers -- the gamma curves of
+# BT.709/601, sRGB and the legacy analog systems.
+_SDR_TRANSFERS = frozenset({'bt709', 'smpte170m', 'bt470m', 'bt470bg', 'gamma22',
+                            'gamma28', 'smpte240m', 'iec61966-2-1'})
 
-def is_gpu_only_tonemapper(tonemapper: str) -> bool:
-    """True for tonemapping algorithms only implemented on the GPU (libplacebo)
-    path -- FFMPEG_CONVERT_FILTER (CPU) has no equivalent. Case-insensitive."""
-    return tonemapper.lower() in GPU_ONLY_TONEMAPPERS
+
+def classify_source(properties: dict) -> str:  # type: ignore[type-arg]
+    """SOURCE_PQ, SOURCE_HLG or SOURCE_SDR for a get_video_properties() dict.
+
+    SDR needs an explicit SDR transfer tag and non-BT.2020 primaries; anything
+    else -- including a missing or unknown tag -- is PQ, the HDR10 chain this
+    app always ran. That errs toward tonemapping: tonemapping an untagged
+    SDR file costs time and darkens it a little, while skipping it for an
+    untagged HDR file would ship a washed-out picture. Dolby Vision is PQ
+    whatever its tags say: profile 5 often carries none.
+    """
+    if properties.get('is_dolby_vision'):
+        return SOURCE_PQ
+    transfer = (properties.get('color_transfer') or '').lower()
+    if transfer == 'arib-std-b67':
+        return SOURCE_HLG
+    if (transfer in _SDR_TRANSFERS
+            and (properties.get('color_primaries') or '').lower() != 'bt2020'):
+        return SOURCE_SDR
+    return SOURCE_PQ
 
 
 # Shared "All Video Files" file-dialog filter entry, used by both the
@@ -109,8 +160,16 @@ VULKAN_CUDA_DEVICE_ARGS = [
     '-filter_hw_device', 'vk',
 ]
 
-FFMPEG_EXECUTABLE = None
-FFPROBE_EXECUTABLE = None
+# FFMPEG_EXECUTABLE and FFPROBE_EXECUTABLE are not assigned here: importing
+# this module configures nothing and looks nothing up. The first read of
+# either -- utils.FFMPEG_EXECUTABLE, `from utils import ...`, or
+# ffmpeg_executable() -- locates both (see _locate_ffmpeg); logging is set up
+# by the entry point calling setup_logging().
+_FFMPEG_NAMES = ('FFMPEG_EXECUTABLE', 'FFPROBE_EXECUTABLE')
+# What _locate_ffmpeg found, None for a tool it couldn't; None until it runs.
+_located_ffmpeg: 'dict[str, str | None] | None' = None
+_LOCATE_FFMPEG_LOCK = threading.Lock()
+
 
 # Initialize logging
 def _log_file_path() -> str:
@@ -122,6 +181,8 @@ def _log_file_path() -> str:
 
 
 def setup_logging():
+    import logging.handlers
+
     handlers: list[logging.Handler] = [logging.StreamHandler()]
     try:
         log_path = _log_file_path()
@@ -248,15 +309,59 @@ def initialize_ffmpeg():
         logging.error(f"Error setting up ffmpeg: {str(e)}", exc_info=True)
         raise
 
-# Call initialization functions
-setup_logging()
-try:
-    initialize_ffmpeg()
-except Exception:
-    # Importing this module must never crash or block on a dialog when ffmpeg is
-    # missing; FFMPEG_EXECUTABLE/FFPROBE_EXECUTABLE stay None and the GUI reports
-    # it to the user on startup (see HDRConverterGUI.__init__).
-    logging.error("ffmpeg could not be initialized at import time", exc_info=True)
+def _locate_ffmpeg() -> 'dict[str, str | None]':
+    """Run initialize_ffmpeg once, on first need, and return what it found.
+
+    Never raises: a missing ffmpeg leaves both paths None, and the GUI
+    reports it on startup (see HDRConverterGUI.check_ffmpeg_available)."""
+    global _located_ffmpeg
+    if _located_ffmpeg is None:
+        with _LOCATE_FFMPEG_LOCK:
+            if _located_ffmpeg is None:
+                try:
+                    initialize_ffmpeg()
+                except Exception:
+                    logging.error("ffmpeg could not be located", exc_info=True)
+                _located_ffmpeg = {name: globals().get(name) for name in _FFMPEG_NAMES}
+    return _located_ffmpeg
+
+
+def __getattr__(name):
+    """FFMPEG_EXECUTABLE / FFPROBE_EXECUTABLE, located on first read."""
+    if name in _FFMPEG_NAMES:
+        return _locate_ffmpeg()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _ffmpeg_tool(name: str) -> 'str | None':
+    """The published path for *name* (one of _FFMPEG_NAMES) -- set by
+    initialize_ffmpeg, or by a test patching it -- else the located one."""
+    try:
+        return globals()[name]
+    except KeyError:
+        return _locate_ffmpeg()[name]
+
+
+def ffmpeg_executable() -> 'str | None':
+    """Path of the ffmpeg to run, or None if there is none. What this module
+    and its importers read at call time: binding FFMPEG_EXECUTABLE with
+    `from utils import` at import would locate ffmpeg during that import."""
+    return _ffmpeg_tool('FFMPEG_EXECUTABLE')
+
+
+def ffprobe_executable() -> 'str | None':
+    """Path of the ffprobe to run, or None; see ffmpeg_executable."""
+    return _ffmpeg_tool('FFPROBE_EXECUTABLE')
+
+
+def require_ffmpeg(failure: str) -> str:
+    """ffmpeg_executable(), for a command about to be built: when there is
+    no ffmpeg, RuntimeError "<failure>: ffmpeg not found." rather than a
+    None in its argv."""
+    exe = ffmpeg_executable()
+    if not exe:
+        raise RuntimeError(f'{failure}: ffmpeg not found.')
+    return exe
 
 
 # Rest of your existing functions...
@@ -265,7 +370,7 @@ def run_ffmpeg_command(cmd):
     startupinfo, creationflags = _startupinfo()
     
     # Replace the ffmpeg command with the bundled/system executable path
-    cmd[0] = FFMPEG_EXECUTABLE
+    cmd[0] = require_ffmpeg("Error running FFmpeg command")
 
     # Normalize path-like args (e.g. input/output file paths) to the native
     # separator. The -vf value is a filtergraph string, not a file path -- it
@@ -309,41 +414,91 @@ def run_ffmpeg_command(cmd):
 
 # HDR metadata (MaxCLL) is static per file and costs ~0.5-1.2s to probe.
 # Cache the dict so all callers share one ffprobe hit.
-_HDR_METADATA_CACHE: dict[str, dict] = {}
-_HDR_METADATA_CACHE_LOCK = threading.Lock()
+_HDR_METADATA_CACHE = probe_cache.FileMemo()
 
 # Video properties (streams, duration, codec) are also static per file; caching
 # eliminates the extra ffprobe spawned inside each extract_frame / extract_frame_with_conversion call.
-_VIDEO_PROPS_CACHE: dict[str, dict] = {}
-_VIDEO_PROPS_CACHE_LOCK = threading.Lock()
+_VIDEO_PROPS_CACHE = probe_cache.FileMemo()
+
+
+# Behind the two ffprobe caches above: the same results on disk, so a file
+# reopened in a later session isn't probed again (see probe_cache.py). Off
+# until the app's entry point opens it with open_probe_stores, as with the
+# capability store below, so tests and scripts that import utils never read
+# or write the user's cache; until then the FileMemos are the only cache.
+_PROBE_STORE: 'probe_cache.ProbeStore | None' = None
+
+
+# Keyframe indexes (see keyframe_index), in memory and on disk like the
+# probes above. They get a store of their own: a two-hour film's index is a
+# few thousand timestamps, tens of kilobytes where a probe result is a few
+# hundred bytes, so they are capped far lower and kept out of probes.json,
+# which is read whole at the first lookup of a session.
+_KEYFRAME_CACHE = probe_cache.FileMemo()
+_KEYFRAME_STORE_MAX_ENTRIES = 300
+_KEYFRAME_STORE: 'probe_cache.ProbeStore | None' = None
+
+
+def open_probe_stores(directory=None):
+    """Start keeping ffprobe results and keyframe indexes on disk, as
+    probes.json and keyframes.json in *directory* (default: cache_dir()).
+    Valid for the ffprobe found by initialize_ffmpeg; atexit writes whatever
+    is still unsaved."""
+    global _PROBE_STORE, _KEYFRAME_STORE
+    directory = directory or cache_dir()
+    tool = ffprobe_executable()
+    _PROBE_STORE = probe_cache.ProbeStore(os.path.join(directory, 'probes.json'), tool)
+    _KEYFRAME_STORE = probe_cache.ProbeStore(
+        os.path.join(directory, 'keyframes.json'), tool,
+        max_entries=_KEYFRAME_STORE_MAX_ENTRIES)
+    atexit.register(_PROBE_STORE.save)
+    atexit.register(_KEYFRAME_STORE.save)
 
 
 def clear_hdr_metadata_cache():
-    """Drop cached HDR metadata and video properties (call when loading a new/replaced file)."""
-    with _HDR_METADATA_CACHE_LOCK:
-        _HDR_METADATA_CACHE.clear()
-    with _VIDEO_PROPS_CACHE_LOCK:
-        _VIDEO_PROPS_CACHE.clear()
+    """Drop cached HDR metadata, video properties, keyframe indexes and crop
+    boxes for every file. A file that changes on disk is reprobed without this; to forget one
+    file, use invalidate_probe_caches."""
+    _HDR_METADATA_CACHE.clear()
+    _VIDEO_PROPS_CACHE.clear()
+    _KEYFRAME_CACHE.clear()
+    clear_crop_cache()
+
+
+def invalidate_probe_caches(video_path):
+    """Drop *video_path*'s cached HDR metadata, video properties, keyframe
+    index and crop box, leaving every other file's in place."""
+    _HDR_METADATA_CACHE.invalidate(video_path)
+    _VIDEO_PROPS_CACHE.invalidate(video_path)
+    _KEYFRAME_CACHE.invalidate(video_path)
+    _CROP_CACHE.invalidate(video_path)
 
 
 def _probe_hdr_metadata(video_path):
-    """Probe MaxCLL from the first frame (uncached).
+    """Probe MaxCLL and the mastering display's peak from the first frame
+    (uncached). Only needed when HDR metadata is asked for before the
+    file's properties: _probe_video_properties reads the same side data in
+    its one ffprobe run and hands it to _HDR_METADATA_CACHE.
 
     Returns:
-        dict with key 'maxcll' (float|None).
+        dict with keys 'maxcll' and 'max_luminance' (nits, float|None each).
     """
+    result: dict = {'maxcll': None, 'max_luminance': None}
+    exe = ffprobe_executable()
+    if not exe:
+        logging.error(f"Error probing HDR metadata for {video_path}: ffprobe not found.")
+        return dict(result, probe_failed=True)
     cmd = [
-        FFPROBE_EXECUTABLE,
+        exe,
         '-v', 'quiet',
         '-select_streams', 'v:0',
-        '-show_frames',
         '-read_intervals', '%+1',
+        '-show_entries', 'frame=side_data_list',
         '-print_format', 'json',
         video_path
     ]
 
     startupinfo, creationflags = _startupinfo()
-    result: dict = {'maxcll': None}
 
     try:
         out = subprocess.check_output(
@@ -360,8 +515,16 @@ def _probe_hdr_metadata(video_path):
         # HDR data) -- degrade to "no HDR metadata" like get_video_properties
         # already does, instead of raising uncaught out of the load path.
         logging.error(f"Error probing HDR metadata for {video_path}: {e}")
-        return result
-    for frame in data.get('frames', []):
+        # Marked so _get_hdr_metadata keeps it out of the on-disk store: a
+        # failure may be transient, "no metadata" is not.
+        return dict(result, probe_failed=True)
+    return _parse_hdr_side_data(data.get('frames', []))
+
+
+def _parse_hdr_side_data(frames):
+    """MaxCLL and mastering peak out of ffprobe's per-frame side data."""
+    result: dict = {'maxcll': None, 'max_luminance': None}
+    for frame in frames:
         for sd in frame.get('side_data_list', []):
             if sd.get('side_data_type') == 'Content light level metadata':
                 # A legitimately-reported 0 must not be treated the same as
@@ -369,19 +532,32 @@ def _probe_hdr_metadata(video_path):
                 mc = sd.get('max_content')
                 if mc is not None:
                     result['maxcll'] = float(mc)
+            elif sd.get('side_data_type') == 'Mastering display metadata':
+                # The same num/den string ffprobe uses for frame rates, e.g.
+                # '1000/1' or '10000000/10000'; unreadable means absent.
+                result['max_luminance'] = _parse_frame_rate_fraction(
+                    sd.get('max_luminance')) or None
     return result
 
 
 def _get_hdr_metadata(video_path):
-    """Thread-safe cached wrapper around _probe_hdr_metadata."""
-    if video_path in _HDR_METADATA_CACHE:
-        return _HDR_METADATA_CACHE[video_path]
-    with _HDR_METADATA_CACHE_LOCK:
-        if video_path in _HDR_METADATA_CACHE:
-            return _HDR_METADATA_CACHE[video_path]
+    """Thread-safe cached wrapper around _probe_hdr_metadata: concurrent
+    callers for one file share a single ffprobe, other files probe in
+    parallel."""
+    return _HDR_METADATA_CACHE.get(video_path, _stored_hdr_metadata)
+
+
+def _stored_hdr_metadata(video_path):
+    """_probe_hdr_metadata behind the on-disk store."""
+    store = _PROBE_STORE
+    if store is None:
+        return _probe_hdr_metadata(video_path)
+    meta = store.get(video_path, 'hdr')
+    if meta is probe_cache.MISSING:
         meta = _probe_hdr_metadata(video_path)
-        _HDR_METADATA_CACHE[video_path] = meta
-        return meta
+        if not meta.get('probe_failed'):
+            store.put(video_path, 'hdr', meta)
+    return meta
 
 
 def get_maxcll(video_path):
@@ -389,6 +565,227 @@ def get_maxcll(video_path):
     return _get_hdr_metadata(video_path)['maxcll']
 
 
+def get_max_luminance(video_path):
+    """Return the mastering display's peak luminance in nits; None if not
+    embedded."""
+    return _get_hdr_metadata(video_path).get('max_luminance')
+
+
+def keyframe_index(video_path):
+    """Return the video's keyframe times (seconds from the start of its
+    timeline, ascending) from the container's own seek index -- MP4's stss,
+    Matroska's Cues, see media_header.keyframes -- or None for a file without
+    one. Read once per file and kept on disk across sessions."""
+    return _KEYFRAME_CACHE.get(video_path, _stored_keyframe_index)
+
+
+def _stored_keyframe_index(video_path):
+    store = _KEYFRAME_STORE
+    if store is None:
+        return media_header.keyframes(video_path)
+    index = store.get(video_path, 'keyframes')
+    if index is probe_cache.MISSING:
+        index = media_header.keyframes(video_path)
+        if index is not None:
+            store.put(video_path, 'keyframes', index)
+    return index
+
+
+def nearest_keyframe(keyframes, time_position):
+    """Return the time in *keyframes* (ascending, as keyframe_index returns
+    it) nearest to *time_position*, or *time_position* itself if there are
+    none. Seeking to a keyframe exactly decodes one frame, where any other
+    position decodes the whole run from the keyframe before it."""
+    if not keyframes:
+        return time_position
+    i = bisect.bisect_left(keyframes, time_position)
+    candidates = keyframes[max(0, i - 1):i + 1]
+    return min(candidates, key=lambda k: abs(k - time_position))
+
+
+# How far past each requested cut point probe_keyframes_near reads packets
+# looking for a keyframe. Comfortably longer than the 2-10 s GOPs real
+# encoders emit, while still only touching a few seconds of the file per cut.
+_KEYFRAME_SEARCH_WINDOW = 15.0
+
+
+def probe_keyframes_near(video_path, targets, window=_KEYFRAME_SEARCH_WINDOW):
+    """Return one keyframe timestamp (seconds, ascending, de-duplicated) near
+    each of *targets*, for cutting a file into independently-encodable
+    segments.
+
+    Answered from the file's keyframe_index when it has one. Otherwise reads
+    only packet headers (no decoding) in a short -read_intervals window
+    after each target, so the cost is a handful of seeks, not a scan of a
+    multi-gigabyte file. A target with no keyframe inside its window is
+    dropped rather than guessed at -- the caller then simply gets fewer,
+    longer segments. Timestamps are returned relative to the container's
+    start_time, which is what ffmpeg's input-side -ss expects: an MPEG-TS
+    source starting at 1.4 s would otherwise have every cut land 1.4 s late.
+    Returns [] on any probe failure.
+    """
+    if not targets:
+        return []
+    index = keyframe_index(video_path)
+    if index is not None:
+        return _keyframes_after(index, targets, window)
+    exe = ffprobe_executable()
+    if not exe:
+        return []
+    intervals = ','.join(f'{t:.3f}%+{window:g}' for t in targets)
+    cmd = [
+        exe,
+        '-v', 'quiet',
+        '-select_streams', 'v:0',
+        '-read_intervals', intervals,
+        '-show_entries', 'packet=pts_time,flags:format=start_time',
+        '-print_format', 'json',
+        os.path.normpath(video_path),
+    ]
+    startupinfo, creationflags = _startupinfo()
+    try:
+        out = subprocess.check_output(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            startupinfo=startupinfo,
+            creationflags=creationflags
+        )
+        data = json.loads(out.decode('utf-8'))
+    except (subprocess.SubprocessError, OSError, json.JSONDecodeError, ValueError) as e:
+        logging.error(f"Error probing keyframes for {video_path}: {e}")
+        return []
+
+    start_time = _float_or_zero(data.get('format', {}).get('start_time'))
+    keyframes = sorted({
+        round(_float_or_zero(pkt.get('pts_time')) - start_time, 6)
+        for pkt in data.get('packets', [])
+        if 'K' in (pkt.get('flags') or '') and pkt.get('pts_time') not in (None, 'N/A')
+    })
+    return _keyframes_after(keyframes, targets, window)
+
+
+def _keyframes_after(keyframes, targets, window):
+    """The first of *keyframes* (ascending) at or after each target and no
+    more than *window* past it, de-duplicated. Also right for the packets of
+    a read_intervals probe: it seeks to the keyframe *before* each target,
+    so the packets read hold earlier keyframes too."""
+    chosen = []
+    for target in targets:
+        i = bisect.bisect_left(keyframes, target - 1e-6)
+        if i < len(keyframes) and keyframes[i] <= target + window:
+            chosen.append(keyframes[i])
+    return sorted(set(chosen))
+
+
+# Letterbox detection (see detect_crop). Like the two caches above, a file's
+# black bars don't change while it is loaded, and the probe decodes a frame at
+# each sample position, so it runs once per file. None is cached too: "no bars
+# worth cropping" is as much an answer as a box is.
+_CROP_CACHE = probe_cache.FileMemo()
+
+# How many positions detect_crop samples, spread evenly through the file so
+# that a dark opening scene or a single full-frame shot can't decide the crop
+# for the whole film on its own.
+_CROP_SAMPLES = 8
+
+# cropdetect's black threshold, as a fraction of full scale so one value works
+# for 8- and 10-bit sources alike. 0.1 sits above limited-range black (64/1023)
+# plus encoder noise and well below any real picture content at the edges.
+# skip=0: the default skips the first two frames of each input, and each of
+# our inputs is one frame long.
+_CROPDETECT_FILTER = 'cropdetect=limit=0.1:round=2:skip=0'
+_CROPDETECT_RE = re.compile(r'x1:(-?\d+) x2:(-?\d+) y1:(-?\d+) y2:(-?\d+)')
+
+# A crop that removes less than this share of the frame isn't worth applying:
+# it saves almost no work and a one-or-two-pixel trim of a full-frame source is
+# far more likely to be a dark edge than a real bar.
+_MIN_CROP_SAVING = 0.02
+
+
+def clear_crop_cache():
+    """Drop cached crop boxes (clear_hdr_metadata_cache does this as well)."""
+    _CROP_CACHE.clear()
+
+
+def _probe_crop(video_path):
+    """Detect the letterbox/pillarbox of *video_path* (uncached).
+
+    Runs cropdetect on one frame at each of _CROP_SAMPLES positions, in one
+    ffmpeg process with the same -ss/-i-per-position layout as
+    extract_frames_batch, and takes the union of the per-frame boxes: any
+    sample with picture in a row or column keeps it, so the crop only removes
+    what is black everywhere that was looked at. Samples that are black
+    throughout (fades, title cards) have no box and are left out.
+
+    Returns (width, height, x, y) with every value even -- 4:2:0 chroma can't
+    be cut on an odd line -- or None when the probe fails, nothing usable was
+    sampled, or the box wouldn't save at least _MIN_CROP_SAVING of the frame.
+    """
+    properties = get_video_properties(video_path)
+    if not properties or not ffmpeg_executable():
+        return None
+    src_w, src_h = properties.get('width') or 0, properties.get('height') or 0
+    duration = properties.get('duration') or 0
+    if not (src_w and src_h and duration):
+        return None
+    positions = [duration * (i + 1) / (_CROP_SAMPLES + 1) for i in range(_CROP_SAMPLES)]
+    cmd = [ffmpeg_executable(), '-hide_banner', '-nostats', '-loglevel', 'info']
+    for t in positions:
+        cmd += ['-ss', f'{t:.3f}', '-i', os.path.normpath(video_path)]
+    cmd += [
+        '-filter_complex', _batch_ffmpeg_filter_complex(len(positions), _CROPDETECT_FILTER),
+        '-map', '[out]', '-f', 'null', '-',
+    ]
+    startupinfo, creationflags = _startupinfo()
+    try:
+        result = subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE, startupinfo=startupinfo,
+            creationflags=creationflags, timeout=60,
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        logging.error(f"Error detecting crop for {video_path}: {e}")
+        return None
+    if result.returncode != 0:
+        logging.error(f"Crop detection failed for {video_path}: "
+                      f"{result.stderr.decode('utf-8', errors='replace')[-500:]}")
+        return None
+
+    boxes = [tuple(map(int, m.groups())) for m in
+             _CROPDETECT_RE.finditer(result.stderr.decode('utf-8', errors='replace'))]
+    # An all-black frame reports an inverted box (x2 < x1): no picture to keep.
+    boxes = [b for b in boxes if b[1] >= b[0] and b[3] >= b[2]]
+    if not boxes:
+        return None
+    x1 = max(0, min(b[0] for b in boxes)) & ~1
+    y1 = max(0, min(b[2] for b in boxes)) & ~1
+    x2 = min(src_w, max(b[1] for b in boxes) + 1)
+    y2 = min(src_h, max(b[3] for b in boxes) + 1)
+    width, height = (x2 - x1 + 1) & ~1, (y2 - y1 + 1) & ~1  # rounded up to even
+    width, height = min(width, src_w - x1), min(height, src_h - y1)
+    if width * height > src_w * src_h * (1 - _MIN_CROP_SAVING):
+        return None
+    # Less than half the frame left means the samples were mostly dark, not
+    # that the film is that narrow; encoding the whole frame is the safe answer.
+    if width < src_w / 2 or height < src_h / 2:
+        return None
+    return width, height, x1, y1
+
+
+def detect_crop(video_path):
+    """The black-bar crop for *video_path* as (width, height, x, y), or None
+    when there is nothing worth removing. Cached per file and thread-safe,
+    like _get_hdr_metadata."""
+    return _CROP_CACHE.get(video_path, _probe_crop)
+
+
+def crop_filter(crop) -> str:
+    """The ffmpeg filter for a detect_crop box."""
+    width, height, x, y = crop
+    return f'crop={width}:{height}:{x}:{y}'
+
+
 def build_libplacebo_filter(gamma, tonemapper, width: 'int | str' = 'iw',
                             height: 'int | str' = 'ih',
                             cuda_input: bool = False,
@@ -474,6 +871,15 @@ def build_libplacebo_filter(gamma, tonemapper, width: 'int | str' = 'iw',
 _libplacebo_available = None
 # Cached result of the CUDA→Vulkan interop probe.
 _cuda_interop_available = None
+# Filter names parsed from `ffmpeg -filters`: None = not yet listed.
+_ffmpeg_filters: 'frozenset[str] | None' = None
+# One lock per probe above, held while it runs: startup detection
+# (ConversionManager.start_gpu_detection) and the first preview or conversion
+# can ask for the same answer at once, and the second caller should wait for
+# the running probe rather than spawn its own.
+_LIBPLACEBO_PROBE_LOCK = threading.Lock()
+_CUDA_INTEROP_PROBE_LOCK = threading.Lock()
+_FILTERS_PROBE_LOCK = threading.Lock()
 
 
 def reset_libplacebo_probe():
@@ -487,11 +893,66 @@ def reset_cuda_interop_probe():
     global _cuda_interop_available
     _cuda_interop_available = None
 
-# Ceiling for the startup GPU probe below. It runs inside create_widgets --
-# i.e. between main.pyw's root.withdraw() and root.deiconify() -- so an
-# unbounded wait there is a startup hang with no window and no error. Measured
-# at ~1s on a healthy machine; 20s leaves a wide margin for a cold driver or
-# first-run shader compilation while still bounding a wedged one. Erring
+
+# Behind the in-memory results above: the same answers on disk, so a launch
+# after the first spawns no probe at all (see capability_cache.py). Off until
+# the app's entry point opens it -- main.pyw does, before building the window
+# -- so tests and scripts that import utils never read or write the user's
+# cache.
+_CAPABILITY_STORE: 'capability_cache.CapabilityStore | None' = None
+
+
+def open_capability_store(path=None):
+    """Start keeping capability probe answers on disk, at *path* (default:
+    capabilities.json under cache_dir()). Valid for the ffmpeg/ffprobe found
+    by initialize_ffmpeg and the installed GPU drivers; nothing is stored
+    when ffmpeg wasn't found."""
+    global _CAPABILITY_STORE
+    ffmpeg = probe_cache.tool_fingerprint(ffmpeg_executable())
+    identity = None
+    if ffmpeg is not None:
+        identity = '\n'.join((ffmpeg, probe_cache.tool_fingerprint(ffprobe_executable()) or '',
+                              gpu_driver_identity()))
+    _CAPABILITY_STORE = capability_cache.CapabilityStore(
+        path or os.path.join(cache_dir(), 'capabilities.json'), identity)
+    return _CAPABILITY_STORE
+
+
+def stored_capability(name, probe, keep=lambda value: True):
+    """Return the stored answer for capability *name*, or run probe() and
+    store what it returns -- unless that fails *keep*, for an inconclusive
+    answer the next launch should ask again. Without an open store this is
+    just probe()."""
+    store = _CAPABILITY_STORE
+    if store is not None:
+        value = store.get(name)
+        if value is not capability_cache.MISSING:
+            return value
+    value = probe()
+    if store is not None and keep(value):
+        store.put(name, value)
+    return value
+
+
+def reprobe_capabilities():
+    """Forget every capability answer, in memory and on disk, so the next
+    query of each runs its probe again -- after plugging in an eGPU, say,
+    which changes no driver file. ConversionManager keeps its own encoder
+    choice; see its reset_gpu_detection."""
+    global _ffmpeg_filters
+    if _CAPABILITY_STORE is not None:
+        _CAPABILITY_STORE.clear()
+    reset_libplacebo_probe()
+    reset_cuda_interop_probe()
+    _ffmpeg_filters = None
+
+
+# Ceiling for the GPU probes below. They run on startup detection's worker
+# threads (ConversionManager.start_gpu_detection), but a conversion started
+# before they answer waits on them, so an unbounded probe is still a
+# conversion that never starts. Measured at ~1s on a healthy machine; 20s
+# leaves a wide margin for a cold driver or first-run shader compilation
+# while still bounding a wedged one. Erring
 # generous on purpose: a premature timeout silently costs that customer GPU
 # tonemapping, so a false negative is worse than a slow true positive.
 _GPU_PROBE_TIMEOUT = 20
@@ -500,23 +961,37 @@ _GPU_PROBE_TIMEOUT = 20
 def vulkan_libplacebo_available():
     """Return True if this ffmpeg can tonemap on the GPU via Vulkan + libplacebo.
 
-    Probes once and caches the result. The probe runs the real filter chain on a
-    tiny synthetic frame, so a success genuinely proves the path works on this
-    machine; on any failure -- including an inconclusive one -- we fall back to
-    the CPU tonemap path.
+    Probes once and caches the result, on disk too when the capability store
+    is open. The probe runs the real filter chain on a tiny synthetic frame,
+    so a success genuinely proves the path works on this machine; on any
+    failure -- including an inconclusive one -- we fall back to the CPU
+    tonemap path. A timeout is not stored: a cold driver may well answer
+    next launch.
     """
     global _libplacebo_available
     if _libplacebo_available is not None:
         return _libplacebo_available
 
-    if not FFMPEG_EXECUTABLE:
-        _libplacebo_available = False
-        return False
+    with _LIBPLACEBO_PROBE_LOCK:
+        if _libplacebo_available is not None:
+            return _libplacebo_available
+        if not ffmpeg_executable():
+            _libplacebo_available = False
+            return False
+
+        available, _ = stored_capability(
+            'libplacebo', _probe_libplacebo, keep=lambda answer: answer[1])
+        _libplacebo_available = available
+    logging.warning(f"Vulkan/libplacebo available: {available}")
+    return available
 
+
+def _probe_libplacebo():
+    """(available, conclusive) from one run of the libplacebo test chain."""
     startupinfo, creationflags = _startupinfo()
 
     cmd = [
-        FFMPEG_EXECUTABLE, '-loglevel', 'error',
+        ffmpeg_executable(), '-loglevel', 'error',
         '-init_hw_device', 'vulkan=vk:0', '-filter_hw_device', 'vk',
         '-f', 'lavfi', '-i', 'color=c=black:s=64x64,format=p010',
         '-vf', 'hwupload,libplacebo=tonemapping=clip:format=nv12,hwdownload,format=nv12',
@@ -528,7 +1003,7 @@ def vulkan_libplacebo_available():
             startupinfo=startupinfo, creationflags=creationflags,
             timeout=_GPU_PROBE_TIMEOUT,
         )
-        _libplacebo_available = (result.returncode == 0)
+        return result.returncode == 0, True
     except subprocess.TimeoutExpired:
         # Listed separately because TimeoutExpired subclasses SubprocessError,
         # not OSError -- the clause below does not catch it, and letting it
@@ -537,37 +1012,48 @@ def vulkan_libplacebo_available():
         logging.warning(
             f"libplacebo probe exceeded {_GPU_PROBE_TIMEOUT}s; assuming "
             f"unavailable and falling back to CPU tonemapping")
-        _libplacebo_available = False
+        return False, False
     except (FileNotFoundError, OSError) as e:
         logging.debug(f"libplacebo probe failed to run: {e}")
-        _libplacebo_available = False
-
-    logging.warning(f"Vulkan/libplacebo available: {_libplacebo_available}")
-    return _libplacebo_available
+        return False, True
 
 
 def vulkan_cuda_interop_available() -> bool:
     """Return True if CUDA→Vulkan interop works for hardware-decoded frames.
 
-    Probes once and caches. Validates the full chain NVIDIA uses for the fast
-    path: CUDA frames (from NVDEC) mapped to Vulkan via hwmap, then processed
-    by libplacebo.  A success proves both the driver support and the linked
-    device creation work on this machine.
+    Probes once and caches, on disk too when the capability store is open.
+    Validates the full chain NVIDIA uses for the fast path: CUDA frames (from
+    NVDEC) mapped to Vulkan via hwmap, then processed by libplacebo.  A
+    success proves both the driver support and the linked device creation
+    work on this machine. Bounded by the same timeout as the libplacebo
+    probe, and for the same reason a timeout isn't stored.
     """
     global _cuda_interop_available
     if _cuda_interop_available is not None:
         return _cuda_interop_available
 
-    if not FFMPEG_EXECUTABLE:
-        _cuda_interop_available = False
-        return False
+    with _CUDA_INTEROP_PROBE_LOCK:
+        if _cuda_interop_available is not None:
+            return _cuda_interop_available
+        if not ffmpeg_executable():
+            _cuda_interop_available = False
+            return False
+
+        available, _ = stored_capability(
+            'cuda_interop', _probe_cuda_interop, keep=lambda answer: answer[1])
+        _cuda_interop_available = available
+    logging.warning(f"CUDA/Vulkan interop available: {available}")
+    return available
 
+
+def _probe_cuda_interop():
+    """(available, conclusive) from one run of the CUDA interop test chain."""
     startupinfo, creationflags = _startupinfo()
 
     # Simulate CUDA frames going through the interop chain: upload a synthetic
     # frame to CUDA memory, hwmap to Vulkan, run libplacebo, then download.
     cmd = [
-        FFMPEG_EXECUTABLE, '-loglevel', 'error',
+        ffmpeg_executable(), '-loglevel', 'error',
         '-init_hw_device', 'cuda=cu:0',
         '-init_hw_device', 'vulkan=vk@cu',
         '-filter_hw_device', 'vk',
@@ -582,16 +1068,68 @@ def vulkan_cuda_interop_available() -> bool:
         result = subprocess.run(
             cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
             startupinfo=startupinfo, creationflags=creationflags,
+            timeout=_GPU_PROBE_TIMEOUT,
         )
-        _cuda_interop_available = (result.returncode == 0)
-        if not _cuda_interop_available and result.stderr:
+        if result.returncode != 0 and result.stderr:
             logging.warning(f"CUDA interop probe stderr: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return result.returncode == 0, True
+    except subprocess.TimeoutExpired:
+        logging.warning(f"CUDA→Vulkan interop probe exceeded {_GPU_PROBE_TIMEOUT}s")
+        return False, False
     except (FileNotFoundError, OSError) as e:
         logging.warning(f"CUDA→Vulkan interop probe raised: {e}")
-        _cuda_interop_available = False
-
-    logging.warning(f"CUDA/Vulkan interop available: {_cuda_interop_available}")
-    return _cuda_interop_available
+        return False, True
+
+
+# One line of `ffmpeg -filters` / `-encoders`: a flags column, then the name.
+_LISTING_LINE_RE = re.compile(r'^\s*[A-Z.|]{3,6}\s+(\S+)\s')
+
+
+def _parse_ffmpeg_listing(text):
+    """The names in an `ffmpeg -filters` or `-encoders` listing, skipping its
+    legend (whose flag columns are followed by '=')."""
+    names = set()
+    for line in text.splitlines():
+        match = _LISTING_LINE_RE.match(line)
+        if match and match.group(1) != '=':
+            names.add(match.group(1))
+    return names
+
+
+def ffmpeg_filters() -> 'frozenset[str]':
+    """Return the names of every filter this ffmpeg build has, listed once
+    (and stored with the other capabilities). Empty if it can't be listed.
+    ConversionManager hands it to ffmpeg_command, which checks each chain's
+    zscale, tonemap and lut3d against it."""
+    global _ffmpeg_filters
+    filters = _ffmpeg_filters
+    if filters is not None:
+        return filters
+    if not ffmpeg_executable():
+        return frozenset()
+    with _FILTERS_PROBE_LOCK:
+        if _ffmpeg_filters is None:
+            _ffmpeg_filters = frozenset(stored_capability(
+                'filters', _list_ffmpeg_filters, keep=bool))
+        return _ffmpeg_filters
+
+
+def _list_ffmpeg_filters() -> 'list[str]':
+    exe = ffmpeg_executable()
+    if not exe:
+        return []
+    startupinfo, creationflags = _startupinfo()
+    try:
+        out = subprocess.run(
+            [exe, '-hide_banner', '-filters'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            startupinfo=startupinfo, creationflags=creationflags,
+            timeout=_GPU_PROBE_TIMEOUT,
+        ).stdout.decode('utf-8', errors='replace')
+    except (subprocess.SubprocessError, OSError) as e:
+        logging.warning(f"Could not list ffmpeg filters: {e}")
+        return []
+    return sorted(_parse_ffmpeg_listing(out))
 
 
 _PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
@@ -599,6 +1137,8 @@ _PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
 
 def _split_png_frames(data: bytes) -> 'list[Image.Image]':
     """Split a byte stream of back-to-back PNG files into PIL Image objects."""
+    from PIL import Image
+
     frames: list[Image.Image] = []
     pos = 0
     while pos < len(data):
@@ -614,6 +1154,138 @@ def _split_png_frames(data: bytes) -> 'list[Image.Image]':
     return frames
 
 
+# Preview frames leave ffmpeg uncompressed: a PPM is a three-line text header
+# ("P6", "<width> <height>", "255") and then exactly width*height*3 bytes of
+# rgb24. PNG cost a zlib compress in ffmpeg and a decompress in PIL of ~25 MB
+# per frame at PREVIEW_SIZE; the header is what makes raw pixels safe to read,
+# since the size a force_original_aspect_ratio scale lands on isn't known
+# up front. An ffmpeg built without the ppm encoder gets PNG instead, decided
+# by its first refusal and kept for the session.
+_RAW_FRAME_ARGS = ['-f', 'image2pipe', '-vcodec', 'ppm', '-pix_fmt', 'rgb24', '-']
+_PNG_FRAME_ARGS = ['-f', 'image2pipe', '-vcodec', 'png', '-']
+_raw_frames_unsupported = False
+
+
+def _frame_pipe_args() -> 'list[str]':
+    """The output args that put frames on stdout for _run_frame_pipe."""
+    return _PNG_FRAME_ARGS if _raw_frames_unsupported else _RAW_FRAME_ARGS
+
+
+def _read_raw_frames(stream) -> 'list[Image.Image]':
+    """Every PPM frame on *stream*. Each frame's pixels are read in one call
+    and handed to Image.frombytes, which copies them once into the image --
+    PIL has no zero-copy view of a three-byte-per-pixel buffer."""
+    from PIL import Image
+
+    frames: list[Image.Image] = []
+    while True:
+        magic = stream.readline()
+        if not magic:
+            return frames
+        size = stream.readline().split()
+        maxval = stream.readline().strip()
+        if magic.strip() != b'P6' or len(size) != 2 or maxval != b'255':
+            raise ValueError(f"unexpected frame header {magic + b' '.join(size)!r}")
+        width, height = int(size[0]), int(size[1])
+        expected = width * height * 3
+        pixels = stream.read(expected)
+        if len(pixels) != expected:
+            raise ValueError(f"frame cut short at {len(pixels)} of {expected} bytes")
+        frames.append(Image.frombytes('RGB', (width, height), pixels))
+
+
+def _raw_encoder_missing(stderr: str) -> bool:
+    return 'ppm' in stderr and ('Unknown encoder' in stderr or 'not found' in stderr)
+
+
+def _run_frame_pipe(cmd: 'list[str]', failure: str) -> 'list[Image.Image]':
+    """Run *cmd*, which ends in _frame_pipe_args(), and return the frames it
+    writes to stdout. stderr is drained on a thread so a chatty ffmpeg can't
+    fill its pipe and stall the frames. A non-zero exit raises RuntimeError
+    starting with *failure*."""
+    global _raw_frames_unsupported
+    raw = cmd[-len(_RAW_FRAME_ARGS):] == _RAW_FRAME_ARGS
+    startupinfo, creationflags = _startupinfo()
+    try:
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            startupinfo=startupinfo, creationflags=creationflags,
+        )
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f'{failure}: {e}') from e
+    stdout, stderr_pipe = process.stdout, process.stderr
+    assert stdout is not None and stderr_pipe is not None  # both PIPE above
+    stderr: 'list[bytes]' = []
+    drain = threading.Thread(target=lambda: stderr.append(stderr_pipe.read()),
+                             daemon=True)
+    drain.start()
+    malformed = None
+    try:
+        frames = (_read_raw_frames(stdout) if raw
+                  else _split_png_frames(stdout.read()))
+    except ValueError as e:
+        process.kill()
+        frames, malformed = [], e
+    process.wait()
+    drain.join()
+    err = b''.join(stderr).decode('utf-8', errors='replace')
+    if process.returncode != 0 and malformed is None:
+        if raw and _raw_encoder_missing(err):
+            logging.warning("ffmpeg has no ppm encoder; preview frames fall back to PNG.")
+            _raw_frames_unsupported = True
+            return _run_frame_pipe(cmd[:-len(_RAW_FRAME_ARGS)] + _PNG_FRAME_ARGS, failure)
+        logging.error(f"FFmpeg error: {err}")
+        if "no path between colorspaces" in err:
+            raise RuntimeError("There was an error importing this video. Colorspace mismatch.")
+        raise RuntimeError(f'{failure}: {err}')
+    if malformed is not None:
+        raise RuntimeError(f'{failure}: {malformed}')
+    return frames
+
+
+def _single_frame(cmd: 'list[str]', failure: str) -> 'Image.Image':
+    """The one frame a -vframes 1 command writes, via _run_frame_pipe."""
+    frames = _run_frame_pipe(cmd, failure)
+    if not frames:
+        logging.error(f"{failure}: ffmpeg wrote no frame")
+        raise RuntimeError(f"{failure}.")
+    return frames[0]
+
+
+def preview_frame_size(video_path: str, width: 'int | str | None',
+                       height: 'int | str | None') -> 'tuple[int, int] | None':
+    """The size a preview frame of *video_path* comes out at for a *width* x
+    *height* box: the source's shape fit inside the box, rounded exactly as
+    ffmpeg's scale=...:force_original_aspect_ratio=decrease would. Knowing it
+    up front is what lets the preview chains resize before the tonemap.
+
+    None when there is no box ('iw'/'ih', or None) or no source size on
+    record to fit -- see _fit_scale for the latter."""
+    if not isinstance(width, int) or not isinstance(height, int):
+        return None
+    properties = get_video_properties(video_path) or {}
+    src_w, src_h = properties.get('width'), properties.get('height')
+    if not src_w or not src_h:
+        return None
+    # av_rescale: round half away from zero.
+    fit_w = (height * src_w + src_h // 2) // src_h
+    fit_h = (width * src_h + src_w // 2) // src_w
+    return (max(1, min(width, fit_w)), max(1, min(height, fit_h)))
+
+
+def _fit_scale(video_path: str, width: 'int | str | None',
+               height: 'int | str | None') -> str:
+    """The scale filter that fits a frame to the *width* x *height* box, or ''
+    for no box. With no source size on record (see preview_frame_size) ffmpeg
+    works the fit out itself."""
+    size = preview_frame_size(video_path, width, height)
+    if size is not None:
+        return f'scale={size[0]}:{size[1]}'
+    if isinstance(width, int) and isinstance(height, int):
+        return f'scale={width}:{height}:force_original_aspect_ratio=decrease'
+    return ''
+
+
 def _batch_ffmpeg_filter_complex(n: int, per_input_filter: str) -> str:
     """Build a filter_complex that applies per_input_filter to each of N inputs and concats."""
     if n == 1:
@@ -626,6 +1298,82 @@ def _batch_ffmpeg_filter_complex(n: int, per_input_filter: str) -> str:
     return f'{parts};{concat_in}concat=n={n}:v=1:a=0[out]'
 
 
+def _fan_out_filter_complex(n: int, branches: 'list[str]') -> str:
+    """Build a filter_complex that decodes one frame from each of N inputs
+    once and splits it through every filter in *branches*, then concats
+    input by input, branch by branch. Each branch ends in rgb24 so concat,
+    which needs one pixel format, never converts one branch's pixels by
+    another's color tags."""
+    k = len(branches)
+    parts, outs = [], []
+    for i in range(n):
+        taps = ''.join(f'[s{i}_{j}]' for j in range(k))
+        parts.append(f'[{i}:v]trim=end_frame=1,setpts=PTS-STARTPTS,split={k}{taps}')
+        for j, branch in enumerate(branches):
+            parts.append(f'[s{i}_{j}]{branch},format=rgb24[v{i}_{j}]')
+            outs.append(f'[v{i}_{j}]')
+    return ';'.join(parts) + f";{''.join(outs)}concat=n={n * k}:v=1:a=0[out]"
+
+
+def extract_preview_frames(
+    video_path: str,
+    time_positions: 'list[float]',
+    gamma: float,
+    tonemappers: 'list[str]',
+    width: int,
+    height: int,
+    lut_enabled: bool = True,
+    gpu: bool = False,
+) -> 'list[tuple[Image.Image, list[Image.Image]]]':
+    """The original and converted preview frames for each position, from a
+    single decode of it: (original, [converted per tonemapper]) per position.
+
+    extract_frame plus extract_frame_with_conversion open, seek and decode
+    the same frame twice; here split fans the decoded frame out to the
+    original's scale and to each tonemapper's chain (the CPU chain, or
+    libplacebo when *gpu*). CPU positions share one process as in
+    extract_frames_batch; GPU positions run one process each, as in
+    extract_frames_with_gpu_conversion_batch.
+    """
+    if not time_positions or not tonemappers:
+        return []
+    exe = ffmpeg_executable()
+    if not exe:
+        return []
+    if gpu:
+        converts = [_gpu_preview_filter(video_path, gamma, tm, width, height, lut_enabled)
+                    for tm in tonemappers]
+    else:
+        converts = [_cpu_preview_filter(video_path, gamma, tm, width, height, lut_enabled)
+                    for tm in tonemappers]
+    branches = [_fit_scale(video_path, width, height) or 'null'] + converts
+    if gpu:
+        frames = []
+        for t in time_positions:
+            cmd = [exe] + VULKAN_DEVICE_ARGS + [
+                '-ss', str(t), '-i', os.path.normpath(video_path),
+                '-filter_complex', _fan_out_filter_complex(1, branches),
+                '-map', '[out]',
+            ]
+            cmd += _frame_pipe_args()
+            frames += _run_frame_pipe(cmd, 'FFmpeg preview extraction failed (GPU)')
+    else:
+        cmd = [exe]
+        for t in time_positions:
+            cmd += ['-ss', str(t), '-i', os.path.normpath(video_path)]
+        cmd += [
+            '-filter_complex', _fan_out_filter_complex(len(time_positions), branches),
+            '-map', '[out]',
+        ]
+        cmd += _frame_pipe_args()
+        frames = _run_frame_pipe(cmd, 'FFmpeg preview extraction failed')
+    k = len(branches)
+    if len(frames) != len(time_positions) * k:
+        raise RuntimeError(f"FFmpeg preview extraction returned {len(frames)} of "
+                           f"{len(time_positions) * k} frames.")
+    return [(frames[i], frames[i + 1:i + k]) for i in range(0, len(frames), k)]
+
+
 def extract_frames_batch(
     video_path: str,
     time_positions: 'list[float]',
@@ -640,29 +1388,76 @@ def extract_frames_batch(
     """
     if not time_positions:
         return []
-    if not FFMPEG_EXECUTABLE:
+    exe = ffmpeg_executable()
+    if not exe:
         return []
     n = len(time_positions)
-    startupinfo, creationflags = _startupinfo()
-    scale = f'scale={width}:{height}:force_original_aspect_ratio=decrease'
-    cmd = [FFMPEG_EXECUTABLE]
+    scale = _fit_scale(video_path, width, height) or 'null'
+    cmd = [exe]
     for t in time_positions:
         cmd += ['-ss', str(t), '-i', os.path.normpath(video_path)]
     cmd += [
         '-filter_complex', _batch_ffmpeg_filter_complex(n, scale),
         '-map', '[out]',
-        '-f', 'image2pipe', '-vcodec', 'png', '-',
     ]
-    process = subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-        startupinfo=startupinfo, creationflags=creationflags,
-    )
-    out, err = process.communicate()
-    if process.returncode != 0:
-        raise RuntimeError(
-            f'FFmpeg batch frame extraction failed: {err.decode("utf-8", errors="replace")}'
+    cmd += _frame_pipe_args()
+    return _run_frame_pipe(cmd, 'FFmpeg batch frame extraction failed')
+
+
+def _cpu_preview_filter(video_path: str, gamma: float, tonemapper: str,
+                        width: 'int | str', height: 'int | str',
+                        lut_enabled: bool) -> str:
+    """The CPU preview chain for one tonemapper, matching what a CPU export
+    of the source at the preview's size runs (see ffmpeg_command._tonemap_chain):
+      - the resize comes first, in linear light, so everything after it
+        runs on the preview's pixels (see preview_frame_size);
+      - an SDR source gets no color filters at all;
+      - an HLG source, and BT.2390/Spline (which zscale's tonemap lacks),
+        run as their fused LUT -- see fused_lut.py. That LUT carries the
+        gamut correction itself, so lut_enabled doesn't apply to them.
+    With a box but no source size on record, the frame is fit at the end
+    instead, as before the resize moved up.
+    """
+    tm = tonemapper.lower()
+    size = preview_frame_size(video_path, width, height)
+    fit = '' if size else _fit_scale(video_path, width, height)
+    tail = f',{fit}' if fit else ''
+    source = classify_source(get_video_properties(video_path) or {})
+    if source == SOURCE_SDR:
+        head = f'scale={size[0]}:{size[1]},' if size else ''
+        return f'{head}eq=gamma={gamma}{tail}'
+    if source == SOURCE_HLG or tm in fused_lut.LUT_ONLY_TONEMAPPERS:
+        peak = fused_lut.signal_peak(get_maxcll(video_path), get_max_luminance(video_path))
+        lut_path = _escape_path_for_filter(fused_lut.lut_path(tm, peak, source))
+        if size:
+            chain = fused_lut.FUSED_RESIZED_FILTER.format(
+                width=size[0], height=size[1], lut_path=lut_path)
+        else:
+            chain = fused_lut.FUSED_FILTER.format(lut_path=lut_path)
+        return f'{chain},eq=gamma={gamma}{tail}'
+    if lut_enabled and not size:
+        return FFMPEG_CONVERT_FILTER.format(
+            gamma=gamma, tonemapper=tm, lut_path=get_lut_filter_path()) + tail
+    out_w, out_h = size or ('iw', 'ih')
+    if lut_enabled:
+        return FFMPEG_FILTER.format(
+            gamma=gamma, width=out_w, height=out_h, tonemapper=tm,
+            lut_path=get_lut_filter_path(),
         )
-    return _split_png_frames(out)
+    return FFMPEG_FILTER_LEGACY_NO_LUT.format(
+        gamma=gamma, width=out_w, height=out_h, tonemapper=tm
+    ) + tail
+
+
+def _gpu_preview_filter(video_path: str, gamma: float, tonemapper: str,
+                        width: 'int | str', height: 'int | str',
+                        lut_enabled: bool) -> str:
+    """The GPU preview chain: libplacebo scales to exactly w x h, so the box
+    is fit to the source's shape first. It downscales in linear light ahead
+    of its tonemap itself."""
+    width, height = preview_frame_size(video_path, width, height) or (width, height)
+    return build_libplacebo_filter(
+        gamma, tonemapper, width=width, height=height, lut_enabled=lut_enabled)
 
 
 def extract_frames_with_conversion_batch(
@@ -683,37 +1478,21 @@ def extract_frames_with_conversion_batch(
     """
     if not time_positions:
         return []
-    if not FFMPEG_EXECUTABLE:
+    exe = ffmpeg_executable()
+    if not exe:
         return []
     n = len(time_positions)
-    startupinfo, creationflags = _startupinfo()
-    if lut_enabled:
-        tone_filter = FFMPEG_FILTER.format(
-            gamma=gamma, width=width, height=height, tonemapper=tonemapper.lower(),
-            lut_path=get_lut_filter_path(),
-        )
-    else:
-        tone_filter = FFMPEG_FILTER_LEGACY_NO_LUT.format(
-            gamma=gamma, width=width, height=height, tonemapper=tonemapper.lower()
-        )
-    cmd = [FFMPEG_EXECUTABLE]
+    tone_filter = _cpu_preview_filter(video_path, gamma, tonemapper, width, height,
+                                      lut_enabled)
+    cmd = [exe]
     for t in time_positions:
         cmd += ['-ss', str(t), '-i', os.path.normpath(video_path)]
     cmd += [
         '-filter_complex', _batch_ffmpeg_filter_complex(n, tone_filter),
         '-map', '[out]',
-        '-f', 'image2pipe', '-vcodec', 'png', '-',
     ]
-    process = subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-        startupinfo=startupinfo, creationflags=creationflags,
-    )
-    out, err = process.communicate()
-    if process.returncode != 0:
-        raise RuntimeError(
-            f'FFmpeg batch conversion failed: {err.decode("utf-8", errors="replace")}'
-        )
-    return _split_png_frames(out)
+    cmd += _frame_pipe_args()
+    return _run_frame_pipe(cmd, 'FFmpeg batch conversion failed')
 
 
 def extract_frame_with_conversion(video_path, gamma, tonemapper='reinhard',
@@ -726,9 +1505,10 @@ def extract_frame_with_conversion(video_path, gamma, tonemapper='reinhard',
         gamma (float): The gamma correction value.
         tonemapper (str): The tonemapping algorithm to use.
         time_position (float, optional): The time position to extract the frame from.
-        width, height: output scale for the filter chain. Default ('iw'/'ih') keeps
-            the source resolution; pass concrete sizes (e.g. 960, 540) to have ffmpeg
-            scale the preview down, decoding far less data for a snappier preview.
+        width, height: box to fit the frame in. Default ('iw'/'ih') keeps the
+            source resolution; a concrete box (e.g. 960, 540) is fit to the
+            source's shape and resized to before the tonemap, so the chain
+            runs on the preview's pixels (see preview_frame_size).
         lut_enabled: TEMPORARY, dev-verification only -- see FFMPEG_FILTER_LEGACY_NO_LUT.
     Returns:
         PIL.Image: The extracted and converted frame as a PIL image.
@@ -742,27 +1522,16 @@ def extract_frame_with_conversion(video_path, gamma, tonemapper='reinhard',
     else:
         target_time = time_position
 
-    if lut_enabled:
-        filter_str = FFMPEG_FILTER.format(
-            gamma=gamma, width=width, height=height, tonemapper=tonemapper.lower(),
-            lut_path=get_lut_filter_path(),
-        )
-    else:
-        filter_str = FFMPEG_FILTER_LEGACY_NO_LUT.format(
-            gamma=gamma, width=width, height=height, tonemapper=tonemapper.lower()
-        )
+    exe = require_ffmpeg("Failed to extract and convert frame")
+    filter_str = _cpu_preview_filter(video_path, gamma, tonemapper, width, height,
+                                     lut_enabled)
     cmd = [
-        FFMPEG_EXECUTABLE, '-ss', str(target_time), '-i', video_path,
+        exe, '-ss', str(target_time), '-i', os.path.normpath(video_path),
         '-vf', filter_str,
-        '-vframes', '1', '-f', 'image2pipe', '-'
+        '-vframes', '1',
     ]
-
-    out = run_ffmpeg_command(cmd)
-    try:
-        return Image.open(io.BytesIO(out))
-    except UnidentifiedImageError as e:
-        logging.error(f"Failed to extract and convert frame: {e}")
-        raise RuntimeError("Failed to extract and convert frame.")
+    cmd += _frame_pipe_args()
+    return _single_frame(cmd, "Failed to extract and convert frame")
 
 
 def extract_frame_with_gpu_conversion(video_path, gamma, tonemapper='bt.2390',
@@ -770,11 +1539,10 @@ def extract_frame_with_gpu_conversion(video_path, gamma, tonemapper='bt.2390',
                                       height: 'int | str' = 'ih', lut_enabled: bool = True):
     """GPU (libplacebo) counterpart to extract_frame_with_conversion.
 
-    Used for tonemappers with no zscale/CPU implementation (see
-    GPU_ONLY_TONEMAPPERS) -- preview must render the true algorithm, not an
-    approximation, so these route through libplacebo/Vulkan instead of
-    zscale. Uses the plain-Vulkan (CPU-decode) path, not CUDA interop:
-    interop optimizes full-length encodes, not single preview frames.
+    Used whenever real export would tonemap on the GPU, so preview renders
+    libplacebo's own algorithm rather than the CPU chain's. Uses the
+    plain-Vulkan (CPU-decode) path, not CUDA interop: interop optimizes
+    full-length encodes, not single preview frames.
 
     lut_enabled: TEMPORARY, dev-verification only -- see build_libplacebo_filter.
     """
@@ -784,20 +1552,16 @@ def extract_frame_with_gpu_conversion(video_path, gamma, tonemapper='bt.2390',
 
     target_time = properties['duration'] / 3 if time_position is None else time_position
 
-    filter_str = build_libplacebo_filter(
-        gamma, tonemapper, width=width, height=height, lut_enabled=lut_enabled)
-    cmd = [FFMPEG_EXECUTABLE] + VULKAN_DEVICE_ARGS + [
-        '-ss', str(target_time), '-i', video_path,
+    exe = require_ffmpeg("Failed to extract and convert frame (GPU)")
+    filter_str = _gpu_preview_filter(video_path, gamma, tonemapper, width, height,
+                                     lut_enabled)
+    cmd = [exe] + VULKAN_DEVICE_ARGS + [
+        '-ss', str(target_time), '-i', os.path.normpath(video_path),
         '-vf', filter_str,
-        '-vframes', '1', '-f', 'image2pipe', '-'
+        '-vframes', '1',
     ]
-
-    out = run_ffmpeg_command(cmd)
-    try:
-        return Image.open(io.BytesIO(out))
-    except UnidentifiedImageError as e:
-        logging.error(f"Failed to extract and convert frame (GPU): {e}")
-        raise RuntimeError("Failed to extract and convert frame.")
+    cmd += _frame_pipe_args()
+    return _single_frame(cmd, "Failed to extract and convert frame (GPU)")
 
 
 def extract_frames_with_gpu_conversion_batch(
@@ -831,8 +1595,8 @@ def extract_frame(video_path, time_position=None, width: 'int | None' = None,
     Args:
         video_path (str): The path to the video file.
         time_position (float, optional): The time position to extract the frame from.
-        width, height (int, optional): when both given, ffmpeg scales the frame to
-            this size on the way out, so the preview decodes far less data.
+        width, height (int, optional): when both given, ffmpeg fits the frame
+            inside this box on the way out (see preview_frame_size).
     Returns:
         PIL.Image: The extracted frame as a PIL image.
     """
@@ -846,17 +1610,14 @@ def extract_frame(video_path, time_position=None, width: 'int | None' = None,
     else:
         target_time = time_position
 
-    cmd = [FFMPEG_EXECUTABLE, '-ss', str(target_time), '-i', video_path]
-    if width and height:
-        cmd += ['-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease']
-    cmd += ['-vframes', '1', '-f', 'image2pipe', '-']
-
-    out = run_ffmpeg_command(cmd)
-    try:
-        return Image.open(io.BytesIO(out))
-    except UnidentifiedImageError as e:
-        logging.error(f"Failed to extract frame: {e}")
-        raise RuntimeError("Failed to extract frame.")
+    cmd = [require_ffmpeg("Failed to extract frame"), '-ss', str(target_time),
+           '-i', os.path.normpath(video_path)]
+    scale = _fit_scale(video_path, width, height)
+    if scale:
+        cmd += ['-vf', scale]
+    cmd += ['-vframes', '1']
+    cmd += _frame_pipe_args()
+    return _single_frame(cmd, "Failed to extract frame")
 
 def _int_or_zero(v) -> int:
     """Convert a value to int; return 0 for None, empty, or non-numeric strings (e.g. 'N/A')."""
@@ -923,49 +1684,77 @@ def _parse_bit_depth(video_stream: dict) -> int:
     return 8
 
 
-def get_video_properties(input_file):
-    if input_file in _VIDEO_PROPS_CACHE:
-        return _VIDEO_PROPS_CACHE[input_file]
+# Everything _probe_video_properties reads, for ffprobe's -show_entries: the
+# stream fields behind the props dict (index for subtitle mapping), the DoVi
+# record in the video stream's side data, and the first frames' HDR side
+# data -- without -show_frames' full per-frame dump.
+_PROBE_ENTRIES = (
+    'stream=index,codec_type,codec_name,width,height,avg_frame_rate,'
+    'r_frame_rate,bit_rate,duration,pix_fmt,bits_per_raw_sample,'
+    'color_primaries,color_transfer,side_data_list'
+    ':format=duration,bit_rate'
+    ':frame=side_data_list'
+)
 
-    with _VIDEO_PROPS_CACHE_LOCK:
-        return _probe_video_properties(input_file)
+
+def get_video_properties(input_file):
+    """The source's stream properties, or None when it can't be probed. Cached
+    per file like _get_hdr_metadata; None is not cached, so a failed probe is
+    retried on the next call."""
+    return _VIDEO_PROPS_CACHE.get(input_file, _probe_video_properties,
+                                  keep=lambda props: props is not None)
 
 
 def _probe_video_properties(input_file):
-    """Runs under _VIDEO_PROPS_CACHE_LOCK; re-checks the cache (another thread
-    may have populated it while this one was waiting on the lock) before
-    spawning ffprobe, matching _get_hdr_metadata's check-lock-check pattern."""
-    if input_file in _VIDEO_PROPS_CACHE:
-        return _VIDEO_PROPS_CACHE[input_file]
+    """Probe *input_file* (uncached in memory; answered from the on-disk
+    store when it has the file).
+
+    media_header reads MP4/MOV and Matroska headers in-process and returns
+    what ffprobe would; failing that, one ffprobe run covers both. Either
+    way the first frames' HDR side data, when known, goes to
+    _HDR_METADATA_CACHE so get_maxcll doesn't open the file a second time.
+    _PROBE_ENTRIES limits ffprobe's output to the fields read here and in
+    _parse_dovi/_parse_bit_depth."""
+    store = _PROBE_STORE
+    stored = probe_cache.MISSING if store is None else store.get(input_file, 'props')
+    if stored is not probe_cache.MISSING:
+        return stored
 
     startupinfo, creationflags = _startupinfo()
 
-    command = [
-        FFPROBE_EXECUTABLE,
-        '-v', 'quiet',
-        '-print_format', 'json',
-        '-show_streams',
-        '-show_format',
-        os.path.normpath(input_file)
-    ]
-
     try:
-        result = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            startupinfo=startupinfo,
-            creationflags=creationflags
-        )
-        output, _ = result.communicate()
-        
-        if result.returncode != 0:
-            return None
-            
-        if isinstance(output, bytes):
-            output = output.decode('utf-8')
-            
-        data = json.loads(output)
+        # The common containers answer from their header without a process
+        # launch; anything media_header can't settle goes to ffprobe.
+        data = media_header.probe(input_file)
+        if data is None:
+            exe = ffprobe_executable()
+            if not exe:
+                logging.error("Error getting video properties: ffprobe not found.")
+                return None
+            command = [
+                exe,
+                '-v', 'quiet',
+                '-print_format', 'json',
+                '-read_intervals', '%+1',
+                '-show_entries', _PROBE_ENTRIES,
+                os.path.normpath(input_file)
+            ]
+            result = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                startupinfo=startupinfo,
+                creationflags=creationflags
+            )
+            output, _ = result.communicate()
+
+            if result.returncode != 0:
+                return None
+
+            if isinstance(output, bytes):
+                output = output.decode('utf-8')
+
+            data = json.loads(output)
         
         video_stream = None
         audio_stream = None
@@ -1055,7 +1844,15 @@ def _probe_video_properties(input_file):
             "is_dolby_vision": is_dolby_vision,
             "dovi_profile": dovi_profile,
         }
-        _VIDEO_PROPS_CACHE[input_file] = props
+        if store is not None:
+            store.put(input_file, 'props', props)
+        # No 'frames' key means ffprobe didn't get as far as decoding one:
+        # leave HDR metadata to its own probe rather than record "none".
+        if 'frames' in data:
+            meta = _parse_hdr_side_data(data['frames'])
+            _HDR_METADATA_CACHE.put(input_file, meta)
+            if store is not None:
+                store.put(input_file, 'hdr', meta)
         return props
         
     except (subprocess.SubprocessError, json.JSONDecodeError, ValueError) as e:
@@ -0,0 +1,28 @@
+"""A TestCase with a fresh temporary directory per test.
+
+The on-disk caches (probe_cache, capability_cache, frame_store, checkpoints)
+and media_header are tested against real files rather than a mocked
+filesystem; this is the directory they write to, removed after each test.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """self.tmp is an empty directory of this test's own."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def _file(self, name: str, data: bytes = b'x') -> str:
+        """Write *data* to *name* in self.tmp; returns its path."""
+        path = os.path.join(self.tmp, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
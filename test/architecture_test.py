@@ -29,21 +29,35 @@ _ALLOWED: "dict[str, tuple[frozenset[str], bool]]" = {
     'settings':           (frozenset({'platform_utils'}), False),
     'updater':            (frozenset(), False),
     'license_errors':     (frozenset(), False),
-    'utils':              (frozenset({'platform_utils'}), False),
+    'probe_cache':        (frozenset(), False),
+    'media_header':       (frozenset(), False),
+    'capability_cache':   (frozenset(), False),
+    'cpu_budget':         (frozenset(), False),
+    'frame_cache':        (frozenset({'cpu_budget'}), False),
+    'frame_store':        (frozenset({'probe_cache'}), False),
+    'fused_lut':          (frozenset({'platform_utils'}), False),
+    'utils':              (frozenset({'platform_utils', 'fused_lut', 'probe_cache',
+                                      'media_header', 'capability_cache'}), False),
     'conversion_view':    (frozenset(), False),
     'platform_utils':     (frozenset(), False),
-    'ffmpeg_command':     (frozenset({'conversion_view', 'utils'}), False),
+    'ffmpeg_command':     (frozenset({'conversion_view', 'utils', 'fused_lut'}), False),
+    'ffmpeg_progress':    (frozenset(), False),
+    'checkpoints':        (frozenset(), False),
     'licensing':          (frozenset({'license_errors'}), False),
-    'conversion':         (frozenset({'utils', 'conversion_view', 'ffmpeg_command', 'platform_utils'}), False),
+    'conversion':         (frozenset({'utils', 'conversion_view', 'ffmpeg_command',
+                                      'ffmpeg_progress', 'checkpoints',
+                                      'fused_lut', 'platform_utils', 'cpu_budget'}), False),
     'dark_theme':         (frozenset(), True),
     'dialog_theme':       (frozenset(), True),
     'tk_conversion_view': (frozenset({'conversion_view'}), True),
-    'preview':            (frozenset({'utils'}), True),
+    'preview':            (frozenset({'utils', 'cpu_budget', 'frame_cache', 'frame_store',
+                                      'platform_utils'}), True),
     'dialogs':            (frozenset({'dialog_theme', 'licensing', 'updater'}), True),
     'gui':                (frozenset({'dark_theme', 'conversion', 'tk_conversion_view',
                                       'utils', 'settings', 'dialogs', 'preview',
                                       'updater'}), True),
-    'main':               (frozenset({'gui', 'licensing', 'utils', 'platform_utils'}), True),
+    'main':               (frozenset({'gui', 'conversion', 'licensing', 'utils',
+                                      'platform_utils'}), True),
 }
 
 # gui.py is the composition root, not a shared library. That edge is the
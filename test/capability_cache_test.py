@@ -0,0 +1,94 @@
+"""Unit tests for src/capability_cache.py: answers kept per identity, their
+TTL, the explicit clear, and the round trip through disk. A temp dir -- no
+ffmpeg, no GPU."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import capability_cache  # noqa: E402
+from _temp_dir import TempDirTestCase  # noqa: E402
+
+
+class _StoreTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store_path = os.path.join(self.tmp, 'cache', 'capabilities.json')
+
+    def _store(self, identity='ffmpeg|1|2', **kwargs):
+        return capability_cache.CapabilityStore(self.store_path, identity, **kwargs)
+
+
+class TestLookup(_StoreTest):
+
+    def test_miss_then_hit_across_instances(self):
+        store = self._store()
+        self.assertIs(store.get('libplacebo'), capability_cache.MISSING)
+        store.put('libplacebo', [True, True])
+        store.put('encoders', 'h264_nvenc')
+        reopened = self._store()
+        self.assertEqual(reopened.get('libplacebo'), [True, True])
+        self.assertEqual(reopened.get('encoders'), 'h264_nvenc')
+
+    def test_false_is_an_answer(self):
+        store = self._store()
+        store.put('nvidia', False)
+        self.assertIs(self._store().get('nvidia'), False)
+
+    def test_another_identity_starts_empty(self):
+        self._store().put('nvidia', True)
+        self.assertIs(self._store('ffmpeg|1|3').get('nvidia'), capability_cache.MISSING)
+
+    def test_no_identity_stores_nothing(self):
+        store = self._store(None)
+        store.put('nvidia', True)
+        self.assertIs(store.get('nvidia'), capability_cache.MISSING)
+        self.assertFalse(os.path.exists(self.store_path))
+
+    def test_answers_expire(self):
+        store = self._store(ttl=60.0)
+        with patch('capability_cache.time.time', return_value=1000.0):
+            store.put('nvidia', True)
+        with patch('capability_cache.time.time', return_value=1059.0):
+            self.assertIs(store.get('nvidia'), True)
+        with patch('capability_cache.time.time', return_value=1061.0):
+            self.assertIs(store.get('nvidia'), capability_cache.MISSING)
+
+    def test_clear_forgets_on_disk_too(self):
+        store = self._store()
+        store.put('nvidia', True)
+        store.clear()
+        self.assertIs(store.get('nvidia'), capability_cache.MISSING)
+        self.assertIs(self._store().get('nvidia'), capability_cache.MISSING)
+
+
+class TestUnreadableFile(_StoreTest):
+
+    def test_corrupt_or_foreign_file_starts_empty(self):
+        os.makedirs(os.path.dirname(self.store_path))
+        for payload in ('not json', json.dumps([1, 2]),
+                        json.dumps({'version': 99, 'identity': 'ffmpeg|1|2',
+                                    'entries': {'nvidia': {'value': True, 'at': 0}}})):
+            with open(self.store_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            self.assertIs(self._store().get('nvidia'), capability_cache.MISSING)
+
+    def test_unwritable_location_is_not_an_error(self):
+        blocker = os.path.join(self.tmp, 'file')
+        with open(blocker, 'w') as f:
+            f.write('x')
+        store = capability_cache.CapabilityStore(
+            os.path.join(blocker, 'capabilities.json'), 'ffmpeg|1|2')
+        store.put('nvidia', True)
+        self.assertIs(store.get('nvidia'), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,11 +7,15 @@ covered here as an ongoing regression suite rather than transitional
 scaffolding. New characterization tests are welcome for any other code path
 worth pinning down this way, not just responsiveness work.
 """
+import io
 import sys
 import os
 import json
+import shutil
+import tempfile
 import threading
 import unittest
+from concurrent.futures import Future
 from unittest.mock import patch, MagicMock, ANY, call
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
@@ -183,7 +187,10 @@ class TestMonitorProgress(unittest.TestCase):
         manager = ConversionManager()
         manager.cancelled = False
         proc = MagicMock()
-        proc.stderr = iter(['frame=1 time=00:00:45.00 bitrate=1'])
+        proc.stderr = iter([])
+        # ffmpeg's -progress stream: key=value lines, block closed by progress=.
+        proc.stdout = iter(['frame=1\n', 'out_time_us=45000000\n',
+                            'speed=2.0x\n', 'progress=continue\n'])
         proc.returncode = 0
         manager.process = proc
         manager.handle_completion = MagicMock()
@@ -253,7 +260,7 @@ class TestPreviewWorkerThread(unittest.TestCase):
 
         seen = {}
 
-        def fake_extract(video_path, time_position, tonemapper, lut_enabled=True):
+        def fake_extract(video_path, time_position, tonemapper, lut_enabled=True, box=None):
             seen['thread'] = threading.current_thread()
             seen['time_position'] = time_position
             seen['tonemapper'] = tonemapper
@@ -402,8 +409,12 @@ class TestPreviewWorkerThread(unittest.TestCase):
         self.assertEqual((vp, duration, tm), ('in.mp4', 60.0, 'mobius'))
 
 
+@patch('src.preview.extract_frames_with_conversion_batch', return_value=[])
+@patch('src.preview.extract_frames_batch', return_value=[])
+@patch('src.preview.extract_preview_frames', return_value=[])
 class TestPreviewPrewarm(unittest.TestCase):
-    """Non-visible seek frames are pre-extracted in 2 batch ffmpeg calls (not 8 individual ones)."""
+    """Non-visible seek frames are pre-extracted in 1 batch ffmpeg call that
+    decodes each position once for both frames (not 8 individual ones)."""
 
     def _gui(self, current=1, total=5, generation=3):
         gui = _bare_gui()
@@ -414,60 +425,73 @@ class TestPreviewPrewarm(unittest.TestCase):
         gui._preview_cache_converted = {}
         return gui
 
-    @patch('src.preview.extract_frames_with_conversion_batch', return_value=[])
-    @patch('src.preview.extract_frames_batch', return_value=[])
-    def test_two_batch_calls_for_four_frames(self, mock_orig, mock_conv):
-        """Whole prewarm uses exactly 1 original batch call + 1 converted batch call."""
+    def test_one_batch_call_for_four_frames(self, mock_pairs, mock_orig, mock_conv):
+        """Whole prewarm uses exactly 1 fan-out batch call."""
         gui = self._gui(current=1)
         gui._prewarm_other_frames('in.mkv', 60.0, 'reinhard', generation=3)
-        self.assertEqual(mock_orig.call_count, 1)
-        self.assertEqual(mock_conv.call_count, 1)
+        self.assertEqual(mock_pairs.call_count, 1)
+        mock_orig.assert_not_called()
+        mock_conv.assert_not_called()
 
-    @patch('src.preview.extract_frames_with_conversion_batch', return_value=[])
-    @patch('src.preview.extract_frames_batch', return_value=[])
-    def test_extracts_every_other_frame_position(self, mock_orig, mock_conv):
+    def test_extracts_every_other_frame_position(self, mock_pairs, *_):
         """Batch receives the 4 non-current time positions."""
         gui = self._gui(current=1)
         gui._prewarm_other_frames('in.mkv', 60.0, 'mobius', generation=3)
-        positions = mock_orig.call_args[0][1]
+        positions = mock_pairs.call_args[0][1]
         # index/(total+1)*duration for indices 2..5 (index 1 = current, skipped)
         self.assertEqual(sorted(round(t, 3) for t in positions), [20.0, 30.0, 40.0, 50.0])
 
-    @patch('src.preview.extract_frames_with_conversion_batch', return_value=[])
-    @patch('src.preview.extract_frames_batch', return_value=[])
-    def test_skips_the_currently_displayed_frame(self, mock_orig, mock_conv):
+    def test_skips_the_currently_displayed_frame(self, mock_pairs, *_):
         """Frame at the current index is never included in the batch positions."""
         gui = self._gui(current=3)
         gui._prewarm_other_frames('in.mkv', 60.0, 'reinhard', generation=3)
-        positions = mock_orig.call_args[0][1]
+        positions = mock_pairs.call_args[0][1]
         self.assertEqual(len(positions), 4)
         self.assertNotIn(30.0, [round(t, 3) for t in positions])  # 3/6*60 = 30
 
-    @patch('src.preview.extract_frames_with_conversion_batch')
-    @patch('src.preview.extract_frames_batch')
-    def test_stops_immediately_when_superseded(self, mock_orig, mock_conv):
+    def test_tonemapper_switch_converts_only(self, mock_pairs, mock_orig, mock_conv):
+        """Originals already cached: only the converted batch runs."""
+        gui = self._gui(current=1)
+        for t in (20.0, 30.0, 40.0, 50.0):
+            gui._preview_cache_original[('in.mkv', t, PREVIEW_SIZE)] = MagicMock()
+        gui._prewarm_other_frames('in.mkv', 60.0, 'hable', generation=3)
+        mock_pairs.assert_not_called()
+        mock_orig.assert_not_called()
+        self.assertEqual(len(mock_conv.call_args[0][1]), 4)
+
+    def test_fan_out_fills_both_caches(self, mock_pairs, *_):
+        mock_pairs.side_effect = _fan_out().side_effect
+        gui = self._gui(current=1)
+        gui._cache_lock = threading.Lock()
+        gui._prewarm_other_frames('in.mkv', 60.0, 'mobius', generation=3)
+        self.assertEqual(gui._preview_cache_original[('in.mkv', 20.0, PREVIEW_SIZE)], 'orig')
+        self.assertEqual(
+            gui._preview_cache_converted[('in.mkv', 20.0, 'mobius', True, False, PREVIEW_SIZE)],
+            'conv:mobius')
+
+    def test_stops_immediately_when_superseded(self, mock_pairs, mock_orig, mock_conv):
         """Stale generation → batch functions never called."""
         gui = self._gui()  # _preview_generation=3
         gui._prewarm_other_frames('in.mkv', 60.0, 'mobius', generation=1)
+        mock_pairs.assert_not_called()
         mock_orig.assert_not_called()
         mock_conv.assert_not_called()
 
-    @patch('src.preview.extract_frames_with_conversion_batch', return_value=[])
-    @patch('src.preview.extract_frames_batch')
-    def test_original_batch_errors_are_swallowed(self, mock_orig, mock_conv):
+    def test_batch_errors_are_swallowed(self, mock_pairs, *_):
         """A batch failure must not propagate out of the background worker."""
-        mock_orig.side_effect = RuntimeError('batch decode fail')
+        mock_pairs.side_effect = RuntimeError('batch decode fail')
         gui = self._gui()
         with patch('src.preview.logging'):
             gui._prewarm_other_frames('in.mkv', 60.0, 'mobius', generation=3)
 
-    @patch('src.preview.extract_frames_with_conversion_batch')
-    @patch('src.preview.extract_frames_batch', return_value=[])
-    def test_converted_batch_errors_are_swallowed(self, mock_orig, mock_conv):
+    def test_converted_batch_errors_are_swallowed(self, mock_pairs, mock_orig, mock_conv):
         mock_conv.side_effect = RuntimeError('tonemap batch fail')
         gui = self._gui()
+        for t in (20.0, 30.0, 40.0, 50.0):
+            gui._preview_cache_original[('in.mkv', t, PREVIEW_SIZE)] = MagicMock()
         with patch('src.preview.logging'):
             gui._prewarm_other_frames('in.mkv', 60.0, 'mobius', generation=3)
+        mock_conv.assert_called_once()
 
 
 class TestPreviewPool(unittest.TestCase):
@@ -476,10 +500,11 @@ class TestPreviewPool(unittest.TestCase):
     # ── pool worker cap ─────────────────────────────────────────────────────
 
     def test_pool_worker_cap_formula(self):
-        """max(1, cpu_count // 4) — matches the documented formula."""
-        from src.preview import _PREVIEW_POOL_WORKERS
-        expected = max(1, (os.cpu_count() or 1) // 4)
-        self.assertEqual(_PREVIEW_POOL_WORKERS, expected)
+        """max(1, cpus // 4) over the CPU budget, not the host's core count."""
+        from src.preview import _preview_pool_workers
+        for cpus, expected in ((32, 8), (6, 1), (1, 1)):
+            with patch('cpu_budget.cpus', return_value=cpus):
+                self.assertEqual(_preview_pool_workers(), expected)
 
     def test_lazy_pool_is_built_at_the_hardware_scaled_width(self):
         """The constant existing is not the same as it being used.
@@ -490,7 +515,7 @@ class TestPreviewPool(unittest.TestCase):
         max_workers, silently dropping the hardware scaling on every machine
         with more than 4 cores.
         """
-        from src.preview import _PREVIEW_POOL_WORKERS
+        from src.preview import _preview_pool_workers
         gui = _bare_gui()
         gui.root = MagicMock()
         gui.current_frame_index = 1
@@ -509,7 +534,7 @@ class TestPreviewPool(unittest.TestCase):
             gui.display_frames('in.mp4')
 
         self.assertEqual(mock_pool.call_args.kwargs.get('max_workers'),
-                         _PREVIEW_POOL_WORKERS)
+                         _preview_pool_workers())
 
     # ── display_frames uses the pool ────────────────────────────────────────
 
@@ -534,8 +559,8 @@ class TestPreviewPool(unittest.TestCase):
 
     # ── _prewarm_other_frames dispatches to pool ────────────────────────────
 
-    def test_prewarm_submits_two_tasks_to_pool(self):
-        """`_prewarm_other_frames` submits one original task + one converted task."""
+    def test_prewarm_submits_one_fan_out_task_to_pool(self):
+        """`_prewarm_other_frames` submits one task decoding each position once."""
         gui = _bare_gui()
         gui.current_frame_index = 1
         gui.total_frames = 5
@@ -546,10 +571,8 @@ class TestPreviewPool(unittest.TestCase):
 
         gui._prewarm_other_frames('v.mkv', 60.0, 'reinhard', generation=1)
 
-        self.assertEqual(gui._preview_pool.submit.call_count, 2)
-        methods_submitted = [c[0][0] for c in gui._preview_pool.submit.call_args_list]
-        self.assertIn(gui._prewarm_batch_originals, methods_submitted)
-        self.assertIn(gui._prewarm_batch_converted, methods_submitted)
+        gui._preview_pool.submit.assert_called_once()
+        self.assertEqual(gui._preview_pool.submit.call_args[0][0], gui._prewarm_batch_pairs)
 
     def test_prewarm_does_not_submit_when_stale(self):
         gui = _bare_gui()
@@ -576,9 +599,9 @@ class TestPreviewPool(unittest.TestCase):
         conv = {}
         for idx in range(2, 6):
             t = round((idx / 6) * duration, 3)
-            orig[('v.mkv', t)] = MagicMock()
+            orig[('v.mkv', t, PREVIEW_SIZE)] = MagicMock()
             # Cache key's 5th element is use_gpu -- False here (no gpu_accel_var, CPU-capable tonemapper).
-            conv[('v.mkv', t, 'reinhard', True, False)] = MagicMock()
+            conv[('v.mkv', t, 'reinhard', True, False, PREVIEW_SIZE)] = MagicMock()
         gui._preview_cache_original = orig
         gui._preview_cache_converted = conv
         gui._preview_pool = MagicMock()
@@ -600,8 +623,8 @@ class TestPreviewPool(unittest.TestCase):
 
         gui._prewarm_batch_originals('v.mkv', [10.0], generation=1)
 
-        self.assertIn(('v.mkv', 10.0), gui._preview_cache_original)
-        self.assertIs(gui._preview_cache_original[('v.mkv', 10.0)], img)
+        self.assertIn(('v.mkv', 10.0, PREVIEW_SIZE), gui._preview_cache_original)
+        self.assertIs(gui._preview_cache_original[('v.mkv', 10.0, PREVIEW_SIZE)], img)
 
     @patch('src.preview.extract_frames_batch')
     def test_batch_originals_bails_when_stale(self, mock_batch):
@@ -636,8 +659,9 @@ class TestPreviewPool(unittest.TestCase):
         gui._prewarm_batch_converted('v.mkv', [10.0], 'mobius', generation=1)
 
         # Cache key's 5th element is use_gpu -- False here (no gpu_accel_var, CPU-capable tonemapper).
-        self.assertIn(('v.mkv', 10.0, 'mobius', True, False), gui._preview_cache_converted)
-        self.assertIs(gui._preview_cache_converted[('v.mkv', 10.0, 'mobius', True, False)], img)
+        key = ('v.mkv', 10.0, 'mobius', True, False, PREVIEW_SIZE)
+        self.assertIn(key, gui._preview_cache_converted)
+        self.assertIs(gui._preview_cache_converted[key], img)
 
     @patch('src.preview.extract_frames_with_conversion_batch')
     def test_batch_converted_bails_when_stale(self, mock_batch):
@@ -696,53 +720,59 @@ class TestPreviewPool(unittest.TestCase):
 
 
 class TestGpuOnlyTonemapperPreviewDispatch(unittest.TestCase):
-    """BT.2390/Spline have no CPU/zscale equivalent -- preview must route
-    them through the real libplacebo/Vulkan path, never approximate via
-    zscale, so the CPU and GPU extraction functions must be dispatched on
-    based on the selected tonemapper."""
+    """BT.2390/Spline used to have no CPU equivalent, so preview sent them
+    to libplacebo/Vulkan unconditionally. They now run on the CPU as a fused
+    LUT (see fused_lut.py), so they follow the same GPU/CPU dispatch as
+    every other tonemapper: CPU unless GPU tonemapping is active."""
 
-    @patch('src.preview.extract_frame_with_gpu_conversion', return_value='gpu-converted')
-    @patch('src.preview.extract_frame_with_conversion')
-    @patch('src.preview.extract_frame', return_value='orig')
-    def test_single_frame_dispatches_to_gpu_path_for_bt2390(
-            self, _extract, mock_cpu_convert, mock_gpu_convert):
+    def test_single_frame_uses_cpu_path_for_bt2390_when_gpu_off(self):
         gui = _bare_gui()
         gui._preview_cache_original = {}
         gui._preview_cache_converted = {}
-        original, converted = gui._extract_preview_images('in.mp4', 5.0, 'bt.2390')
-        self.assertEqual(converted, 'gpu-converted')
-        mock_gpu_convert.assert_called_once()
-        mock_cpu_convert.assert_not_called()
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            original, converted = gui._extract_preview_images('in.mp4', 5.0, 'bt.2390')
+        self.assertEqual(converted, 'conv:bt.2390')
+        self.assertIs(mock_fan_out.call_args.kwargs['gpu'], False)
 
-    @patch('src.preview.extract_frame_with_gpu_conversion')
-    @patch('src.preview.extract_frame_with_conversion')
-    @patch('src.preview.extract_frame', return_value='orig')
-    def test_single_frame_still_uses_cpu_path_for_mobius(
-            self, _extract, mock_cpu_convert, mock_gpu_convert):
+    def test_single_frame_still_uses_cpu_path_for_mobius(self):
         gui = _bare_gui()
         gui._preview_cache_original = {}
         gui._preview_cache_converted = {}
-        gui._extract_preview_images('in.mp4', 5.0, 'mobius')
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            gui._extract_preview_images('in.mp4', 5.0, 'mobius')
+        self.assertIs(mock_fan_out.call_args.kwargs['gpu'], False)
+
+    @patch('src.preview.extract_frame_with_gpu_conversion')
+    @patch('src.preview.extract_frame_with_conversion', return_value='cpu-converted')
+    def test_converted_only_miss_uses_cpu_path_for_bt2390_when_gpu_off(
+            self, mock_cpu_convert, mock_gpu_convert):
+        gui = _bare_gui()
+        gui._preview_cache_original = {('in.mp4', 5.0, PREVIEW_SIZE): 'orig'}
+        gui._preview_cache_converted = {}
+        self.assertEqual(gui._extract_preview_images('in.mp4', 5.0, 'bt.2390'),
+                         ('orig', 'cpu-converted'))
         mock_cpu_convert.assert_called_once()
         mock_gpu_convert.assert_not_called()
 
-    @patch('src.preview.extract_frames_with_gpu_conversion_batch', return_value=['g0'])
-    @patch('src.preview.extract_frames_with_conversion_batch')
-    def test_batch_prewarm_dispatches_to_gpu_path_for_spline(
+    @patch('src.preview.extract_frames_with_gpu_conversion_batch')
+    @patch('src.preview.extract_frames_with_conversion_batch', return_value=['c0'])
+    def test_batch_prewarm_uses_cpu_path_for_spline_when_gpu_off(
             self, mock_cpu_batch, mock_gpu_batch):
         gui = _bare_gui()
         gui._preview_generation = 1
         gui._preview_cache_converted = {}
         gui._prewarm_batch_converted('v.mkv', [10.0], 'spline', generation=1)
-        mock_gpu_batch.assert_called_once()
-        mock_cpu_batch.assert_not_called()
-        # Cache key's 5th element is use_gpu -- True here since 'spline' is GPU-only.
-        self.assertIn(('v.mkv', 10.0, 'spline', True, True), gui._preview_cache_converted)
+        mock_cpu_batch.assert_called_once()
+        mock_gpu_batch.assert_not_called()
+        # Cache key's 5th element is use_gpu -- False with GPU tonemapping off.
+        self.assertIn(('v.mkv', 10.0, 'spline', True, False, PREVIEW_SIZE),
+                      gui._preview_cache_converted)
 
+    @patch('src.preview.vulkan_libplacebo_available', return_value=True)
     @patch('src.preview.extract_frames_with_gpu_conversion_batch', return_value=['g0'])
     @patch('src.preview.extract_frames_with_conversion_batch')
     def test_batch_prewarm_for_spline_honors_lut_enabled_false(
-            self, mock_cpu_batch, mock_gpu_batch):
+            self, mock_cpu_batch, mock_gpu_batch, _avail):
         """extract_frames_with_gpu_conversion_batch threads lut_enabled
         through to every extract_frame_with_gpu_conversion call, so a
         toggle-off prewarm genuinely produces toggle-off content and must be
@@ -750,13 +780,17 @@ class TestGpuOnlyTonemapperPreviewDispatch(unittest.TestCase):
         guard against (see test_gpu_only_prewarm_hits_cache_when_toggle_off_too
         in preview_test.py for the end-to-end behavior this now allows)."""
         gui = _bare_gui()
+        gui.gpu_accel_var = MagicMock()
+        gui.gpu_accel_var.get.return_value = True
         gui._preview_generation = 1
         gui._preview_cache_converted = {}
         gui._prewarm_batch_converted('v.mkv', [10.0], 'spline', generation=1, lut_enabled=False)
         mock_gpu_batch.assert_called_once_with('v.mkv', [10.0], 1.0, 'spline', 3840, 2160, lut_enabled=False)
         mock_cpu_batch.assert_not_called()
-        self.assertIn(('v.mkv', 10.0, 'spline', False, True), gui._preview_cache_converted)
-        self.assertNotIn(('v.mkv', 10.0, 'spline', True, True), gui._preview_cache_converted)
+        self.assertIn(('v.mkv', 10.0, 'spline', False, True, PREVIEW_SIZE),
+                      gui._preview_cache_converted)
+        self.assertNotIn(('v.mkv', 10.0, 'spline', True, True, PREVIEW_SIZE),
+                         gui._preview_cache_converted)
 
     @patch('src.preview.extract_frames_with_gpu_conversion_batch')
     @patch('src.preview.extract_frames_with_conversion_batch', return_value=['c0'])
@@ -771,7 +805,7 @@ class TestGpuOnlyTonemapperPreviewDispatch(unittest.TestCase):
 
 
 class TestPreviewWorkerThreadRender(unittest.TestCase):
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_render_updates_labels_and_caches(self, mock_photo):
         gui = _bare_gui()
         mock_img = MagicMock(spec=Image.Image)
@@ -851,6 +885,82 @@ class TestGuiInteractions(unittest.TestCase):
         mock_mb.showerror.assert_called_once()
         mock_mb.showwarning.assert_not_called()
 
+    def _detecting_gui(self, mock_cm):
+        """A bare GUI whose GPU detection is still running; returns it with
+        the pending future."""
+        gui = _bare_gui()
+        gui.root = MagicMock()
+        gui.gpu_status_label = MagicMock()
+        gui.convert_button = MagicMock()
+        gui.tooltip = None
+        gui._after_gpu_detection = []
+        detection = Future()
+        mock_cm.start_gpu_detection.return_value = detection
+        gui._detect_gpu_acceleration = MagicMock()
+        gui._apply_gpu_availability = MagicMock()
+        gui._start_gpu_detection()
+        return gui, detection
+
+    @patch('src.gui.conversion_manager')
+    def test_pending_gpu_detection_shows_detecting_until_answered(self, mock_cm):
+        """The window doesn't wait for detection: the badge reads
+        "detecting", and the answer is applied on the main thread once the
+        probes finish."""
+        gui, detection = self._detecting_gui(mock_cm)
+        gui.gpu_status_label.config.assert_called_once_with(text="… GPU", foreground='gray')
+        gui._detect_gpu_acceleration.assert_not_called()
+
+        detection.set_result(True)
+        gui.root.after.assert_called_once()
+        gui._detect_gpu_acceleration.assert_not_called()
+        gui.root.after.call_args.args[1]()
+        gui._detect_gpu_acceleration.assert_called_once()
+        gui._apply_gpu_availability.assert_called_once()
+
+    @patch('src.gui.conversion_manager')
+    def test_answered_gpu_detection_is_shown_at_once(self, mock_cm):
+        gui = _bare_gui()
+        gui.gpu_status_label = MagicMock()
+        gui._detect_gpu_acceleration = MagicMock()
+        detection = Future()
+        detection.set_result(True)
+        mock_cm.start_gpu_detection.return_value = detection
+
+        gui._start_gpu_detection()
+
+        gui._detect_gpu_acceleration.assert_called_once()
+        gui.gpu_status_label.config.assert_not_called()
+
+    @patch('src.gui.messagebox')
+    @patch('src.gui.conversion_manager')
+    def test_convert_during_gpu_detection_runs_once_answered(self, mock_cm, mock_mb):
+        """A conversion started while detection runs waits for its answer --
+        clicking twice still converts once -- instead of starting on the CPU."""
+        gui, detection = self._detecting_gui(mock_cm)
+        gui.input_path_var = MagicMock()
+        gui.input_path_var.get.return_value = ''
+        gui.convert_video()
+        gui.convert_video()
+        gui.input_path_var.get.assert_not_called()
+        # The click isn't lost without a trace: Convert says it is waiting.
+        gui.convert_button.config.assert_called_once_with(
+            state='disabled', text='Waiting for GPU…')
+
+        detection.set_result(True)
+        gui.root.after.call_args.args[1]()
+        gui.convert_button.config.assert_called_with(state='normal', text='Convert')
+        self.assertEqual(gui._after_gpu_detection, [])
+        # Converted now: with no input chosen, that is the usual warning, once.
+        mock_mb.showwarning.assert_called_once()
+
+    @patch('src.gui.conversion_manager')
+    def test_superseded_gpu_detection_is_ignored(self, mock_cm):
+        gui, detection = self._detecting_gui(mock_cm)
+        gui._gpu_detection = Future()
+        detection.set_result(False)
+        gui.root.after.call_args.args[1]()
+        gui._detect_gpu_acceleration.assert_not_called()
+
     @patch('src.gui.conversion_manager')
     def test_gpu_status_tooltip_available_shows_gpu_name(self, mock_cm):
         """The GPU name lookup must be lazy -- only on hover, not at bind
@@ -1317,65 +1427,138 @@ class TestBatchQueue(unittest.TestCase):
         gui.update_frame_preview.assert_called_once()
 
 
+def _fan_out(original='orig', converted='conv'):
+    """A stand-in for utils.extract_preview_frames: (original, [converted
+    per tonemapper]) for each position."""
+    def fake(video_path, positions, gamma, tonemappers, width, height,
+             lut_enabled=True, gpu=False):
+        return [(original, [f'{converted}:{tm}' for tm in tonemappers]) for _ in positions]
+    return MagicMock(side_effect=fake)
+
+
+def _hdr10_loaded(gui, video_path='in.mp4'):
+    """What _get_duration records for an HDR10 file, which makes
+    _preview_tonemappers render the zscale tonemappers alongside."""
+    gui._duration_path = video_path
+    gui._duration_source_kind = 'pq'
+    return gui
+
+
 class TestPreviewExtractionCache(unittest.TestCase):
     """Extracted frames are cached by (path, time, tonemapper) so
     revisiting a frame/tonemapper combo never re-runs ffmpeg."""
 
-    @patch('src.preview.extract_frame_with_conversion', return_value='conv')
-    @patch('src.preview.extract_frame', return_value='orig')
+    @patch('src.preview.extract_frame_with_conversion')
+    @patch('src.preview.extract_frame')
     def test_repeated_combo_is_a_cache_hit(self, mock_extract, mock_convert):
         gui = _bare_gui()
-        first = gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        second = gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        self.assertEqual(mock_extract.call_count, 1)   # original cached
-        self.assertEqual(mock_convert.call_count, 1)   # converted cached
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            first = gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
+            second = gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
+        self.assertEqual(mock_fan_out.call_count, 1)   # both frames cached
+        mock_extract.assert_not_called()
+        mock_convert.assert_not_called()
         self.assertEqual(first, second)
+        self.assertEqual(first, ('orig', 'conv:reinhard'))
 
-    @patch('src.preview.extract_frame_with_conversion', side_effect=['c0', 'c1'])
-    @patch('src.preview.extract_frame', return_value='orig')
-    def test_same_frame_new_tonemapper_reuses_original(self, mock_extract, mock_convert):
-        gui = _bare_gui()
-        gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        gui._extract_preview_images('in.mp4', 5.0, 'mobius')
-        self.assertEqual(mock_extract.call_count, 1)   # original shared across tonemappers
-        self.assertEqual(mock_convert.call_count, 2)   # converted differs per tonemapper
-
-    @patch('src.preview.extract_frame_with_conversion', side_effect=['a', 'b'])
-    @patch('src.preview.extract_frame', return_value='orig')
-    def test_different_tonemapper_is_a_cache_miss(self, mock_extract, mock_convert):
+    def test_both_frames_come_from_one_decode(self):
         gui = _bare_gui()
-        gui._extract_preview_images('in.mp4', 5.0, 'mobius')
-        gui._extract_preview_images('in.mp4', 5.0, 'hable')
-        self.assertEqual(mock_convert.call_count, 2)
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            gui._extract_preview_images('in.mp4', 5.0, 'mobius', box=(960, 640))
+        mock_fan_out.assert_called_once_with(
+            'in.mp4', [5.0], 1.0, ['mobius'], 960, 640, lut_enabled=True, gpu=False)
 
-    @patch('src.preview.extract_frame_with_conversion', return_value='c')
-    @patch('src.preview.extract_frame', return_value='o')
-    def test_new_frame_position_reextracts_original(self, mock_extract, mock_convert):
-        gui = _bare_gui()
-        gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        gui._extract_preview_images('in.mp4', 9.0, 'reinhard')
-        self.assertEqual(mock_extract.call_count, 2)
-
-    def test_reset_clears_the_cache(self):
+    @patch('src.preview.extract_frame_with_conversion', side_effect=['c1'])
+    @patch('src.preview.extract_frame')
+    def test_same_frame_new_tonemapper_reuses_original(self, mock_extract, mock_convert):
         gui = _bare_gui()
-        with patch('src.preview.extract_frame', return_value='o'), \
-             patch('src.preview.extract_frame_with_conversion', return_value='c'):
+        with patch('src.preview.extract_preview_frames', _fan_out()):
             gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        gui._reset_preview_cache()
-        with patch('src.preview.extract_frame', return_value='o2') as me, \
-             patch('src.preview.extract_frame_with_conversion', return_value='c2') as mc:
+        self.assertEqual(gui._extract_preview_images('in.mp4', 5.0, 'mobius'), ('orig', 'c1'))
+        mock_extract.assert_not_called()               # original shared across tonemappers
+        self.assertEqual(mock_convert.call_count, 1)   # converted differs per tonemapper
+
+    def test_hdr10_source_caches_every_zscale_tonemapper(self):
+        gui = _hdr10_loaded(_bare_gui())
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            gui._extract_preview_images('in.mp4', 5.0, 'mobius')
+        self.assertEqual(mock_fan_out.call_args[0][3], ['mobius', 'reinhard', 'hable'])
+        with patch('src.preview.extract_frame_with_conversion') as mock_convert:
+            self.assertEqual(gui._extract_preview_images('in.mp4', 5.0, 'hable'),
+                             ('orig', 'conv:hable'))
+        mock_convert.assert_not_called()               # the switch is a cache hit
+
+    def test_gpu_path_renders_only_the_selected_tonemapper(self):
+        gui = _hdr10_loaded(_bare_gui())
+        self.assertEqual(gui._preview_tonemappers('in.mp4', 'hable', use_gpu=True), ['hable'])
+
+    def test_new_frame_position_reextracts_both(self):
+        gui = _bare_gui()
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
             gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-            me.assert_called_once()   # re-extracted after reset
-            mc.assert_called_once()
+            gui._extract_preview_images('in.mp4', 9.0, 'reinhard')
+        self.assertEqual(mock_fan_out.call_count, 2)
+
+    def _source(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        path = os.path.join(tmp, 'in.mp4')
+        with open(path, 'wb') as f:
+            f.write(b'x')
+        return path
+
+    def _loaded(self, gui, path):
+        gui.input_path_var = MagicMock()
+        gui.input_path_var.get.return_value = path
+        return gui
 
-    def test_cache_is_bounded(self):
-        gui = _bare_gui()
-        with patch('src.preview.extract_frame', return_value='o'), \
-             patch('src.preview.extract_frame_with_conversion', return_value='c'):
-            for i in range(HDRConverterGUI._PREVIEW_CACHE_MAX + 20):
+    def test_reloading_a_file_keeps_its_frames(self):
+        """Switching between queued files must not throw their frames away."""
+        path = self._source()
+        gui = self._loaded(_bare_gui(), path)
+        with patch('src.preview.invalidate_probe_caches'):
+            gui._reset_preview_cache()
+            with patch('src.preview.extract_preview_frames', _fan_out()):
+                gui._extract_preview_images(path, 5.0, 'reinhard')
+            gui._reset_preview_cache()
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            gui._extract_preview_images(path, 5.0, 'reinhard')
+        mock_fan_out.assert_not_called()
+
+    def test_reloading_a_changed_file_drops_its_frames(self):
+        path = self._source()
+        gui = self._loaded(_bare_gui(), path)
+        gui._preview_cache_original = {('other.mp4', 5.0, PREVIEW_SIZE): 'kept'}
+        gui._preview_cache_converted = {}
+        with patch('src.preview.invalidate_probe_caches'):
+            gui._reset_preview_cache()
+            with patch('src.preview.extract_preview_frames', _fan_out()):
+                gui._extract_preview_images(path, 5.0, 'reinhard')
+            with open(path, 'wb') as f:
+                f.write(b'xy')
+            gui._reset_preview_cache()
+        with patch('src.preview.extract_preview_frames', _fan_out('o2', 'c2')) as mock_fan_out:
+            gui._extract_preview_images(path, 5.0, 'reinhard')
+        mock_fan_out.assert_called_once()   # re-extracted after the change
+        self.assertIn(('other.mp4', 5.0, PREVIEW_SIZE), gui._preview_cache_original)
+
+    def test_cache_is_bounded_by_decoded_bytes(self):
+        gui = _bare_gui()
+        gui._init_preview_cache()
+        frame = Image.new('RGB', (160, 90))
+        gui._preview_frames.budget = 10 * 160 * 90 * 4
+        fan_out = MagicMock(side_effect=lambda video_path, positions, gamma, tonemappers,
+                            *args, **kwargs: [(frame, [frame]) for _ in positions])
+        with patch('src.preview.extract_preview_frames', fan_out):
+            for i in range(20):
                 gui._extract_preview_images('in.mp4', float(i), 'reinhard')
-        self.assertLessEqual(len(gui._preview_cache_converted),
-                             HDRConverterGUI._PREVIEW_CACHE_MAX)
+        stats = gui._preview_frames.stats()
+        self.assertEqual(stats['entries'], 10)
+        self.assertLessEqual(stats['bytes'], stats['budget'])
+        self.assertEqual(stats['evictions'], 30)
+        # Originals and converted frames share the budget: the newest of both stay.
+        self.assertIn(('in.mp4', 19.0, PREVIEW_SIZE), gui._preview_cache_original)
+        self.assertNotIn(('in.mp4', 0.0, PREVIEW_SIZE), gui._preview_cache_original)
 
 
 class TestPreviewPerformance(unittest.TestCase):
@@ -1391,7 +1574,8 @@ class TestPreviewPerformance(unittest.TestCase):
         # separate from the on-demand one.
         for name in ('extract_frames_batch',
                      'extract_frames_with_conversion_batch',
-                     'extract_frames_with_gpu_conversion_batch'):
+                     'extract_frames_with_gpu_conversion_batch',
+                     'extract_preview_frames'):
             patcher = patch(f'src.preview.{name}', return_value=[])
             patcher.start()
             self.addCleanup(patcher.stop)
@@ -1431,21 +1615,17 @@ class TestPreviewPerformance(unittest.TestCase):
         gui.adjust_gamma = MagicMock(return_value=MagicMock())
         gui.converted_image_label = MagicMock()
 
-        with patch('src.preview.ImageTk.PhotoImage'):
+        with patch('PIL.ImageTk.PhotoImage'):
             gui._apply_gamma_to_preview()
 
         gui.adjust_gamma.assert_called_once_with(base, 1.5)
         gui.converted_image_label.config.assert_called_once()
 
-    @patch('src.preview.extract_frame_with_conversion', return_value='converted')
-    @patch('src.preview.extract_frame', return_value='original')
-    def test_extraction_targets_preview_resolution(self, mock_extract, mock_convert):
+    def test_extraction_targets_preview_resolution(self):
         gui = _bare_gui()
-        gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
-        self.assertEqual(mock_extract.call_args.kwargs.get('width'), PREVIEW_SIZE[0])
-        self.assertEqual(mock_extract.call_args.kwargs.get('height'), PREVIEW_SIZE[1])
-        self.assertEqual(mock_convert.call_args.kwargs.get('width'), PREVIEW_SIZE[0])
-        self.assertEqual(mock_convert.call_args.kwargs.get('height'), PREVIEW_SIZE[1])
+        with patch('src.preview.extract_preview_frames', _fan_out()) as mock_fan_out:
+            gui._extract_preview_images('in.mp4', 5.0, 'reinhard')
+        self.assertEqual(mock_fan_out.call_args[0][4:6], PREVIEW_SIZE)
 
     def test_duration_probed_once_per_file(self):
         gui = _bare_gui()
@@ -1619,10 +1799,9 @@ class TestConvertVideoBranches(unittest.TestCase):
             self, _isfile, _exists, mock_mb, mock_cm):
         gui = self._gui()
         gui.tonemap_var.get.return_value = 'BT.2390'
-        # A GPU-only tonemapper is only reachable with GPU accel on (the real
-        # UI forces it back to Mobius otherwise) -- _effective_lut_enabled now
-        # forces the LUT on whenever GPU accel is off, so this must be True to
-        # actually exercise the toggle-forwarding behavior under test.
+        # _effective_lut_enabled forces the LUT on whenever GPU accel is off,
+        # so this must be True to actually exercise the toggle-forwarding
+        # behavior under test.
         gui.gpu_accel_var.get.return_value = True
         gui.lut_export_var.get.return_value = False
         gui.drop_target_registered = False
@@ -1775,7 +1954,7 @@ class TestGuiErrorAndResizePaths(unittest.TestCase):
         gui.handle_file_drop(event)  # must not raise
         mock_mb.showerror.assert_called_once()
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_resize_images_rescales_present_frames(self, _mock_photo):
         gui = _bare_gui()
         img = MagicMock(spec=Image.Image)
@@ -1903,7 +2082,7 @@ class TestResponsivePreview(unittest.TestCase):
         self.assertEqual(h, 1000)  # height-bound: available height is the limiter
         self.assertEqual(w, round(1000 * src_size[0] / src_size[1]))
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_render_at_size_resizes_both_panes(self, _mock_photo):
         gui = _bare_gui()
         img = MagicMock(spec=Image.Image)
@@ -1964,6 +2143,54 @@ class TestResponsivePreview(unittest.TestCase):
         self.assertLessEqual(w, PREVIEW_SIZE[0])
         self.assertEqual(h, round(w * PREVIEW_SIZE[1] / PREVIEW_SIZE[0]))
 
+    def test_extract_box_rounds_up_and_only_grows(self):
+        gui = _bare_gui()
+        gui._window_auto_fitted = True
+        gui._preview_render_size = (700, 394)
+        self.assertEqual(gui._preview_extract_box(), (960, 640))
+        gui._preview_render_size = (300, 169)  # smaller window: cached frames serve it
+        self.assertEqual(gui._preview_extract_box(), (960, 640))
+        gui._preview_render_size = (1300, 731)
+        self.assertEqual(gui._preview_extract_box(), (1600, 960))
+        gui._preview_render_size = (9000, 5000)
+        self.assertEqual(gui._preview_extract_box(), PREVIEW_SIZE)
+
+    def test_source_size_is_the_frames_shape_at_the_full_box(self):
+        # A pane-sized frame must not cap how far the panes may grow.
+        gui = _bare_gui()
+        gui.original_image = Image.new('RGB', (640, 267))
+        w, h = gui._preview_source_size()
+        self.assertEqual(w, PREVIEW_SIZE[0])
+        self.assertAlmostEqual(w / h, 640 / 267, places=2)
+
+    def _rescale_gui(self, in_cache):
+        gui = _bare_gui()
+        gui.root = MagicMock()
+        gui.original_image = MagicMock()
+        gui.loading_frame = MagicMock()
+        gui.loading_frame.winfo_ismapped.return_value = False
+        gui._preview_target_size = MagicMock(return_value=(1200, 675))
+        gui._render_preview_at_size = MagicMock()
+        gui.input_path_var = MagicMock()
+        gui.input_path_var.get.return_value = 'in.mp4'
+        gui.display_image_var = MagicMock()
+        gui.display_image_var.get.return_value = True
+        gui._preview_in_cache = MagicMock(return_value=in_cache)
+        gui.display_frames = MagicMock()
+        gui._show_preview_loading = MagicMock()
+        return gui
+
+    def test_rescale_past_the_cached_box_reextracts_without_spinner(self):
+        gui = self._rescale_gui(in_cache=False)
+        gui._rescale_preview_to_window()
+        gui.display_frames.assert_called_once_with('in.mp4')
+        gui._show_preview_loading.assert_not_called()
+
+    def test_rescale_within_the_cached_box_does_not_reextract(self):
+        gui = self._rescale_gui(in_cache=True)
+        gui._rescale_preview_to_window()
+        gui.display_frames.assert_not_called()
+
     def test_target_size_falls_back_before_layout(self):
         gui = _bare_gui()
         gui.image_frame = MagicMock()
@@ -2552,7 +2779,7 @@ class TestPreviewLoadingIndicator(unittest.TestCase):
         gui._hide_preview_loading = MagicMock()
         gui._reveal_preview = MagicMock()
 
-        with patch('src.preview.ImageTk.PhotoImage'):
+        with patch('PIL.ImageTk.PhotoImage'):
             gui._render_preview_images(img, img, time_position=5.0)
 
         gui._hide_preview_loading.assert_called_once()
@@ -2664,52 +2891,137 @@ class TestBuildInfoText(unittest.TestCase):
 
 
 class TestUpdateInfoLabel(unittest.TestCase):
-    """_update_info_label reads metadata and updates the info strip."""
+    """_update_info_label probes metadata on a worker and updates the info
+    strip once the answer is published on the main thread."""
 
-    def test_shows_text_when_props_available(self):
+    @staticmethod
+    def _gui():
         gui = _bare_gui()
+        gui.root = MagicMock()
         gui.info_label = MagicMock()
-        props = {
-            'width': 1920, 'height': 1080, 'frame_rate': 24.0,
-            'codec_name': 'hevc', 'audio_codec': 'aac',
-            'color_primaries': 'bt2020', 'color_transfer': '',
-        }
-        with patch('src.gui.get_video_properties', return_value=props), \
+        return gui
+
+    @staticmethod
+    def _publish(gui):
+        """Wait for the probe, then run what it scheduled, as the Tk loop would."""
+        gui._input_probe.result(timeout=5)
+        for scheduled in gui.root.after.call_args_list:
+            scheduled.args[1]()
+        gui.root.after.reset_mock()
+
+    _PROPS = {
+        'width': 1920, 'height': 1080, 'frame_rate': 24.0,
+        'codec_name': 'hevc', 'audio_codec': 'aac',
+        'color_primaries': 'bt2020', 'color_transfer': '',
+    }
+
+    def test_shows_text_when_props_available(self):
+        gui = self._gui()
+        with patch('src.gui.get_video_properties', return_value=self._PROPS), \
              patch('src.gui.get_maxcll', return_value=400.0):
             gui._update_info_label('clip.mkv')
-        gui.info_label.config.assert_called_once()
-        gui.info_label.grid.assert_called_once()
+            self._publish(gui)
+        self.assertIn('1920', gui.info_label.config.call_args.kwargs['text'])
+        gui.info_label.grid.assert_called()
+        gui.info_label.grid_remove.assert_not_called()
 
     def test_hides_label_when_probe_fails(self):
-        gui = _bare_gui()
-        gui.info_label = MagicMock()
+        gui = self._gui()
         with patch('src.gui.get_video_properties', return_value=None):
             gui._update_info_label('bad.mkv')
+            self._publish(gui)
         gui.info_label.grid_remove.assert_called_once()
 
     def test_stores_source_bit_depth_for_later_auto_ten_bit_decision(self):
         """The probed bit depth is remembered so convert_video/start_batch can
         pick the output bit depth automatically without re-probing the file."""
-        gui = _bare_gui()
-        gui.info_label = MagicMock()
-        props = {
-            'width': 3840, 'height': 2160, 'frame_rate': 23.976,
-            'codec_name': 'hevc', 'audio_codec': 'truehd',
-            'color_primaries': 'bt2020', 'color_transfer': 'smpte2084',
-            'bit_depth': 12,
-        }
+        gui = self._gui()
+        props = dict(self._PROPS, width=3840, height=2160, bit_depth=12)
         with patch('src.gui.get_video_properties', return_value=props), \
              patch('src.gui.get_maxcll', return_value=400.0):
             gui._update_info_label('clip.mkv')
+            self._publish(gui)
         self.assertEqual(gui._source_bit_depth, 12)
 
     def test_source_bit_depth_defaults_to_8_when_probe_fails(self):
-        gui = _bare_gui()
-        gui.info_label = MagicMock()
+        gui = self._gui()
         with patch('src.gui.get_video_properties', return_value=None):
             gui._update_info_label('bad.mkv')
+            self._publish(gui)
         self.assertEqual(gui._source_bit_depth, 8)
 
+    def test_placeholder_shown_and_nothing_probed_on_the_calling_thread(self):
+        gui = self._gui()
+        release = threading.Event()
+        probed_on = []
+
+        def slow_probe(path):
+            probed_on.append(threading.current_thread())
+            release.wait(5)
+            return self._PROPS
+
+        with patch('src.gui.get_video_properties', side_effect=slow_probe), \
+             patch('src.gui.get_maxcll', return_value=None):
+            gui._update_info_label('clip.mkv')
+            gui.info_label.config.assert_called_once_with(
+                text=HDRConverterGUI._INFO_PLACEHOLDER)
+            gui.info_label.grid.assert_called_once()
+            self.assertIsNone(gui._cached_props)
+            release.set()
+            self._publish(gui)
+        self.assertNotIn(threading.current_thread(), probed_on)
+        self.assertEqual(gui._cached_props, self._PROPS)
+
+    def test_superseded_probe_is_dropped(self):
+        """A probe for a file that has since been replaced must not overwrite
+        the newer file's metadata, however late it lands."""
+        gui = self._gui()
+        release = threading.Event()
+        old_props = dict(self._PROPS, width=640)
+
+        def probe(path):
+            if path == 'old.mkv':
+                release.wait(5)
+                return old_props
+            return self._PROPS
+
+        with patch('src.gui.get_video_properties', side_effect=probe), \
+             patch('src.gui.get_maxcll', return_value=None):
+            gui._update_info_label('old.mkv')
+            old_probe = gui._input_probe
+            gui._update_info_label('new.mkv')
+            self._publish(gui)
+            release.set()
+            old_probe.result(timeout=5)
+            for scheduled in gui.root.after.call_args_list:
+                scheduled.args[1]()
+        self.assertEqual(gui._cached_props, self._PROPS)
+
+    def test_unload_drops_a_pending_probe(self):
+        gui = self._gui()
+        release = threading.Event()
+
+        def slow_probe(path):
+            release.wait(5)
+            return self._PROPS
+
+        with patch('src.gui.get_video_properties', side_effect=slow_probe), \
+             patch('src.gui.get_maxcll', return_value=None):
+            gui._update_info_label('clip.mkv')
+            probe = gui._input_probe
+            gui.input_path_var = MagicMock()
+            gui.output_path_var = MagicMock()
+            with patch.object(gui, '_reset_custom_seek'), \
+                 patch.object(gui, '_reset_preview_cache'), \
+                 patch.object(gui, 'update_frame_preview'):
+                gui._unload_input_file()
+            release.set()
+            probe.result(timeout=5)
+            for scheduled in gui.root.after.call_args_list:
+                scheduled.args[1]()
+        self.assertIsNone(gui._cached_props)
+        gui.info_label.grid_remove.assert_called_once()
+
 
 class TestHandleFileDropGuards(unittest.TestCase):
     """handle_file_drop early-exit conditions."""
@@ -2898,7 +3210,7 @@ class TestResizeImages(unittest.TestCase):
         gui.adjust_gamma = lambda img, g: img
         gui.original_image_label = MagicMock()
         gui.converted_image_label = MagicMock()
-        with patch('src.preview.ImageTk.PhotoImage'):
+        with patch('PIL.ImageTk.PhotoImage'):
             gui.resize_images(400, 300)
         gui.original_image_label.config.assert_called_once()
         gui.converted_image_label.config.assert_called_once()
@@ -2925,7 +3237,7 @@ class TestResizeImages(unittest.TestCase):
         gui.adjust_gamma = lambda img, g: img
         gui.original_image_label = MagicMock()
         gui.converted_image_label = MagicMock()
-        with patch('src.preview.ImageTk.PhotoImage'):
+        with patch('PIL.ImageTk.PhotoImage'):
             gui.resize_images(1600, 900)
         self.assertEqual(
             gui._converted_preview_base.size, (800, 450),
@@ -3021,10 +3333,24 @@ class TestFrameExtractionErrorPaths(unittest.TestCase):
                     call('nonexistent.mp4')
 
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
-    @patch('src.utils.run_ffmpeg_command', return_value=b'not-an-image')
-    def test_raises_runtime_error_on_bad_image_bytes(self, _run, _props):
+    @patch('src.utils.subprocess.Popen')
+    def test_raises_runtime_error_on_bad_image_bytes(self, mock_popen, _props):
+        for name, call in self._callers().items():
+            with self.subTest(function=name):
+                proc = mock_popen.return_value
+                proc.stdout, proc.stderr = io.BytesIO(b'not-an-image'), io.BytesIO(b'')
+                proc.returncode = 0
+                with self.assertRaises(RuntimeError):
+                    call('clip.mp4')
+
+    @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
+    @patch('src.utils.subprocess.Popen')
+    def test_raises_runtime_error_when_no_frame_comes_out(self, mock_popen, _props):
         for name, call in self._callers().items():
             with self.subTest(function=name):
+                proc = mock_popen.return_value
+                proc.stdout, proc.stderr = io.BytesIO(b''), io.BytesIO(b'')
+                proc.returncode = 0
                 with self.assertRaises(RuntimeError):
                     call('clip.mp4')
 
@@ -3332,7 +3658,10 @@ class TestApplyQualityMode(unittest.TestCase):
             gui.info_label = MagicMock()
             gui._update_bit_depth_choice = MagicMock()
             gui._refresh_info_label_text = MagicMock()
+            gui.root = MagicMock()
             gui._update_info_label('clip.mkv')
+            gui._input_probe.result(timeout=5)
+            gui.root.after.call_args.args[1]()  # publish, as the Tk loop would
         gui.quality_slider.configure.assert_called_once_with(from_=1000, to=40000)
 
     def test_update_info_label_seeds_fifty_percent_for_newly_loaded_file(self):
@@ -3347,7 +3676,10 @@ class TestApplyQualityMode(unittest.TestCase):
             gui.info_label = MagicMock()
             gui._update_bit_depth_choice = MagicMock()
             gui._refresh_info_label_text = MagicMock()
+            gui.root = MagicMock()
             gui._update_info_label('clip.mkv')
+            gui._input_probe.result(timeout=5)
+            gui.root.after.call_args.args[1]()  # publish, as the Tk loop would
         gui.bitrate_var.set.assert_any_call(20000)  # 50% of the new file's 40,000 kbps
 
 
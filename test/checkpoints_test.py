@@ -0,0 +1,90 @@
+"""Unit tests for src/checkpoints.py: the resume key, and the manifest's
+round trip through disk. Real files in a temp dir -- no ffmpeg."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import checkpoints  # noqa: E402
+from _temp_dir import TempDirTestCase  # noqa: E402
+
+_BOUNDS = [(0.0, 120.0), (120.0, 120.0), (240.0, None)]
+
+
+class TestRequestKey(TempDirTestCase):
+
+    def test_stable_for_the_same_settings_and_file(self):
+        src = self._file('in.mkv')
+        self.assertEqual(checkpoints.request_key({'a': 1, 'b': 2}, src),
+                         checkpoints.request_key({'b': 2, 'a': 1}, src))
+
+    def test_changes_with_settings_or_file_identity(self):
+        src = self._file('in.mkv')
+        key = checkpoints.request_key({'a': 1}, src)
+        self.assertNotEqual(key, checkpoints.request_key({'a': 2}, src))
+        with open(src, 'ab') as f:
+            f.write(b'grown')
+        self.assertNotEqual(key, checkpoints.request_key({'a': 1}, src))
+
+    def test_missing_input_has_no_key(self):
+        self.assertIsNone(checkpoints.request_key({}, os.path.join(self.tmp, 'gone')))
+
+    def test_checkpoint_dir_sits_beside_the_output(self):
+        path = checkpoints.checkpoint_dir(os.path.join(self.tmp, 'out.mp4'), 'ab' * 32)
+        self.assertEqual(os.path.dirname(path), self.tmp)
+        self.assertTrue(os.path.basename(path).startswith('.hdr2sdr-'))
+
+
+class TestManifest(TempDirTestCase):
+
+    def test_round_trip_keeps_bounds_and_completed_segments(self):
+        work = os.path.join(self.tmp, 'work')
+        manifest = checkpoints.new_manifest(work, 'k', _BOUNDS)
+        seg = self._file('work/segment_0001.mkv', b'abc')
+        manifest.mark_done(1, seg)
+
+        loaded = checkpoints.load_manifest(work, 'k')
+
+        self.assertEqual(loaded.bounds, _BOUNDS)
+        self.assertEqual(loaded.completed, {1: 3})
+        self.assertTrue(loaded.is_done(1, seg))
+        self.assertFalse(loaded.is_done(0, seg))
+
+    def test_segment_changed_since_it_finished_is_not_done(self):
+        manifest = checkpoints.new_manifest(self.tmp, 'k', _BOUNDS)
+        seg = self._file('segment_0000.mkv', b'abc')
+        manifest.mark_done(0, seg)
+        self._file('segment_0000.mkv', b'ab')
+        self.assertFalse(manifest.is_done(0, seg))
+        os.remove(seg)
+        self.assertFalse(manifest.is_done(0, seg))
+
+    def test_other_key_missing_or_corrupt_manifest_loads_as_none(self):
+        checkpoints.new_manifest(self.tmp, 'k', _BOUNDS)
+        self.assertIsNone(checkpoints.load_manifest(self.tmp, 'other'))
+        self.assertIsNone(checkpoints.load_manifest(os.path.join(self.tmp, 'no'), 'k'))
+        with open(os.path.join(self.tmp, checkpoints.MANIFEST_NAME), 'w') as f:
+            f.write('{"version": 1, "key": "k"')
+        self.assertIsNone(checkpoints.load_manifest(self.tmp, 'k'))
+
+    def test_mark_done_without_the_file_records_nothing(self):
+        manifest = checkpoints.new_manifest(self.tmp, 'k', _BOUNDS)
+        manifest.mark_done(0, os.path.join(self.tmp, 'never_written.mkv'))
+        self.assertEqual(manifest.completed, {})
+
+    def test_save_replaces_atomically(self):
+        manifest = checkpoints.new_manifest(self.tmp, 'k', _BOUNDS)
+        manifest.completed[2] = 7
+        manifest.save()
+        self.assertFalse(os.path.exists(manifest.path + '.tmp'))
+        with open(manifest.path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['completed'], {'2': 7})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import shutil
 import subprocess  # Added import
 import multiprocessing  # Added import
 import ctypes  # Added import for SW_HIDE
@@ -346,9 +347,10 @@ class TestConversionManager(unittest.TestCase):
 
             process = manager.start_ffmpeg_process(cmd)
             mock_popen.assert_called_once_with(
-                cmd,
+                ['ffmpeg', '-progress', 'pipe:1', '-nostats',
+                 '-i', 'input.mp4', 'output.mkv'],
                 stderr=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
                 universal_newlines=True,
                 startupinfo=None,
                 encoding='utf-8',  # Added encoding
@@ -373,9 +375,10 @@ class TestConversionManager(unittest.TestCase):
 
             manager.start_ffmpeg_process(cmd)
             mock_popen.assert_called_once_with(
-                cmd,
+                ['ffmpeg', '-progress', 'pipe:1', '-nostats',
+                 '-i', 'input.mp4', 'output.mkv'],
                 stderr=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
                 universal_newlines=True,
                 startupinfo=startupinfo_instance,
                 encoding='utf-8',
@@ -764,6 +767,113 @@ class TestDetectGpuEncoder(unittest.TestCase):
             mock_detect.assert_not_called()
 
 
+class TestBackgroundGpuDetection(unittest.TestCase):
+    """start_gpu_detection: the probes run concurrently off the caller's
+    thread, once, and everything else waits for that answer."""
+
+    def test_encoder_and_libplacebo_probes_run_concurrently(self):
+        """Each probe waits until the other has started: run one after the
+        other, this would time out instead of answering."""
+        m = ConversionManager()
+        started = threading.Barrier(2, timeout=5)
+
+        def detect():
+            started.wait()
+            return 'h264_amf'
+
+        def libplacebo():
+            started.wait()
+            return False
+
+        with patch.object(m, 'detect_gpu_encoder', side_effect=detect), \
+             patch('src.conversion.vulkan_libplacebo_available', side_effect=libplacebo):
+            self.assertTrue(m.start_gpu_detection().result(timeout=10))
+
+    def test_one_detection_until_reset(self):
+        m = ConversionManager()
+        with patch.object(m, 'detect_gpu_encoder', return_value=None) as mock_detect, \
+             patch('src.conversion.vulkan_libplacebo_available', return_value=False):
+            detection = m.start_gpu_detection()
+            self.assertIs(m.start_gpu_detection(), detection)
+            self.assertFalse(m.is_gpu_acceleration_available())
+            # "No hardware encoder" is an answer too, not a reason to probe again.
+            self.assertIsNone(m._resolve_gpu_encoder())
+            mock_detect.assert_called_once()
+            m.reset_gpu_detection()
+            self.assertIsNot(m.start_gpu_detection(), detection)
+            m.start_gpu_detection().result(timeout=10)
+            self.assertEqual(mock_detect.call_count, 2)
+
+    def test_conversion_waits_for_running_encoder_probe(self):
+        """A conversion resolving the encoder while detection's probe runs
+        gets that probe's answer rather than spawning its own."""
+        m = ConversionManager()
+        release = threading.Event()
+
+        def detect():
+            release.wait(5)
+            return 'h264_qsv'
+
+        with patch.object(m, 'detect_gpu_encoder', side_effect=detect) as mock_detect, \
+             patch('src.conversion.vulkan_libplacebo_available', return_value=False):
+            detection = m.start_gpu_detection()
+            resolved = []
+            waiter = threading.Thread(target=lambda: resolved.append(m._resolve_gpu_encoder()))
+            waiter.start()
+            release.set()
+            waiter.join(5)
+            detection.result(timeout=10)
+        self.assertEqual(resolved, ['h264_qsv'])
+        mock_detect.assert_called_once()
+
+    def test_cuda_interop_prewarmed_only_for_nvenc_with_libplacebo(self):
+        for encoder, libplacebo, prewarmed in (('h264_nvenc', True, True),
+                                               ('h264_nvenc', False, False),
+                                               ('h264_amf', True, False)):
+            with self.subTest(encoder=encoder, libplacebo=libplacebo):
+                m = ConversionManager()
+                done = threading.Event()
+                with patch.object(m, 'detect_gpu_encoder', return_value=encoder), \
+                     patch('src.conversion.vulkan_libplacebo_available',
+                           return_value=libplacebo), \
+                     patch('src.conversion.vulkan_cuda_interop_available',
+                           side_effect=lambda: done.set()) as mock_cuda:
+                    m.start_gpu_detection().result(timeout=10)
+                    done.wait(5 if prewarmed else 0.2)
+                self.assertEqual(mock_cuda.called, prewarmed)
+
+
+class TestStoredGpuDetection(unittest.TestCase):
+    """With the capability store open, the encoder listing and nvidia-smi
+    answer from it instead of spawning again."""
+
+    def setUp(self):
+        import src.conversion
+        store = MagicMock()
+        store.get.side_effect = {'encoders': 'h264_nvenc', 'nvidia': True}.get
+        # The utils module conversion.py imported it from, whichever name
+        # that module was loaded under.
+        patcher = patch.dict(src.conversion.stored_capability.__globals__,
+                             {'_CAPABILITY_STORE': store})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_detect_gpu_encoder_uses_stored_answers(self):
+        m = ConversionManager()
+        m._list_encoders = MagicMock()
+        m._nvidia_present = MagicMock()
+        self.assertEqual(m.detect_gpu_encoder(), 'h264_nvenc')
+        m._list_encoders.assert_not_called()
+        m._nvidia_present.assert_not_called()
+
+    def test_reset_gpu_detection_forgets_encoder_and_name(self):
+        m = ConversionManager()
+        m._gpu_encoder, m._gpu_name_cache = 'h264_nvenc', 'RTX'
+        m.reset_gpu_detection()
+        self.assertIsNone(m._gpu_encoder)
+        self.assertIsNone(m._gpu_name_cache)
+
+
 class TestGpuName(unittest.TestCase):
     """gpu_name() feeds the GPU status label's hover tooltip. The
     nvidia-smi/WMI probing itself is tested against platform_utils.gpu_name
@@ -1213,10 +1323,11 @@ class TestLibplaceboCommandConstruction(unittest.TestCase):
 
 
 class TestGpuOnlyTonemapperSafetyNet(unittest.TestCase):
-    """BT.2390/Spline have no CPU implementation. If per-item settings force
-    the CPU branch anyway (e.g. 12-bit output, which always forces CPU
-    regardless of the GPU toggle), construct_ffmpeg_command must raise a
-    clear error instead of building an invalid zscale filter string."""
+    """BT.2390/Spline have no zscale implementation; on the CPU branch (e.g.
+    12-bit output, which always forces CPU regardless of the GPU toggle)
+    they run as their fused LUT. Only if that LUT can't be created must
+    construct_ffmpeg_command raise a clear error instead of building an
+    invalid zscale filter string."""
 
     _PROPS = {
         "width": 1920, "height": 1080, "bit_rate": 4000000,
@@ -1224,7 +1335,18 @@ class TestGpuOnlyTonemapperSafetyNet(unittest.TestCase):
         "duration": 30.0, "subtitle_streams": [], "codec_name": "hevc",
     }
 
-    def test_raises_when_forced_cpu_with_gpu_only_tonemapper(self):
+    @patch('src.conversion.ConversionManager._resolve_fused_lut',
+           return_value='/cache/bt.cube')
+    def test_forced_cpu_runs_the_fused_lut(self, resolve):
+        m = ConversionManager()
+        cmd = ' '.join(m.construct_ffmpeg_command(
+            _req(use_gpu=True, tonemapper='BT.2390', bit_depth=12), self._PROPS, _view()))
+        resolve.assert_called_once_with('in.mp4', 'bt.2390', 'pq')
+        self.assertIn('lut3d=file=/cache/bt.cube', cmd)
+        self.assertNotIn('tonemap=', cmd)
+
+    @patch('src.conversion.ConversionManager._resolve_fused_lut', return_value=None)
+    def test_raises_when_forced_cpu_without_a_fused_lut(self, _resolve):
         m = ConversionManager()
         with self.assertRaises(ValueError) as ctx:
             m.construct_ffmpeg_command(
@@ -1412,6 +1534,7 @@ class TestMonitorProgressCancellationRace(unittest.TestCase):
         class RacyProcess:
             """Process whose .wait() mimics cancel_conversion clearing the reference."""
             stderr = iter([])  # empty → the for-loop exits immediately
+            stdout = None      # no -progress stream to read
             returncode = 0
 
             def wait(self) -> None:
@@ -2001,6 +2124,535 @@ class TestStartTakesARequestAndAView(unittest.TestCase):
         self.assertIs(manager._run.view, view)
 
 
+class TestJobScheduler(unittest.TestCase):
+    """submit() queues jobs and runs up to max_concurrent_jobs at once, each on
+    its own handle. _launch is replaced by a fake that just marks a job as
+    launched, so these tests are about admission and bookkeeping, not ffmpeg."""
+
+    def _manager(self, limit=2, encoder=None):
+        m = ConversionManager(max_concurrent_jobs=limit)
+        m._gpu_encoder = encoder
+        m.detect_gpu_encoder = MagicMock(return_value=encoder)
+        m.launched = []
+
+        def fake_launch(request, view, job):
+            job.process = MagicMock()
+            job.state = 'running'
+            m.launched.append(job)
+            return True
+        m._launch = fake_launch
+        return m
+
+    def test_default_limit_follows_the_cpu_budget(self):
+        from src.conversion import default_max_concurrent_jobs
+        with patch('src.conversion.cpu_budget.cpus', return_value=32):
+            self.assertEqual(default_max_concurrent_jobs(), 4)
+        with patch('src.conversion.cpu_budget.cpus', return_value=4):
+            self.assertEqual(default_max_concurrent_jobs(), 1)
+
+    def test_submit_runs_up_to_the_limit_then_queues(self):
+        m = self._manager(limit=2)
+        jobs = [m.submit(_req(input_path=f'{i}.mp4'), _view()) for i in range(3)]
+
+        self.assertEqual([j.state for j in jobs], ['running', 'running', 'pending'])
+
+        m._finish_job(jobs[0], 'done')
+
+        self.assertEqual(jobs[0].state, 'done')
+        self.assertEqual(jobs[2].state, 'running')
+        self.assertEqual(m.jobs(), [jobs[1], jobs[2]])
+
+    def test_raising_the_limit_admits_queued_jobs(self):
+        m = self._manager(limit=1)
+        jobs = [m.submit(_req(), _view()) for _ in range(3)]
+        m.set_max_concurrent_jobs(3)
+        self.assertTrue(all(j.state == 'running' for j in jobs))
+
+    def test_nvenc_session_cap_holds_gpu_jobs_but_not_cpu_jobs(self):
+        m = self._manager(limit=8, encoder='h264_nvenc')
+        gpu = [m.submit(_req(use_gpu=True), _view()) for _ in range(4)]
+        cpu = m.submit(_req(use_gpu=False), _view())
+
+        self.assertEqual([j.state for j in gpu],
+                         ['running', 'running', 'running', 'pending'])
+        # Submitted after the held-back GPU job, but not blocked by it.
+        self.assertEqual(cpu.state, 'running')
+
+        m._finish_job(gpu[0], 'done')
+        self.assertEqual(gpu[3].state, 'running')
+
+    def test_twelve_bit_gpu_request_does_not_count_against_the_cap(self):
+        m = self._manager(limit=8, encoder='h264_nvenc')
+        for _ in range(3):
+            m.submit(_req(use_gpu=True), _view())
+        twelve = m.submit(_req(use_gpu=True, bit_depth=12), _view())
+        self.assertEqual(twelve.state, 'running')
+
+    def test_cancel_pending_job_completes_it_and_leaves_others(self):
+        m = self._manager(limit=1)
+        outcomes = []
+        running = m.submit(_req(), _view())
+        queued = m.submit(_req(), _view(on_complete=lambda ok, why: outcomes.append((ok, why))))
+
+        m.cancel_job(queued)
+
+        self.assertEqual(queued.state, 'cancelled')
+        self.assertEqual(outcomes, [(False, 'Cancelled')])
+        self.assertEqual(m.jobs(), [running])
+        running.process.terminate.assert_not_called()
+
+    def test_cancel_running_job_terminates_only_its_process(self):
+        m = self._manager(limit=2)
+        a = m.submit(_req(), _view())
+        b = m.submit(_req(), _view())
+
+        m.cancel_job(a)
+
+        a.process.terminate.assert_called_once()
+        b.process.terminate.assert_not_called()
+        self.assertTrue(a.cancelled)
+        self.assertFalse(b.cancelled)
+
+    def test_cancel_conversion_cancels_every_scheduled_job(self):
+        m = self._manager(limit=1)
+        a = m.submit(_req(), _view())
+        b = m.submit(_req(), _view())
+
+        m.cancel_conversion()
+
+        a.process.terminate.assert_called_once()
+        self.assertEqual(b.state, 'cancelled')
+
+    def test_retry_job_requeues_a_finished_job(self):
+        m = self._manager(limit=1)
+        job = m.submit(_req(), _view())
+        m._finish_job(job, 'failed')
+
+        self.assertIs(m.retry_job(job), True)
+
+        self.assertEqual(job.state, 'running')
+        self.assertEqual(m.launched, [job, job])
+        # Still queued/running: a second retry is refused.
+        self.assertIs(m.retry_job(job), False)
+
+    def test_monitor_reads_the_jobs_own_process_and_frees_its_slot(self):
+        m = self._manager(limit=1)
+        job = m.submit(_req(), _view())
+        waiting = m.submit(_req(), _view())
+        proc = MagicMock()
+        proc.stderr = iter([])
+        proc.stdout = iter(['out_time_us=45000000\n', 'speed=3.0x\n',
+                            'progress=continue\n'])
+        proc.returncode = 0
+        job.process = proc
+        m.process = None  # the interactive slot is idle throughout
+        view = _view()
+
+        m.monitor_progress(job.run.request, view, 90.0, job=job)
+
+        self.assertEqual(job.progress, 50.0)
+        self.assertEqual(job.stats.eta(90.0), 15.0)
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(waiting.state, 'running')
+        self.assertEqual(view.notices[0].title, 'Success')
+
+    def test_gpu_retry_relaunches_the_scheduled_job_in_place(self):
+        m = self._manager(limit=1)
+        job = m.submit(_req(use_gpu=True, tonemapper='hable'), _view())
+        proc = MagicMock()
+        proc.stderr = iter(['cuda failure'])
+        proc.returncode = 1
+        job.process = proc
+        m.start = MagicMock()
+
+        m.monitor_progress(job.run.request, job.run.view, 90.0, job=job)
+
+        m.start.assert_not_called()
+        self.assertEqual(m.launched, [job, job])
+        self.assertEqual(job.state, 'running')
+        self.assertEqual(m.jobs(), [job])
+
+
+class TestSplitEncode(unittest.TestCase):
+    """split_encode cuts one long file at keyframes, encodes the segments in
+    parallel, then stitches them with a stream-copy mux."""
+
+    _LONG = dict(_PROPS, duration=3600.0, codec_name='h264')
+
+    def _plan(self, request, props=None, keyframes=None, workers=4):
+        m = ConversionManager()
+        with patch('src.conversion.default_segment_workers', return_value=workers), \
+                patch('src.conversion.probe_keyframes_near',
+                      return_value=keyframes if keyframes is not None
+                      else [0.0, 450.0, 900.0, 1350.0, 1800.0, 2250.0, 2700.0, 3150.0]) as probe:
+            return m._segment_plan(request, props or self._LONG), probe
+
+    def test_opt_in_cpu_request_is_split_two_segments_per_worker(self):
+        plan, probe = self._plan(_req(split_encode=True))
+        self.assertEqual(plan.workers, 4)
+        self.assertEqual(len(plan.bounds), 8)
+        self.assertEqual(plan.bounds[-1], (3150.0, None))
+        self.assertIsNone(plan.manifest)
+        # The first target is 0, to find where the video itself starts.
+        self.assertEqual(probe.call_args.args[1][0], 0.0)
+
+    @patch('src.conversion.get_video_properties')
+    def test_scheduled_split_encode_shares_the_budget_with_other_jobs(self, mock_props):
+        """Each of a scheduled split encode's workers gets its share of the
+        job's share, not of the whole machine."""
+        import tempfile
+        from src.conversion import ConversionJob, SegmentPlan
+        mock_props.return_value = self._LONG
+        m = ConversionManager(max_concurrent_jobs=2)
+        m.verify_paths = MagicMock(return_value=True)
+        m._segment_plan = MagicMock(return_value=SegmentPlan([(0.0, None)], 4, None))
+        m._make_work_dir = MagicMock(return_value=tempfile.mkdtemp())
+        m.construct_segmented_commands = MagicMock(side_effect=RuntimeError('built'))
+        with patch('src.conversion.cpu_budget.cpus', return_value=16), \
+                patch('src.conversion.cpu_budget.os.cpu_count', return_value=16), \
+                self.assertRaises(RuntimeError):
+            m._launch(_req(split_encode=True), _view(), ConversionJob())
+        self.assertEqual(m.construct_segmented_commands.call_args.kwargs['threads'], 2)
+
+    def test_not_split_unless_asked(self):
+        plan, probe = self._plan(_req())
+        self.assertIsNone(plan)
+        probe.assert_not_called()
+
+    def test_gpu_encode_is_not_split_but_twelve_bit_is(self):
+        self.assertIsNone(self._plan(_req(split_encode=True, use_gpu=True))[0])
+        self.assertIsNotNone(
+            self._plan(_req(split_encode=True, use_gpu=True, bit_depth=12))[0])
+
+    def test_copyable_sdr_source_is_not_split(self):
+        """A stream copy is a remux -- there is no encode to parallelize."""
+        sdr = dict(self._LONG, color_transfer='bt709', color_primaries='bt709')
+        plan, probe = self._plan(_req(split_encode=True, output_path='out.mp4'), sdr)
+        self.assertIsNone(plan)
+        probe.assert_not_called()
+
+    def test_short_file_or_single_worker_is_not_split(self):
+        self.assertIsNone(
+            self._plan(_req(split_encode=True), dict(self._LONG, duration=60.0))[0])
+        self.assertIsNone(self._plan(_req(split_encode=True), workers=1)[0])
+
+    def test_no_keyframes_found_falls_back_to_one_encode(self):
+        self.assertIsNone(self._plan(_req(split_encode=True), keyframes=[])[0])
+
+    def _commands(self, work_dir, n=3):
+        from src.ffmpeg_command import SegmentedCommands
+        return SegmentedCommands(
+            segment_cmds=[['seg', str(i)] for i in range(n)],
+            segment_paths=[f'seg{i}.mkv' for i in range(n)],
+            concat_list_path=os.path.join(work_dir, 'segments.txt'),
+            concat_list="file 'seg0.mkv'\n",
+            concat_cmd=['mux'])
+
+    def _proc(self, lines, returncode=0, progress=()):
+        proc = MagicMock()
+        proc.stderr = iter(lines)
+        proc.stdout = iter(progress)
+        proc.returncode = returncode
+        proc.poll.return_value = returncode
+        return proc
+
+    def _run(self, procs_by_cmd, work_dir=None, manifest=None, request=None):
+        import tempfile
+        from src.conversion import (ConversionJob, ConversionRun, SegmentPlan,
+                                    _ProcessGroup)
+        work_dir = work_dir or tempfile.mkdtemp()
+        request = request or _req()
+        m = ConversionManager()
+        started = []
+
+        def fake_start(cmd):
+            started.append(cmd[0] + cmd[1] if len(cmd) > 1 else cmd[0])
+            return procs_by_cmd(cmd)
+        m.start_ffmpeg_process = fake_start
+        outcomes = []
+        view = _view(on_complete=lambda ok, why: outcomes.append((ok, why)))
+        job = ConversionJob(run=ConversionRun(request=request, view=view),
+                            process=_ProcessGroup())
+        plan = SegmentPlan([(0.0, 10.0), (10.0, 10.0), (20.0, None)], 2, manifest)
+        m._run_segmented(job, request, view, 30.0, self._commands(work_dir),
+                         work_dir, plan)
+        self.manager = m
+        return job, view, outcomes, started, work_dir
+
+    def test_segments_then_mux_with_aggregated_progress(self):
+        def procs(cmd):
+            if cmd[0] == 'mux':
+                return self._proc(['muxing'])
+            return self._proc([], progress=['out_time_us=10000000\n',
+                                            'progress=end\n'])
+
+        job, view, outcomes, started, work_dir = self._run(procs)
+
+        self.assertEqual(sorted(started), ['mux', 'seg0', 'seg1', 'seg2'])
+        self.assertEqual(started[-1], 'mux')
+        self.assertEqual(outcomes, [(True, None)])
+        # 3 x 10 s of a 30 s file, held below 100 until the mux finishes.
+        self.assertEqual(max(view.progress), 99.0)
+        self.assertEqual(job.process.returncode, 0)
+        self.assertFalse(os.path.exists(work_dir))
+
+    def test_failed_segment_skips_the_mux_and_reports_its_stderr(self):
+        def procs(cmd):
+            if cmd[0] == 'seg' and cmd[1] == '1':
+                return self._proc(['Error while encoding'], returncode=1)
+            return self._proc([])
+
+        job, view, outcomes, started, work_dir = self._run(procs)
+
+        self.assertNotIn('mux', started)
+        self.assertEqual(outcomes, [(False, 'Error while encoding')])
+        self.assertFalse(os.path.exists(work_dir))
+
+    def test_process_group_terminates_late_joiners_after_cancel(self):
+        from src.conversion import _ProcessGroup
+        group = _ProcessGroup()
+        running = MagicMock()
+        running.poll.return_value = None
+        group.add(running)
+        group.terminate()
+        late = MagicMock()
+        group.add(late)
+        running.terminate.assert_called_once()
+        late.terminate.assert_called_once()
+        self.assertIsNone(group.poll())
+
+
+class TestResumableEncode(unittest.TestCase):
+    """resumable records finished segments in a manifest beside the output, and
+    a re-run of the same request encodes only the ones still missing."""
+
+    _LONG = TestSplitEncode._LONG
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.input = os.path.join(self.tmp, 'in.mkv')
+        with open(self.input, 'wb') as f:
+            f.write(b'source')
+
+    def _req(self, **overrides):
+        return _req(input_path=self.input,
+                    output_path=os.path.join(self.tmp, 'out.mp4'),
+                    resumable=True, **overrides)
+
+    def _plan(self, request, keyframes=(0.0, 1200.0, 2400.0)):
+        with patch('src.conversion.probe_keyframes_near',
+                   return_value=list(keyframes)) as probe:
+            return ConversionManager()._segment_plan(request, self._LONG), probe
+
+    def test_checkpoint_interval_segments_one_at_a_time(self):
+        plan, probe = self._plan(self._req())
+        # 3600 s at one segment per _CHECKPOINT_INTERVAL (120 s) = 30 targets.
+        self.assertEqual(len(probe.call_args.args[1]), 30)
+        self.assertEqual(plan.workers, 1)
+        self.assertEqual(len(plan.bounds), 3)
+        self.assertTrue(os.path.isfile(plan.manifest.path))
+        self.assertEqual(os.path.dirname(plan.manifest.work_dir), self.tmp)
+
+    def test_gpu_encode_is_resumable(self):
+        plan, _ = self._plan(self._req(use_gpu=True))
+        self.assertIsNotNone(plan)
+        self.assertEqual(plan.workers, 1)
+
+    def test_same_request_reuses_the_manifest_without_probing(self):
+        first, _ = self._plan(self._req())
+        first.manifest.completed[0] = 1
+        first.manifest.save()
+
+        again, probe = self._plan(self._req(open_after_conversion=True,
+                                            split_encode=True))
+
+        probe.assert_not_called()
+        self.assertEqual(again.manifest.work_dir, first.manifest.work_dir)
+        self.assertEqual(again.bounds, first.bounds)
+        self.assertEqual(again.manifest.completed, {0: 1})
+
+    def test_changed_settings_or_source_start_a_fresh_checkpoint(self):
+        first, _ = self._plan(self._req())
+        changed, probe = self._plan(self._req(tonemapper='hable'))
+        probe.assert_called_once()
+        self.assertNotEqual(changed.manifest.work_dir, first.manifest.work_dir)
+
+        with open(self.input, 'ab') as f:
+            f.write(b'more')
+        touched, probe = self._plan(self._req())
+        probe.assert_called_once()
+        self.assertNotEqual(touched.manifest.work_dir, first.manifest.work_dir)
+
+    def _manifest(self, work_dir, done=()):
+        from src import checkpoints
+        manifest = checkpoints.new_manifest(
+            work_dir, 'k', [(0.0, 10.0), (10.0, 10.0), (20.0, None)])
+        for index in done:
+            path = os.path.join(work_dir, f'seg{index}.mkv')
+            with open(path, 'wb') as f:
+                f.write(b'x' * (index + 1))
+            manifest.mark_done(index, path)
+        return manifest
+
+    def _commands(self, work_dir):
+        from src.ffmpeg_command import SegmentedCommands
+        return SegmentedCommands(
+            segment_cmds=[['seg', str(i)] for i in range(3)],
+            segment_paths=[os.path.join(work_dir, f'seg{i}.mkv') for i in range(3)],
+            concat_list_path=os.path.join(work_dir, 'segments.txt'),
+            concat_list='', concat_cmd=['mux'])
+
+    def _run(self, manifest, procs_by_cmd, request=None):
+        # TestSplitEncode._run, pointed at this manifest's work dir.
+        helper = TestSplitEncode()
+        helper._commands = self._commands
+        result = helper._run(procs_by_cmd, work_dir=manifest.work_dir,
+                             manifest=manifest, request=request)
+        return result + (helper.manager,)
+
+    def test_only_missing_segments_are_encoded(self):
+        work_dir = os.path.join(self.tmp, 'work')
+        manifest = self._manifest(work_dir, done=(0, 2))
+
+        def procs(cmd):
+            if cmd[0] == 'seg':
+                with open(os.path.join(work_dir, f'seg{cmd[1]}.mkv'), 'wb') as f:
+                    f.write(b'data')
+            return TestSplitEncode()._proc([])
+
+        _, view, outcomes, started, _, _ = self._run(manifest, procs)
+
+        self.assertEqual(started, ['seg1', 'mux'])
+        self.assertEqual(outcomes, [(True, None)])
+        # The two checkpointed segments count from the start: 20 of 30 s.
+        self.assertAlmostEqual(view.progress[0], 200 / 3)
+        self.assertFalse(os.path.exists(work_dir))
+
+    def test_failure_keeps_the_checkpoint_and_records_finished_segments(self):
+        from src import checkpoints
+        work_dir = os.path.join(self.tmp, 'work')
+        manifest = self._manifest(work_dir)
+
+        def procs(cmd):
+            if cmd[0] == 'seg':
+                with open(os.path.join(work_dir, f'seg{cmd[1]}.mkv'), 'wb') as f:
+                    f.write(b'data')
+            return TestSplitEncode()._proc(
+                ['Error while encoding'] if cmd[1:] == ['2'] else [],
+                returncode=1 if cmd[1:] == ['2'] else 0)
+
+        # Two workers: segment 2 only starts once 0 or 1 has finished.
+        _, _, outcomes, _, _, _ = self._run(manifest, procs)
+
+        self.assertEqual(outcomes, [(False, 'Error while encoding')])
+        reloaded = checkpoints.load_manifest(work_dir, 'k')
+        self.assertIn(0, reloaded.completed)
+        self.assertNotIn(2, reloaded.completed)
+
+    def test_gpu_segment_failure_schedules_a_cpu_retry(self):
+        work_dir = os.path.join(self.tmp, 'work')
+        manifest = self._manifest(work_dir, done=(0, 1))
+
+        def procs(cmd):
+            return TestSplitEncode()._proc(['cuda failure'], returncode=1)
+
+        with patch.object(ConversionManager, '_retry_with_cpu') as retry:
+            job, _, outcomes, _, _, _ = self._run(
+                manifest, procs, request=self._req(use_gpu=True))
+
+        self.assertEqual(outcomes, [])
+        retry.assert_called_once_with(job.run.request, job.run.view, job)
+        self.assertTrue(os.path.isdir(work_dir))
+
+
+class TestFanOutRequests(unittest.TestCase):
+    """merge_fan_out groups a batch by source and tonemap; the launch guards
+    check every fan-out output the way they check the main one."""
+
+    def test_same_source_and_tonemap_merge_into_one_run(self):
+        from src.conversion import merge_fan_out
+        requests = [_req(output_path='a.mkv'),
+                    _req(input_path='other.mp4', output_path='x.mkv'),
+                    _req(output_path='b.mp4', bit_depth=10, quality=28),
+                    _req(output_path='c.mkv', tonemapper='hable')]
+
+        runs = merge_fan_out(requests)
+
+        self.assertEqual([members for _, members in runs], [[0, 2], [1], [3]])
+        merged = runs[0][0]
+        self.assertEqual(merged.output_path, 'a.mkv')
+        self.assertEqual(len(merged.extra_outputs), 1)
+        spec = merged.extra_outputs[0]
+        self.assertEqual((spec.output_path, spec.bit_depth, spec.quality),
+                         ('b.mp4', 10, 28))
+
+    def test_a_merged_output_keeps_its_own_size(self):
+        from src.conversion import merge_fan_out
+        runs = merge_fan_out([_req(output_path='a.mkv'),
+                              _req(output_path='b.mp4', output_height=720)])
+        merged = runs[0][0]
+        self.assertIsNone(merged.output_height)
+        self.assertEqual(merged.extra_outputs[0].height, 720)
+
+    def test_cropped_and_uncropped_outputs_are_separate_runs(self):
+        from src.conversion import merge_fan_out
+        runs = merge_fan_out([_req(output_path='a.mkv'),
+                              _req(output_path='b.mp4', auto_crop=True)])
+        self.assertEqual([members for _, members in runs], [[0], [1]])
+
+    def test_segmented_requests_are_never_merged(self):
+        from src.conversion import merge_fan_out
+        runs = merge_fan_out([_req(output_path='a.mkv'),
+                              _req(output_path='b.mkv', split_encode=True)])
+        self.assertEqual([members for _, members in runs], [[0], [1]])
+        self.assertEqual(runs[1][0].extra_outputs, ())
+
+    def test_fan_out_is_never_segmented(self):
+        from src.conversion import OutputSpec
+        request = _req(split_encode=True, extra_outputs=(OutputSpec('b.mkv'),))
+        self.assertIsNone(ConversionManager()._segment_plan(
+            request, dict(_PROPS, duration=3600.0)))
+
+    def _reasons(self, *extras, **overrides):
+        outcomes = []
+        view = _view(on_complete=lambda ok, why: outcomes.append(why))
+        m = ConversionManager()
+        with patch('src.conversion.get_video_properties') as props:
+            started = m.start(_req(extra_outputs=tuple(extras), **overrides), view)
+        self.assertFalse(started)
+        props.assert_not_called()
+        return outcomes
+
+    def test_guards_cover_every_extra_output(self):
+        from src.conversion import OutputSpec
+        self.assertEqual(self._reasons(OutputSpec('in.mp4')),
+                         ["Input and output file cannot be the same."])
+        self.assertIn('share the path', self._reasons(OutputSpec('out.mkv'))[0])
+        self.assertIn('legacy .m4v',
+                      self._reasons(OutputSpec('b.m4v', bit_depth=10))[0])
+
+
+class TestFusedLutResolver(unittest.TestCase):
+    """The manager bakes a fused LUT for the source's own signal peak, and an
+    unwritable LUT cache falls back to the normal chain."""
+
+    @patch('src.conversion.get_max_luminance', return_value=4000.0)
+    @patch('src.conversion.get_maxcll', return_value=None)
+    def test_lut_is_baked_for_the_sources_peak(self, _maxcll, _mastering):
+        with patch('src.conversion.fused_lut.lut_path',
+                   return_value='C:\\cache\\x.cube') as lut_path:
+            path = ConversionManager._resolve_fused_lut('in.mkv', 'hable')
+        lut_path.assert_called_once_with('hable', 40.0, 'pq')
+        self.assertEqual(path, 'C\\\\:/cache/x.cube')
+
+    @patch('src.conversion.get_max_luminance', return_value=None)
+    @patch('src.conversion.get_maxcll', return_value=None)
+    def test_unwritable_cache_falls_back_to_the_filter_chain(self, *_):
+        with patch('src.conversion.fused_lut.lut_path', side_effect=OSError('read-only')):
+            self.assertIsNone(ConversionManager._resolve_fused_lut('in.mkv', 'hable'))
+
 
 if __name__ == '__main__':
     unittest.main()
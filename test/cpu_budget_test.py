@@ -0,0 +1,125 @@
+"""Unit tests for src/cpu_budget.py: the CPU count a process may use, from
+the host count, its affinity mask and its cgroup quota. Cgroup trees are
+built in a temp dir -- nothing is read from this machine's /sys."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import cpu_budget  # noqa: E402
+
+
+class _CgroupTree(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.proc_cgroup = os.path.join(self.root, 'self-cgroup')
+
+    def _membership(self, *lines):
+        with open(self.proc_cgroup, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def _file(self, relative, text):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    def _limit(self):
+        return cpu_budget._cgroup_cpu_limit(self.root, self.proc_cgroup)
+
+
+class TestCgroupV2(_CgroupTree):
+
+    def test_quota_in_cpus(self):
+        self._membership('0::/')
+        self._file('cpu.max', '150000 100000')
+        self.assertEqual(self._limit(), 1.5)
+
+    def test_unlimited(self):
+        self._membership('0::/')
+        self._file('cpu.max', 'max 100000')
+        self.assertIsNone(self._limit())
+
+    def test_tightest_ancestor_wins(self):
+        self._membership('0::/app/worker')
+        self._file('app/cpu.max', '200000 100000')
+        self._file('app/worker/cpu.max', '400000 100000')
+        self.assertEqual(self._limit(), 2.0)
+
+    def test_host_path_without_a_namespace_falls_back_to_the_mount(self):
+        self._membership('0::/docker/abc123')
+        self._file('cpu.max', '300000 100000')
+        self.assertEqual(self._limit(), 3.0)
+
+
+class TestCgroupV1(_CgroupTree):
+
+    def test_quota_over_period(self):
+        self._membership('4:cpu,cpuacct:/', '0::/')
+        self._file('cpu,cpuacct/cpu.cfs_quota_us', '250000')
+        self._file('cpu,cpuacct/cpu.cfs_period_us', '100000')
+        self.assertEqual(self._limit(), 2.5)
+
+    def test_minus_one_is_unlimited(self):
+        self._membership('1:cpu:/')
+        self._file('cpu/cpu.cfs_quota_us', '-1')
+        self._file('cpu/cpu.cfs_period_us', '100000')
+        self.assertIsNone(self._limit())
+
+
+class TestNoCgroups(_CgroupTree):
+
+    def test_missing_or_garbled_files_mean_no_limit(self):
+        self.assertIsNone(self._limit())  # no /proc/self/cgroup at all
+        self._membership('garbage', '0::/')
+        self._file('cpu.max', 'nonsense')
+        self.assertIsNone(self._limit())
+
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(cpu_budget, '_cpus', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _measure(self, host, affinity, quota):
+        with patch('cpu_budget.os.cpu_count', return_value=host), \
+                patch('cpu_budget._affinity_cpus', return_value=affinity), \
+                patch('cpu_budget._cgroup_cpu_limit', return_value=quota):
+            return cpu_budget.cpus()
+
+    def test_smallest_limit_wins_and_quota_rounds_up(self):
+        self.assertEqual(self._measure(64, 64, None), 64)
+        cpu_budget._cpus = None
+        self.assertEqual(self._measure(64, 16, None), 16)
+        cpu_budget._cpus = None
+        self.assertEqual(self._measure(64, 16, 2.5), 3)
+        cpu_budget._cpus = None
+        self.assertEqual(self._measure(None, None, 0.2), 1)
+
+    def test_measured_once(self):
+        self.assertEqual(self._measure(8, None, None), 8)
+        self.assertEqual(self._measure(64, None, None), 8)
+
+    def test_threads_per_job_only_when_the_default_would_oversubscribe(self):
+        with patch('cpu_budget.cpus', return_value=16), \
+                patch('cpu_budget.os.cpu_count', return_value=16):
+            self.assertIsNone(cpu_budget.threads_per_job())
+            self.assertEqual(cpu_budget.threads_per_job(4), 4)
+        with patch('cpu_budget.cpus', return_value=4), \
+                patch('cpu_budget.os.cpu_count', return_value=64):
+            self.assertEqual(cpu_budget.threads_per_job(), 4)
+            self.assertEqual(cpu_budget.threads_per_job(8), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,6 +38,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 from src.conversion import ConversionManager, ConversionRequest  # noqa: E402
 from src.utils import (FFMPEG_CONVERT_FILTER, FFMPEG_EXECUTABLE,  # noqa: E402
                        get_lut_filter_path, build_libplacebo_filter)
+from src.fused_lut import FUSED_FILTER  # noqa: E402
 from _recording_view import RecordingConversionView  # noqa: E402
 
 
@@ -87,6 +88,11 @@ class Case:
     interop: bool = True
     gpu_encoder: str | None = None
     gpu_probe_forbidden: bool = False
+    # What ConversionManager._resolve_fused_lut returns -- None is a LUT
+    # that couldn't be created.
+    fused_lut_path: str | None = None
+    # What utils.detect_crop finds in the source: (w, h, x, y), or None.
+    crop: tuple | None = None
 
 
 CASES = [
@@ -1536,9 +1542,61 @@ CASES = [
         props_kwargs={'is_dolby_vision': True, 'dovi_profile': 5},
         libplacebo=False,
         expect_notices=1,
-        expect_raises="bt.2390 requires GPU tonemapping; this item's settings force CPU processing — change the tonemapper or output bit depth.",
+        expect_raises="bt.2390 requires GPU tonemapping or its CPU lookup table, and the lookup table could not be created — check that the cache folder is writable, or change the tonemapper.",
         expect=None,
     ),
+    Case(
+        name='dovi_profile5_lut_only_tonemapper_runs_fused_lut',
+        request_kwargs={'tonemapper': 'bt.2390'},
+        props_kwargs={'is_dolby_vision': True, 'dovi_profile': 5},
+        libplacebo=False,
+        fused_lut_path='/cache/bt.cube',
+        expect_notices=1,
+        expect_raises=None,
+        expect=[
+            FFMPEG_EXECUTABLE,
+            '-loglevel',
+            'info',
+            '-i',
+            'in.mp4',
+            '-filter_complex',
+            _FC(FUSED_FILTER.format(lut_path='/cache/bt.cube')),
+            '-map',
+            '[vout]',
+            '-map',
+            '0:a:0?',
+            '-map',
+            '0:s?',
+            '-c:v',
+            'libx264',
+            '-preset',
+            'veryfast',
+            '-tune',
+            'film',
+            '-crf',
+            '23',
+            '-r',
+            '30.0',
+            '-pix_fmt',
+            'yuv420p',
+            '-strict',
+            '-2',
+            '-c:a',
+            'aac',
+            '-ac',
+            '2',
+            '-b:a',
+            '192k',
+            '-c:s',
+            'copy',
+            '-map_metadata',
+            '0',
+            '-movflags',
+            '+faststart',
+            'out.mkv',
+            '-y',
+        ],
+    ),
     Case(
         name='cuda_interop_fully_gpu_fast_path',
         request_kwargs={'use_gpu': True, 'lut_enabled': False},
@@ -1660,6 +1718,101 @@ CASES = [
             '-y',
         ],
     ),
+    Case(
+        name='cpu_output_height_resizes_before_tonemap',
+        request_kwargs={'output_height': 720},
+        props_kwargs={},
+        expect_notices=0,
+        expect_raises=None,
+        expect=[
+            FFMPEG_EXECUTABLE,
+            '-loglevel',
+            'info',
+            '-i',
+            'in.mp4',
+            '-filter_complex',
+            _FC('zscale=t=linear:npl=100,format=gbrpf32le,'
+                'zscale=w=1280:h=720:f=bilinear,'
+                + zscale_filter(1.0, 'reinhard').split(',', 1)[1]),
+            '-map',
+            '[vout]',
+            '-map',
+            '0:a?',
+            '-map',
+            '0:s?',
+            '-c:v',
+            'libx264',
+            '-preset',
+            'veryfast',
+            '-tune',
+            'film',
+            '-crf',
+            '23',
+            '-r',
+            '30.0',
+            '-pix_fmt',
+            'yuv420p',
+            '-strict',
+            '-2',
+            '-c:a',
+            'copy',
+            '-c:s',
+            'copy',
+            '-map_metadata',
+            '0',
+            '-movflags',
+            '+faststart',
+            'out.mkv',
+            '-y',
+        ],
+    ),
+    Case(
+        name='cpu_auto_crop_crops_before_tonemap',
+        request_kwargs={'auto_crop': True},
+        props_kwargs={},
+        expect_notices=0,
+        expect_raises=None,
+        crop=(1920, 800, 0, 140),
+        expect=[
+            FFMPEG_EXECUTABLE,
+            '-loglevel',
+            'info',
+            '-i',
+            'in.mp4',
+            '-filter_complex',
+            _FC('crop=1920:800:0:140,' + zscale_filter(1.0, 'reinhard')),
+            '-map',
+            '[vout]',
+            '-map',
+            '0:a?',
+            '-map',
+            '0:s?',
+            '-c:v',
+            'libx264',
+            '-preset',
+            'veryfast',
+            '-tune',
+            'film',
+            '-crf',
+            '23',
+            '-r',
+            '30.0',
+            '-pix_fmt',
+            'yuv420p',
+            '-strict',
+            '-2',
+            '-c:a',
+            'copy',
+            '-c:s',
+            'copy',
+            '-map_metadata',
+            '0',
+            '-movflags',
+            '+faststart',
+            'out.mkv',
+            '-y',
+        ],
+    ),
 ]
 
 
@@ -1685,7 +1838,10 @@ class TestFfmpegCommandGoldenMaster(unittest.TestCase):
         view = RecordingConversionView()
         with patch('src.conversion.platform.system', return_value=case.platform), \
              patch('src.conversion.vulkan_libplacebo_available', return_value=case.libplacebo), \
-             patch('src.conversion.vulkan_cuda_interop_available', return_value=case.interop):
+             patch('src.conversion.vulkan_cuda_interop_available', return_value=case.interop), \
+             patch('src.conversion.ConversionManager._resolve_fused_lut',
+                   return_value=case.fused_lut_path), \
+             patch('src.conversion.detect_crop', return_value=case.crop):
             if case.expect_raises is not None:
                 with self.assertRaises(ValueError, msg=case.name) as ctx:
                     manager.construct_ffmpeg_command(request, properties, view)
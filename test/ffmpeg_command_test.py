@@ -10,7 +10,7 @@ from __future__ import annotations
 import os
 import sys
 import unittest
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
@@ -33,6 +33,13 @@ class _Req:
     bit_depth: int = 8
     licensed: bool = False
     lut_enabled: bool = True
+    extra_outputs: tuple = ()
+    fused_lut: bool = False
+    output_height: 'int | None' = None
+    auto_crop: bool = False
+
+    def with_overrides(self, **changes):
+        return replace(self, **changes)
 
 
 _PROPS = {'codec_name': 'h264'}
@@ -459,6 +466,22 @@ class TestBuild(unittest.TestCase):
         self.assertIn('libx264', cmd, msg=cmd)
         self.assertEqual(view.notices, [], msg=view.notices)
 
+    def test_threads_cap_decoder_filters_and_encoder(self):
+        cmd = ffmpeg_command.build(_Req(), self._PROPS, self._probes(),
+                                   _RecordingView(), threads=3)
+        i = cmd.index('-i')
+        self.assertEqual(cmd[cmd.index('-filter_threads') + 1], '3', msg=cmd)
+        self.assertLess(cmd.index('-filter_threads'), i, msg=cmd)
+        before, after = cmd[:i], cmd[i:]
+        self.assertEqual(before[before.index('-threads') + 1], '3', msg=cmd)
+        self.assertEqual(after[after.index('-threads') + 1], '3', msg=cmd)
+        self.assertLess(after.index('-threads'), after.index('-pix_fmt'), msg=cmd)
+
+    def test_no_threads_leaves_ffmpeg_defaults(self):
+        cmd = ffmpeg_command.build(_Req(), self._PROPS, self._probes(), _RecordingView())
+        self.assertNotIn('-threads', cmd, msg=cmd)
+        self.assertNotIn('-filter_threads', cmd, msg=cmd)
+
     def test_notices_are_delivered_even_when_filter_args_raises(self):
         """The core of the notice-before-raise guarantee: a Dolby Vision
         profile-5 warning from _tonemap_plan must reach the view even
@@ -481,6 +504,440 @@ class TestBuild(unittest.TestCase):
             _Req(use_gpu=True, bit_depth=12), self._PROPS,
             self._probes(resolve_gpu_encoder=_forbidden), view)
 
+    def test_missing_ffmpeg_is_a_clear_error(self):
+        with patch('utils.ffmpeg_executable', return_value=None):
+            with self.assertRaisesRegex(RuntimeError, 'ffmpeg not found'):
+                ffmpeg_command.build(_Req(), self._PROPS, self._probes(),
+                                     _RecordingView())
+
+    def test_a_filter_missing_from_this_ffmpeg_is_a_clear_error(self):
+        probes = self._probes(resolve_filters=lambda: frozenset({'scale', 'tonemap'}))
+        with self.assertRaisesRegex(ValueError, 'no zscale or lut3d filter'):
+            ffmpeg_command.build(_Req(), self._PROPS, probes, _RecordingView())
+
+    def test_filters_are_checked_only_when_listed(self):
+        """An ffmpeg whose -filters output couldn't be read is left to run."""
+        probes = self._probes(resolve_filters=frozenset)
+        ffmpeg_command.build(_Req(), self._PROPS, probes, _RecordingView())
+        probes = self._probes(
+            resolve_filters=lambda: frozenset({'zscale', 'tonemap', 'lut3d'}))
+        ffmpeg_command.build(_Req(), self._PROPS, probes, _RecordingView())
+
+
+class TestSegmentBounds(unittest.TestCase):
+
+    def test_cuts_become_contiguous_segments_and_the_last_is_open_ended(self):
+        self.assertEqual(
+            ffmpeg_command.segment_bounds([10.0, 20.0], 30.0),
+            [(0.0, 10.0), (10.0, 10.0), (20.0, None)])
+
+    def test_first_segment_starts_at_the_given_keyframe(self):
+        bounds = ffmpeg_command.segment_bounds([10.023], 30.0, start=0.023)
+        self.assertEqual(bounds[0][0], 0.023)
+        self.assertAlmostEqual(bounds[0][1], 10.0)
+
+    def test_out_of_range_and_duplicate_cuts_are_dropped(self):
+        """Each would otherwise yield an empty segment, which the concat
+        demuxer rejects."""
+        self.assertEqual(
+            ffmpeg_command.segment_bounds([0.0, 15.0, 15.0, 30.0, 45.0], 30.0),
+            [(0.0, 15.0), (15.0, None)])
+
+
+class TestBuildSegmented(unittest.TestCase):
+
+    _PROPS = dict(TestBuild._PROPS, frame_rate=25.0)
+
+    def _build(self, req=None, bounds=((0.0, 10.0), (10.0, None)), threads=4):
+        return ffmpeg_command.build_segmented(
+            req or _Req(output_path='out.mp4'), self._PROPS,
+            TestBuild._probes(TestBuild()), _RecordingView(),
+            list(bounds), os.path.join('work', 'dir'), threads=threads)
+
+    def test_one_video_only_encode_per_segment(self):
+        built = self._build()
+        self.assertEqual(len(built.segment_cmds), 2)
+        for cmd, path in zip(built.segment_cmds, built.segment_paths):
+            self.assertEqual(cmd[-2:], [path, '-y'], msg=cmd)
+            for flag in ('-an', '-sn', '-dn'):
+                self.assertIn(flag, cmd, msg=cmd)
+            self.assertNotIn('-map_metadata', cmd, msg=cmd)
+            self.assertEqual(cmd[cmd.index('-threads') + 1], '4', msg=cmd)
+
+    def test_seek_precedes_input_and_length_stops_half_a_frame_short(self):
+        first, last = self._build().segment_cmds
+        self.assertLess(first.index('-ss'), first.index('-i'), msg=first)
+        self.assertEqual(first[first.index('-t') + 1], '9.980000', msg=first)
+        self.assertEqual(last[last.index('-ss') + 1], '10.000000', msg=last)
+        self.assertNotIn('-t', last, msg=last)
+
+    def test_mux_copies_video_and_takes_audio_and_subtitles_from_the_source(self):
+        built = self._build()
+        cmd = built.concat_cmd
+        self.assertEqual(cmd[cmd.index('-f') + 1], 'concat', msg=cmd)
+        self.assertEqual(cmd[cmd.index('-c:v') + 1], 'copy', msg=cmd)
+        self.assertIn('1:a?', cmd, msg=cmd)
+        self.assertNotIn('0:a?', cmd, msg=cmd)
+        self.assertEqual(cmd[cmd.index('-map_metadata') + 1], '1', msg=cmd)
+        self.assertEqual(cmd[-2], os.path.normpath('out.mp4'), msg=cmd)
+
+    def test_hevc_output_in_mp4_is_tagged_on_the_mux(self):
+        built = self._build(req=_Req(output_path='out.mp4', bit_depth=12))
+        self.assertIn('hvc1', built.concat_cmd, msg=built.concat_cmd)
+
+    def test_missing_ffmpeg_is_a_clear_error(self):
+        with patch('utils.ffmpeg_executable', return_value=None):
+            with self.assertRaisesRegex(RuntimeError, 'ffmpeg not found'):
+                self._build()
+
+    def test_concat_list_quotes_every_segment_path(self):
+        built = ffmpeg_command.build_segmented(
+            _Req(), self._PROPS, TestBuild._probes(TestBuild()), _RecordingView(),
+            [(0.0, None)], "it's here")
+        self.assertEqual(
+            built.concat_list,
+            "file '" + os.path.join("it'\\''s here", 'segment_0000.mkv') + "'\n")
+
+
+class TestFusedLut(unittest.TestCase):
+    """fused_lut swaps the CPU chain for one lookup -- only when asked, only
+    on the CPU path, and only for a tonemapper fused_lut.py implements.
+    BT.2390 and Spline, which only the LUT implements on the CPU, take it
+    unasked."""
+
+    def _filter(self, req, resolve=lambda tm: f'/cache/{tm}.cube', **probes):
+        calls = []
+
+        def resolve_fused_lut(tonemapper, transfer):
+            calls.append(tonemapper if transfer == 'pq' else (tonemapper, transfer))
+            return resolve(tonemapper)
+        cmd = ffmpeg_command.build(
+            req, TestBuild._PROPS,
+            TestBuild._probes(TestBuild(), resolve_fused_lut=resolve_fused_lut, **probes),
+            _RecordingView())
+        return cmd[cmd.index('-filter_complex') + 1], calls
+
+    def test_opted_in_cpu_request_uses_the_fused_lut(self):
+        graph, calls = self._filter(_Req(fused_lut=True, tonemapper='Hable'))
+        self.assertEqual(calls, ['hable'])
+        self.assertIn('lut3d=file=/cache/hable.cube', graph)
+        self.assertNotIn('tonemap=', graph)
+        self.assertNotIn('eq=gamma', graph)
+
+    def test_gamma_other_than_one_keeps_its_eq_pass(self):
+        graph, _ = self._filter(_Req(fused_lut=True, gamma=1.2))
+        self.assertTrue(graph.endswith(',eq=gamma=1.2[vout]'), msg=graph)
+
+    def test_resolver_is_lazy_and_none_falls_back(self):
+        graph, calls = self._filter(_Req())
+        self.assertEqual(calls, [])
+        self.assertIn('tonemap=reinhard', graph)
+        graph, calls = self._filter(_Req(fused_lut=True), resolve=lambda tm: None)
+        self.assertEqual(calls, ['reinhard'])
+        self.assertIn('tonemap=reinhard', graph)
+
+    def test_libplacebo_only_tonemapper_takes_the_lut_unasked(self):
+        graph, calls = self._filter(_Req(tonemapper='Spline'))
+        self.assertEqual(calls, ['spline'])
+        self.assertIn('lut3d=file=/cache/spline.cube', graph)
+
+    def test_libplacebo_only_tonemapper_without_a_lut_raises(self):
+        with self.assertRaises(ValueError):
+            self._filter(_Req(tonemapper='bt.2390'), resolve=lambda tm: None)
+
+    def test_hlg_source_on_the_cpu_takes_its_hlg_lut_unasked(self):
+        hlg = dict(TestBuild._PROPS, color_transfer='arib-std-b67', color_primaries='bt2020')
+        calls = []
+
+        def resolve_fused_lut(tonemapper, transfer):
+            calls.append((tonemapper, transfer))
+            return '/cache/hlg.cube'
+        cmd = ffmpeg_command.build(
+            _Req(tonemapper='Hable'), hlg,
+            TestBuild._probes(TestBuild(), resolve_fused_lut=resolve_fused_lut),
+            _RecordingView())
+        self.assertEqual(calls, [('hable', 'hlg')])
+        self.assertIn('lut3d=file=/cache/hlg.cube', cmd[cmd.index('-filter_complex') + 1])
+
+    def test_libplacebo_path_never_asks_for_a_fused_lut(self):
+        _, calls = self._filter(_Req(fused_lut=True, use_gpu=True, lut_enabled=False),
+                                resolve_libplacebo_available=lambda: True)
+        self.assertEqual(calls, [])
+
+
+class TestSdrSource(unittest.TestCase):
+    """An SDR source has nothing to tonemap: it is copied as-is when the
+    output can hold it, and otherwise re-encoded with no color filters."""
+
+    _SDR = dict(TestBuild._PROPS, color_transfer='bt709', color_primaries='bt709')
+
+    def _build(self, req, props=None, **probes):
+        return ffmpeg_command.build(req, props or self._SDR,
+                                    TestBuild._probes(TestBuild(), **probes),
+                                    _RecordingView())
+
+    def test_stream_copy_ok(self):
+        ok = ffmpeg_command.stream_copy_ok
+        self.assertTrue(ok(_Req(output_path='out.mp4'), self._SDR))
+        self.assertFalse(ok(_Req(output_path='out.mp4', gamma=1.2), self._SDR))
+        self.assertFalse(ok(_Req(output_path='out.mp4', extra_outputs=('b',)), self._SDR))
+        self.assertFalse(ok(_Req(output_path='out.mp4'), dict(self._SDR, bit_depth=10)))
+        self.assertFalse(ok(_Req(output_path='out.mp4'), dict(self._SDR, codec_name='vp9')))
+        self.assertFalse(ok(_Req(output_path='out.mp4'), TestBuild._PROPS))
+        self.assertTrue(ok(_Req(output_path='out.mp4', bit_depth=10),
+                           dict(self._SDR, bit_depth=10)))
+
+    def test_copy_command_has_no_filter_and_tags_hevc_for_mp4(self):
+        def _forbidden():
+            raise AssertionError('a stream copy must not probe the GPU')
+        cmd = self._build(_Req(output_path='out.mp4', use_gpu=True),
+                          dict(self._SDR, codec_name='hevc'),
+                          resolve_gpu_encoder=_forbidden,
+                          resolve_libplacebo_available=_forbidden)
+        self.assertNotIn('-filter_complex', cmd)
+        self.assertEqual(cmd[cmd.index('-c:v') + 1], 'copy')
+        self.assertEqual(cmd[cmd.index('-tag:v') + 1], 'hvc1')
+
+    def test_re_encode_has_no_color_filters(self):
+        def _forbidden():
+            raise AssertionError('an SDR source must not probe libplacebo')
+        cmd = self._build(_Req(output_path='out.mp4', gamma=1.2, use_gpu=True),
+                          resolve_libplacebo_available=_forbidden,
+                          resolve_fused_lut=lambda tm, transfer: _forbidden())
+        self.assertEqual(cmd[cmd.index('-filter_complex') + 1], '[0:v:0]eq=gamma=1.2[vout]')
+        cmd = self._build(_Req(output_path='out.webm'))
+        self.assertEqual(cmd[cmd.index('-filter_complex') + 1], '[0:v:0]null[vout]')
+
+
+class TestOutputSize(unittest.TestCase):
+    """output_height resizes in linear light, before anything that costs per
+    pixel, on every path that tonemaps."""
+
+    _PROPS = TestBuild._PROPS
+    _HLG = dict(TestBuild._PROPS, color_transfer='arib-std-b67', color_primaries='bt2020')
+    _SDR = dict(TestBuild._PROPS, color_transfer='bt709', color_primaries='bt709')
+
+    def _graph(self, req, props=None, **probes):
+        cmd = ffmpeg_command.build(req, props or self._PROPS,
+                                   TestBuild._probes(TestBuild(), **probes),
+                                   _RecordingView())
+        return cmd[cmd.index('-filter_complex') + 1]
+
+    def test_output_size(self):
+        size = ffmpeg_command.output_size
+        self.assertEqual(size(self._PROPS, 1080), None)
+        self.assertEqual(size(self._PROPS, 2160), None)
+        self.assertEqual(size(self._PROPS, None), None)
+        self.assertEqual(size({}, 720), None)
+        self.assertEqual(size(self._PROPS, 720), (1280, 720))
+        self.assertEqual(size(self._PROPS, 481), (854, 480))
+        self.assertEqual(size(dict(self._PROPS, width=1920, height=800), 540), (1296, 540))
+
+    def test_cpu_chain_resizes_straight_after_linearizing(self):
+        graph = self._graph(_Req(output_height=540))
+        self.assertTrue(graph.startswith(
+            '[0:v:0]zscale=t=linear:npl=100,format=gbrpf32le,'
+            'zscale=w=960:h=540:f=bilinear,tonemap=reinhard,'), msg=graph)
+
+    def test_fused_lut_resizes_then_looks_up_in_pq(self):
+        calls = []
+
+        def resolve(tonemapper, transfer):
+            calls.append((tonemapper, transfer))
+            return '/cache/pq.cube'
+        graph = self._graph(_Req(tonemapper='Spline', output_height=540), self._HLG,
+                            resolve_fused_lut=resolve)
+        self.assertEqual(calls, [('spline', 'pq')])
+        self.assertIn('zscale=w=960:h=540:f=bilinear,zscale=t=smpte2084:npl=100,', graph)
+        self.assertLess(graph.index('zscale=w=960'), graph.index('lut3d=file=/cache/pq.cube'))
+
+    def test_resized_hlg_keeps_the_zscale_chain_for_its_tonemappers(self):
+        def _forbidden(tonemapper, transfer):
+            raise AssertionError('no LUT was asked for')
+        graph = self._graph(_Req(tonemapper='Hable', output_height=540), self._HLG,
+                            resolve_fused_lut=_forbidden)
+        self.assertIn('tonemap=hable', graph)
+
+    def test_libplacebo_resizes_itself(self):
+        graph = self._graph(_Req(use_gpu=True, output_height=540),
+                            resolve_gpu_encoder=lambda: 'h264_nvenc',
+                            resolve_libplacebo_available=lambda: True)
+        self.assertIn('libplacebo=w=960:h=540:', graph)
+
+    def test_sdr_source_resizes_in_linear_light_and_is_not_copied(self):
+        req = _Req(output_path='out.mp4', output_height=540)
+        self.assertFalse(ffmpeg_command.stream_copy_ok(req, self._SDR))
+        self.assertEqual(
+            self._graph(req, self._SDR),
+            '[0:v:0]zscale=t=linear,format=gbrpf32le,zscale=w=960:h=540:f=bilinear,'
+            'zscale=t=bt709:m=bt709:r=tv[vout]')
+
+
+class TestAutoCrop(unittest.TestCase):
+    """auto_crop: the detected crop runs first, and everything after it --
+    resize included -- sees only the picture inside the bars."""
+
+    _PROPS = TestBuild._PROPS
+    _SDR = TestOutputSize._SDR
+    _SCOPE = (1920, 800, 0, 140)
+
+    def _graph(self, req, props=None, crop=_SCOPE, **probes):
+        cmd = ffmpeg_command.build(
+            req, props or self._PROPS,
+            TestBuild._probes(TestBuild(), **{'resolve_crop': lambda: crop, **probes}),
+            _RecordingView())
+        return cmd[cmd.index('-filter_complex') + 1]
+
+    def test_crop_leads_the_chain(self):
+        graph = self._graph(_Req(auto_crop=True))
+        self.assertTrue(graph.startswith(
+            '[0:v:0]crop=1920:800:0:140,zscale=t=linear:npl=100,'), msg=graph)
+
+    def test_crop_probe_only_runs_when_asked(self):
+        def _forbidden():
+            raise AssertionError('auto_crop is off')
+        graph = self._graph(_Req(), crop=None, resolve_crop=_forbidden)
+        self.assertNotIn('crop=', graph)
+
+    def test_no_crop_found_leaves_the_chain_unchanged(self):
+        self.assertEqual(self._graph(_Req(auto_crop=True), crop=None),
+                         self._graph(_Req()))
+
+    def test_resize_follows_the_cropped_aspect_ratio(self):
+        graph = self._graph(_Req(auto_crop=True, output_height=540))
+        self.assertIn('crop=1920:800:0:140,zscale=t=linear:npl=100,format=gbrpf32le,'
+                      'zscale=w=1296:h=540:f=bilinear,', graph)
+
+    def test_crop_alone_is_not_a_resize(self):
+        # 800 lines left: asking for 1080 keeps the cropped size.
+        graph = self._graph(_Req(auto_crop=True, output_height=1080))
+        self.assertNotIn('zscale=w=', graph)
+
+    @patch('ffmpeg_command.platform.system', return_value='Linux')
+    def test_crop_runs_before_the_upload_and_skips_cuda_interop(self, _system):
+        def _forbidden():
+            raise AssertionError('a cropped run cannot use CUDA frames')
+        graph = self._graph(_Req(use_gpu=True, auto_crop=True),
+                            resolve_gpu_encoder=lambda: 'h264_nvenc',
+                            resolve_libplacebo_available=lambda: True,
+                            resolve_cuda_interop_available=_forbidden)
+        self.assertTrue(graph.startswith('[0:v:0]crop=1920:800:0:140,format=p010,hwupload,'),
+                        msg=graph)
+
+    def test_cropped_sdr_source_is_re_encoded(self):
+        req = _Req(output_path='out.mp4', auto_crop=True)
+        self.assertFalse(ffmpeg_command.stream_copy_ok(req, self._SDR, self._SCOPE))
+        self.assertEqual(self._graph(req, self._SDR), '[0:v:0]crop=1920:800:0:140[vout]')
+
+    def test_segments_are_cropped_too(self):
+        built = ffmpeg_command.build_segmented(
+            _Req(auto_crop=True), self._PROPS,
+            TestBuild._probes(TestBuild(), resolve_crop=lambda: self._SCOPE),
+            _RecordingView(), [(0.0, None)], 'work')
+        cmd = built.segment_cmds[0]
+        self.assertTrue(cmd[cmd.index('-filter_complex') + 1].startswith(
+            '[0:v:0]crop=1920:800:0:140,'))
+
+
+class TestFanOut(unittest.TestCase):
+    """extra_outputs: one decode and tonemap, split once per output."""
+
+    _PROPS = TestBuild._PROPS
+
+    def _build(self, extras, req=None, **probes):
+        req = req or _Req(output_path='a.mkv')
+        return ffmpeg_command.build(
+            replace(req, extra_outputs=tuple(extras)), self._PROPS,
+            TestBuild._probes(TestBuild(), **probes), _RecordingView())
+
+    def _output(self, cmd, path):
+        """The args belonging to the output written to *path*."""
+        end = cmd.index(os.path.normpath(path))
+        start = max(i for i, arg in enumerate(cmd[:end]) if arg == '-map'
+                    and cmd[i + 1].startswith('['))
+        return cmd[start:end + 1]
+
+    def test_without_extras_the_command_is_unchanged(self):
+        cmd = self._build([])
+        self.assertEqual(cmd[cmd.index('-filter_complex') + 1].count('split'), 0)
+        self.assertEqual(cmd.count('-i'), 1)
+
+    def test_one_input_one_tonemap_split_to_every_output(self):
+        cmd = self._build([ffmpeg_command.OutputSpec('b.mp4', height=540),
+                           ffmpeg_command.OutputSpec('c.mp4')])
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertEqual(cmd.count('-i'), 1, msg=cmd)
+        self.assertEqual(graph.count('tonemap='), 1, msg=graph)
+        self.assertIn('split=3[s0][s1][s2]', graph)
+        self.assertIn('[s1]scale=960:540[vout1]', graph)
+        self.assertEqual(self._output(cmd, 'b.mp4')[:2], ['-map', '[vout1]'])
+        self.assertEqual(self._output(cmd, 'c.mp4')[:2], ['-map', '[s2]'])
+        self.assertEqual(cmd[-1], '-y')
+        self.assertEqual(cmd.count('-y'), 1)
+
+    def test_each_output_has_its_own_codec_depth_and_quality(self):
+        cmd = self._build([ffmpeg_command.OutputSpec(
+            'b.mp4', bit_depth=10, quality=28, codec='hevc')])
+        primary, extra = self._output(cmd, 'a.mkv'), self._output(cmd, 'b.mp4')
+        self.assertIn('libx264', primary)
+        self.assertEqual(primary[primary.index('-pix_fmt') + 1], 'yuv420p')
+        self.assertIn('libx265', extra)
+        self.assertIn('hvc1', extra)
+        self.assertEqual(extra[extra.index('-pix_fmt') + 1], 'yuv420p10le')
+        self.assertEqual(extra[extra.index('-crf') + 1], '28')
+
+    def test_h264_preference_overrides_hevc_source_preservation(self):
+        props = dict(self._PROPS, codec_name='hevc')
+        plan = ffmpeg_command._codec_and_pix_fmt(_Req(), props, None, prefer='h264')
+        self.assertEqual(plan.codec, 'libx264')
+        # ...but never the mandatory 12-bit swap.
+        plan = ffmpeg_command._codec_and_pix_fmt(
+            _Req(bit_depth=12), props, None, prefer='h264')
+        self.assertEqual(plan.codec, 'libx265')
+
+    def test_a_twelve_bit_output_keeps_the_whole_run_on_the_cpu(self):
+        resolve = []
+        cmd = self._build([ffmpeg_command.OutputSpec('b.mkv', bit_depth=12)],
+                          req=_Req(output_path='a.mkv', use_gpu=True),
+                          resolve_gpu_encoder=lambda: resolve.append(1) or 'h264_nvenc')
+        self.assertEqual(resolve, [])
+        self.assertNotIn('h264_nvenc', cmd)
+
+    def test_every_output_resized_tonemaps_at_the_largest(self):
+        cmd = self._build([ffmpeg_command.OutputSpec('b.mp4', height=540)],
+                          req=_Req(output_path='a.mkv', output_height=720))
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertIn('zscale=w=1280:h=720', graph)
+        self.assertLess(graph.index('zscale=w=1280'), graph.index('tonemap='))
+        self.assertIn('[s1]scale=960:540[vout1]', graph)
+        self.assertEqual(self._output(cmd, 'a.mkv')[:2], ['-map', '[s0]'])
+
+    def test_one_full_size_output_keeps_the_tonemap_full_size(self):
+        cmd = self._build([ffmpeg_command.OutputSpec('b.mp4')],
+                          req=_Req(output_path='a.mkv', output_height=720))
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertNotIn('zscale=w=', graph)
+        self.assertIn('[s0]scale=1280:720[vout0]', graph)
+
+    def test_extra_outputs_never_upscale_and_stay_even(self):
+        cmd = self._build([ffmpeg_command.OutputSpec('b.mp4', height=2160),
+                           ffmpeg_command.OutputSpec('c.mp4', height=541)])
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertNotIn('[s1]scale', graph)
+        self.assertEqual(self._output(cmd, 'b.mp4')[:2], ['-map', '[s1]'])
+        self.assertIn('[s2]scale=960:540[vout2]', graph)
+
+    @patch('ffmpeg_command.platform.system', return_value='Linux')
+    def test_cuda_frames_are_downloaded_once_before_the_split(self, _system):
+        cmd = self._build(
+            [ffmpeg_command.OutputSpec('b.mkv', height=540)],
+            req=_Req(output_path='a.mkv', use_gpu=True, lut_enabled=False),
+            resolve_gpu_encoder=lambda: 'h264_nvenc',
+            resolve_libplacebo_available=lambda: True,
+            resolve_cuda_interop_available=lambda: True)
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertIn('derive_device=cuda,hwdownload,format=nv12[vt]', graph)
+
 
 if __name__ == '__main__':
     unittest.main()
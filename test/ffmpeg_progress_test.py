@@ -0,0 +1,88 @@
+"""Unit tests for src/ffmpeg_progress.py: the -progress stream parser and the
+bounded stderr buffer. Pure functions over strings -- no subprocess."""
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import ffmpeg_progress  # noqa: E402
+
+# One real block as ffmpeg 6 writes it with -progress pipe:1.
+_BLOCK = [
+    'frame=240\n', 'fps=47.95\n', 'stream_0_0_q=28.0\n', 'bitrate=1520.3kbits/s\n',
+    'total_size=1900544\n', 'out_time_us=10000000\n', 'out_time_ms=10000000\n',
+    'out_time=00:00:10.000000\n', 'dup_frames=0\n', 'drop_frames=0\n',
+    'speed=1.92x\n', 'progress=continue\n',
+]
+
+
+class TestProgressParser(unittest.TestCase):
+
+    def test_event_only_when_a_block_closes(self):
+        parser = ffmpeg_progress.ProgressParser()
+        events = [parser.feed(line) for line in _BLOCK]
+        self.assertEqual(events[:-1], [None] * (len(_BLOCK) - 1))
+        self.assertEqual(events[-1], ffmpeg_progress.ProgressEvent(
+            frame=240, fps=47.95, speed=1.92, out_time=10.0,
+            total_size=1900544, done=False))
+
+    def test_end_block_is_marked_done(self):
+        parser = ffmpeg_progress.ProgressParser()
+        for line in _BLOCK[:-1]:
+            parser.feed(line)
+        self.assertTrue(parser.feed('progress=end\n').done)
+
+    def test_na_figures_from_the_first_block_do_not_raise(self):
+        parser = ffmpeg_progress.ProgressParser()
+        for line in ['frame=0', 'fps=0.00', 'total_size=N/A',
+                     'out_time_us=N/A', 'speed=N/A']:
+            parser.feed(line)
+        event = parser.feed('progress=continue')
+        self.assertIsNone(event.speed)
+        self.assertEqual((event.out_time, event.total_size), (0.0, 0))
+
+    def test_older_builds_without_out_time_us_fall_back_to_out_time_ms(self):
+        """out_time_ms has always been microseconds despite its name."""
+        parser = ffmpeg_progress.ProgressParser()
+        parser.feed('out_time_ms=2500000')
+        self.assertEqual(parser.feed('progress=continue').out_time, 2.5)
+
+    def test_fields_do_not_leak_into_the_next_block(self):
+        parser = ffmpeg_progress.ProgressParser()
+        parser.feed('speed=2x')
+        parser.feed('progress=continue')
+        self.assertIsNone(parser.feed('progress=continue').speed)
+
+
+class TestProgressEvent(unittest.TestCase):
+
+    def _event(self, out_time=30.0, speed=2.0):
+        return ffmpeg_progress.ProgressEvent(
+            frame=0, fps=0.0, speed=speed, out_time=out_time,
+            total_size=0, done=False)
+
+    def test_percent_is_clamped_to_the_duration(self):
+        self.assertEqual(self._event().percent(120.0), 25.0)
+        self.assertEqual(self._event(out_time=121.0).percent(120.0), 100.0)
+        self.assertEqual(self._event().percent(0), 0.0)
+
+    def test_eta_divides_remaining_media_time_by_speed(self):
+        self.assertEqual(self._event().eta(120.0), 45.0)
+        self.assertIsNone(self._event(speed=None).eta(120.0))
+
+
+class TestStderrTail(unittest.TestCase):
+
+    def test_keeps_only_the_newest_lines(self):
+        tail = ffmpeg_progress.stderr_tail()
+        for i in range(ffmpeg_progress.STDERR_TAIL_LINES + 10):
+            tail.append(str(i))
+        self.assertEqual(len(tail), ffmpeg_progress.STDERR_TAIL_LINES)
+        self.assertEqual(tail[0], '10')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Unit tests for src/frame_cache.py: the byte budget, least-recently-used
+eviction, the counters, sections sharing one budget, and the default budget
+from available memory and the cgroup limit. Cgroup trees and meminfo are
+built in a temp dir -- nothing is read from this machine's /sys or /proc."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import frame_cache  # noqa: E402
+
+_MIB = 1024 * 1024
+
+
+def _cache(budget=100):
+    """Values are their own size in bytes."""
+    return frame_cache.FrameCache(lambda value: value, budget)
+
+
+class TestBudget(unittest.TestCase):
+
+    def test_evicts_least_recently_used_past_the_budget(self):
+        cache = _cache()
+        cache.put(('t', 'a'), 40)
+        cache.put(('t', 'b'), 40)
+        cache.get(('t', 'a'))
+        cache.put(('t', 'c'), 40)
+        self.assertIn(('t', 'a'), cache)
+        self.assertNotIn(('t', 'b'), cache)
+        self.assertEqual(cache.size, 80)
+
+    def test_replacing_an_entry_recharges_it(self):
+        cache = _cache()
+        cache.put(('t', 'a'), 60)
+        cache.put(('t', 'a'), 30)
+        self.assertEqual(cache.size, 30)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_value_larger_than_the_budget_is_not_stored(self):
+        cache = _cache()
+        cache.put(('t', 'a'), 10)
+        cache.put(('t', 'huge'), 101)
+        self.assertNotIn(('t', 'huge'), cache)
+        self.assertIn(('t', 'a'), cache)
+
+    def test_counters(self):
+        cache = _cache()
+        cache.put(('t', 'a'), 60)
+        cache.get(('t', 'a'))
+        cache.get(('t', 'missing'))
+        cache.put(('t', 'b'), 60)
+        self.assertEqual(cache.stats(), {'entries': 1, 'bytes': 60, 'budget': 100,
+                                         'hits': 1, 'misses': 1, 'evictions': 1})
+
+    def test_membership_counts_no_lookup(self):
+        cache = _cache()
+        cache.put(('t', 'a'), 1)
+        self.assertIn(('t', 'a'), cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+class TestSections(unittest.TestCase):
+
+    def test_sections_share_one_budget(self):
+        cache = _cache()
+        originals, converted = cache.section('original'), cache.section('converted')
+        originals['k'] = 60
+        converted['k'] = 60
+        self.assertNotIn('k', originals)
+        self.assertEqual(converted['k'], 60)
+        self.assertEqual(list(converted), ['k'])
+        self.assertEqual(len(originals), 0)
+
+    def test_missing_key(self):
+        section = _cache().section('original')
+        self.assertIsNone(section.get('k'))
+        with self.assertRaises(KeyError):
+            section['k']
+        self.assertIsNone(section.pop('k'))
+
+
+class _MemoryFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.proc_cgroup = os.path.join(self.root, 'self-cgroup')
+
+    def _file(self, relative, text):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        return path
+
+    def _headroom(self):
+        return frame_cache._cgroup_headroom(self.root, self.proc_cgroup)
+
+
+class TestCgroupHeadroom(_MemoryFiles):
+
+    def test_v2_limit_less_usage(self):
+        self._file('self-cgroup', '0::/app')
+        self._file('app/memory.max', str(1024 * _MIB))
+        self._file('app/memory.current', str(256 * _MIB))
+        self.assertEqual(self._headroom(), 768 * _MIB)
+
+    def test_v2_unlimited(self):
+        self._file('self-cgroup', '0::/')
+        self._file('memory.max', 'max')
+        self.assertIsNone(self._headroom())
+
+    def test_tightest_ancestor_wins(self):
+        self._file('self-cgroup', '0::/app/worker')
+        self._file('app/memory.max', str(512 * _MIB))
+        self._file('app/worker/memory.max', str(2048 * _MIB))
+        self.assertEqual(self._headroom(), 512 * _MIB)
+
+    def test_v1_limit_and_its_unlimited_sentinel(self):
+        self._file('self-cgroup', '4:memory:/docker/abc')
+        self._file('memory/memory.limit_in_bytes', str(9223372036854771712))
+        self._file('memory/docker/abc/memory.limit_in_bytes', str(1024 * _MIB))
+        self._file('memory/docker/abc/memory.usage_in_bytes', str(24 * _MIB))
+        self.assertEqual(self._headroom(), 1000 * _MIB)
+
+    def test_no_cgroups(self):
+        self.assertIsNone(self._headroom())
+
+
+class TestDefaultBudget(_MemoryFiles):
+
+    def test_meminfo_available(self):
+        path = self._file('meminfo', 'MemTotal: 16000000 kB\nMemAvailable: 8000000 kB')
+        self.assertEqual(frame_cache._meminfo_available(path), 8000000 * 1024)
+
+    def _budget(self, system, cgroup):
+        with patch('frame_cache._system_available', return_value=system), \
+                patch('frame_cache._cgroup_headroom', return_value=cgroup):
+            return frame_cache.default_budget()
+
+    def test_a_share_of_the_tighter_limit(self):
+        self.assertEqual(self._budget(8192 * _MIB, 1024 * _MIB), 256 * _MIB)
+        self.assertEqual(self._budget(1024 * _MIB, None), 256 * _MIB)
+
+    def test_clamped(self):
+        self.assertEqual(self._budget(128 * _MIB, None), frame_cache._MIN_BUDGET)
+        self.assertEqual(self._budget(64 * 1024 * _MIB, None), frame_cache._MAX_BUDGET)
+
+    def test_unknown_memory_falls_back(self):
+        self.assertEqual(self._budget(None, None), frame_cache._FALLBACK_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
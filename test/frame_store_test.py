@@ -0,0 +1,122 @@
+"""Unit tests for src/frame_store.py: frames kept per source file and key,
+their invalidation when the file or the tool changes, the byte cap, and
+unreadable frames. A temp dir -- no ffmpeg, no PIL."""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import frame_store  # noqa: E402
+from _temp_dir import TempDirTestCase  # noqa: E402
+
+
+class _StoreTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = os.path.join(self.tmp, 'cache', 'preview-frames')
+        self.tool = self._file('ffmpeg', b'tool')
+        self.video = self._file('in.mp4', b'video')
+
+    def _store(self, **kwargs):
+        return frame_store.FrameStore(self.directory, lambda: self.tool, **kwargs)
+
+    def _put(self, store, key, data):
+        store.put(self.video, key, data)
+        store.flush()
+
+
+class TestLookup(_StoreTest):
+
+    def test_every_part_of_the_key_names_its_own_frame(self):
+        """One source file holds an original and a converted frame per
+        position; a different tonemapper, path or box is another frame."""
+        store = self._store()
+        self._put(store, (5.0, (960, 540)), b'original')
+        self._put(store, (5.0, 'hable', True, False, (960, 540)), b'tonemapped')
+        for key in ((6.0, (960, 540)), (5.0, (1280, 720)),
+                    (5.0, 'hable', True, True, (960, 540)),
+                    (5.0, 'mobius', True, False, (960, 540))):
+            self.assertIsNone(store.get(self.video, key), key)
+        self.assertEqual(self._store().get(self.video, (5.0, (960, 540))), b'original')
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_callable_data_is_encoded_on_the_writer_thread(self):
+        threads = []
+
+        def encode():
+            threads.append(threading.current_thread().name)
+            return b'encoded'
+        store = self._store()
+        self._put(store, (5.0,), encode)
+        self.assertEqual(store.get(self.video, (5.0,)), b'encoded')
+        self.assertTrue(threads[0].startswith('frame-store'), threads)
+
+    def test_stored_compressed(self):
+        self._put(self._store(), (5.0,), b'\0' * 100000)
+        (name,) = os.listdir(self.directory)
+        self.assertLess(os.path.getsize(os.path.join(self.directory, name)), 1000)
+
+    def test_changed_source_misses(self):
+        store = self._store()
+        self._put(store, (5.0,), b'pixels')
+        self._file('in.mp4', b'edited video')
+        self.assertIsNone(store.get(self.video, (5.0,)))
+
+    def test_another_tool_misses(self):
+        self._put(self._store(), (5.0,), b'pixels')
+        self._file('ffmpeg', b'updated tool')
+        self.assertIsNone(self._store().get(self.video, (5.0,)))
+
+    def test_no_tool_or_no_source_stores_nothing(self):
+        store = frame_store.FrameStore(self.directory, lambda: None)
+        self._put(store, (5.0,), b'pixels')
+        self.assertIsNone(store.get(self.video, (5.0,)))
+        store = self._store()
+        store.put(os.path.join(self.tmp, 'gone.mp4'), (5.0,), b'pixels')
+        store.flush()
+        self.assertFalse(os.path.exists(self.directory))
+
+
+class TestCap(_StoreTest):
+
+    def test_least_recently_used_evicted_past_the_cap(self):
+        store = self._store(max_bytes=2500)
+        times = iter(range(1000, 2000))
+        with patch('frame_store.time.time', side_effect=lambda: next(times)):
+            for t in (1.0, 2.0, 3.0):
+                self._put(store, (t,), os.urandom(1000))
+                if t == 2.0:
+                    store.get(self.video, (1.0,))  # 1.0 is now newer than 2.0
+        self.assertIsNotNone(store.get(self.video, (1.0,)))
+        self.assertIsNone(store.get(self.video, (2.0,)))
+        self.assertIsNotNone(store.get(self.video, (3.0,)))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+
+class TestUnreadable(_StoreTest):
+
+    def test_corrupt_frame_is_a_miss_and_removed(self):
+        store = self._store()
+        self._put(store, (5.0,), b'pixels')
+        (name,) = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(b'not zlib')
+        self.assertIsNone(self._store().get(self.video, (5.0,)))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unwritable_location_is_not_an_error(self):
+        blocker = self._file('file', b'x')
+        store = frame_store.FrameStore(os.path.join(blocker, 'frames'), lambda: self.tool)
+        self._put(store, (5.0,), b'pixels')
+        self.assertIsNone(store.get(self.video, (5.0,)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Unit tests for src/fused_lut.py: the baked tonemap math and the on-disk
+LUT cache. The LUT's accuracy against the real five-pass ffmpeg chain is
+measured with ffmpeg itself (see the module docstring), not here."""
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import fused_lut  # noqa: E402
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_spec = importlib.util.spec_from_file_location(
+    'generate_lut', os.path.join(_REPO_ROOT, 'tools', 'generate_lut.py'))
+generate_lut = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_lut)
+
+
+def _pq(nits: float) -> float:
+    """The PQ code value for *nits* (inverse of fused_lut._pq_eotf)."""
+    y = (nits / 10000.0) ** fused_lut._M1
+    return ((fused_lut._C1 + fused_lut._C2 * y) / (1 + fused_lut._C3 * y)) ** fused_lut._M2
+
+
+class TestSignalPeak(unittest.TestCase):
+
+    def test_maxcll_then_mastering_peak_then_1000_nits(self):
+        self.assertEqual(fused_lut.signal_peak(4000.0, 1000.0), 40.0)
+        self.assertEqual(fused_lut.signal_peak(None, 1000.0), 10.0)
+        self.assertEqual(fused_lut.signal_peak(0.0, 4000.0), 40.0)
+        self.assertEqual(fused_lut.signal_peak(None, None), 10.0)
+
+
+class TestTransform(unittest.TestCase):
+
+    def test_black_stays_black(self):
+        for tonemapper in fused_lut.FUSED_TONEMAPPERS:
+            self.assertEqual(fused_lut.transform(0.0, 0.0, 0.0, tonemapper, 10.0),
+                             (0.0, 0.0, 0.0))
+
+    def test_gray_at_the_peak_maps_to_white(self):
+        code = _pq(1000.0)
+        for tonemapper in ('reinhard', 'hable', 'bt.2390', 'spline'):
+            for channel in fused_lut.transform(code, code, code, tonemapper, 10.0):
+                self.assertAlmostEqual(channel, 1.0, places=4, msg=tonemapper)
+
+    def test_curve_is_monotonic_on_gray(self):
+        for tonemapper in fused_lut.FUSED_TONEMAPPERS:
+            grays = [fused_lut.transform(v / 20, v / 20, v / 20, tonemapper, 10.0)[1]
+                     for v in range(21)]
+            self.assertEqual(grays, sorted(grays), msg=tonemapper)
+
+    def test_unknown_tonemapper_is_rejected(self):
+        with self.assertRaises(ValueError):
+            fused_lut.transform(0.5, 0.5, 0.5, 'clip', 10.0)
+
+    def test_bt2390_leaves_tones_below_its_knee_alone(self):
+        # Peak 1000 nits: the knee sits near 6.5 nits in PQ terms.
+        for sig in (0.001, 0.01, 0.05):
+            self.assertAlmostEqual(fused_lut._pq_curve(sig, 'bt.2390', 10.0), sig,
+                                   places=9)
+
+    def test_libplacebo_curves_clamp_above_the_peak(self):
+        for tonemapper in fused_lut.LUT_ONLY_TONEMAPPERS:
+            self.assertAlmostEqual(fused_lut._pq_curve(40.0, tonemapper, 10.0), 1.0,
+                                   places=6, msg=tonemapper)
+
+    def test_libplacebo_curves_pass_an_sdr_bright_source_through(self):
+        for tonemapper in fused_lut.LUT_ONLY_TONEMAPPERS:
+            self.assertEqual(fused_lut._pq_curve(0.5, tonemapper, 1.0), 0.5)
+
+    def test_hlg_linearizes_like_zscale(self):
+        # zscale=t=linear:npl=100's float output for these HLG gray levels.
+        for code, linear in ((0.25, 0.0960529), (0.5, 0.5069702), (0.75, 2.0315216),
+                             (1.0, 10.0)):
+            self.assertAlmostEqual(fused_lut._hlg_eotf(code) / 100.0, linear, places=5)
+
+    def test_hlg_peak_white_maps_to_white(self):
+        for channel in fused_lut.transform(1.0, 1.0, 1.0, 'reinhard', 10.0, 'hlg'):
+            self.assertAlmostEqual(channel, 1.0, places=4)
+
+    def test_gamut_stage_matches_the_bundled_lut_generator(self):
+        self.assertEqual([list(row) for row in fused_lut._BT2020_TO_BT709],
+                         generate_lut.BT2020_TO_BT709)
+        for rgb in [(0.2, 0.5, 0.9), (1.0, 0.0, 0.0), (0.05, 0.8, 0.3)]:
+            encoded = tuple(c ** (1 / 2.4) for c in rgb)
+            for got, want in zip(fused_lut._gamut(rgb), generate_lut._convert(*encoded)):
+                self.assertAlmostEqual(got, want, places=9)
+
+
+class TestCube(unittest.TestCase):
+
+    def test_header_declares_size_and_extended_domain(self):
+        lines = fused_lut.cube_lines('reinhard', 10.0, size=3)
+        self.assertEqual(lines[:3], ['LUT_3D_SIZE 3', 'DOMAIN_MIN 0.0 0.0 0.0',
+                                     'DOMAIN_MAX 1.5 1.5 1.5'])
+        self.assertEqual(len(lines), 3 + 27)
+        self.assertEqual(lines[3], '0.000000 0.000000 0.000000')
+
+    def test_lut_is_generated_once_per_tonemapper_and_peak(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        real = fused_lut.cube_lines
+        calls = []
+
+        def small(tonemapper, peak, transfer='pq'):
+            calls.append((tonemapper, peak, transfer))
+            return real(tonemapper, peak, size=2, transfer=transfer)
+
+        with patch.object(fused_lut, 'cache_dir', return_value=tmp), \
+                patch.object(fused_lut, 'cube_lines', side_effect=small):
+            first = fused_lut.lut_path('Reinhard', 10.0)
+            again = fused_lut.lut_path('reinhard', 10.0)
+            other = fused_lut.lut_path('reinhard', 40.0)
+            hlg = fused_lut.lut_path('reinhard', 10.0, 'hlg')
+
+        self.assertEqual(first, again)
+        self.assertEqual(len({first, other, hlg}), 3)
+        self.assertEqual(calls, [('reinhard', 10.0, 'pq'), ('reinhard', 40.0, 'pq'),
+                                 ('reinhard', 10.0, 'hlg')])
+        with open(first) as f:
+            self.assertEqual(f.readline(), 'LUT_3D_SIZE 2\n')
+        self.assertEqual([n for n in os.listdir(os.path.dirname(first))
+                          if n.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
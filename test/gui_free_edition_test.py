@@ -8,7 +8,8 @@ import importlib.util
 import os
 import sys
 import unittest
-from unittest.mock import patch
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
 
 _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 _SRC = os.path.join(_ROOT, 'src')
@@ -39,6 +40,16 @@ def _probe_tk() -> None:
 _TK_OK, _SKIP = available(_probe_tk)
 
 
+def _gpu_detected(gui):
+    """Patch *gui*'s conversion_manager so the GUI finds GPU support already
+    detected: no probe thread, and the answer shown during construction."""
+    detection = Future()
+    detection.set_result(True)
+    return patch.multiple(gui.conversion_manager,
+                          is_gpu_acceleration_available=MagicMock(return_value=True),
+                          start_gpu_detection=MagicMock(return_value=detection))
+
+
 def _load_gui_without_pro():
     """Load a throwaway copy of gui.py with `pro.batch` forced unimportable.
 
@@ -163,8 +174,7 @@ class TestFreeEditionGui(unittest.TestCase):
         root = TkinterDnD.Tk()
         root.withdraw()
         self.addCleanup(root.destroy)
-        with patch.object(gui.conversion_manager, 'is_gpu_acceleration_available',
-                           return_value=True):
+        with _gpu_detected(gui):
             app = gui.HDRConverterGUI(root, licensed=False)
         self.assertFalse(app._licensed)
 
@@ -175,8 +185,7 @@ class TestFreeEditionGui(unittest.TestCase):
         root = TkinterDnD.Tk()
         root.withdraw()
         self.addCleanup(root.destroy)
-        with patch.object(gui.conversion_manager, 'is_gpu_acceleration_available',
-                           return_value=True):
+        with _gpu_detected(gui):
             app = gui.HDRConverterGUI(root, licensed=False)
         self.assertNotIn(app.quality_slider, app.interactable_elements)
         self.assertNotIn(app.quality_entry, app.interactable_elements)
@@ -193,8 +202,7 @@ class TestFreeEditionGui(unittest.TestCase):
         root = TkinterDnD.Tk()
         root.withdraw()
         self.addCleanup(root.destroy)
-        with patch.object(gui.conversion_manager, 'is_gpu_acceleration_available',
-                           return_value=True):
+        with _gpu_detected(gui):
             app = gui.HDRConverterGUI(root, licensed=False)
         with patch.object(app, '_load_input_file') as mock_load:
             app.handle_file_drop(type('E', (), {'data': 'C:/v/a.mp4'})())
@@ -211,7 +219,6 @@ class TestFreeEditionGui(unittest.TestCase):
         root = TkinterDnD.Tk()
         root.withdraw()
         self.addCleanup(root.destroy)
-        with patch.object(gui.conversion_manager, 'is_gpu_acceleration_available',
-                           return_value=True):
+        with _gpu_detected(gui):
             app = gui.HDRConverterGUI(root, licensed=False)
         app._write_back_current_settings()  # must not raise
@@ -14,6 +14,7 @@ import os
 import sys
 import types
 import unittest
+from concurrent.futures import Future
 from typing import Any, Callable
 from unittest.mock import patch, MagicMock
 
@@ -41,6 +42,15 @@ from _no_external import (  # noqa: E402
 from _tk_probe import probe  # noqa: E402
 
 
+def _answered_detection():
+    """A GPU detection that has already finished, for start_gpu_detection's
+    patch: the GUI then shows it synchronously, reading the answer from the
+    patched is_gpu_acceleration_available."""
+    detection = Future()
+    detection.set_result(True)
+    return detection
+
+
 # One Tk instance shared across the entire module.  Creating and destroying a
 # Tk() per test causes Tcl to deinit/reinit its library on each cycle, which
 # is unreliable when the system's Tcl installation is incomplete (e.g. a
@@ -119,6 +129,10 @@ class _GuiTestBase(unittest.TestCase):
         self._gpu_patch = patch(
             'src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True)
         self._gpu_patch.start()
+        self._detection_patch = patch(
+            'src.gui.conversion_manager.start_gpu_detection',
+            return_value=_answered_detection())
+        self._detection_patch.start()
         # Reuse the module-level Tk — never destroy it between tests.
         # Destroying and recreating Tk forces Tcl to deinit/reinit, which is
         # unreliable on broken system Tcl installs.  Instead, destroy only the
@@ -135,6 +149,13 @@ class _GuiTestBase(unittest.TestCase):
         self._props_patch.stop()
         self._maxcll_patch.stop()
         self._gpu_patch.stop()
+        self._detection_patch.stop()
+
+    def _settle_file_probe(self):
+        """Wait for the metadata probe a file load started (see
+        _update_info_label), then let the event loop publish it."""
+        self.gui._input_probe.result(timeout=5)
+        self.root.update()
 
 
 class TestConstruction(_GuiTestBase):
@@ -174,53 +195,23 @@ class TestConstruction(_GuiTestBase):
         self.gui.bitrate_var.set(15000)
         self.assertEqual(self.gui.quality_display_var.get(), '15,000 kbps')
 
-    @patch('src.gui.vulkan_libplacebo_available', return_value=True)
-    def test_tonemap_combobox_shows_all_entries_when_gpu_tonemap_active(self, _avail):
-        self.gui.gpu_accel_var.set(True)
+    def test_tonemap_combobox_shows_all_entries_with_gpu_accel_off(self):
+        """BT.2390 and Spline run on the CPU as a fused LUT, so turning GPU
+        acceleration off no longer suffixes, greys or removes them."""
+        self.gui.gpu_accel_var.set(False)
         self.gui._apply_tonemap_choices()
         self.assertEqual(tuple(self.gui.tonemap_combobox.cget('values')),
                          tuple(TONEMAP))
         self.assertEqual(str(self.gui.tonemap_combobox.cget('state')), 'readonly')
 
-    @patch('src.gui.vulkan_libplacebo_available', return_value=False)
-    def test_tonemap_combobox_suffixes_gpu_only_when_unavailable(self, _avail):
-        self.gui.gpu_accel_var.set(False)
-        self.gui._apply_tonemap_choices()
-        values = tuple(self.gui.tonemap_combobox.cget('values'))
-        suffix = self.gui._GPU_ONLY_SUFFIX
-        self.assertIn(f'BT.2390{suffix}', values)
-        self.assertIn(f'Spline{suffix}', values)
-        self.assertNotIn('BT.2390', values)
-        self.assertNotIn('Spline', values)
-        self.assertIn('Reinhard', values)
-
-    @patch('src.gui.vulkan_libplacebo_available', return_value=False)
-    def test_tonemap_selection_resets_to_mobius_when_unavailable(self, _avail):
+    def test_bt2390_selection_survives_gpu_accel_off(self):
         self.gui.tonemap_var.set('BT.2390')
         self.gui.gpu_accel_var.set(False)
         self.gui._apply_tonemap_choices()
-        self.assertEqual(self.gui.tonemap_var.get(), 'Mobius')
-
-    @patch('src.gui.vulkan_libplacebo_available', return_value=False)
-    def test_selecting_greyed_gpu_only_row_reverts_to_last_valid(self, _avail):
-        self.gui.gpu_accel_var.set(False)
-        self.gui._apply_tonemap_choices()
-        self.gui._last_valid_tonemapper = 'Hable'
-        self.gui.tonemap_var.set(f'BT.2390{self.gui._GPU_ONLY_SUFFIX}')
-        self.gui._on_tonemap_selected()
-        self.assertEqual(self.gui.tonemap_var.get(), 'Hable')
-
-    @patch('src.gui.vulkan_libplacebo_available', return_value=True)
-    def test_selecting_gpu_only_row_while_active_is_accepted(self, _avail):
-        self.gui.gpu_accel_var.set(True)
-        self.gui._apply_tonemap_choices()
-        self.gui.tonemap_var.set('BT.2390')
         self.gui._on_tonemap_selected()
         self.assertEqual(self.gui.tonemap_var.get(), 'BT.2390')
-        self.assertEqual(self.gui._last_valid_tonemapper, 'BT.2390')
 
-    @patch('src.gui.vulkan_libplacebo_available', return_value=True)
-    def test_lut_export_checkbox_stays_enabled_across_any_tonemapper_switch(self, _avail):
+    def test_lut_export_checkbox_stays_enabled_across_any_tonemapper_switch(self):
         """Accurate GPU Color's availability depends only on GPU acceleration
         being on, not on which tonemapper is selected -- libplacebo's gamut
         handling was found to diverge from the LUT reference for CPU-capable
@@ -339,7 +330,8 @@ class TestConstruction(_GuiTestBase):
         expected = {
             self.gui.browse_button, self.gui.convert_button, self.gui.gamma_slider,
             self.gui.open_after_conversion_checkbutton,
-            self.gui.display_image_checkbutton, self.gui.input_entry,
+            self.gui.display_image_checkbutton, self.gui.auto_crop_checkbutton,
+            self.gui.input_entry,
             self.gui.output_entry, self.gui.gamma_entry,
             self.gui.batch_listbox,
             self.gui.quality_slider, self.gui.quality_entry,
@@ -501,6 +493,10 @@ class TestRestoringBitrateModeAtStartup(unittest.TestCase):
         self._gpu_patch = patch(
             'src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True)
         self._gpu_patch.start()
+        self._detection_patch = patch(
+            'src.gui.conversion_manager.start_gpu_detection',
+            return_value=_answered_detection())
+        self._detection_patch.start()
         self.root = _probe_root
         drain_after_timers(self.root)
         for w in self.root.winfo_children():
@@ -512,6 +508,7 @@ class TestRestoringBitrateModeAtStartup(unittest.TestCase):
         self._props_patch.stop()
         self._maxcll_patch.stop()
         self._gpu_patch.stop()
+        self._detection_patch.stop()
 
     def test_persisted_bitrate_survives_construction(self):
         gui = HDRConverterGUI(self.root, licensed=True)
@@ -988,6 +985,9 @@ class TestInfoLabel(_GuiTestBase):
         }
         with patch.object(self.gui, 'update_frame_preview'):
             self.gui.select_file()
+            self.assertEqual(self.gui.info_label.cget('text'),
+                             HDRConverterGUI._INFO_PLACEHOLDER)
+            self._settle_file_probe()
         self.assertNotEqual(self.gui.info_label.grid_info(), {})
         self.assertIn('3840', self.gui.info_label.cget('text'))
         self.assertIn('HDR', self.gui.info_label.cget('text'))
@@ -998,6 +998,7 @@ class TestInfoLabel(_GuiTestBase):
         mock_dialog.return_value = 'movie.mkv'
         with patch.object(self.gui, 'update_frame_preview'):
             self.gui.select_file()
+            self._settle_file_probe()
         self.assertEqual(self.gui.info_label.grid_info(), {})
 
 
@@ -1017,7 +1018,9 @@ class TestDropTargetAndClose(_GuiTestBase):
         # _probe_root is alive is safe — the Tcl library is already loaded.
         with patch('src.gui.load_settings', return_value=dict(DEFAULTS)), \
              patch('src.gui.save_settings'), \
-             patch('src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True):
+             patch('src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True), \
+             patch('src.gui.conversion_manager.start_gpu_detection',
+                   return_value=_answered_detection()):
             tmp_root = TkinterDnD.Tk()
             tmp_root.withdraw()
             tmp_gui = HDRConverterGUI(tmp_root, licensed=True)
@@ -1041,10 +1044,14 @@ class _LicensingBase(unittest.TestCase):
         save_p = patch('src.gui.save_settings')
         gpu_p = patch(
             'src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True)
+        detection_p = patch(
+            'src.gui.conversion_manager.start_gpu_detection',
+            return_value=_answered_detection())
         load_p.start()
         save_p.start()
         gpu_p.start()
-        cls._class_patches = [load_p, save_p, gpu_p]
+        detection_p.start()
+        cls._class_patches = [load_p, save_p, gpu_p, detection_p]
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -1214,6 +1221,10 @@ class _FreshGuiTestBase(unittest.TestCase):
         self._gpu_patch = patch(
             'src.gui.conversion_manager.is_gpu_acceleration_available', return_value=True)
         self._gpu_patch.start()
+        self._detection_patch = patch(
+            'src.gui.conversion_manager.start_gpu_detection',
+            return_value=_answered_detection())
+        self._detection_patch.start()
         drain_after_timers(_probe_root)
         for w in _probe_root.winfo_children():
             w.destroy()
@@ -1222,6 +1233,7 @@ class _FreshGuiTestBase(unittest.TestCase):
         self._load_patch.stop()
         self._save_patch.stop()
         self._gpu_patch.stop()
+        self._detection_patch.stop()
 
     def _make_gui(self, licensed: bool) -> HDRConverterGUI:
         return HDRConverterGUI(_probe_root, licensed=licensed)
@@ -1612,6 +1624,7 @@ class TestDolbyVisionInfoBarTag(_GuiTestBase):
         with patch('src.gui.get_video_properties', return_value=self._props(dovi)), \
              patch('src.gui.get_maxcll', return_value=1000.0):
             self.gui._update_info_label('movie.mkv')
+            self._settle_file_probe()
 
     def test_no_tag_on_startup(self):
         self.assertNotIn('Dolby Vision', self.gui.info_label.cget('text'))
@@ -1678,8 +1691,9 @@ class TestFixturesDoNotEscapeTheirMocks(_GuiTestBase):
             'a drained event queue must not leave the update check armed')
 
     def test_preview_pool_is_built_at_the_hardware_scaled_width(self):
-        """The preview pool must stay hardware-scaled (max(1, cpu_count // 4)),
-        introduced in d7274a6 to replace a single daemon thread.
+        """The preview pool must stay hardware-scaled (max(1, cpus // 4) over
+        the CPU budget), introduced in d7274a6 to replace a single daemon
+        thread.
 
         Observed on the real, fully-constructed GUI rather than by re-deriving
         the formula: characterization_test asserts the *constant* is correct,
@@ -1687,11 +1701,9 @@ class TestFixturesDoNotEscapeTheirMocks(_GuiTestBase):
         max_workers. _max_workers is private but stable across CPython
         versions, and it is the only way to read back an executor's width.
         """
-        from src.gui import _PREVIEW_POOL_WORKERS
+        import cpu_budget
         self.assertEqual(self.gui._preview_pool._max_workers,
-                         _PREVIEW_POOL_WORKERS)
-        self.assertEqual(_PREVIEW_POOL_WORKERS,
-                         max(1, (os.cpu_count() or 1) // 4))
+                         max(1, cpu_budget.cpus() // 4))
 
     def test_select_file_does_not_spawn_ffprobe(self):
         with no_real_subprocess('select_file'), no_real_dialogs('select_file'), \
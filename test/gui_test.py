@@ -1,5 +1,6 @@
 import os
 import unittest
+from concurrent.futures import Future
 from unittest import TestCase
 from unittest.mock import patch, MagicMock, call
 import tkinter as tk
@@ -7,6 +8,15 @@ from tkinter import ttk, DoubleVar, BooleanVar
 from src.gui import HDRConverterGUI
 from PIL import Image
 
+
+def _answered_detection():
+    """A GPU detection that has already finished, for start_gpu_detection's
+    patch: the GUI then shows it synchronously, reading the answer from the
+    patched is_gpu_acceleration_available."""
+    detection = Future()
+    detection.set_result(True)
+    return detection
+
 class TestHDRConverterGUI(TestCase):
     """Test suite for HDRConverterGUI class."""
 
@@ -51,6 +61,9 @@ class TestHDRConverterGUI(TestCase):
             'gpu_probe': patch(
                 'src.gui.conversion_manager.is_gpu_acceleration_available',
                 return_value=True),
+            'gpu_detection': patch(
+                'src.gui.conversion_manager.start_gpu_detection',
+                return_value=_answered_detection()),
         }
 
         # Combine all patches
@@ -120,7 +133,7 @@ class TestHDRConverterGUI(TestCase):
         # Verify UI updates
         self._assert_frame_updates()
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     @patch('src.preview.extract_frame_with_conversion')
     @patch('src.preview.extract_frame')
     @patch('src.preview.get_video_properties')
@@ -207,7 +220,7 @@ class TestHDRConverterGUI(TestCase):
         self.gui.original_image_label.config.assert_called_with(image=mock_photo)
         self.gui.converted_image_label.config.assert_called_with(image=mock_photo)
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_render_preview_images_correct_size_when_frame_collapsed(self, mock_photo_image):
         """Frame buttons must render at a usable size even when image_frame height
         is below _PREVIEW_HEIGHT_RESERVE (as happens during loading: the spinner is
@@ -241,7 +254,7 @@ class TestHDRConverterGUI(TestCase):
         self.assertGreaterEqual(used_size[1], 100,
                                 f"Rendered height {used_size[1]} is too small (collapsed frame bug)")
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_render_preview_reuses_previous_size_when_frame_height_constrains(self, mock_photo_image):
         """Clicking a frame button while a render is in progress must not shrink
         the images.  image_frame fills the root vertically (weight=1), so its
@@ -369,6 +382,9 @@ class TestWindowIcon(unittest.TestCase):
             'gpu_probe': patch(
                 'src.gui.conversion_manager.is_gpu_acceleration_available',
                 return_value=True),
+            'gpu_detection': patch(
+                'src.gui.conversion_manager.start_gpu_detection',
+                return_value=_answered_detection()),
         }
         if extra_patches:
             patches.update(extra_patches)
@@ -459,6 +475,9 @@ class TestShowTooltip(TestCase):
             'gpu_probe': patch(
                 'src.gui.conversion_manager.is_gpu_acceleration_available',
                 return_value=True),
+            'gpu_detection': patch(
+                'src.gui.conversion_manager.start_gpu_detection',
+                return_value=_answered_detection()),
         }
         self.patches = patches
         self.mocks = {name: p.start() for name, p in patches.items()}
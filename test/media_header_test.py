@@ -0,0 +1,290 @@
+"""Unit tests for src/media_header.py: MP4 and Matroska headers read into
+ffprobe's JSON shape, and the fallback (None) wherever the header leaves a
+field to the bitstream.
+
+The smoke-test samples' expected values are what ffmpeg reports for them;
+the rest are minimal headers built here. No ffmpeg needed.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import media_header  # noqa: E402
+from _temp_dir import TempDirTestCase  # noqa: E402
+
+_SAMPLES = os.path.join(os.path.dirname(__file__), 'smoke_test_videos')
+
+
+def _box(kind: bytes, payload: bytes = b'') -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _full_box(kind: bytes, payload: bytes) -> bytes:
+    return _box(kind, b'\0\0\0\0' + payload)
+
+
+def _hvc1(*children: bytes, width=3840, height=2160) -> bytes:
+    hvcc = bytearray(23)
+    hvcc[17] = 0xF8 | 2  # bitDepthLumaMinus8 = 2
+    fixed = (b'\0' * 6 + b'\0\1' + b'\0' * 16 + struct.pack('>HH', width, height)
+             + b'\0' * 50)
+    return _box(b'hvc1', fixed + _box(b'hvcC', bytes(hvcc)) + b''.join(children))
+
+
+def _colr(primaries=9, transfer=16) -> bytes:
+    return _box(b'colr', b'nclx' + struct.pack('>HHHB', primaries, transfer, 9, 0))
+
+
+def _mp4(entry: bytes, frames=48, timescale=12288, delta=512, frame_size=1000,
+         stbl_extra=b'', trak_extra=b'') -> bytes:
+    stbl = _box(b'stbl',
+                _full_box(b'stsd', struct.pack('>I', 1) + entry)
+                + _full_box(b'stts', struct.pack('>III', 1, frames, delta))
+                + _full_box(b'stsz', struct.pack('>II', frame_size, frames))
+                + stbl_extra)
+    mdia = trak_extra + _box(b'mdia',
+                _full_box(b'mdhd', struct.pack('>IIII', 0, 0, timescale, frames * delta) + b'\0' * 4)
+                + _full_box(b'hdlr', b'\0' * 4 + b'vide' + b'\0' * 13)
+                + _box(b'minf', stbl))
+    mvhd = _full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, frames * delta * 1000 // timescale)
+                     + b'\0' * 80)
+    return _box(b'ftyp', b'isom\0\0\0\0') + _box(b'moov', mvhd + _box(b'trak', mdia))
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, 'big') + payload
+
+
+def _uint(element_id: int, value: int) -> bytes:
+    return _ebml(element_id, value.to_bytes(4, 'big'))
+
+
+def _mkv(colour: bytes, codec_private: 'bytes | None' = None, dovi_profile=None,
+         cues: 'bytes | None' = None) -> bytes:
+    video = _ebml(0xE0, _uint(0xB0, 3840) + _uint(0xBA, 2160) + _ebml(0x55B0, colour))
+    entry = (_uint(0xD7, 1) + _uint(0x83, 1) + _ebml(0x86, b'V_MPEGH/ISO/HEVC')
+             + _uint(0x23E383, 41708333) + video)
+    if codec_private is not None:
+        entry += _ebml(0x63A2, codec_private)
+    if dovi_profile is not None:
+        record = bytes([1, 0, dovi_profile << 1, 0]) + b'\0' * 20
+        entry += _ebml(0x41E4, _uint(0x41E7, int.from_bytes(b'dvvC', 'big'))
+                       + _ebml(0x41ED, record))
+    audio = _uint(0xD7, 2) + _uint(0x83, 2) + _ebml(0x86, b'A_EAC3')
+    subs = _uint(0xD7, 3) + _uint(0x83, 17) + _ebml(0x86, b'S_TEXT/UTF8')
+    tracks = _ebml(0x1654AE6B, _ebml(0xAE, entry) + _ebml(0xAE, audio) + _ebml(0xAE, subs))
+    info = _ebml(0x1549A966, _uint(0x2AD7B1, 1_000_000) + _ebml(0x4489, struct.pack('>d', 60000.0)))
+    body = info + tracks + _ebml(0x1F43B675, b'\0' * 64)
+    if cues is not None:
+        # Cues after the Cluster, as muxers write them, found via the SeekHead.
+        def seek_head(position):
+            return _ebml(0x114D9B74, _ebml(0x4DBB, _ebml(0x53AB, b'\x1c\x53\xbb\x6b')
+                                           + _uint(0x53AC, position)))
+        body = seek_head(len(seek_head(0)) + len(body)) + body + _ebml(0x1C53BB6B, cues)
+    return (_ebml(0x1A45DFA3, _ebml(0x4282, b'matroska'))
+            + _ebml(0x18538067, body))
+
+
+def _cue_point(time: int, *tracks: int) -> bytes:
+    return _ebml(0xBB, _uint(0xB3, time) + b''.join(
+        _ebml(0xB7, _uint(0xF7, track) + _uint(0xF1, 0)) for track in tracks))
+
+
+class _BuiltHeaders(TempDirTestCase):
+
+    def _probe(self, data: bytes, name='v.mp4'):
+        return media_header.probe(self._file(name, data))
+
+
+class TestSmokeSamples(unittest.TestCase):
+    """The repo's own samples, against what ffmpeg reports for them."""
+
+    def _probe(self, name):
+        data = media_header.probe(os.path.join(_SAMPLES, name))
+        self.assertIsNotNone(data, name)
+        return data
+
+    def test_hdr10_mp4(self):
+        data = self._probe('hdr10_10bit.mp4')
+        video, audio = data['streams']
+        self.assertEqual((video['codec_name'], video['width'], video['height']), ('hevc', 960, 540))
+        self.assertEqual((video['color_primaries'], video['color_transfer']), ('bt2020', 'smpte2084'))
+        self.assertEqual(video['bits_per_raw_sample'], '10')
+        self.assertEqual(video['avg_frame_rate'], '589824/24576')  # 24 fps
+        self.assertEqual(video['bit_rate'], '442552')
+        self.assertEqual(audio['codec_name'], 'aac')
+        self.assertEqual(data['format'], {'duration': '2.000000', 'bit_rate': '562656'})
+        # HDR10 without mdcv/clli boxes: the SEI may have them, so no answer.
+        self.assertNotIn('frames', data)
+
+    def test_twelve_bit_mp4(self):
+        video, = self._probe('hdr10_12bit.mp4')['streams']
+        self.assertEqual(video['bits_per_raw_sample'], '12')
+        self.assertEqual(video['avg_frame_rate'], '1843200/30720')  # 60 fps
+
+    def test_dolby_vision_profile_8(self):
+        video, audio = self._probe('dovi_p8.mp4')['streams']
+        self.assertEqual(video['side_data_list'],
+                         [{'side_data_type': 'DOVI configuration record', 'dv_profile': 8}])
+        self.assertEqual(audio['codec_name'], 'eac3')
+
+    def test_matroska_with_subtitles(self):
+        data = self._probe('hdr10_10bit_truehd_pgs.mkv')
+        self.assertEqual([(s['index'], s['codec_type'], s['codec_name']) for s in data['streams']],
+                         [(0, 'video', 'hevc'), (1, 'audio', 'truehd'),
+                          (2, 'subtitle', 'ass'), (3, 'subtitle', 'hdmv_pgs_subtitle')])
+        video = data['streams'][0]
+        self.assertEqual(video['avg_frame_rate'], '24/1')
+        self.assertEqual(video['bits_per_raw_sample'], '10')
+        self.assertNotIn('bit_rate', video)  # as ffprobe: Matroska has none per stream
+        self.assertEqual(data['format']['duration'], '2.000000')
+
+    def test_colour_only_in_the_sps_falls_back(self):
+        """sdr_h264_8bit.mp4 is tagged bt709 in its SPS but has no colr box."""
+        self.assertIsNone(media_header.probe(os.path.join(_SAMPLES, 'sdr_h264_8bit.mp4')))
+
+
+class TestMp4(_BuiltHeaders):
+
+    def test_mastering_and_content_light_boxes_become_frame_side_data(self):
+        mdcv = _box(b'mdcv', b'\0' * 16 + struct.pack('>II', 10_000_000, 50))
+        clli = _box(b'clli', struct.pack('>HH', 1000, 400))
+        data = self._probe(_mp4(_hvc1(_colr(), mdcv, clli)))
+        self.assertEqual(data['frames'], [{'side_data_list': [
+            {'side_data_type': 'Mastering display metadata', 'max_luminance': '10000000/10000'},
+            {'side_data_type': 'Content light level metadata', 'max_content': 1000},
+        ]}])
+
+    def test_mastering_box_without_content_light_falls_back(self):
+        """MaxCLL may be in SEI only; a header without clli leaves the HDR
+        side data to ffprobe rather than report none."""
+        mdcv = _box(b'mdcv', b'\0' * 16 + struct.pack('>II', 10_000_000, 50))
+        data = self._probe(_mp4(_hvc1(_colr(), mdcv)))
+        self.assertEqual(data['streams'][0]['color_transfer'], 'smpte2084')
+        self.assertNotIn('frames', data)
+
+    def test_sdr_source_has_no_hdr_side_data(self):
+        data = self._probe(_mp4(_hvc1(_colr(primaries=1, transfer=1))))
+        self.assertEqual(data['streams'][0]['color_transfer'], 'bt709')
+        self.assertEqual(data['frames'], [{'side_data_list': []}])
+
+    def test_unspecified_colour_falls_back(self):
+        self.assertIsNone(self._probe(_mp4(_hvc1(_colr(transfer=2)))))
+
+    def test_missing_colr_falls_back(self):
+        self.assertIsNone(self._probe(_mp4(_hvc1())))
+
+    def test_fragmented_mp4_falls_back(self):
+        data = _mp4(_hvc1(_colr()))
+        moov = data.index(b'moov') - 4
+        size = struct.unpack_from('>I', data, moov)[0]
+        mvex = _box(b'mvex', _full_box(b'trex', b'\0' * 20))
+        patched = (data[:moov] + struct.pack('>I', size + len(mvex)) + data[moov + 4:]
+                   + mvex)
+        self.assertIsNone(self._probe(patched))
+
+    def test_truncated_file_falls_back(self):
+        self.assertIsNone(self._probe(_mp4(_hvc1(_colr()))[:120]))
+
+
+class TestMatroska(_BuiltHeaders):
+
+    _HVCC = bytes(17) + bytes([0xF8 | 2]) + bytes(5)
+
+    def test_colour_element_and_hdr_metadata(self):
+        colour = (_uint(0x55BB, 9) + _uint(0x55BA, 16) + _uint(0x55BC, 1000)
+                  + _ebml(0x55D0, _ebml(0x55D9, struct.pack('>d', 4000.0))))
+        data = self._probe(_mkv(colour, self._HVCC), 'v.mkv')
+        video, audio, subs = data['streams']
+        self.assertEqual((video['color_primaries'], video['color_transfer']), ('bt2020', 'smpte2084'))
+        self.assertEqual(video['bits_per_raw_sample'], '10')
+        self.assertEqual(video['avg_frame_rate'], '24000/1001')
+        self.assertEqual((audio['codec_name'], subs['codec_name']), ('eac3', 'subrip'))
+        self.assertEqual(data['format']['duration'], '60.000000')
+        self.assertEqual(data['frames'], [{'side_data_list': [
+            {'side_data_type': 'Mastering display metadata', 'max_luminance': '40000000/10000'},
+            {'side_data_type': 'Content light level metadata', 'max_content': 1000},
+        ]}])
+
+    def test_dolby_vision_block_addition_mapping(self):
+        colour = _uint(0x55BB, 9) + _uint(0x55BA, 16)
+        video = self._probe(_mkv(colour, self._HVCC, dovi_profile=8), 'v.mkv')['streams'][0]
+        self.assertEqual(video['side_data_list'][0]['dv_profile'], 8)
+
+    def test_bit_depth_from_bits_per_channel_without_codec_private(self):
+        colour = _uint(0x55BB, 1) + _uint(0x55BA, 1) + _uint(0x55B2, 8)
+        video = self._probe(_mkv(colour), 'v.mkv')['streams'][0]
+        self.assertEqual(video['bits_per_raw_sample'], '8')
+
+    def test_no_colour_falls_back(self):
+        self.assertIsNone(self._probe(_mkv(b'', self._HVCC), 'v.mkv'))
+
+
+class TestKeyframes(_BuiltHeaders):
+    """keyframes(): the video track's seek index as presentation times."""
+
+    def _keyframes(self, data: bytes, name='v.mp4'):
+        return media_header.keyframes(self._file(name, data))
+
+    # 24 fps at timescale 12288; every sample shown two frames after it is
+    # decoded (B-frame reordering), with the edit list starting at the first.
+    _STSS = _full_box(b'stss', struct.pack('>IIII', 3, 1, 25, 40))
+    _CTTS = _full_box(b'ctts', struct.pack('>III', 1, 48, 1024))
+
+    def _elst(self, *entries) -> bytes:
+        return _box(b'edts', _full_box(b'elst', struct.pack('>I', len(entries)) + b''.join(
+            struct.pack('>IiI', duration, media_time, 0x10000)
+            for duration, media_time in entries)))
+
+    def test_mp4_sync_samples_on_the_edited_timeline(self):
+        data = _mp4(_hvc1(_colr()), stbl_extra=self._STSS + self._CTTS,
+                    trak_extra=self._elst((2000, 1024)))
+        self.assertEqual(self._keyframes(data), [0.0, 1.0, 1.625])
+
+    def test_mp4_leading_empty_edit_delays_the_track(self):
+        data = _mp4(_hvc1(_colr()), stbl_extra=self._STSS + self._CTTS,
+                    trak_extra=self._elst((500, -1), (2000, 1024)))
+        self.assertEqual(self._keyframes(data), [0.5, 1.5, 2.125])
+
+    def test_mp4_without_edit_list_starts_at_first_presentation(self):
+        data = _mp4(_hvc1(_colr()), stbl_extra=self._STSS + self._CTTS)
+        self.assertEqual(self._keyframes(data), [0.0, 1.0, 1.625])
+
+    def test_mp4_without_stss_is_all_keyframes(self):
+        self.assertEqual(len(self._keyframes(_mp4(_hvc1(_colr()), frames=12))), 12)
+
+    def test_matroska_cues_for_the_video_track_only(self):
+        cues = _cue_point(0, 1, 2) + _cue_point(2002, 1) + _cue_point(3000, 2)
+        data = _mkv(_uint(0x55BB, 9), cues=cues)
+        self.assertEqual(self._keyframes(data, 'v.mkv'), [0.0, 2.002])
+
+    def test_matroska_without_cues_has_no_index(self):
+        self.assertIsNone(self._keyframes(_mkv(_uint(0x55BB, 9)), 'v.mkv'))
+        self.assertIsNone(self._keyframes(_mkv(_uint(0x55BB, 9), cues=_cue_point(0, 2)), 'v.mkv'))
+
+    def test_smoke_samples_start_on_a_keyframe(self):
+        for name in ('hdr10_10bit.mp4', 'dovi_p8.mp4', 'hdr10_10bit_truehd_pgs.mkv'):
+            self.assertEqual(media_header.keyframes(os.path.join(_SAMPLES, name)), [0.0], name)
+
+    def test_other_files_have_no_index(self):
+        self.assertIsNone(self._keyframes(b'not a video at all', 'v.avi'))
+        self.assertIsNone(media_header.keyframes(os.path.join(self.tmp, 'missing.mkv')))
+
+
+class TestNotAContainer(_BuiltHeaders):
+
+    def test_other_files_and_empty_files_are_not_probed(self):
+        self.assertIsNone(self._probe(b'not a video at all', 'v.avi'))
+        self.assertIsNone(self._probe(b'', 'empty.mp4'))
+        self.assertIsNone(media_header.probe(os.path.join(self.tmp, 'missing.mp4')))
+
+
+if __name__ == '__main__':
+    unittest.main()
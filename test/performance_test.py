@@ -14,8 +14,13 @@ Two complementary kinds:
 A real-ffmpeg extraction audit runs only when a sample video is present (skips on
 CI), reporting the slow decode-bound path with a loose catastrophe ceiling.
 """
+import io
+import json
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
 import time
 import unittest
 from unittest.mock import patch, MagicMock
@@ -32,13 +37,16 @@ from src.utils import (
 )
 
 
-def _png_bytes():
-    import io
-    buf = io.BytesIO()
-    Image.new('RGB', (8, 8), (1, 2, 3)).save(buf, format='PNG')
-    return buf.getvalue()
+def _frame_pipe(stdout):
+    """A Popen stand-in whose stdout is *stdout*, for utils._run_frame_pipe."""
+    proc = MagicMock()
+    proc.stdout, proc.stderr = io.BytesIO(stdout), io.BytesIO(b'')
+    proc.returncode = 0
+    return proc
+
 
 SMOKE_DIR = os.path.join(os.path.dirname(__file__), 'smoke_test_videos')
+_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
 
 
 def _bare_gui():
@@ -72,7 +80,7 @@ _FFMPEG_OK = bool(FFMPEG_EXECUTABLE) and os.path.exists(FFMPEG_EXECUTABLE)
 class TestSnappinessGuards(unittest.TestCase):
     """Deterministic invariants: the interactions that must stay subprocess-free."""
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     @patch('src.preview.get_video_properties')
     @patch('src.preview.extract_frame_with_conversion')
     @patch('src.preview.extract_frame')
@@ -93,7 +101,7 @@ class TestSnappinessGuards(unittest.TestCase):
         mock_convert.assert_not_called()
         mock_props.assert_not_called()
 
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe', return_value=[Image.new('RGB', (8, 8))])
     @patch('src.utils.get_video_properties', return_value={'duration': 100, 'width': 1920, 'height': 1080})
     @patch('src.utils._probe_hdr_metadata', return_value={'maxcll': 200.0})
     def test_maxfall_not_probed_during_preview_extraction(self, mock_probe, _mock_props, mock_run):
@@ -101,13 +109,12 @@ class TestSnappinessGuards(unittest.TestCase):
         # so HDR metadata probing is never needed during preview extraction.
         clear_hdr_metadata_cache()
         self.addCleanup(clear_hdr_metadata_cache)
-        mock_run.return_value = _png_bytes()
         for t, tonemap in [(10.0, 'mobius'), (20.0, 'hable'), (30.0, 'reinhard')]:
             extract_frame_with_conversion('clip.mkv', gamma=1.0, tonemapper=tonemap, time_position=t,
                                           width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1])
         self.assertEqual(mock_probe.call_count, 0)
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_gamma_change_does_not_resize_window(self, _mock_photo):
         gui = _bare_gui()
         gui.display_image_var = MagicMock()
@@ -122,7 +129,7 @@ class TestSnappinessGuards(unittest.TestCase):
 
         gui.adjust_window_size.assert_not_called()  # no geometry thrash per tick
 
-    @patch('src.preview.ImageTk.PhotoImage')
+    @patch('PIL.ImageTk.PhotoImage')
     def test_render_caches_converted_base_at_preview_size(self, _mock_photo):
         # The cached base must be downsized to preview size so gamma stays cheap.
         gui = _bare_gui()
@@ -141,29 +148,59 @@ class TestSnappinessGuards(unittest.TestCase):
 
         self.assertEqual(gui._converted_preview_base.size, PREVIEW_SIZE)
 
-    @patch('src.preview.extract_frame_with_conversion', return_value='c')
-    @patch('src.preview.extract_frame', return_value='o')
-    def test_preview_extraction_requests_reduced_resolution(self, mock_extract, mock_convert):
+    @patch('src.preview.extract_preview_frames', return_value=[('o', ['c'])])
+    def test_preview_extraction_requests_the_pane_box(self, mock_fan_out):
         gui = _bare_gui()
-        gui._extract_preview_images('in.mp4', 5.0, 'mobius')
-        self.assertEqual(
-            (mock_extract.call_args.kwargs['width'], mock_extract.call_args.kwargs['height']),
-            PREVIEW_SIZE)
-        self.assertEqual(
-            (mock_convert.call_args.kwargs['width'], mock_convert.call_args.kwargs['height']),
-            PREVIEW_SIZE)
+        gui._extract_preview_images('in.mp4', 5.0, 'mobius', box=(960, 640))
+        self.assertEqual(mock_fan_out.call_args[0][4:6], (960, 640))
 
     @patch('src.preview.extract_frame_with_conversion', return_value='c')
     @patch('src.preview.extract_frame', return_value='o')
-    def test_revisiting_cached_frame_spawns_no_ffmpeg(self, mock_extract, mock_convert):
+    @patch('src.preview.extract_preview_frames', return_value=[('o', ['c'])])
+    def test_revisiting_cached_frame_spawns_no_ffmpeg(self, mock_fan_out, mock_extract,
+                                                      mock_convert):
         gui = _bare_gui()
         gui._extract_preview_images('in.mp4', 5.0, 'reinhard')  # populate cache
-        mock_extract.reset_mock()
-        mock_convert.reset_mock()
+        mock_fan_out.assert_called_once()  # one decode for both frames
         gui._extract_preview_images('in.mp4', 5.0, 'reinhard')  # revisit
+        mock_fan_out.assert_called_once()
         mock_extract.assert_not_called()
         mock_convert.assert_not_called()
 
+    def test_reopened_file_previews_from_disk_without_ffmpeg(self):
+        """A later session finds the frames in the disk store (frame_store)
+        and promotes them into memory: no ffmpeg at all."""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        video = os.path.join(tmp, 'in.mp4')
+        with open(video, 'wb') as f:
+            f.write(b'x')
+
+        def session():
+            gui = _bare_gui()
+            with patch('src.preview.cache_dir', return_value=tmp), \
+                    patch('src.preview.ffmpeg_executable', return_value=sys.executable):
+                gui._init_preview_cache()
+            return gui
+
+        original = Image.new('RGB', (64, 36), (10, 20, 30))
+        converted = Image.new('RGB', (64, 36), (40, 50, 60))
+        first = session()
+        with patch('src.preview.extract_preview_frames',
+                   return_value=[(original, [converted])]):
+            first._extract_preview_images(video, 5.0, 'reinhard')
+        first._preview_store.flush()
+
+        second = session()
+        with patch('src.preview.extract_preview_frames') as mock_fan_out, \
+                patch('src.utils.subprocess.Popen') as mock_popen:
+            got_original, got_converted = second._extract_preview_images(video, 5.0, 'reinhard')
+        mock_fan_out.assert_not_called()
+        mock_popen.assert_not_called()
+        self.assertEqual(got_original.tobytes(), original.tobytes())
+        self.assertEqual(got_converted.tobytes(), converted.tobytes())
+        self.assertIn((video, 5.0, PREVIEW_SIZE), second._preview_cache_original)
+
 
 class TestTimingBudgets(unittest.TestCase):
     """Cheap hot-path operations measured with generous ceilings + a [perf] report."""
@@ -196,6 +233,113 @@ class TestTimingBudgets(unittest.TestCase):
                          f"[perf] adjust_gamma pane={ms_small:.2f}ms 4K={ms_big:.2f}ms "
                          f"(~{ms_big / max(ms_small, 1e-3):.0f}x)")
 
+    def test_raw_preview_frame_transport_beats_png(self):
+        # A PREVIEW_SIZE frame off the pipe: raw rgb24 behind a PPM header is
+        # read straight into its buffer, PNG is zlib-inflated by PIL. The
+        # picture is a smooth gradient, PNG's best case.
+        import src.utils as utils
+        frame = Image.linear_gradient('L').resize(PREVIEW_SIZE).convert('RGB')
+        png = io.BytesIO()
+        frame.save(png, format='PNG', compress_level=1)
+        raw = b'P6\n%d %d\n255\n' % PREVIEW_SIZE + frame.tobytes()
+
+        def read(stdout, args):
+            with patch('src.utils.subprocess.Popen', return_value=_frame_pipe(stdout)):
+                frames = utils._run_frame_pipe(['ffmpeg'] + args, 'failed')
+            frames[0].load()
+
+        with patch.object(utils, '_raw_frames_unsupported', False):
+            ms_raw = _best_ms(lambda: read(raw, utils._RAW_FRAME_ARGS), runs=3)
+            ms_png = _best_ms(lambda: read(png.getvalue(), utils._PNG_FRAME_ARGS), runs=3)
+        self.assertLess(ms_raw, ms_png,
+                         f"[perf] 4K preview frame off the pipe: raw={ms_raw:.1f}ms "
+                         f"png={ms_png:.1f}ms")
+
+
+# Run in a fresh interpreter: everything here is about what a cold launch pays,
+# which a test process that has already imported the app can't observe.
+_COLD_IMPORT = """
+import json, logging, sys, time
+start = time.perf_counter()
+import gui
+elapsed = time.perf_counter() - start
+utils = sys.modules['utils']
+print(json.dumps({
+    'import_ms': elapsed * 1000.0,
+    'pil_imported': 'PIL' in sys.modules,
+    'ffmpeg_located': utils._located_ffmpeg is not None
+                      or 'FFMPEG_EXECUTABLE' in vars(utils),
+    'logging_configured': bool(logging.root.handlers),
+}))
+"""
+
+# main.pyw's sequence up to the event loop. Dialogs are stubbed: a missing
+# ffmpeg or GPU would otherwise leave a modal box waiting for a click.
+_COLD_LAUNCH = """
+import json, time
+start = time.perf_counter()
+from tkinterdnd2 import TkinterDnD
+import gui
+for name in ('showerror', 'showwarning', 'showinfo'):
+    setattr(gui.messagebox, name, lambda *a, **k: None)
+try:
+    root = TkinterDnD.Tk()
+except Exception as e:
+    print(json.dumps({'tk_error': f'{type(e).__name__}: {e}'}))
+    raise SystemExit
+root.withdraw()
+app = gui.HDRConverterGUI(root, licensed=False)
+root.deiconify()
+root.update_idletasks()
+window = time.perf_counter() - start
+ready = []
+root.after_idle(lambda: ready.append(time.perf_counter() - start))
+while not ready:
+    root.update()
+print(json.dumps({'window_ms': window * 1000.0, 'interactive_ms': ready[0] * 1000.0}))
+root.destroy()
+"""
+
+
+def _cold_run(script):
+    """Run *script* in a new interpreter with src/ importable; its last
+    stdout line, parsed."""
+    out = subprocess.run([sys.executable, '-c', script], cwd=_SRC, capture_output=True,
+                         text=True, timeout=120, env={**os.environ, 'PYTHONPATH': _SRC})
+    if out.returncode != 0:
+        raise AssertionError(f'startup script failed:\n{out.stderr}')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart(unittest.TestCase):
+    """What a launch pays before the window shows: import-time work is
+    asserted structurally, the times against generous ceilings."""
+
+    def test_importing_the_app_does_no_startup_work(self):
+        """PIL, ffmpeg lookup and logging setup all wait for first use or
+        the entry point -- a module that pulls one back into import time
+        adds it to every launch."""
+        report = _cold_run(_COLD_IMPORT)
+        self.assertFalse(report['pil_imported'], 'importing gui imported PIL')
+        self.assertFalse(report['ffmpeg_located'], 'importing gui located ffmpeg')
+        self.assertFalse(report['logging_configured'], 'importing gui configured logging')
+
+    def test_import_time_budget(self):
+        best = min(_cold_run(_COLD_IMPORT)['import_ms'] for _ in range(3))
+        # ~170ms observed; 1.5s is headroom for a cold disk or a loaded CI box.
+        self.assertLess(best, 1500.0, f"[perf] import gui: {best:.0f} ms")
+
+    def test_time_to_window_and_interactive_budget(self):
+        report = _cold_run(_COLD_LAUNCH)
+        if 'tk_error' in report:
+            self.skipTest(f"no Tk display [{report['tk_error']}]")
+        # The window no longer waits for GPU detection (it runs behind it),
+        # so both are bounded by imports plus building the widgets.
+        self.assertLess(report['window_ms'], 4000.0,
+                        f"[perf] time to window: {report['window_ms']:.0f} ms")
+        self.assertLess(report['interactive_ms'], 5000.0,
+                        f"[perf] time to interactive: {report['interactive_ms']:.0f} ms")
+
 
 @unittest.skipUnless(_SAMPLE and _FFMPEG_OK, "no sample video / ffmpeg for the extraction audit")
 class TestExtractionPerfAudit(unittest.TestCase):
@@ -7,14 +7,17 @@ ConversionManager instance -- see
 docs/superpowers/specs/2026-08-08-platform-utils-seam-design.md.
 """
 import os
+import shutil
 import sys
 import subprocess
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
+from src import platform_utils
 from src.platform_utils import gpu_name
 
 
@@ -162,5 +165,30 @@ class TestGpuName(unittest.TestCase):
         self.assertIsNone(gpu_name(nvidia_present=True, gpu_encoder=None))
 
 
+
+class TestGpuDriverIdentity(unittest.TestCase):
+    """gpu_driver_identity() keys the capability store: it must change when
+    a driver file does, and only stat() them."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.driver = os.path.join(self.tmp, 'vulkan-1.dll')
+        with open(self.driver, 'wb') as f:
+            f.write(b'v1')
+        patcher = patch('src.platform_utils._gpu_driver_files',
+                        return_value=[self.driver, os.path.join(self.tmp, 'missing.dll')])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_changes_when_a_driver_file_changes(self):
+        before = platform_utils.gpu_driver_identity()
+        self.assertIn('vulkan-1.dll', before)
+        self.assertNotIn('missing.dll', before)
+        with open(self.driver, 'ab') as f:
+            f.write(b' updated')
+        self.assertNotEqual(platform_utils.gpu_driver_identity(), before)
+
+
 if __name__ == '__main__':
     unittest.main()
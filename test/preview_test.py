@@ -31,35 +31,41 @@ _VALID_PNG = (
 
 class TestPreviewLutToggle(unittest.TestCase):
 
+    @patch('preview.extract_preview_frames')
     @patch('preview.extract_frame_with_conversion')
     @patch('preview.extract_frame')
-    def test_toggling_lut_only_recomputes_converted_frame(self, mock_extract_frame, mock_extract_conv):
+    def test_toggling_lut_only_recomputes_converted_frame(
+            self, mock_extract_frame, mock_extract_conv, mock_fan_out):
         gui = _FakeGui()
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_extract_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
+        img = Image.open(__import__('io').BytesIO(_VALID_PNG))
+        mock_fan_out.return_value = [(img, [img])]
+        mock_extract_conv.return_value = img
 
         gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
         gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=False)
 
-        # Original (HDR) frame extracted only once -- its cache key doesn't
-        # include lut_enabled, so the second call must reuse the cached frame.
-        self.assertEqual(mock_extract_frame.call_count, 1)
-        # Converted (SDR) frame extracted twice -- once per distinct lut_enabled state.
-        self.assertEqual(mock_extract_conv.call_count, 2)
-        self.assertTrue(mock_extract_conv.call_args_list[0].kwargs['lut_enabled'])   # first call: lut_enabled=True
-        self.assertFalse(mock_extract_conv.call_args_list[1].kwargs['lut_enabled'])  # second call: lut_enabled=False
-
+        # First call: both frames from one decode, with the LUT.
+        mock_fan_out.assert_called_once()
+        self.assertTrue(mock_fan_out.call_args.kwargs['lut_enabled'])
+        # Original (HDR) frame reused -- its cache key doesn't include
+        # lut_enabled, so the second call must reuse the cached frame.
+        mock_extract_frame.assert_not_called()
+        # Converted (SDR) frame extracted again for the new lut_enabled state.
+        mock_extract_conv.assert_called_once()
+        self.assertFalse(mock_extract_conv.call_args.kwargs['lut_enabled'])
+
+    @patch('preview.extract_preview_frames')
     @patch('preview.extract_frame_with_conversion')
-    @patch('preview.extract_frame')
-    def test_same_lut_state_reuses_converted_cache(self, mock_extract_frame, mock_extract_conv):
+    def test_same_lut_state_reuses_converted_cache(self, mock_extract_conv, mock_fan_out):
         gui = _FakeGui()
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_extract_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
+        img = Image.open(__import__('io').BytesIO(_VALID_PNG))
+        mock_fan_out.return_value = [(img, [img])]
 
         gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
         gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
 
-        self.assertEqual(mock_extract_conv.call_count, 1)
+        mock_fan_out.assert_called_once()
+        mock_extract_conv.assert_not_called()
 
     @patch('preview.extract_frames_with_conversion_batch')
     @patch('preview.extract_frame_with_conversion')
@@ -90,11 +96,12 @@ class TestPreviewLutToggle(unittest.TestCase):
 
         mock_extract_conv.assert_not_called()
 
+    @patch('preview.vulkan_libplacebo_available', return_value=True)
     @patch('preview.extract_frame_with_gpu_conversion')
     @patch('preview.extract_frames_with_gpu_conversion_batch')
     @patch('preview.extract_frame')
     def test_gpu_only_prewarm_hits_cache_when_toggle_off_too(
-            self, mock_extract_frame, mock_gpu_batch, mock_gpu_single):
+            self, mock_extract_frame, mock_gpu_batch, mock_gpu_single, _avail):
         """extract_frames_with_gpu_conversion_batch now threads lut_enabled
         through to every extract_frame_with_gpu_conversion call, so a
         toggle-off prewarm produces genuinely toggle-off content -- it's a
@@ -108,6 +115,8 @@ class TestPreviewLutToggle(unittest.TestCase):
         lut_enabled -- is fixed.)
         """
         gui = _FakeGui()
+        gui.gpu_accel_var = MagicMock()
+        gui.gpu_accel_var.get.return_value = True
         gui._preview_generation = 1
         gui._preview_cache_original = {}
         gui._preview_cache_converted = {}
@@ -122,15 +131,18 @@ class TestPreviewLutToggle(unittest.TestCase):
         mock_gpu_batch.assert_called_once_with(
             'v.mp4', [1.0], 1.0, 'bt.2390', 3840, 2160, lut_enabled=False)
 
+    @patch('preview.vulkan_libplacebo_available', return_value=True)
     @patch('preview.extract_frame_with_gpu_conversion')
     @patch('preview.extract_frames_with_gpu_conversion_batch')
     @patch('preview.extract_frame')
     def test_gpu_only_prewarm_still_hits_cache_when_toggle_on(
-            self, mock_extract_frame, mock_gpu_batch, mock_gpu_single):
+            self, mock_extract_frame, mock_gpu_batch, mock_gpu_single, _avail):
         """Regression guard: the toggle-ON (default) case must still be a
         genuine cache hit -- prewarm speedup must not regress for the
         default state while fixing the toggle-off poisoning case above."""
         gui = _FakeGui()
+        gui.gpu_accel_var = MagicMock()
+        gui.gpu_accel_var.get.return_value = True
         gui._preview_generation = 1
         gui._preview_cache_original = {}
         gui._preview_cache_converted = {}
@@ -162,89 +174,53 @@ class TestPreviewUsesGpuTonemapWhenActive(unittest.TestCase):
         gui.gpu_accel_var.get.return_value = gpu_accel
         return gui
 
-    @patch('preview.vulkan_libplacebo_available', return_value=True)
-    @patch('preview.extract_frame_with_gpu_conversion')
-    @patch('preview.extract_frame_with_conversion')
-    @patch('preview.extract_frame')
-    def test_cpu_capable_tonemapper_uses_gpu_extraction_when_gpu_active(
-            self, mock_extract_frame, mock_cpu_conv, mock_gpu_conv, _mock_probe):
-        gui = self._gui(gpu_accel=True)
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_gpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-
-        gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
-
-        mock_gpu_conv.assert_called_once()
-        mock_cpu_conv.assert_not_called()
+    def _extract(self, gui, tonemapper):
+        """Run a first (uncached) extraction; return whether it went to the GPU."""
+        img = Image.open(__import__('io').BytesIO(_VALID_PNG))
+        with patch('preview.extract_preview_frames', return_value=[(img, [img])]) as fan_out:
+            gui._extract_preview_images('v.mp4', 1.0, tonemapper, lut_enabled=True)
+        fan_out.assert_called_once()
+        return fan_out.call_args.kwargs['gpu']
 
     @patch('preview.vulkan_libplacebo_available', return_value=True)
-    @patch('preview.extract_frame_with_gpu_conversion')
-    @patch('preview.extract_frame_with_conversion')
-    @patch('preview.extract_frame')
-    def test_cpu_capable_tonemapper_uses_cpu_extraction_when_gpu_off(
-            self, mock_extract_frame, mock_cpu_conv, mock_gpu_conv, _mock_probe):
-        gui = self._gui(gpu_accel=False)
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_cpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
+    def test_cpu_capable_tonemapper_uses_gpu_extraction_when_gpu_active(self, _mock_probe):
+        self.assertIs(self._extract(self._gui(gpu_accel=True), 'reinhard'), True)
 
-        gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
-
-        mock_cpu_conv.assert_called_once()
-        mock_gpu_conv.assert_not_called()
+    @patch('preview.vulkan_libplacebo_available', return_value=True)
+    def test_cpu_capable_tonemapper_uses_cpu_extraction_when_gpu_off(self, _mock_probe):
+        self.assertIs(self._extract(self._gui(gpu_accel=False), 'reinhard'), False)
 
     @patch('preview.vulkan_libplacebo_available', return_value=False)
-    @patch('preview.extract_frame_with_gpu_conversion')
-    @patch('preview.extract_frame_with_conversion')
-    @patch('preview.extract_frame')
     def test_cpu_capable_tonemapper_falls_back_to_cpu_when_libplacebo_unavailable(
-            self, mock_extract_frame, mock_cpu_conv, mock_gpu_conv, _mock_probe):
+            self, _mock_probe):
         """GPU toggle on but this machine can't actually run libplacebo --
         must fall back to CPU extraction, matching what real export does
         (construct_ffmpeg_command's use_libplacebo is also gated on the probe)."""
-        gui = self._gui(gpu_accel=True)
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_cpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-
-        gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
-
-        mock_cpu_conv.assert_called_once()
-        mock_gpu_conv.assert_not_called()
+        self.assertIs(self._extract(self._gui(gpu_accel=True), 'reinhard'), False)
 
     @patch('preview.vulkan_libplacebo_available', return_value=False)
-    @patch('preview.extract_frame_with_gpu_conversion')
-    @patch('preview.extract_frame')
-    def test_gpu_only_tonemapper_still_uses_gpu_extraction_regardless_of_toggle(
-            self, mock_extract_frame, mock_gpu_conv, _mock_probe):
-        """BT.2390/Spline have no CPU implementation at all -- unconditional,
-        regardless of the GPU accel toggle or the libplacebo probe result."""
-        gui = self._gui(gpu_accel=False)
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_gpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-
-        gui._extract_preview_images('v.mp4', 1.0, 'bt.2390', lut_enabled=True)
-
-        mock_gpu_conv.assert_called_once()
+    def test_libplacebo_curve_uses_cpu_extraction_when_gpu_off(self, _mock_probe):
+        """BT.2390/Spline run on the CPU as a fused LUT now, so with GPU
+        tonemapping off they no longer pay a Vulkan init per preview frame."""
+        self.assertIs(self._extract(self._gui(gpu_accel=False), 'bt.2390'), False)
 
     @patch('preview.vulkan_libplacebo_available', return_value=True)
     @patch('preview.extract_frame_with_gpu_conversion')
     @patch('preview.extract_frame_with_conversion')
-    @patch('preview.extract_frame')
     def test_toggling_gpu_accel_invalidates_cache_for_same_tonemapper(
-            self, mock_extract_frame, mock_cpu_conv, mock_gpu_conv, _mock_probe):
+            self, mock_cpu_conv, mock_gpu_conv, _mock_probe):
         """The same tonemapper name renders differently via CPU zscale vs GPU
         libplacebo -- toggling 'Use GPU' must not silently reuse the other
         path's cached frame."""
-        mock_extract_frame.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
-        mock_gpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
         mock_cpu_conv.return_value = Image.open(__import__('io').BytesIO(_VALID_PNG))
 
         gui = self._gui(gpu_accel=True)
-        gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
+        self.assertIs(self._extract(gui, 'reinhard'), True)
         gui.gpu_accel_var.get.return_value = False
         gui._extract_preview_images('v.mp4', 1.0, 'reinhard', lut_enabled=True)
 
-        mock_gpu_conv.assert_called_once()
         mock_cpu_conv.assert_called_once()
+        mock_gpu_conv.assert_not_called()
 
 
 class TestDisplayFramesReadsLutExportVar(unittest.TestCase):
@@ -296,6 +272,44 @@ class TestDisplayFramesReadsLutExportVar(unittest.TestCase):
         self.assertTrue(mock_extract.call_args.args[-1])
 
 
+class TestPreviewAutoCrop(unittest.TestCase):
+    """With auto_crop_var set, both preview frames show the crop export will
+    apply, cut from the cached full frames rather than re-extracted."""
+
+    def _gui(self, auto_crop: bool):
+        gui = TestDisplayFramesReadsLutExportVar()._gui(lut_enabled=True)
+        gui.auto_crop_var = MagicMock(); gui.auto_crop_var.get.return_value = auto_crop
+        return gui
+
+    @patch('preview.get_video_properties', return_value={'width': 1920, 'height': 1080})
+    @patch('preview.detect_crop', return_value=(1920, 800, 0, 140))
+    @patch('preview._HDRPreviewMixin._extract_preview_images')
+    def test_both_frames_are_cropped_at_preview_scale(self, mock_extract, _crop, _props):
+        mock_extract.return_value = (Image.new('RGB', (960, 540)),
+                                     Image.new('RGB', (960, 540)))
+        gui = self._gui(auto_crop=True)
+        gui.display_frames('v.mp4')
+        original, converted = gui._render_preview_images.call_args.args[:2]
+        self.assertEqual(original.size, (960, 400))
+        self.assertEqual(converted.size, (960, 400))
+
+    @patch('preview.detect_crop')
+    @patch('preview._HDRPreviewMixin._extract_preview_images')
+    def test_off_leaves_frames_whole_and_never_detects(self, mock_extract, mock_crop):
+        frames = (Image.new('RGB', (960, 540)), Image.new('RGB', (960, 540)))
+        mock_extract.return_value = frames
+        gui = self._gui(auto_crop=False)
+        gui.display_frames('v.mp4')
+        self.assertEqual(gui._render_preview_images.call_args.args[:2], frames)
+        mock_crop.assert_not_called()
+
+    @patch('preview.get_video_properties', return_value={'width': 1920, 'height': 1080})
+    @patch('preview.detect_crop', return_value=None)
+    def test_nothing_to_crop_returns_the_frames_as_they_are(self, _crop, _props):
+        frame = Image.new('RGB', (960, 540))
+        self.assertEqual(_FakeGui._crop_preview_frames('v.mp4', frame), (frame,))
+
+
 class TestEffectiveLutEnabled(unittest.TestCase):
     """_effective_lut_enabled is the single place that decides what
     preview/export actually use: lut_export_var's raw checked state, applied
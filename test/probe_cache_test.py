@@ -0,0 +1,225 @@
+"""Unit tests for src/probe_cache.py: lookups validated against the file and
+the probing tool, eviction, the round trip through disk, and FileMemo's
+single-flight in-memory layer. Real files in a
+temp dir -- no ffmpeg."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import probe_cache  # noqa: E402
+from _temp_dir import TempDirTestCase  # noqa: E402
+
+
+class _StoreTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tool = self._file('ffprobe', b'binary')
+        self.store_path = os.path.join(self.tmp, 'cache', 'probes.json')
+
+    def _store(self, **kwargs):
+        return probe_cache.ProbeStore(self.store_path, self.tool, **kwargs)
+
+
+class TestLookup(_StoreTest):
+
+    def test_miss_then_hit(self):
+        video = self._file('a.mkv')
+        store = self._store()
+        self.assertIs(store.get(video, 'props'), probe_cache.MISSING)
+        store.put(video, 'props', {'width': 1920})
+        self.assertEqual(store.get(video, 'props'), {'width': 1920})
+        self.assertIs(store.get(video, 'hdr'), probe_cache.MISSING)
+
+    def test_a_changed_file_is_a_miss_and_drops_its_other_kinds(self):
+        video = self._file('a.mkv')
+        store = self._store()
+        store.put(video, 'props', {'width': 1920})
+        store.put(video, 'hdr', {'maxcll': 1000.0})
+        with open(video, 'ab') as f:
+            f.write(b'grown')
+        self.assertIs(store.get(video, 'props'), probe_cache.MISSING)
+        store.put(video, 'props', {'width': 3840})
+        self.assertEqual(store.get(video, 'props'), {'width': 3840})
+        self.assertIs(store.get(video, 'hdr'), probe_cache.MISSING)
+
+    def test_a_missing_file_is_never_stored(self):
+        gone = os.path.join(self.tmp, 'gone.mkv')
+        store = self._store()
+        store.put(gone, 'props', {'width': 1})
+        self.assertIs(store.get(gone, 'props'), probe_cache.MISSING)
+
+    def test_no_tool_means_no_caching(self):
+        video = self._file('a.mkv')
+        store = probe_cache.ProbeStore(self.store_path, None)
+        store.put(video, 'props', {'width': 1920})
+        self.assertIs(store.get(video, 'props'), probe_cache.MISSING)
+
+
+class TestPersistence(_StoreTest):
+
+    def test_saved_entries_load_in_a_new_store(self):
+        video = self._file('a.mkv')
+        store = self._store()
+        store.put(video, 'props', {'width': 1920})
+        store.save()
+        self.assertEqual(self._store().get(video, 'props'), {'width': 1920})
+
+    def test_a_different_tool_build_ignores_the_file(self):
+        video = self._file('a.mkv')
+        store = self._store()
+        store.put(video, 'props', {'width': 1920})
+        store.save()
+        with open(self.tool, 'ab') as f:
+            f.write(b'updated')
+        self.assertIs(self._store().get(video, 'props'), probe_cache.MISSING)
+
+    def test_a_corrupt_file_starts_empty(self):
+        os.makedirs(os.path.dirname(self.store_path))
+        with open(self.store_path, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        video = self._file('a.mkv')
+        store = self._store()
+        self.assertIs(store.get(video, 'props'), probe_cache.MISSING)
+        store.put(video, 'props', {'width': 1920})
+        store.save()
+        with open(self.store_path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['version'], probe_cache._STORE_VERSION)
+
+    def test_puts_in_quick_succession_are_saved_once(self):
+        store = self._store()
+        with patch.object(store, 'save', wraps=store.save) as save:
+            for i in range(5):
+                store.put(self._file(f'{i}.mkv'), 'props', {'n': i})
+        self.assertEqual(save.call_count, 1)
+
+    def test_an_unwritable_location_is_logged_not_raised(self):
+        blocker = self._file('blocker')
+        store = probe_cache.ProbeStore(os.path.join(blocker, 'probes.json'), self.tool)
+        store.put(self._file('a.mkv'), 'props', {'width': 1})  # must not raise
+        self.assertFalse(os.path.exists(store.path))
+
+
+class TestEviction(_StoreTest):
+
+    def test_least_recently_used_entries_go_first(self):
+        store = self._store(max_entries=10)
+        videos = [self._file(f'{i}.mkv') for i in range(11)]
+        clock = iter(range(100))
+        with patch.object(probe_cache.time, 'time', side_effect=lambda: next(clock)):
+            for video in videos[:10]:
+                store.put(video, 'props', {})
+            store.get(videos[0], 'props')  # now the most recently used
+            store.put(videos[10], 'props', {})
+        kept = [v for v in videos if store.get(v, 'props') is not probe_cache.MISSING]
+        self.assertEqual(len(kept), 9)
+        self.assertIn(videos[0], kept)
+        self.assertIn(videos[10], kept)
+        self.assertNotIn(videos[1], kept)
+
+
+class TestFileMemo(_StoreTest):
+
+    def test_concurrent_callers_for_one_file_compute_once(self):
+        video = self._file('a.mkv')
+        memo = probe_cache.FileMemo()
+        calls, start = [], threading.Barrier(4)
+
+        def compute(path):
+            time.sleep(0.05)
+            calls.append(path)
+            return {'width': 1920}
+
+        results = []
+
+        def worker():
+            start.wait()
+            results.append(memo.get(video, compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'width': 1920}] * 4)
+
+    def test_different_files_compute_in_parallel(self):
+        memo = probe_cache.FileMemo()
+        slow_started, release = threading.Event(), threading.Event()
+
+        def slow(path):
+            slow_started.set()
+            release.wait(5)
+            return 'slow'
+
+        t = threading.Thread(target=memo.get, args=(self._file('slow.mkv'), slow))
+        t.start()
+        self.addCleanup(t.join, 5)
+        self.addCleanup(release.set)
+        self.assertTrue(slow_started.wait(5))
+        # Must not wait behind the slow file.
+        self.assertEqual(memo.get(self._file('fast.mkv'), lambda path: 'fast'), 'fast')
+
+    def test_relative_and_absolute_paths_share_an_entry(self):
+        video = self._file('a.mkv')
+        memo = probe_cache.FileMemo()
+        memo.get(video, lambda path: 1)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp)
+        self.assertEqual(memo.get('a.mkv', lambda path: 2), 1)
+
+    def test_a_changed_file_is_recomputed(self):
+        video = self._file('a.mkv')
+        memo = probe_cache.FileMemo()
+        memo.get(video, lambda path: 1)
+        with open(video, 'ab') as f:
+            f.write(b'grown')
+        self.assertEqual(memo.get(video, lambda path: 2), 2)
+
+    def test_rejected_results_and_errors_are_not_kept(self):
+        video = self._file('a.mkv')
+        memo = probe_cache.FileMemo()
+        self.assertIsNone(memo.get(video, lambda path: None, keep=lambda v: v is not None))
+        with self.assertRaises(RuntimeError):
+            memo.get(video, lambda path: (_ for _ in ()).throw(RuntimeError('boom')))
+        self.assertEqual(memo.get(video, lambda path: 3), 3)
+
+    def test_put_answers_a_later_get(self):
+        video = self._file('a.mkv')
+        memo = probe_cache.FileMemo()
+        memo.put(video, 1)
+        self.assertEqual(memo.get(video, lambda path: 2), 1)
+
+    def test_invalidate_forgets_one_file_only(self):
+        a, b = self._file('a.mkv'), self._file('b.mkv')
+        memo = probe_cache.FileMemo()
+        memo.get(a, lambda path: 1)
+        memo.get(b, lambda path: 1)
+        memo.invalidate(a)
+        self.assertEqual(memo.get(a, lambda path: 2), 2)
+        self.assertEqual(memo.get(b, lambda path: 2), 1)
+
+    def test_least_recently_used_entries_go_first(self):
+        memo = probe_cache.FileMemo(max_entries=2)
+        a, b, c = (self._file(f'{n}.mkv') for n in 'abc')
+        memo.get(a, lambda path: 1)
+        memo.get(b, lambda path: 1)
+        memo.get(a, lambda path: 1)  # now the most recently used
+        memo.get(c, lambda path: 1)
+        self.assertEqual(len(memo), 2)
+        self.assertEqual(memo.get(a, lambda path: 2), 1)
+        self.assertEqual(memo.get(b, lambda path: 2), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,7 +34,7 @@ class TestLoadSettings(unittest.TestCase):
             'gamma': 2.2, 'tonemapper': 'Hable',
             'open_after_conversion': True, 'display_preview': False,
             'quality': 19, 'quality_mode': 'cq', 'quality_bitrate_kbps': 8000, 'filetype': 'MKV',
-            'lut_enabled': False,
+            'lut_enabled': False, 'auto_crop': True,
         }
         with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
             json.dump(data, f)
@@ -89,6 +89,9 @@ class TestLoadSettings(unittest.TestCase):
     def test_defaults_include_lut_enabled_on(self):
         self.assertEqual(DEFAULTS['lut_enabled'], True)
 
+    def test_defaults_leave_auto_crop_off(self):
+        self.assertEqual(DEFAULTS['auto_crop'], False)
+
 
 class TestSaveSettings(unittest.TestCase):
 
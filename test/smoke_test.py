@@ -343,9 +343,99 @@ class TestLutReproducesLegacyGamutMath(unittest.TestCase):
             )
 
 
+@unittest.skipUnless(_HDR10_10BIT_OK, "sample 'smoke_test_videos/hdr10_10bit.mp4' / ffmpeg not available")
+class TestAutoCropFindsLetterbox(unittest.TestCase):
+    """auto_crop against real black bars: the HDR10 sample squeezed into a
+    letterbox at test time (lossless FFV1, so the bars stay exactly black),
+    detected with real cropdetect, and converted with the crop in front of
+    the tonemap."""
+
+    def test_bars_are_detected_and_cropped_off_before_the_tonemap(self):
+        from PIL import ImageChops, ImageStat
+        from src.utils import detect_crop
+        with tempfile.TemporaryDirectory(prefix='hdr_smoke_crop_') as tmpdir:
+            boxed = os.path.join(tmpdir, 'letterbox.mkv')
+            subprocess.run([FFMPEG_EXECUTABLE, '-y', '-loglevel', 'error',
+                            '-i', HDR10_10BIT_VIDEO, '-vf', 'scale=960:400,pad=960:540:0:70',
+                            '-an', '-c:v', 'ffv1', boxed], check=True)
+            self.assertEqual(detect_crop(boxed), (960, 400, 0, 70))
+
+            manager, props = ConversionManager(), get_video_properties(boxed)
+            frames = []
+            for name, auto_crop in (('cropped.png', True), ('whole.png', False)):
+                cmd = manager.construct_ffmpeg_command(
+                    _req(boxed, os.path.join(tmpdir, 'out.mkv'), auto_crop=auto_crop),
+                    props, RecordingConversionView())
+                out_path = os.path.join(tmpdir, name)
+                subprocess.run([FFMPEG_EXECUTABLE, '-y', '-loglevel', 'error', '-i', boxed,
+                                '-filter_complex', cmd[cmd.index('-filter_complex') + 1],
+                                '-map', '[vout]', '-frames:v', '1', out_path], check=True)
+                frames.append(Image.open(out_path).convert('RGB'))
+
+        cropped, whole = frames
+        self.assertEqual(cropped.size, (960, 400))
+        # The tonemap works pixel by pixel, so cropping first only changes the
+        # edge rows, whose chroma no longer blends with the bar next to them
+        # on upsampling (measured mean 0.14/255).
+        diff = ImageChops.difference(cropped, whole.crop((0, 70, 960, 470)))
+        self.assertLessEqual(sum(ImageStat.Stat(diff).mean) / 3, 0.5)
+
+
+@unittest.skipUnless(_HDR10_10BIT_OK, "sample 'smoke_test_videos/hdr10_10bit.mp4' / ffmpeg not available")
+class TestResizeBeforeTonemapMatchesResizeAfter(unittest.TestCase):
+    """output_height resizes in linear light before the tonemap, so the
+    tonemap runs on a quarter of the pixels. The tonemap curve isn't linear,
+    so that can't be bit-identical to tonemapping at full size and resizing
+    the SDR result -- this proves it stays close to a gamma-correct resize
+    done after the tonemap, on the real command's filter graph."""
+
+    # Measured on this sample at half size: mean 0.48/255, worst 28/255 --
+    # the worst at hard edges between highlights and shadow, where averaging
+    # before a compressive curve and after it genuinely differ. Resizing the
+    # PQ signal instead of linear light measured mean 1.30, worst 54.
+    _MEAN_TOLERANCE = 1.0
+    _MAX_TOLERANCE = 40
+
+    def _frame(self, tmpdir, name, graph):
+        out_path = os.path.join(tmpdir, name)
+        cmd = [FFMPEG_EXECUTABLE, '-y', '-loglevel', 'error', '-i', HDR10_10BIT_VIDEO,
+               '-filter_complex', graph, '-map', '[vout]', '-frames:v', '1', out_path]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(
+            result.returncode, 0,
+            msg=f"ffmpeg failed for {name}:\n{result.stderr.decode('utf-8', 'replace')[-2000:]}")
+        return Image.open(out_path).convert('RGB')
+
+    def test_resize_before_tonemap_matches_resize_after(self):
+        from PIL import ImageChops, ImageStat
+        props = get_video_properties(HDR10_10BIT_VIDEO)
+        height = props['height'] // 2
+        with tempfile.TemporaryDirectory(prefix='hdr_smoke_resize_') as tmpdir:
+            cmd = ConversionManager().construct_ffmpeg_command(
+                _req(HDR10_10BIT_VIDEO, os.path.join(tmpdir, 'out.mkv'),
+                     tonemapper='Hable', output_height=height),
+                props, RecordingConversionView())
+            before = self._frame(tmpdir, 'before.png', cmd[cmd.index('-filter_complex') + 1])
+            full = FFMPEG_CONVERT_FILTER.format(
+                gamma=1.0, tonemapper='hable', lut_path=get_lut_filter_path())
+            after = self._frame(tmpdir, 'after.png', (
+                f'[0:v:0]{full},zscale=t=linear,format=gbrpf32le,'
+                f'zscale=w={before.width}:h={before.height}:f=bilinear,'
+                f'zscale=t=bt709[vout]'))
+
+        self.assertEqual(before.height, height)
+        self.assertEqual(before.size, after.size)
+        diff = ImageChops.difference(before, after)
+        stat = ImageStat.Stat(diff)
+        mean = sum(stat.mean) / 3
+        worst = max(high for _, high in stat.extrema)
+        self.assertLessEqual(mean, self._MEAN_TOLERANCE, f"mean difference {mean:.2f}/255")
+        self.assertLessEqual(worst, self._MAX_TOLERANCE, f"worst difference {worst}/255")
+
+
 @unittest.skipUnless(_LIBPLACEBO_OK, "Vulkan/libplacebo not available on this machine")
 class TestRealGpuOnlyTonemappers(unittest.TestCase):
-    """BT.2390 and Spline have no CPU/zscale implementation -- this proves the
+    """BT.2390 and Spline have no zscale implementation -- this proves the
     real libplacebo filter strings the app constructs actually work against
     genuine HDR input, covering the exact verification gap (mocked-only
     tests) that let the original zscale-based design go uncaught."""
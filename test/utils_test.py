@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 import threading
@@ -12,11 +13,17 @@ from src.utils import (
     clear_hdr_metadata_cache,
     extract_frames_batch, extract_frames_with_conversion_batch, _split_png_frames,
     extract_frame_with_gpu_conversion, extract_frames_with_gpu_conversion_batch,
+    extract_preview_frames,
 )
+import shutil
 import subprocess
+import tempfile
 from PIL import Image  # Added import
 import json  # Ensure json is imported
 
+# What a mocked _run_frame_pipe hands back for a -vframes 1 command.
+_ONE_FRAME = [Image.new('RGB', (1, 1))]
+
 class TestGetVideoProperties(unittest.TestCase):
 
     @patch('src.utils.subprocess.Popen')
@@ -178,7 +185,7 @@ class TestRunFfmpegCommand(unittest.TestCase):
 
 class TestExtractFrame(unittest.TestCase):
 
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe')
     @patch('src.utils.get_video_properties')
     def test_extract_frame_success(self, mock_get_props, mock_run_ffmpeg):
         # Mock the video properties to have a duration of 90 seconds
@@ -194,13 +201,7 @@ class TestExtractFrame(unittest.TestCase):
             "subtitle_streams": []
         }
 
-        # Provide valid PNG image bytes
-        mock_run_ffmpeg.return_value = (
-            b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
-            b'\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00'
-            b'\x00\x00\nIDATx\xdac\xf8\x0f\x00\x01\x01\x01\x00'
-            b'\x18\xdd\x8d\x1b\x00\x00\x00\x00IEND\xaeB`\x82'
-        )
+        mock_run_ffmpeg.return_value = [Image.new('RGB', (1, 1))]
 
         frame = extract_frame('input.mp4')
         self.assertIsInstance(frame, Image.Image)
@@ -209,8 +210,8 @@ class TestExtractFrame(unittest.TestCase):
         expected_time = 90.0 / 3  # 30 seconds
         mock_run_ffmpeg.assert_called_once_with([
             ANY, '-ss', str(expected_time), '-i', 'input.mp4',
-            '-vframes', '1', '-f', 'image2pipe', '-'
-        ])
+            '-vframes', '1', '-f', 'image2pipe', '-vcodec', 'ppm', '-pix_fmt', 'rgb24', '-'
+        ], ANY)
 
     @patch('subprocess.Popen')
     def test_extract_frame_failure(self, mock_popen):
@@ -229,10 +230,7 @@ class TestExtractFrame(unittest.TestCase):
             }
 
             # Setup the ffmpeg command failure
-            mock_process = MagicMock()
-            mock_process.communicate.return_value = (b'', b'error')
-            mock_process.returncode = 1
-            mock_popen.return_value = mock_process
+            mock_popen.return_value = _frame_process(b'', b'error', 1)
 
             with self.assertRaises(RuntimeError):
                 extract_frame('input.mp4')
@@ -240,7 +238,7 @@ class TestExtractFrame(unittest.TestCase):
 class TestExtractFrameWithConversion(unittest.TestCase):
 
     @patch('src.utils.get_lut_filter_path', return_value='FAKE_LUT_PATH')
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe')
     def test_extract_frame_with_conversion_success(self, mock_run_ffmpeg, _mock_lut_path):
         with patch('src.utils.get_video_properties') as mock_get_props:
             mock_get_props.return_value = {
@@ -249,12 +247,7 @@ class TestExtractFrameWithConversion(unittest.TestCase):
                 "audio_codec": "aac", "audio_bit_rate": 128000,
                 "duration": 90.0, "subtitle_streams": []
             }
-            mock_run_ffmpeg.return_value = (
-                b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
-                b'\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00'
-                b'\x00\x00\nIDATx\xdac\xf8\x0f\x00\x01\x01\x01\x00'
-                b'\x18\xdd\x8d\x1b\x00\x00\x00\x00IEND\xaeB`\x82'
-            )
+            mock_run_ffmpeg.return_value = [Image.new('RGB', (1, 1))]
 
             frame = extract_frame_with_conversion('input.mp4', gamma=2.2)
 
@@ -263,33 +256,28 @@ class TestExtractFrameWithConversion(unittest.TestCase):
                 'zscale=t=bt709:m=bt709:r=tv,'
                 'lut3d=file=FAKE_LUT_PATH:interp=tetrahedral,'
                 'setparams=color_primaries=bt709:color_trc=bt709:colorspace=bt709,'
-                'eq=gamma=2.2,'
-                'scale=iw:ih:force_original_aspect_ratio=decrease'
+                'eq=gamma=2.2'
             )
             self.assertIsInstance(frame, Image.Image)
             mock_run_ffmpeg.assert_called_once()
             actual_args = mock_run_ffmpeg.call_args[0][0]
             self.assertEqual(actual_args[1:], [
                 '-ss', str(90.0 / 3), '-i', 'input.mp4',
-                '-vf', expected_vf, '-vframes', '1', '-f', 'image2pipe', '-'
+                '-vf', expected_vf, '-vframes', '1',
+                '-f', 'image2pipe', '-vcodec', 'ppm', '-pix_fmt', 'rgb24', '-'
             ])
 
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe')
     def test_extract_frame_with_conversion_lut_disabled_uses_legacy_chain(self, mock_run_ffmpeg):
         with patch('src.utils.get_video_properties') as mock_get_props:
             mock_get_props.return_value = {"duration": 90.0}
-            mock_run_ffmpeg.return_value = (
-                b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
-                b'\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00'
-                b'\x00\x00\nIDATx\xdac\xf8\x0f\x00\x01\x01\x01\x00'
-                b'\x18\xdd\x8d\x1b\x00\x00\x00\x00IEND\xaeB`\x82'
-            )
+            mock_run_ffmpeg.return_value = [Image.new('RGB', (1, 1))]
             extract_frame_with_conversion('input.mp4', gamma=1.0, lut_enabled=False)
             vf = mock_run_ffmpeg.call_args[0][0][mock_run_ffmpeg.call_args[0][0].index('-vf') + 1]
             self.assertIn('p=bt709', vf)
             self.assertNotIn('lut3d', vf)
 
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe')
     def test_extract_frame_with_conversion_failure(self, mock_run_ffmpeg):
         with patch('src.utils.get_video_properties') as mock_get_props:
             mock_get_props.return_value = {
@@ -303,19 +291,11 @@ class TestExtractFrameWithConversion(unittest.TestCase):
             with self.assertRaises(RuntimeError):
                 extract_frame_with_conversion('input.mp4', gamma=2.2)
 
-_VALID_PNG = (
-    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
-    b'\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00'
-    b'\x00\x00\nIDATx\xdac\xf8\x0f\x00\x01\x01\x01\x00'
-    b'\x18\xdd\x8d\x1b\x00\x00\x00\x00IEND\xaeB`\x82'
-)
-
-
 class TestPreviewScaling(unittest.TestCase):
     """Extraction can target a preview resolution so the GUI decodes less data."""
 
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
-    @patch('src.utils.run_ffmpeg_command', return_value=_VALID_PNG)
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
     def test_extract_frame_scales_when_size_given(self, mock_run, _props):
         extract_frame('in.mp4', time_position=1.0, width=960, height=540)
         args = mock_run.call_args[0][0]
@@ -323,20 +303,45 @@ class TestPreviewScaling(unittest.TestCase):
         self.assertIn('scale=960:540', args[args.index('-vf') + 1])
 
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
-    @patch('src.utils.run_ffmpeg_command', return_value=_VALID_PNG)
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
     def test_extract_frame_unscaled_by_default(self, mock_run, _props):
         extract_frame('in.mp4', time_position=1.0)
         self.assertNotIn('-vf', mock_run.call_args[0][0])  # unchanged default
 
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
-    @patch('src.utils.run_ffmpeg_command', return_value=_VALID_PNG)
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
     def test_conversion_uses_given_size_in_scale(self, mock_run, _props):
         extract_frame_with_conversion('in.mp4', gamma=1.0, width=960, height=540)
         vf = mock_run.call_args[0][0][mock_run.call_args[0][0].index('-vf') + 1]
         self.assertIn('scale=960:540', vf)
 
+    @patch('src.utils.get_video_properties',
+           return_value={'duration': 90.0, 'width': 3840, 'height': 1600,
+                         'color_transfer': 'smpte2084'})
+    @patch('src.utils.get_lut_filter_path', return_value='LUT')
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
+    def test_conversion_resizes_before_the_tonemap(self, mock_run, *_):
+        """With the source's size known the chain downscales straight after
+        linearizing, to the box fit to the source's shape, so tonemap and
+        lut3d run on the preview's pixels."""
+        extract_frame_with_conversion('in.mp4', gamma=1.0, tonemapper='hable',
+                                      width=960, height=540)
+        vf = mock_run.call_args[0][0][mock_run.call_args[0][0].index('-vf') + 1]
+        self.assertTrue(vf.startswith(
+            'zscale=t=linear:npl=100,format=gbrpf32le,zscale=w=960:h=400:f=bilinear,'
+            'tonemap=hable,'), vf)
+        self.assertNotIn('scale=960:540', vf)
+
+    @patch('src.utils.get_video_properties',
+           return_value={'duration': 90.0, 'width': 3840, 'height': 1600})
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
+    def test_extract_frame_scales_to_the_fitted_size(self, mock_run, _props):
+        extract_frame('in.mp4', time_position=1.0, width=960, height=540)
+        args = mock_run.call_args[0][0]
+        self.assertEqual(args[args.index('-vf') + 1], 'scale=960:400')
+
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
-    @patch('src.utils.run_ffmpeg_command', return_value=_VALID_PNG)
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
     def test_extract_frame_scale_does_not_upscale(self, mock_run, _props):
         """scale filter must include force_original_aspect_ratio=decrease so a
         1080p source is not upscaled when the 4K cap is larger than the source."""
@@ -703,15 +708,37 @@ class TestVulkanLibplaceboProbe(unittest.TestCase):
         vulkan_libplacebo_available()
         mock_run.assert_called_once()  # probed once, then cached
 
+    @patch('src.utils.FFMPEG_EXECUTABLE', 'ffmpeg')
+    @patch('src.utils.subprocess.run')
+    def test_concurrent_callers_share_one_probe(self, mock_run):
+        """Startup detection and a first preview can ask at once; the
+        second waits for the running probe instead of starting another."""
+        release = threading.Event()
+
+        def slow_probe(*args, **kwargs):
+            release.wait(5)
+            return MagicMock(returncode=0)
+
+        mock_run.side_effect = slow_probe
+        answers = []
+        callers = [threading.Thread(target=lambda: answers.append(vulkan_libplacebo_available()))
+                   for _ in range(3)]
+        for caller in callers:
+            caller.start()
+        release.set()
+        for caller in callers:
+            caller.join(5)
+        self.assertEqual(answers, [True, True, True])
+        mock_run.assert_called_once()
+
     @patch('src.utils.FFMPEG_EXECUTABLE', 'ffmpeg')
     @patch('src.utils.subprocess.run')
     def test_probe_is_bounded_by_a_timeout(self, mock_run):
-        """This probe runs synchronously inside create_widgets, i.e. between
-        main.pyw's root.withdraw() and root.deiconify(). It initializes a
-        Vulkan device, so it is at the mercy of the customer's GPU driver --
-        and an unbounded subprocess.run there means a wedged driver hangs the
-        app at startup with no window and no error, which is precisely the
-        failure mode the v1-token deadlock produced."""
+        """This probe runs on startup GPU detection's worker, and a conversion
+        started before it answers waits for it. It initializes a Vulkan
+        device, so it is at the mercy of the customer's GPU driver -- and an
+        unbounded subprocess.run there means a wedged driver leaves the GPU
+        badge on "detecting" and that conversion never starting."""
         mock_run.return_value = MagicMock(returncode=0)
         vulkan_libplacebo_available()
         self.assertIsNotNone(
@@ -724,12 +751,97 @@ class TestVulkanLibplaceboProbe(unittest.TestCase):
     def test_false_when_probe_times_out(self, _run):
         """TimeoutExpired subclasses SubprocessError, NOT OSError, so the
         existing except clause does not catch it. Adding a timeout without
-        widening that clause would convert a startup hang into an uncaught
-        exception on the same pre-window path -- no better. Falling back to
+        widening that clause would convert a hang into an exception out of
+        the same detection -- no better. Falling back to
         the CPU tonemap path is the correct answer to 'GPU probe inconclusive'."""
         self.assertFalse(vulkan_libplacebo_available())
 
 
+class TestCapabilityStore(unittest.TestCase):
+    """Capability probes answered from capabilities.json once it is open
+    (see capability_cache.py): a second launch spawns nothing."""
+
+    def setUp(self):
+        import src.utils as _u
+        self._u = _u
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        ffmpeg = os.path.join(self.tmp, 'ffmpeg')
+        with open(ffmpeg, 'wb') as f:
+            f.write(b'binary')
+        for target, value in (('src.utils.FFMPEG_EXECUTABLE', ffmpeg),
+                              ('src.utils.gpu_driver_identity', lambda: 'driver|1|2')):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, _u, '_CAPABILITY_STORE', None)
+        self.addCleanup(_u.reprobe_capabilities)
+        self.path = os.path.join(self.tmp, 'capabilities.json')
+        _u.open_capability_store(self.path)
+        _u.reprobe_capabilities()
+
+    def _relaunch(self):
+        """A new process: nothing in memory, the same file on disk."""
+        self._u.reset_libplacebo_probe()
+        self._u.reset_cuda_interop_probe()
+        self._u._ffmpeg_filters = None
+        self._u.open_capability_store(self.path)
+
+    @patch('src.utils.subprocess.run')
+    def test_second_launch_spawns_no_gpu_probe(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stderr=b'')
+        self.assertTrue(vulkan_libplacebo_available())
+        self.assertTrue(vulkan_cuda_interop_available())
+        self._relaunch()
+        mock_run.reset_mock()
+        self.assertTrue(vulkan_libplacebo_available())
+        self.assertTrue(vulkan_cuda_interop_available())
+        mock_run.assert_not_called()
+
+    @patch('src.utils.subprocess.run',
+           side_effect=subprocess.TimeoutExpired(cmd='ffmpeg', timeout=1))
+    def test_timeout_is_not_stored(self, mock_run):
+        self.assertFalse(vulkan_libplacebo_available())
+        self._relaunch()
+        self.assertFalse(vulkan_libplacebo_available())
+        self.assertEqual(mock_run.call_count, 2)
+
+    @patch('src.utils.subprocess.run')
+    def test_reprobe_runs_the_probe_again(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=1)
+        self.assertFalse(vulkan_libplacebo_available())
+        mock_run.return_value = MagicMock(returncode=0)
+        self._u.reprobe_capabilities()
+        self.assertTrue(vulkan_libplacebo_available())
+        self._relaunch()
+        self.assertTrue(vulkan_libplacebo_available())
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_a_replaced_ffmpeg_invalidates_every_answer(self):
+        self._u.stored_capability('nvidia', lambda: True)
+        with open(self._u.FFMPEG_EXECUTABLE, 'ab') as f:
+            f.write(b' updated')
+        self._relaunch()
+        self.assertIs(self._u.stored_capability('nvidia', lambda: False), False)
+
+    @patch('src.utils.subprocess.run')
+    def test_filters_are_listed_once_and_queryable(self, mock_run):
+        mock_run.return_value = MagicMock(stdout=(
+            b'Filters:\n'
+            b'  T.. = Timeline support\n'
+            b'  ---\n'
+            b' TSC zscale            V->V       Apply resizing, colorspace and bit depth conversion.\n'
+            b' ..C tonemap           V->V       Conversion to/from different dynamic ranges.\n'
+            b' ... lut3d             V->V       Adjust colors using a 3D LUT.\n'))
+        filters = self._u.ffmpeg_filters()
+        self.assertIn('zscale', filters)
+        self.assertIn('lut3d', filters)
+        self.assertNotIn('libplacebo', filters)
+        self._relaunch()
+        self.assertEqual(self._u.ffmpeg_filters(), {'zscale', 'tonemap', 'lut3d'})
+        mock_run.assert_called_once()
+
+
 # ---------------------------------------------------------------------------
 # Issue #1 — Concurrency: _HDR_METADATA_CACHE must be guarded by a lock
 # ---------------------------------------------------------------------------
@@ -841,21 +953,134 @@ class TestVideoPropertiesConcurrency(unittest.TestCase):
         )
 
 
-class TestIsGpuOnlyTonemapper(unittest.TestCase):
-    """Single shared predicate for identifying GPU-only tonemappers (bt.2390,
-    spline), replacing four ad-hoc `.lower() in GPU_ONLY_TONEMAPPERS` call
-    sites duplicated across conversion.py/preview.py/gui.py."""
-
-    def test_true_for_gpu_only_tonemappers_case_insensitive(self):
-        from src.utils import is_gpu_only_tonemapper
-        self.assertTrue(is_gpu_only_tonemapper('bt.2390'))
-        self.assertTrue(is_gpu_only_tonemapper('BT.2390'))
-        self.assertTrue(is_gpu_only_tonemapper('Spline'))
-
-    def test_false_for_cpu_capable_tonemappers(self):
-        from src.utils import is_gpu_only_tonemapper
-        self.assertFalse(is_gpu_only_tonemapper('reinhard'))
-        self.assertFalse(is_gpu_only_tonemapper('hable'))
+class TestCpuPreviewFilter(unittest.TestCase):
+    """The CPU preview runs the chain a CPU export of the source uses:
+    BT.2390/Spline and HLG sources through their fused LUT (zscale's tonemap
+    has neither curve), SDR sources with no color filters."""
+
+    @patch('src.utils.get_video_properties', return_value={'color_transfer': 'smpte2084'})
+    @patch('src.utils.get_max_luminance', return_value=None)
+    @patch('src.utils.get_maxcll', return_value=4000.0)
+    @patch('src.utils.fused_lut.lut_path', return_value='/cache/bt.cube')
+    def test_libplacebo_only_tonemapper_uses_its_fused_lut(self, mock_lut_path, *_):
+        from src.utils import _cpu_preview_filter
+        filt = _cpu_preview_filter('in.mkv', 1.2, 'BT.2390', 960, 540, lut_enabled=False)
+        mock_lut_path.assert_called_once_with('bt.2390', 40.0, 'pq')
+        self.assertIn('lut3d=file=/cache/bt.cube', filt)
+        self.assertNotIn('tonemap=', filt)
+        self.assertTrue(filt.endswith(
+            ',eq=gamma=1.2,scale=960:540:force_original_aspect_ratio=decrease'), filt)
+
+    @patch('src.utils.get_video_properties', return_value={'color_transfer': 'smpte2084'})
+    @patch('src.utils.fused_lut.lut_path')
+    def test_zscale_tonemappers_keep_the_full_chain(self, mock_lut_path, _props):
+        from src.utils import _cpu_preview_filter
+        filt = _cpu_preview_filter('in.mkv', 1.0, 'Hable', 960, 540, lut_enabled=True)
+        self.assertIn('tonemap=hable', filt)
+        mock_lut_path.assert_not_called()
+
+    @patch('src.utils.get_video_properties',
+           return_value={'color_transfer': 'arib-std-b67', 'color_primaries': 'bt2020'})
+    @patch('src.utils.get_max_luminance', return_value=None)
+    @patch('src.utils.get_maxcll', return_value=None)
+    @patch('src.utils.fused_lut.lut_path', return_value='/cache/hlg.cube')
+    def test_hlg_source_uses_its_hlg_lut(self, mock_lut_path, *_):
+        from src.utils import _cpu_preview_filter
+        filt = _cpu_preview_filter('in.mkv', 1.0, 'Hable', 960, 540, lut_enabled=True)
+        mock_lut_path.assert_called_once_with('hable', 10.0, 'hlg')
+        self.assertIn('lut3d=file=/cache/hlg.cube', filt)
+
+    @patch('src.utils.get_video_properties',
+           return_value={'color_transfer': 'bt709', 'color_primaries': 'bt709'})
+    def test_sdr_source_gets_no_color_filters(self, _props):
+        from src.utils import _cpu_preview_filter
+        filt = _cpu_preview_filter('in.mp4', 1.0, 'Hable', 960, 540, lut_enabled=True)
+        self.assertEqual(
+            filt, 'eq=gamma=1.0,scale=960:540:force_original_aspect_ratio=decrease')
+
+
+class TestCpuPreviewFilterResizesFirst(unittest.TestCase):
+    """With the source's size known, every CPU preview chain resizes before
+    its color work."""
+
+    _PROPS = {'color_transfer': 'smpte2084', 'width': 3840, 'height': 2160}
+
+    @patch('src.utils.get_max_luminance', return_value=None)
+    @patch('src.utils.get_maxcll', return_value=None)
+    @patch('src.utils.fused_lut.lut_path', return_value='/cache/bt.cube')
+    def test_fused_lut_runs_at_the_preview_size(self, *_):
+        from src.utils import _cpu_preview_filter
+        with patch('src.utils.get_video_properties', return_value=self._PROPS):
+            filt = _cpu_preview_filter('in.mkv', 1.2, 'BT.2390', 960, 540, lut_enabled=True)
+        self.assertTrue(filt.startswith(
+            'zscale=t=linear:npl=100,format=gbrpf32le,zscale=w=960:h=540:f=bilinear,'), filt)
+        self.assertTrue(filt.endswith('lut3d=file=/cache/bt.cube:interp=tetrahedral,'
+                                      'setparams=color_primaries=bt709:color_trc=bt709:'
+                                      'colorspace=bt709,eq=gamma=1.2'), filt)
+
+    def test_sdr_source_scales_before_eq(self):
+        from src.utils import _cpu_preview_filter
+        props = dict(self._PROPS, color_transfer='bt709', color_primaries='bt709')
+        with patch('src.utils.get_video_properties', return_value=props):
+            filt = _cpu_preview_filter('in.mp4', 1.0, 'Hable', 960, 540, lut_enabled=True)
+        self.assertEqual(filt, 'scale=960:540,eq=gamma=1.0')
+
+    def test_legacy_chain_resizes_first_too(self):
+        from src.utils import _cpu_preview_filter
+        with patch('src.utils.get_video_properties', return_value=self._PROPS):
+            filt = _cpu_preview_filter('in.mkv', 1.0, 'Hable', 960, 540, lut_enabled=False)
+        self.assertLess(filt.index('zscale=w=960:h=540'), filt.index('tonemap=hable'))
+        self.assertNotIn('lut3d', filt)
+
+
+class TestPreviewFrameSize(unittest.TestCase):
+    """preview_frame_size rounds the fit exactly as ffmpeg's
+    force_original_aspect_ratio=decrease does."""
+
+    def _size(self, src, box):
+        from src.utils import preview_frame_size
+        with patch('src.utils.get_video_properties',
+                   return_value={'width': src[0], 'height': src[1]}):
+            return preview_frame_size('in.mkv', *box)
+
+    def test_fits_the_limiting_side(self):
+        self.assertEqual(self._size((3840, 2160), (960, 960)), (960, 540))
+        self.assertEqual(self._size((3840, 1600), (960, 540)), (960, 400))
+        # Matches the real-ffmpeg values smoke_test pins for 1:1 and 9:16.
+        self.assertEqual(self._size((480, 480), (3840, 2160)), (2160, 2160))
+        self.assertEqual(self._size((360, 640), (3840, 2160)), (1215, 2160))
+
+    def test_no_box_or_no_source_size(self):
+        from src.utils import preview_frame_size
+        self.assertIsNone(self._size((3840, 2160), ('iw', 'ih')))
+        with patch('src.utils.get_video_properties', return_value={'duration': 9.0}):
+            self.assertIsNone(preview_frame_size('in.mkv', 960, 540))
+
+
+class TestClassifySource(unittest.TestCase):
+
+    def test_tags_decide_the_kind(self):
+        from src.utils import classify_source
+        self.assertEqual(classify_source({'color_transfer': 'smpte2084',
+                                          'color_primaries': 'bt2020'}), 'pq')
+        self.assertEqual(classify_source({'color_transfer': 'arib-std-b67',
+                                          'color_primaries': 'bt2020'}), 'hlg')
+        self.assertEqual(classify_source({'color_transfer': 'bt709',
+                                          'color_primaries': 'bt709'}), 'sdr')
+        self.assertEqual(classify_source({'color_transfer': 'smpte170m',
+                                          'color_primaries': 'smpte170m'}), 'sdr')
+
+    def test_untagged_or_wide_gamut_sources_keep_the_hdr_chain(self):
+        from src.utils import classify_source
+        self.assertEqual(classify_source({}), 'pq')
+        self.assertEqual(classify_source({'color_transfer': 'unknown'}), 'pq')
+        self.assertEqual(classify_source({'color_transfer': 'bt709',
+                                          'color_primaries': 'bt2020'}), 'pq')
+
+    def test_dolby_vision_is_always_pq(self):
+        from src.utils import classify_source
+        self.assertEqual(classify_source({'is_dolby_vision': True,
+                                          'color_transfer': 'bt709'}), 'pq')
 
 
 # ---------------------------------------------------------------------------
@@ -960,6 +1185,42 @@ class TestStartupinfoConsistency(unittest.TestCase):
             )
 
 
+class TestLocateFfmpeg(unittest.TestCase):
+    """ffmpeg/ffprobe are located on first need, once, not at import."""
+
+    def setUp(self):
+        import src.utils as _u
+        self._u = _u
+        saved = {name: vars(_u)[name] for name in _u._FFMPEG_NAMES if name in vars(_u)}
+        located = _u._located_ffmpeg
+
+        def restore():
+            for name in _u._FFMPEG_NAMES:
+                vars(_u).pop(name, None)
+            vars(_u).update(saved)
+            _u._located_ffmpeg = located
+
+        self.addCleanup(restore)
+        for name in _u._FFMPEG_NAMES:
+            vars(_u).pop(name, None)
+        _u._located_ffmpeg = None
+
+    def test_first_read_locates_both_once(self):
+        with patch('src.utils.get_executable_path',
+                   side_effect=lambda name: f'/opt/{name}') as mock_find:
+            self.assertEqual(self._u.ffprobe_executable(), '/opt/ffprobe')
+            self.assertEqual(self._u.FFMPEG_EXECUTABLE, '/opt/ffmpeg')
+            self.assertEqual(self._u.ffmpeg_executable(), '/opt/ffmpeg')
+        self.assertEqual(mock_find.call_count, 2)
+
+    def test_missing_ffmpeg_reads_as_none_without_raising(self):
+        with patch('src.utils.get_executable_path',
+                   side_effect=FileNotFoundError('ffmpeg not found')) as mock_find:
+            self.assertIsNone(self._u.ffmpeg_executable())
+            self.assertIsNone(self._u.FFPROBE_EXECUTABLE)
+        mock_find.assert_called_once()
+
+
 class TestSetupLogging(unittest.TestCase):
     """setup_logging() should write warnings to a rotating log file under
     %LOCALAPPDATA%, not just to stderr (which a windowed/onedir build has no
@@ -1259,6 +1520,26 @@ class TestVideoPropertiesCache(unittest.TestCase):
         get_video_properties('cache_clear_test.mkv')
         self.assertEqual(mock_popen.call_count, 2)
 
+    @patch('src.utils.subprocess.Popen')
+    def test_invalidate_probe_caches_reprobes_only_that_file(self, mock_popen):
+        """invalidate_probe_caches forgets one file; others stay cached."""
+        import src.utils as _u
+        self._mock_popen(mock_popen)
+        get_video_properties('invalidate_a.mkv')
+        get_video_properties('invalidate_b.mkv')
+        _u.invalidate_probe_caches('invalidate_a.mkv')
+        get_video_properties('invalidate_a.mkv')
+        get_video_properties('invalidate_b.mkv')
+        self.assertEqual(mock_popen.call_count, 3)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_absolute_path_hits_the_relative_paths_entry(self, mock_popen):
+        """ConversionManager abspath()s the input; it must not reprobe."""
+        self._mock_popen(mock_popen)
+        get_video_properties('relative_test.mkv')
+        get_video_properties(os.path.abspath('relative_test.mkv'))
+        self.assertEqual(mock_popen.call_count, 1)
+
     @patch('src.utils.subprocess.Popen')
     def test_none_result_not_cached(self, mock_popen):
         """A None result (bad output) must not be cached; next call must reprobe."""
@@ -1270,6 +1551,159 @@ class TestVideoPropertiesCache(unittest.TestCase):
         self.assertEqual(mock_popen.call_count, 2)
 
 
+class TestSingleProbePerFile(unittest.TestCase):
+    """Loading a file probes it once: get_video_properties' ffprobe run also
+    carries the first frames' HDR side data, so get_maxcll spawns nothing."""
+
+    _COMBINED_JSON = json.dumps({
+        "streams": [{"index": 0, "codec_type": "video", "width": 3840, "height": 2160,
+                     "codec_name": "hevc", "avg_frame_rate": "24/1", "bit_rate": "20000000"}],
+        "format": {"duration": "60.0"},
+        "frames": [{"side_data_list": [
+            {"side_data_type": "Content light level metadata", "max_content": 1000},
+            {"side_data_type": "Mastering display metadata", "max_luminance": "4000/1"},
+        ]}],
+    }).encode()
+
+    def setUp(self):
+        clear_hdr_metadata_cache()
+        self.addCleanup(clear_hdr_metadata_cache)
+
+    @patch('src.utils.subprocess.check_output')
+    @patch('src.utils.subprocess.Popen')
+    def test_hdr_metadata_comes_from_the_properties_probe(self, mock_popen, mock_out):
+        import src.utils as _u
+        proc = mock_popen.return_value
+        proc.returncode = 0
+        proc.communicate.return_value = (self._COMBINED_JSON, b'')
+        self.assertEqual(get_video_properties('single_probe.mkv')['width'], 3840)
+        self.assertEqual(_u.get_maxcll('single_probe.mkv'), 1000.0)
+        self.assertEqual(_u.get_max_luminance('single_probe.mkv'), 4000.0)
+        self.assertEqual(mock_popen.call_count, 1)
+        mock_out.assert_not_called()
+
+    @patch('src.utils.subprocess.Popen')
+    def test_asks_only_for_the_fields_it_reads(self, mock_popen):
+        proc = mock_popen.return_value
+        proc.returncode = 0
+        proc.communicate.return_value = (self._COMBINED_JSON, b'')
+        get_video_properties('single_probe_args.mkv')
+        cmd = mock_popen.call_args.args[0]
+        self.assertNotIn('-show_streams', cmd)
+        self.assertNotIn('-show_frames', cmd)
+        entries = cmd[cmd.index('-show_entries') + 1]
+        for field in ('stream=', 'format=', 'frame=side_data_list', 'pix_fmt', 'index'):
+            self.assertIn(field, entries)
+
+    @patch('src.utils.subprocess.check_output')
+    @patch('src.utils.subprocess.Popen')
+    def test_no_frames_in_the_output_leaves_hdr_to_its_own_probe(self, mock_popen, mock_out):
+        import src.utils as _u
+        proc = mock_popen.return_value
+        proc.returncode = 0
+        proc.communicate.return_value = (TestVideoPropertiesCache._VALID_PROPS_JSON, b'')
+        mock_out.return_value = json.dumps({'frames': [{'side_data_list': [
+            {'side_data_type': 'Content light level metadata', 'max_content': 400}]}]}).encode()
+        get_video_properties('single_probe_noframes.mkv')
+        self.assertEqual(_u.get_maxcll('single_probe_noframes.mkv'), 400.0)
+        mock_out.assert_called_once()
+
+
+class TestNativeHeaderProbe(unittest.TestCase):
+    """MP4/Matroska files media_header can read never reach ffprobe."""
+
+    def setUp(self):
+        clear_hdr_metadata_cache()
+        self.addCleanup(clear_hdr_metadata_cache)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_header_answers_without_ffprobe(self, mock_popen):
+        import src.utils as _u
+        sample = os.path.join(os.path.dirname(__file__), 'smoke_test_videos', 'dovi_p8.mp4')
+        with patch('src.utils._PROBE_STORE') as store:
+            store.get.return_value = _u.probe_cache.MISSING
+            props = get_video_properties(sample)
+        mock_popen.assert_not_called()
+        self.assertEqual((props['codec_name'], props['bit_depth'], props['dovi_profile']),
+                         ('hevc', 10, 8))
+        self.assertEqual(props['frame_rate'], 24.0)
+
+
+class TestPersistentProbeStore(unittest.TestCase):
+    """Results found in the on-disk store (probe_cache.py) must not spawn
+    ffprobe; a failed probe must not be written to it."""
+
+    def setUp(self):
+        import shutil, tempfile
+        import src.utils as _u
+        # utils' own module object: src.probe_cache would be a second copy
+        # with its own MISSING.
+        self.probe_cache = probe_cache = _u.probe_cache
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.video = os.path.join(self.tmp, 'a.mkv')
+        tool = os.path.join(self.tmp, 'ffprobe')
+        for path in (self.video, tool):
+            with open(path, 'wb') as f:
+                f.write(b'x')
+        self.store = probe_cache.ProbeStore(os.path.join(self.tmp, 'probes.json'), tool)
+        patcher = patch.object(_u, '_PROBE_STORE', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        clear_hdr_metadata_cache()
+        self.addCleanup(clear_hdr_metadata_cache)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_stored_properties_skip_ffprobe(self, mock_popen):
+        self.store.put(self.video, 'props', {'width': 1920, 'height': 1080})
+        self.assertEqual(get_video_properties(self.video)['width'], 1920)
+        mock_popen.assert_not_called()
+
+    @patch('src.utils.subprocess.Popen')
+    def test_probed_properties_are_stored(self, mock_popen):
+        proc = mock_popen.return_value
+        proc.returncode = 0
+        proc.communicate.return_value = (TestVideoPropertiesCache._VALID_PROPS_JSON, b'')
+        get_video_properties(self.video)
+        self.assertEqual(self.store.get(self.video, 'props')['width'], 1920)
+
+    @patch('src.utils.subprocess.check_output')
+    def test_failed_hdr_probe_is_not_stored(self, mock_out):
+        import src.utils as _u
+        mock_out.side_effect = subprocess.CalledProcessError(1, 'ffprobe')
+        _u._get_hdr_metadata(self.video)
+        self.assertIs(self.store.get(self.video, 'hdr'), self.probe_cache.MISSING)
+        mock_out.side_effect = None
+        mock_out.return_value = json.dumps({'frames': [{}]}).encode()
+        clear_hdr_metadata_cache()
+        _u._get_hdr_metadata(self.video)
+        self.assertEqual(self.store.get(self.video, 'hdr'),
+                         {'maxcll': None, 'max_luminance': None})
+
+
+class TestProbeStoresOptIn(unittest.TestCase):
+    """Importing utils keeps probes in memory only; the app opens the
+    on-disk stores (main.pyw), so tests never touch the user's cache."""
+
+    def test_closed_until_opened(self):
+        import src.utils as _u
+        self.assertIsNone(_u._PROBE_STORE)
+        self.assertIsNone(_u._KEYFRAME_STORE)
+
+    def test_opened_in_a_directory(self):
+        import shutil, tempfile
+        import src.utils as _u
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        with patch.object(_u, '_PROBE_STORE', None), \
+                patch.object(_u, '_KEYFRAME_STORE', None), \
+                patch('src.utils.atexit.register') as register:
+            _u.open_probe_stores(tmp)
+            self.assertEqual(_u._PROBE_STORE.path, os.path.join(tmp, 'probes.json'))
+            self.assertEqual(_u._KEYFRAME_STORE.path, os.path.join(tmp, 'keyframes.json'))
+            self.assertEqual(register.call_count, 2)
+
+
 def _minimal_png() -> bytes:
     """Return a valid 1×1 RGB PNG as bytes (for batch-function tests)."""
     import struct, zlib
@@ -1283,6 +1717,71 @@ def _minimal_png() -> bytes:
     return sig + ihdr + idat + iend
 
 
+def _ppm(width=1, height=1, fill=b'\xff\x00\x00') -> bytes:
+    """One frame as ffmpeg's ppm encoder writes it."""
+    return b'P6\n%d %d\n255\n' % (width, height) + fill * (width * height)
+
+
+def _frame_process(stdout: bytes, stderr: bytes = b'', returncode: int = 0) -> MagicMock:
+    """A Popen stand-in for _run_frame_pipe: real byte streams to read from."""
+    proc = MagicMock()
+    proc.stdout = io.BytesIO(stdout)
+    proc.stderr = io.BytesIO(stderr)
+    proc.returncode = returncode
+    proc.wait.return_value = returncode
+    return proc
+
+
+class TestRunFramePipe(unittest.TestCase):
+    """_run_frame_pipe reads raw rgb24 frames (PPM) off ffmpeg's stdout."""
+
+    _RAW_CMD = ['ffmpeg', '-i', 'in.mkv', '-f', 'image2pipe', '-vcodec', 'ppm',
+                '-pix_fmt', 'rgb24', '-']
+
+    def setUp(self):
+        import src.utils as _u
+        patcher = patch.object(_u, '_raw_frames_unsupported', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.utils = _u
+
+    @patch('src.utils.subprocess.Popen')
+    def test_frames_of_any_size_come_back_as_rgb_images(self, mock_popen):
+        mock_popen.return_value = _frame_process(
+            _ppm(4, 2) + _ppm(3, 5, b'\x00\x00\xff'))
+        first, second = self.utils._run_frame_pipe(list(self._RAW_CMD), 'failed')
+        self.assertEqual((first.mode, first.size), ('RGB', (4, 2)))
+        self.assertEqual(first.getpixel((3, 1)), (255, 0, 0))
+        self.assertEqual(second.size, (3, 5))
+        self.assertEqual(second.getpixel((0, 0)), (0, 0, 255))
+
+    @patch('src.utils.subprocess.Popen')
+    def test_a_frame_cut_short_is_an_error(self, mock_popen):
+        mock_popen.return_value = _frame_process(_ppm(4, 2)[:-5])
+        with self.assertRaises(RuntimeError):
+            self.utils._run_frame_pipe(list(self._RAW_CMD), 'failed')
+
+    @patch('src.utils.subprocess.Popen')
+    def test_missing_ppm_encoder_falls_back_to_png_for_the_session(self, mock_popen):
+        mock_popen.side_effect = [
+            _frame_process(b'', b"Unknown encoder 'ppm'", 1),
+            _frame_process(_minimal_png()),
+        ]
+        frames = self.utils._run_frame_pipe(list(self._RAW_CMD), 'failed')
+        self.assertEqual(len(frames), 1)
+        retry = mock_popen.call_args_list[1].args[0]
+        self.assertEqual(retry[-4:], ['-f', 'image2pipe', '-vcodec', 'png', '-'][-4:])
+        self.assertNotIn('ppm', retry)
+        self.assertTrue(self.utils._raw_frames_unsupported)
+        self.assertEqual(self.utils._frame_pipe_args()[-2], 'png')
+
+    @patch('src.utils.subprocess.Popen')
+    def test_colorspace_failure_keeps_its_readable_message(self, mock_popen):
+        mock_popen.return_value = _frame_process(b'', b'no path between colorspaces', 1)
+        with self.assertRaisesRegex(RuntimeError, 'Colorspace mismatch'):
+            self.utils._run_frame_pipe(list(self._RAW_CMD), 'failed')
+
+
 class TestSplitPngFrames(unittest.TestCase):
     """_split_png_frames parses a concatenated PNG stream into PIL Image objects."""
 
@@ -1305,10 +1804,16 @@ class TestSplitPngFrames(unittest.TestCase):
 class TestExtractFramesBatch(unittest.TestCase):
     """extract_frames_batch must extract N frames in exactly 1 ffmpeg process."""
 
+    def setUp(self):
+        # The source's size sets the fit; keep that ffprobe out of the
+        # Popen count.
+        patcher = patch('src.utils.get_video_properties',
+                        return_value={'width': 3840, 'height': 1600})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def _popen_ok(self, mock_popen, n: int):
-        proc = mock_popen.return_value
-        proc.returncode = 0
-        proc.communicate.return_value = (_minimal_png() * n, b'')
+        mock_popen.return_value = _frame_process(_ppm() * n)
 
     @patch('src.utils.subprocess.Popen')
     def test_three_positions_spawn_one_process(self, mock_popen):
@@ -1317,6 +1822,9 @@ class TestExtractFramesBatch(unittest.TestCase):
         result = extract_frames_batch('vid.mkv', [10.0, 20.0, 30.0], 960, 540)
         self.assertEqual(mock_popen.call_count, 1)
         self.assertEqual(len(result), 3)
+        graph = mock_popen.call_args[0][0]
+        graph = graph[graph.index('-filter_complex') + 1]
+        self.assertEqual(graph.count('scale=960:400'), 3)  # 2.4:1 fit to the box
 
     @patch('src.utils.subprocess.Popen')
     def test_empty_positions_returns_empty_without_popen(self, mock_popen):
@@ -1333,20 +1841,70 @@ class TestExtractFramesBatch(unittest.TestCase):
 
     @patch('src.utils.subprocess.Popen')
     def test_ffmpeg_error_raises_runtime_error(self, mock_popen):
-        proc = mock_popen.return_value
-        proc.returncode = 1
-        proc.communicate.return_value = (b'', b'some ffmpeg error')
+        mock_popen.return_value = _frame_process(b'', b'some ffmpeg error', 1)
         with self.assertRaises(RuntimeError):
             extract_frames_batch('vid.mkv', [10.0], 960, 540)
 
 
+class TestExtractPreviewFrames(unittest.TestCase):
+    """extract_preview_frames decodes each position once and splits it to the
+    original and every tonemapper's chain."""
+
+    def setUp(self):
+        patcher = patch('src.utils.get_video_properties',
+                        return_value={'width': 3840, 'height': 1600,
+                                      'color_transfer': 'smpte2084'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_positions_and_tonemappers_share_one_process(self, mock_popen):
+        mock_popen.return_value = _frame_process(_ppm() * 6)
+        result = extract_preview_frames('vid.mkv', [5.0, 15.0], 1.0,
+                                        ['reinhard', 'hable'], 960, 540)
+        self.assertEqual(mock_popen.call_count, 1)
+        self.assertEqual([len(converted) for _, converted in result], [2, 2])
+        cmd = mock_popen.call_args[0][0]
+        self.assertEqual(cmd.count('-i'), 2)
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        self.assertEqual(graph.count('split=3'), 2)
+        self.assertIn('concat=n=6', graph)
+        self.assertEqual(graph.count('format=rgb24'), 6)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_gpu_runs_one_process_per_position(self, mock_popen):
+        mock_popen.side_effect = [_frame_process(_ppm() * 2), _frame_process(_ppm() * 2)]
+        result = extract_preview_frames('vid.mkv', [5.0, 15.0], 1.0, ['bt.2390'],
+                                        960, 540, gpu=True)
+        self.assertEqual(mock_popen.call_count, 2)
+        self.assertEqual(len(result), 2)
+        self.assertIn('libplacebo', ' '.join(mock_popen.call_args[0][0]))
+
+    @patch('src.utils.subprocess.Popen')
+    def test_missing_frames_raise_runtime_error(self, mock_popen):
+        mock_popen.return_value = _frame_process(_ppm() * 3)
+        with self.assertRaises(RuntimeError):
+            extract_preview_frames('vid.mkv', [5.0, 15.0], 1.0, ['reinhard'], 960, 540)
+
+    @patch('src.utils.subprocess.Popen')
+    def test_empty_positions_returns_empty_without_popen(self, mock_popen):
+        self.assertEqual(extract_preview_frames('vid.mkv', [], 1.0, ['reinhard'], 960, 540), [])
+        mock_popen.assert_not_called()
+
+
 class TestExtractFramesWithConversionBatch(unittest.TestCase):
     """extract_frames_with_conversion_batch must tonemap N frames in 1 ffmpeg process."""
 
+    def setUp(self):
+        # The source's transfer picks the filter chain; keep that ffprobe out
+        # of the Popen count.
+        patcher = patch('src.utils.get_video_properties',
+                        return_value={'color_transfer': 'smpte2084'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def _popen_ok(self, mock_popen, n: int):
-        proc = mock_popen.return_value
-        proc.returncode = 0
-        proc.communicate.return_value = (_minimal_png() * n, b'')
+        mock_popen.return_value = _frame_process(_ppm() * n)
 
     @patch('src.utils.subprocess.Popen')
     def test_two_positions_spawn_one_process(self, mock_popen):
@@ -1363,9 +1921,7 @@ class TestExtractFramesWithConversionBatch(unittest.TestCase):
 
     @patch('src.utils.subprocess.Popen')
     def test_ffmpeg_error_raises_runtime_error(self, mock_popen):
-        proc = mock_popen.return_value
-        proc.returncode = 1
-        proc.communicate.return_value = (b'', b'tonemap failed')
+        mock_popen.return_value = _frame_process(b'', b'tonemap failed', 1)
         with self.assertRaises(RuntimeError):
             extract_frames_with_conversion_batch('vid.mkv', [5.0], 1.0, 'reinhard', 960, 540)
 
@@ -1437,6 +1993,22 @@ class TestProbeHdrMetadata(unittest.TestCase):
         result = self._u._probe_hdr_metadata('/fake/corrupt.mkv')
         self.assertIsNone(result['maxcll'])
 
+    @patch('src.utils.subprocess.check_output')
+    def test_reads_maxcll_and_mastering_peak(self, mock_out):
+        mock_out.return_value = json.dumps({'frames': [{'side_data_list': [
+            {'side_data_type': 'Mastering display metadata',
+             'max_luminance': '10000000/10000'},
+            {'side_data_type': 'Content light level metadata', 'max_content': 0},
+        ]}]}).encode()
+        self.assertEqual(self._u._probe_hdr_metadata('/v.mkv'),
+                         {'maxcll': 0.0, 'max_luminance': 1000.0})
+
+    @patch('src.utils.subprocess.check_output')
+    def test_absent_side_data_is_none(self, mock_out):
+        mock_out.return_value = json.dumps({'frames': [{}]}).encode()
+        self.assertEqual(self._u._probe_hdr_metadata('/v.mkv'),
+                         {'maxcll': None, 'max_luminance': None})
+
 
 class TestDolbyVisionDetection(unittest.TestCase):
     """get_video_properties flags Dolby Vision inputs from ffprobe's stream
@@ -1529,7 +2101,7 @@ class TestExtractFrameWithGpuConversion(unittest.TestCase):
     real preview path for tonemappers with no zscale equivalent (BT.2390,
     Spline). Preview must render the true algorithm, never an approximation."""
 
-    @patch('src.utils.run_ffmpeg_command', return_value=_VALID_PNG)
+    @patch('src.utils._run_frame_pipe', return_value=_ONE_FRAME)
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
     def test_uses_libplacebo_and_vulkan_device_args(self, _props, mock_run):
         frame = extract_frame_with_gpu_conversion(
@@ -1544,7 +2116,7 @@ class TestExtractFrameWithGpuConversion(unittest.TestCase):
         self.assertIn('tonemapping=bt.2390', vf)
         self.assertEqual(cmd[cmd.index('-ss') + 1], '10.0')
 
-    @patch('src.utils.run_ffmpeg_command')
+    @patch('src.utils._run_frame_pipe')
     @patch('src.utils.get_video_properties', return_value={'duration': 90.0})
     def test_failure_raises_runtime_error(self, _props, mock_run):
         mock_run.side_effect = RuntimeError('ffmpeg failed')
@@ -1623,5 +2195,174 @@ class TestLutPathResolution(unittest.TestCase):
         self.assertNotIn('\\', path.replace('\\\\:', ''))  # only the escaped colon may contain backslashes
 
 
+class TestProbeKeyframesNear(unittest.TestCase):
+    """Packet-header keyframe lookup used to pick split-encode cut points."""
+
+    def setUp(self):
+        import src.utils as _u
+        self._u = _u
+
+    def _packets(self, times, start_time='0.000000'):
+        packets = [{'pts_time': f'{t:.6f}', 'flags': 'K__'} for t in times]
+        packets.append({'pts_time': '5.040000', 'flags': '___'})
+        return json.dumps({'packets': packets,
+                           'format': {'start_time': start_time}}).encode()
+
+    @patch('src.utils.subprocess.check_output')
+    def test_picks_first_keyframe_at_or_after_each_target(self, mock_out):
+        mock_out.return_value = self._packets([0.0, 4.0, 8.0, 12.0])
+        self.assertEqual(self._u.probe_keyframes_near('/v.mkv', [3.0, 9.0]),
+                         [4.0, 12.0])
+        intervals = mock_out.call_args.args[0]
+        self.assertIn('3.000%+15,9.000%+15', intervals)
+
+    @patch('src.utils.subprocess.check_output')
+    def test_times_are_relative_to_container_start(self, mock_out):
+        mock_out.return_value = self._packets([1.4, 5.4], start_time='1.400000')
+        self.assertEqual(self._u.probe_keyframes_near('/v.ts', [0.0, 3.0]),
+                         [0.0, 4.0])
+
+    @patch('src.utils.subprocess.check_output')
+    def test_target_without_a_keyframe_in_window_is_dropped(self, mock_out):
+        mock_out.return_value = self._packets([0.0, 40.0])
+        self.assertEqual(self._u.probe_keyframes_near('/v.mkv', [10.0]), [])
+
+    @patch('src.utils.subprocess.check_output')
+    def test_probe_failure_returns_empty(self, mock_out):
+        mock_out.side_effect = subprocess.CalledProcessError(1, ['ffprobe'])
+        self.assertEqual(self._u.probe_keyframes_near('/v.mkv', [10.0]), [])
+
+
+class TestKeyframeIndex(unittest.TestCase):
+    """The container's seek index, read once and reused for cut points."""
+
+    def setUp(self):
+        import src.utils as _u
+        self._u = _u
+        clear_hdr_metadata_cache()
+        self.addCleanup(clear_hdr_metadata_cache)
+        store = patch('src.utils._KEYFRAME_STORE')
+        self.store = store.start()
+        self.addCleanup(store.stop)
+        self.store.get.return_value = _u.probe_cache.MISSING
+
+    @patch('src.utils.media_header.keyframes', return_value=[0.0, 4.0, 8.0])
+    def test_read_once_per_file_and_stored(self, mock_keyframes):
+        self.assertEqual(self._u.keyframe_index(__file__), [0.0, 4.0, 8.0])
+        self.assertEqual(self._u.keyframe_index(__file__), [0.0, 4.0, 8.0])
+        mock_keyframes.assert_called_once()
+        self.store.put.assert_called_once_with(__file__, 'keyframes', [0.0, 4.0, 8.0])
+
+    @patch('src.utils.media_header.keyframes')
+    def test_stored_index_is_not_reread(self, mock_keyframes):
+        self.store.get.return_value = [0.0, 2.0]
+        self.assertEqual(self._u.keyframe_index(__file__), [0.0, 2.0])
+        mock_keyframes.assert_not_called()
+
+    @patch('src.utils.media_header.keyframes', return_value=None)
+    def test_file_without_index_is_not_stored(self, _):
+        self.assertIsNone(self._u.keyframe_index(__file__))
+        self.store.put.assert_not_called()
+
+    @patch('src.utils.subprocess.check_output')
+    @patch('src.utils.media_header.keyframes', return_value=[0.0, 4.0, 8.0, 40.0])
+    def test_cut_points_come_from_the_index(self, _, mock_out):
+        self.assertEqual(self._u.probe_keyframes_near(__file__, [0.0, 3.0, 9.0, 20.0]),
+                         [0.0, 4.0])
+        mock_out.assert_not_called()
+
+    def test_nearest_keyframe(self):
+        keyframes = [0.0, 4.0, 8.0]
+        self.assertEqual(self._u.nearest_keyframe(keyframes, 5.0), 4.0)
+        self.assertEqual(self._u.nearest_keyframe(keyframes, 6.5), 8.0)
+        self.assertEqual(self._u.nearest_keyframe(keyframes, 30.0), 8.0)
+        self.assertEqual(self._u.nearest_keyframe(None, 5.0), 5.0)
+
+
+class TestDetectCrop(unittest.TestCase):
+    """Letterbox detection: cropdetect over sampled positions, unioned."""
+
+    _PROPS = {'width': 1920, 'height': 1080, 'duration': 90.0}
+
+    def setUp(self):
+        import src.utils as _u
+        self._u = _u
+        _u.clear_crop_cache()
+        self.addCleanup(_u.clear_crop_cache)
+        patcher = patch('src.utils.get_video_properties', return_value=dict(self._PROPS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('src.utils.FFMPEG_EXECUTABLE', 'ffmpeg')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _stderr(*boxes):
+        return ''.join(
+            f'[Parsed_cropdetect_2 @ 0x1] x1:{x1} x2:{x2} y1:{y1} y2:{y2} '
+            f'w:0 h:0 x:0 y:0 pts:0 t:0.0 crop=0:0:0:0\n'
+            for x1, x2, y1, y2 in boxes).encode()
+
+    def _run(self, mock_run, *boxes, returncode=0):
+        mock_run.return_value = MagicMock(returncode=returncode,
+                                          stderr=self._stderr(*boxes))
+        return self._u.detect_crop('/v.mkv')
+
+    @patch('src.utils.subprocess.run')
+    def test_scope_bars_are_cropped(self, mock_run):
+        crop = self._run(mock_run, (0, 1919, 140, 939), (0, 1919, 140, 939))
+        self.assertEqual(crop, (1920, 800, 0, 140))
+        self.assertEqual(self._u.crop_filter(crop), 'crop=1920:800:0:140')
+
+    @patch('src.utils.subprocess.run')
+    def test_one_process_with_an_input_per_sample(self, mock_run):
+        self._run(mock_run, (0, 1919, 140, 939))
+        cmd = mock_run.call_args.args[0]
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(cmd.count('-i'), self._u._CROP_SAMPLES)
+        self.assertIn('cropdetect=limit=0.1:round=2:skip=0',
+                      cmd[cmd.index('-filter_complex') + 1])
+
+    @patch('src.utils.subprocess.run')
+    def test_union_keeps_picture_seen_in_any_sample(self, mock_run):
+        # A dark scene reports a smaller box; the brighter one wins.
+        crop = self._run(mock_run, (0, 1919, 200, 879), (0, 1919, 141, 938))
+        self.assertEqual(crop, (1920, 800, 0, 140))
+
+    @patch('src.utils.subprocess.run')
+    def test_odd_edges_round_outward_to_even(self, mock_run):
+        crop = self._run(mock_run, (241, 1678, 0, 1079))
+        self.assertEqual(crop, (1440, 1080, 240, 0))
+
+    @patch('src.utils.subprocess.run')
+    def test_all_black_samples_are_ignored(self, mock_run):
+        crop = self._run(mock_run, (1919, 0, 1079, 0), (0, 1919, 140, 939))
+        self.assertEqual(crop, (1920, 800, 0, 140))
+
+    @patch('src.utils.subprocess.run')
+    def test_full_frame_source_needs_no_crop(self, mock_run):
+        self.assertIsNone(self._run(mock_run, (0, 1919, 2, 1077)))
+
+    @patch('src.utils.subprocess.run')
+    def test_mostly_dark_samples_give_no_crop(self, mock_run):
+        self.assertIsNone(self._run(mock_run, (0, 1919, 400, 799)))
+
+    @patch('src.utils.subprocess.run')
+    def test_failed_probe_gives_no_crop(self, mock_run):
+        self.assertIsNone(self._run(mock_run, returncode=1))
+        mock_run.side_effect = OSError('gone')
+        self._u.clear_crop_cache()
+        self.assertIsNone(self._u.detect_crop('/v.mkv'))
+
+    @patch('src.utils.subprocess.run')
+    def test_result_is_cached_until_cleared(self, mock_run):
+        self._run(mock_run, (0, 1919, 140, 939))
+        self._u.detect_crop('/v.mkv')
+        self.assertEqual(mock_run.call_count, 1)
+        clear_hdr_metadata_cache()
+        self._u.detect_crop('/v.mkv')
+        self.assertEqual(mock_run.call_count, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file